@@ -8,6 +8,7 @@ from app.repositories.models.conversation import (
 )
 from app.repositories.models.custom_bot import BotModel
 from app.routes.schemas.conversation import type_model_name
+from app.time_budget import TimeBudget
 from mypy_boto3_bedrock_runtime.type_defs import ToolSpecificationTypeDef
 from pydantic import BaseModel, JsonValue
 from pydantic.json_schema import GenerateJsonSchema, JsonSchemaValue
@@ -74,10 +75,15 @@ class AgentTool(Generic[T]):
         input: dict[str, JsonValue],
         model: type_model_name,
         bot: BotModel | None = None,
+        time_budget: TimeBudget | None = None,
     ) -> ToolRunResult:
+        """Run the tool. If `time_budget` is given, the tool fails with a timeout error once it is exhausted."""
         try:
             arg = self.args_schema.model_validate(input)
-            res = self.function(arg, bot, model)
+            if time_budget is not None:
+                res = time_budget.run(self.name, lambda: self.function(arg, bot, model))
+            else:
+                res = self.function(arg, bot, model)
             if isinstance(res, list):
                 related_documents = [
                     _function_result_to_related_document(
@@ -1,12 +1,10 @@
-import json
 import logging
 
 from app.agents.tools.agent_tool import AgentTool
+from app.agents.tools.search_cache import search_with_cache
+from app.agents.tools.web_summary import WebPage, summarize_pages
 from app.repositories.models.custom_bot import BotModel, InternetToolModel
 from app.routes.schemas.conversation import type_model_name
-from app.utils import get_bedrock_runtime_client
-from duckduckgo_search import DDGS
-from firecrawl import FirecrawlApp
 from pydantic import BaseModel, Field, root_validator
 
 logger = logging.getLogger(__name__)
@@ -34,57 +32,9 @@ class InternetSearchInput(BaseModel):
         return values
 
 
-def _summarize_content(content: str, title: str, url: str, query: str) -> str:
-    """
-    Summarize content using Claude 3 Haiku to prevent context window bloat.
-    Returns a concise summary (500-800 tokens max) preserving key information.
-    """
-    try:
-        client = get_bedrock_runtime_client()
-
-        # Truncate content if it's too long to avoid token limits
-        max_input_length = 8000  # Conservative limit for input
-        if len(content) > max_input_length:
-            content = content[:max_input_length] + "..."
-
-        prompt = f"""Please provide a concise summary of the following web content in 500-800 tokens maximum. Focus on information that directly answers or relates to the user's query: "{query}"
-
-Title: {title}
-URL: {url}
-Content: {content}
-
-Summary:"""
-
-        response = client.invoke_model(
-            modelId="anthropic.claude-3-haiku-20240307-v1:0",
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps(
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 800,
-                    "messages": [{"role": "user", "content": prompt}],
-                }
-            ),
-        )
-
-        response_body = json.loads(response["body"].read())
-        summary = response_body["content"][0]["text"].strip()
-
-        logger.info(
-            f"Summarized content from {len(content)} chars to {len(summary)} chars"
-        )
-        return summary
-
-    except Exception as e:
-        logger.error(f"Error summarizing content: {e}")
-        # Fallback: return truncated content if summarization fails
-        fallback_content = content[:1000] + "..." if len(content) > 1000 else content
-        logger.info(f"Using fallback content: {len(fallback_content)} chars")
-        return fallback_content
-
-
 def _search_with_duckduckgo(query: str, time_limit: str, locale: str) -> list:
+    from duckduckgo_search import DDGS
+
     # Incoming locale expected as language-country (e.g. 'en-nz'). DDGS prefers country-language, so swap.
     language, country = locale.split("-", 1)
     REGION = f"{country}-{language}".lower()
@@ -94,134 +44,153 @@ def _search_with_duckduckgo(query: str, time_limit: str, locale: str) -> list:
     logger.info(
         f"Executing DuckDuckGo search with query: {query}, region: {REGION}, time_limit: {time_limit}"
     )
-    with DDGS() as ddgs:
-        results = list(
-            ddgs.text(
-                keywords=query,
-                region=REGION,
-                safesearch=SAFE_SEARCH,
-                timelimit=time_limit,
-                max_results=MAX_RESULTS,
-                backend=BACKEND,
-            )
-        )
-        logger.info(f"DuckDuckGo search completed. Found {len(results)} results")
-
-        # Summarize each result to prevent context bloat
-        summarized_results = []
-        for result in results:
-            title = result["title"]
-            url = result["href"]
-            content = result["body"]
-
-            # Summarize the content
-            summary = _summarize_content(content, title, url, query)
-
-            summarized_results.append(
-                {
-                    "content": summary,
-                    "source_name": title,
-                    "source_link": url,
-                }
+
+    def search() -> list:
+        with DDGS() as ddgs:
+            return list(
+                ddgs.text(
+                    keywords=query,
+                    region=REGION,
+                    safesearch=SAFE_SEARCH,
+                    timelimit=time_limit,
+                    max_results=MAX_RESULTS,
+                    backend=BACKEND,
+                )
             )
 
-        return summarized_results
+    results = search_with_cache("duckduckgo", query, locale, time_limit, search)
+    logger.info(f"DuckDuckGo search completed. Found {len(results)} results")
+
+    # Summarize each result to prevent context bloat
+    summaries = summarize_pages(
+        [
+            {
+                "content": result["body"],
+                "title": result["title"],
+                "url": result["href"],
+            }
+            for result in results
+        ],
+        query,
+    )
+    return [
+        {
+            "content": summary,
+            "source_name": result["title"],
+            "source_link": result["href"],
+        }
+        for result, summary in zip(results, summaries)
+    ]
 
 
 def _search_with_firecrawl(
-    query: str, api_key: str, locale: str, max_results: int = 10
+    query: str, api_key: str, locale: str, max_results: int = 10, time_limit: str = ""
 ) -> list:
     logger.info(
         f"Searching with Firecrawl. Query: {query}, Max Results: {max_results}, Locale: {locale}"
     )
 
     try:
-        app = FirecrawlApp(api_key=api_key)
-
-        # Search using Firecrawl
-        # SearchParams: https://github.com/mendableai/firecrawl/blob/main/apps/python-sdk/firecrawl/firecrawl.py#L24
-        from firecrawl import ScrapeOptions
-
-        # Incoming locale is language-country (e.g. 'en-us').
-        language, country = locale.split("-", 1)
-        results = app.search(
-            query,
-            limit=max_results,
-            lang=language,
-            location=country,
-            scrape_options=ScrapeOptions(formats=["markdown"], onlyMainContent=True),
-        )
-
-        if not results:
-            logger.warning("No results found")
-            return []
+        from firecrawl import FirecrawlApp, ScrapeOptions
+
+        def search() -> list[WebPage]:
+            app = FirecrawlApp(api_key=api_key)
+
+            # Search using Firecrawl
+            # SearchParams: https://github.com/mendableai/firecrawl/blob/main/apps/python-sdk/firecrawl/firecrawl.py#L24
+
+            # Incoming locale is language-country (e.g. 'en-us').
+            language, country = locale.split("-", 1)
+            results = app.search(
+                query,
+                limit=max_results,
+                lang=language,
+                location=country,
+                scrape_options=ScrapeOptions(
+                    formats=["markdown"], onlyMainContent=True
+                ),
+            )
 
-        # Log detailed information about the results object
-        logger.info(
-            f"results of firecrawl: success={getattr(results, 'success', 'unknown')} warning={getattr(results, 'warning', None)} error={getattr(results, 'error', None)}"
-        )
+            if not results:
+                logger.warning("No results found")
+                return []
 
-        # Log the data structure
-        if hasattr(results, "data"):
-            data_sample = results.data[:1] if results.data else []
-            logger.info(f"data sample: {data_sample}")
-        else:
+            # Log detailed information about the results object
             logger.info(
-                f"results attributes: {[attr for attr in dir(results) if not attr.startswith('_')]}"
-            )
-            logger.info(
-                f"results as dict attempt: {dict(results) if hasattr(results, '__dict__') else 'no __dict__'}"
+                f"results of firecrawl: success={getattr(results, 'success', 'unknown')} warning={getattr(results, 'warning', None)} error={getattr(results, 'error', None)}"
             )
 
-        # Format and summarize search results
-        search_results = []
+            # Log the data structure
+            if hasattr(results, "data"):
+                data_sample = results.data[:1] if results.data else []
+                logger.info(f"data sample: {data_sample}")
+            else:
+                logger.info(
+                    f"results attributes: {[attr for attr in dir(results) if not attr.startswith('_')]}"
+                )
+                logger.info(
+                    f"results as dict attempt: {dict(results) if hasattr(results, '__dict__') else 'no __dict__'}"
+                )
 
-        # Handle Firecrawl SearchResponse object structure
-        # The Python SDK returns a SearchResponse object with .data attribute
-        if hasattr(results, "data") and results.data:
-            data_list = results.data
-        else:
-            logger.error(
-                f"No data found in results. Results type: {type(results)}, attributes: {[attr for attr in dir(results) if not attr.startswith('_')]}"
-            )
-            return []
+            # Format and summarize search results
+            pages: list[WebPage] = []
 
-        logger.info(f"Found {len(data_list)} data items")
-        for i, data in enumerate(data_list):
-            try:
-                logger.info(
-                    f"Data item {i}: type={type(data)}, keys={list(data.keys()) if isinstance(data, dict) else 'not dict'}"
+            # Handle Firecrawl SearchResponse object structure
+            # The Python SDK returns a SearchResponse object with .data attribute
+            if hasattr(results, "data") and results.data:
+                data_list = results.data
+            else:
+                logger.error(
+                    f"No data found in results. Results type: {type(results)}, attributes: {[attr for attr in dir(results) if not attr.startswith('_')]}"
                 )
+                return []
 
-                if isinstance(data, dict):
-                    title = data.get("title", "")
-                    # Try different URL fields based on Firecrawl API response structure
-                    url = data.get("url", "") or (
-                        data.get("metadata", {}).get("sourceURL", "")
-                        if isinstance(data.get("metadata"), dict)
-                        else ""
+            logger.info(f"Found {len(data_list)} data items")
+            for i, data in enumerate(data_list):
+                try:
+                    logger.info(
+                        f"Data item {i}: type={type(data)}, keys={list(data.keys()) if isinstance(data, dict) else 'not dict'}"
                     )
-                    content = data.get("markdown", "") or data.get("content", "")
-
-                    if not title and not content:
-                        logger.warning(f"Skipping data item {i} - no title or content")
-                        continue
 
-                    # Summarize the content
-                    summary = _summarize_content(content, title, url, query)
+                    if isinstance(data, dict):
+                        title = data.get("title", "")
+                        # Try different URL fields based on Firecrawl API response structure
+                        url = data.get("url", "") or (
+                            data.get("metadata", {}).get("sourceURL", "")
+                            if isinstance(data.get("metadata"), dict)
+                            else ""
+                        )
+                        content = data.get("markdown", "") or data.get("content", "")
+
+                        if not title and not content:
+                            logger.warning(
+                                f"Skipping data item {i} - no title or content"
+                            )
+                            continue
+
+                        pages.append({"content": content, "title": title, "url": url})
+                    else:
+                        logger.warning(f"Data item {i} is not a dict: {type(data)}")
+                except Exception as e:
+                    logger.error(f"Error processing data item {i}: {e}")
+                    continue
+
+            return pages
+
+        # Firecrawl does not limit the time range, but the time limit decides how long results are cached.
+        pages = search_with_cache(
+            "firecrawl", query, locale, time_limit, search, max_results
+        )
 
-                    search_results.append(
-                        {
-                            "content": summary,
-                            "source_name": title,
-                            "source_link": url,
-                        }
-                    )
-                else:
-                    logger.warning(f"Data item {i} is not a dict: {type(data)}")
-            except Exception as e:
-                logger.error(f"Error processing data item {i}: {e}")
-                continue
+        # Summarize the contents concurrently
+        search_results = [
+            {
+                "content": summary,
+                "source_name": page["title"],
+                "source_link": page["url"],
+            }
+            for page, summary in zip(pages, summarize_pages(pages, query))
+        ]
 
         logger.info(f"Found {len(search_results)} results from Firecrawl")
         return search_results
@@ -283,6 +252,7 @@ def _internet_search(
                 api_key=api_key,
                 locale=locale,
                 max_results=internet_tool.firecrawl_config.max_results,
+                time_limit=time_limit,
             )
 
             # If Firecrawl returns empty results, fallback to DuckDuckGo
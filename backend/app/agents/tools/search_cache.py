@@ -0,0 +1,112 @@
+"""Cache, deduplication and rate limiting of internet search requests.
+
+Search results are cached by engine, query, locale and time limit, for a TTL matched to the time limit,
+so that the agent repeating a query within a turn or users asking about the same topic share results.
+Concurrent identical searches are deduplicated, and requests to each engine are spaced out to its
+rate limit, queued in the order of arrival. DuckDuckGo in particular returns empty results or errors
+when rate-limited.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Hashable, TypeVar
+
+from app.cache import SingleFlight, TTLCache
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+T = TypeVar("T")
+
+# TTLs of search results by time limit, in seconds. Results of narrow time limits become stale sooner.
+SEARCH_CACHE_TTLS = {
+    "d": 15 * 60,
+    "w": 60 * 60,
+    "m": 6 * 60 * 60,
+    "y": 24 * 60 * 60,
+    "": 24 * 60 * 60,
+}
+# Max number of requests per second to each engine
+SEARCH_RATE_LIMITS = {
+    "duckduckgo": float(os.environ.get("DUCKDUCKGO_RATE_LIMIT", 1)),
+    "firecrawl": float(os.environ.get("FIRECRAWL_RATE_LIMIT", 5)),
+}
+# Max seconds to wait in the queue of an engine
+SEARCH_QUEUE_TIMEOUT = float(os.environ.get("SEARCH_QUEUE_TIMEOUT", 10))
+
+
+class SearchRateLimitError(Exception):
+    pass
+
+
+class RateLimiter:
+    """Space out requests to `rate` per second.
+    Each caller reserves the next free slot, so waiting callers are served in the order of arrival.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """Wait for a slot. Returns `False` without waiting if no slot is available within `timeout`."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            if slot - now > timeout:
+                return False
+
+            self._next_slot = slot + self.interval
+
+        time.sleep(slot - now)
+        return True
+
+
+_search_cache: TTLCache[Hashable, list] = TTLCache(
+    ttl=SEARCH_CACHE_TTLS[""], maxsize=1024
+)
+_search_flight: SingleFlight[Hashable, list] = SingleFlight()
+_rate_limiters = {
+    engine: RateLimiter(rate) for engine, rate in SEARCH_RATE_LIMITS.items()
+}
+
+
+def get_search_cache_ttl(time_limit: str) -> int:
+    # e.g. `1w` is treated as `w`
+    return SEARCH_CACHE_TTLS.get(time_limit[-1:], SEARCH_CACHE_TTLS[""])
+
+
+def search_with_cache(
+    engine: str,
+    query: str,
+    locale: str,
+    time_limit: str,
+    search: Callable[[], list[T]],
+    *key_args: Hashable,
+) -> list[T]:
+    """Return cached results of the search, or call `search` once for concurrent identical searches.
+    `key_args` distinguish searches by other parameters affecting the results, e.g. the number of results.
+    Empty results are not cached, as engines may return them when rate-limited.
+    Raises `SearchRateLimitError` if the engine is too busy to search within `SEARCH_QUEUE_TIMEOUT`.
+    """
+    key = (engine, query, locale, time_limit, *key_args)
+    results = _search_cache.get(key)
+    if results is not None:
+        logger.info(f"Using cached {engine} results for query: {query}")
+        return results
+
+    def search_with_rate_limit() -> list[T]:
+        rate_limiter = _rate_limiters.get(engine)
+        if rate_limiter and not rate_limiter.acquire(timeout=SEARCH_QUEUE_TIMEOUT):
+            raise SearchRateLimitError(f"Too many requests to {engine}")
+
+        results = search()
+        if results:
+            _search_cache.set(key, results, ttl=get_search_cache_ttl(time_limit))
+
+        return results
+
+    return _search_flight.do(key, search_with_rate_limit)
@@ -0,0 +1,122 @@
+"""Summarization of web pages found by internet search, to prevent context window bloat.
+
+Pages are summarized concurrently, and summaries are cached by URL, content hash and query intent,
+so that the same page is not summarized again for the same question across turns and users.
+Pages which already fit `SUMMARY_TOKEN_BUDGET` are used as they are.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict
+
+from app.cache import TTLCache
+from app.utils import get_bedrock_runtime_client
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+SUMMARIZER_MODEL_ID = os.environ.get(
+    "INTERNET_SEARCH_SUMMARIZER_MODEL_ID", "anthropic.claude-3-haiku-20240307-v1:0"
+)
+# Max number of pages summarized at the same time
+MAX_CONCURRENT_SUMMARIES = int(os.environ.get("MAX_CONCURRENT_SUMMARIES", 5))
+SUMMARY_CACHE_TTL = int(os.environ.get("SUMMARY_CACHE_TTL", 3600))
+
+SUMMARY_TOKEN_BUDGET = 800
+# Rough estimate to count tokens without a tokenizer
+CHARS_PER_TOKEN = 4
+# Conservative limit for the input of the summarizer
+MAX_INPUT_LENGTH = 8000
+FALLBACK_LENGTH = 1000
+
+# Keyed by URL, content hash and query intent
+_summary_cache: TTLCache[tuple[str, str, str], str] = TTLCache(
+    ttl=SUMMARY_CACHE_TTL, maxsize=1024
+)
+
+
+class WebPage(TypedDict):
+    content: str
+    title: str
+    url: str
+
+
+def _compose_query_intent(query: str) -> str:
+    # Queries differing only in case, order of words or spacing are considered the same.
+    return " ".join(sorted(set(query.casefold().split())))
+
+
+def _invoke_summarizer(content: str, title: str, url: str, query: str) -> str:
+    if len(content) > MAX_INPUT_LENGTH:
+        content = content[:MAX_INPUT_LENGTH] + "..."
+
+    prompt = f"""Please provide a concise summary of the following web content in 500-800 tokens maximum. Focus on information that directly answers or relates to the user's query: "{query}"
+
+Title: {title}
+URL: {url}
+Content: {content}
+
+Summary:"""
+
+    # Converse API accepts the same request for any summarizer model.
+    response = get_bedrock_runtime_client().converse(
+        modelId=SUMMARIZER_MODEL_ID,
+        messages=[{"role": "user", "content": [{"text": prompt}]}],
+        inferenceConfig={"maxTokens": SUMMARY_TOKEN_BUDGET},
+    )
+    return "".join(
+        block.get("text", "") for block in response["output"]["message"]["content"]
+    ).strip()
+
+
+def summarize_content(content: str, title: str, url: str, query: str) -> str:
+    """Summarize the content of a web page focusing on the query.
+    Falls back to the truncated content if summarization fails.
+    """
+    if len(content) <= SUMMARY_TOKEN_BUDGET * CHARS_PER_TOKEN:
+        return content
+
+    key = (
+        url,
+        hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        _compose_query_intent(query),
+    )
+    cached_summary = _summary_cache.get(key)
+    if cached_summary is not None:
+        logger.info(f"Using cached summary of {url}")
+        return cached_summary
+
+    try:
+        summary = _invoke_summarizer(content, title, url, query)
+
+    except Exception as e:
+        logger.error(f"Error summarizing content: {e}")
+        # Fallback: return truncated content, which is not cached so that it is summarized next time
+        return content[:FALLBACK_LENGTH] + "..."
+
+    logger.info(f"Summarized content from {len(content)} chars to {len(summary)} chars")
+    _summary_cache.set(key, summary)
+    return summary
+
+
+def summarize_pages(pages: list[WebPage], query: str) -> list[str]:
+    """Summarize the web pages concurrently. Returns the summaries in the order of the pages."""
+    if len(pages) <= 1:
+        return [
+            summarize_content(page["content"], page["title"], page["url"], query)
+            for page in pages
+        ]
+
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_CONCURRENT_SUMMARIES, len(pages))
+    ) as executor:
+        return list(
+            executor.map(
+                lambda page: summarize_content(
+                    page["content"], page["title"], page["url"], query
+                ),
+                pages,
+            )
+        )
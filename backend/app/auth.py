@@ -1,20 +1,39 @@
 import os
 
 import requests
+from app.cache import TTLCache
 from jose import jwt
 
 REGION = os.environ.get("REGION", "ap-northeast-1")
 USER_POOL_ID = os.environ.get("USER_POOL_ID", "")
 CLIENT_ID = os.environ.get("CLIENT_ID", "")
 
+# Cognito rotates signing keys rarely, so the key set is fetched once per hour.
+# An unknown `kid` forces a refetch.
+JWKS_CACHE_TTL = 3600
+_jwks_cache: TTLCache[str, list[dict]] = TTLCache(ttl=JWKS_CACHE_TTL, maxsize=1)
+
+
+def _fetch_jwks() -> list[dict]:
+    url = f"https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}/.well-known/jwks.json"
+    response = requests.get(url, timeout=5)
+    return response.json()["keys"]
+
+
+def _find_signing_key(kid: str) -> dict:
+    keys = _jwks_cache.get_or_set("keys", _fetch_jwks)
+    matched = [k for k in keys if k["kid"] == kid]
+    if not matched:
+        keys = _fetch_jwks()
+        _jwks_cache.set("keys", keys)
+        matched = [k for k in keys if k["kid"] == kid]
+    return matched[0]
+
 
 def verify_token(token: str) -> dict:
     # Verify JWT token
-    url = f"https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}/.well-known/jwks.json"
-    response = requests.get(url)
-    keys = response.json()["keys"]
     header = jwt.get_unverified_header(token)
-    key = [k for k in keys if k["kid"] == header["kid"]][0]
+    key = _find_signing_key(header["kid"])
     # The JWT returned from the Identity Provider may contain an at_hash
     # jose jwt.decode verifies id_token with access_token by default if it contains at_hash
     # See : https://github.com/mpdavis/python-jose/blob/4b0701b46a8d00988afcc5168c2b3a1fd60d15d8/jose/jwt.py#L59
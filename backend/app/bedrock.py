@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import logging
 import os
+import zlib
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -19,7 +20,7 @@ from app.config import (
     DEFAULT_LLAMA_GENERATION_CONFIG,
     DEFAULT_MISTRAL_GENERATION_CONFIG,
 )
-from app.repositories.models.custom_bot import GenerationParamsModel
+from app.repositories.models.custom_bot import GenerationParamsModel, UsageStatsModel
 from app.repositories.models.custom_bot_guardrails import BedrockGuardrailsModel
 from app.routes.schemas.conversation import type_model_name
 from app.utils import get_bedrock_runtime_client
@@ -55,6 +56,20 @@ ENABLE_BEDROCK_CROSS_REGION_INFERENCE = (
     os.environ.get("ENABLE_BEDROCK_CROSS_REGION_INFERENCE", "false") == "true"
 )
 
+# Max number of cache points in a request, including system prompt, tools and messages
+MAX_CACHE_POINTS = 4
+# Rough estimate to count tokens without a tokenizer
+CHARS_PER_TOKEN = 4
+# Approximate number of tokens of an image
+IMAGE_TOKENS = 1600
+# Cache writes cost 25% more than input tokens and cache reads 90% less,
+# so cached tokens pay off if read at least this many times per token written.
+MIN_CACHE_READ_WRITE_RATIO = 0.25 / 0.9
+# Number of cache write tokens of a bot needed before its hit rate is taken into account
+MIN_CACHE_WRITE_SAMPLE = int(os.environ.get("MIN_CACHE_WRITE_SAMPLE", 100_000))
+# Share of conversations which keep caching messages of a bot with a low hit rate, to keep measuring it
+CACHE_EXPLORATION_RATE = float(os.environ.get("CACHE_EXPLORATION_RATE", 0.1))
+
 # Base model IDs mapping
 BASE_MODEL_IDS = {
     "claude-v4-opus": "anthropic.claude-opus-4-20250514-v1:0",
@@ -345,8 +360,6 @@ REGIONAL_INFERENCE_PROFILES = {
     },
 }
 
-client = get_bedrock_runtime_client()
-
 
 class BedrockThrottlingException(Exception): ...
 
@@ -428,6 +441,22 @@ def is_prompt_caching_supported(
         ]
 
 
+def get_prompt_caching_min_tokens(model: type_model_name) -> int:
+    """Minimum number of tokens of a prompt prefix to be cached.
+    Cache points after shorter prefixes are ignored by the model.
+    """
+    if model == "claude-v3.5-haiku":
+        return 2048
+
+    if model == "claude-v4.5-haiku":
+        return 4096
+
+    if is_nova_model(model):
+        return 1000
+
+    return 1024
+
+
 def is_multiple_system_prompt_content_supported(model: type_model_name):
     return not (
         is_nova_model(model)
@@ -704,7 +733,6 @@ def simple_message_models_to_bedrock_messages(
     model: type_model_name,
     guardrail: BedrockGuardrailsModel | None = None,
     search_results: list[SearchResult] | None = None,
-    prompt_caching_enabled: bool = True,
 ) -> list[MessageTypeDef]:
     grounding_source = None
     if search_results and guardrail and guardrail.is_guardrail_enabled:
@@ -737,7 +765,7 @@ def simple_message_models_to_bedrock_messages(
 
         return c.to_contents_for_converse()
 
-    messages: list[MessageTypeDef] = [
+    return [
         {
             "role": message.role,
             "content": [
@@ -750,21 +778,137 @@ def simple_message_models_to_bedrock_messages(
         if _is_conversation_role(message.role)
     ]
 
-    if prompt_caching_enabled and is_prompt_caching_supported(model, target="message"):
-        for order, message in enumerate(
-            filter(lambda m: m["role"] == "user", reversed(messages))
+
+class PromptCachePlan(TypedDict):
+    system: bool
+    tools: bool
+    # Indexes of the messages to end with a cache point
+    messages: list[int]
+
+
+def estimate_tokens(value: Any) -> int:
+    """Roughly estimate the number of tokens of text, content blocks or tool specs."""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value) // CHARS_PER_TOKEN
+
+    if isinstance(value, dict):
+        if isinstance(value.get("image"), dict):
+            return IMAGE_TOKENS
+
+        return sum(estimate_tokens(k) + estimate_tokens(v) for k, v in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(v) for v in value)
+
+    return 0
+
+
+def should_cache_messages(
+    usage_stats: UsageStatsModel | None, conversation_id: str
+) -> bool:
+    """Whether to cache messages for the bot, judging from its cache hit rate so far.
+    Message prefixes change every turn, so their cache writes are wasted unless the conversation
+    continues while they are cached. Some conversations keep caching messages regardless,
+    so that the hit rate keeps being measured.
+    """
+    if (
+        usage_stats is None
+        or usage_stats.cache_write_input_tokens < MIN_CACHE_WRITE_SAMPLE
+    ):
+        return True
+
+    hit_rate = (
+        usage_stats.cache_read_input_tokens / usage_stats.cache_write_input_tokens
+    )
+    if hit_rate >= MIN_CACHE_READ_WRITE_RATIO:
+        return True
+
+    # Explore by conversation rather than by turn, since reads need a write in the previous turn.
+    return zlib.crc32(conversation_id.encode()) % 100 < CACHE_EXPLORATION_RATE * 100
+
+
+def plan_prompt_cache(
+    model: type_model_name,
+    tool_specs: list[ToolTypeDef] | None,
+    system_prompts: list[SystemContentBlockTypeDef],
+    messages: list[Any],
+    cache_messages: bool = True,
+) -> PromptCachePlan:
+    """Choose the cache points of a prompt.
+    The prompt prefix is made of tools, system prompt and messages in this order, and each cache point
+    caches the prefix before it. Candidates are the end of tools, of system prompt, and of the last two
+    user messages, of which the last is written for the next turn and the one before is read from the
+    previous turn. A candidate is taken only if the prefix reaches the minimum number of tokens of the model
+    and has grown since the previous cache point, up to `MAX_CACHE_POINTS`.
+    """
+    plan: PromptCachePlan = {"system": False, "tools": False, "messages": []}
+
+    # Tools come before system prompt, so the prefix is not cached for models unable to cache tools.
+    prefix_cachable = not (
+        tool_specs and not is_prompt_caching_supported(model, target="tool")
+    )
+    user_message_indexes = (
+        [i for i, message in enumerate(messages) if message["role"] == "user"][-2:]
+        if cache_messages and is_prompt_caching_supported(model, target="message")
+        else []
+    )
+
+    segments: list[tuple[Literal["tools", "system"] | int, int, bool]] = [
+        (
+            "tools",
+            estimate_tokens(tool_specs),
+            prefix_cachable and is_prompt_caching_supported(model, target="tool"),
+        ),
+        (
+            "system",
+            estimate_tokens(system_prompts),
+            prefix_cachable and is_prompt_caching_supported(model, target="system"),
+        ),
+        *(
+            (i, estimate_tokens(message["content"]), i in user_message_indexes)
+            for i, message in enumerate(messages)
+        ),
+    ]
+
+    min_tokens = get_prompt_caching_min_tokens(model)
+    prefix_tokens = 0
+    cache_points = 0
+    for segment, tokens, cachable in segments:
+        prefix_tokens += tokens
+        if (
+            not cachable
+            or tokens == 0
+            or prefix_tokens < min_tokens
+            or cache_points >= MAX_CACHE_POINTS
         ):
-            if order >= 2:
-                break
+            continue
 
-            message["content"] = [
-                *(message["content"]),
-                {
-                    "cachePoint": {"type": "default"},
-                },
-            ]
+        if segment == "tools":
+            plan["tools"] = True
 
-    return messages
+        elif segment == "system":
+            plan["system"] = True
+
+        else:
+            plan["messages"].append(segment)
+
+        cache_points += 1
+
+    logger.debug(
+        f"Prompt cache plan for {model} with estimated {prefix_tokens} tokens: {plan}"
+    )
+    return plan
+
+
+def add_message_cache_points(messages: list[Any], indexes: list[int]):
+    """Append a cache point to the content of the messages at the indexes."""
+    for i in indexes:
+        messages[i]["content"] = [
+            *(messages[i]["content"]),
+            {
+                "cachePoint": {"type": "default"},
+            },
+        ]
 
 
 def generation_params_to_converse_configuration(
@@ -923,13 +1067,13 @@ def compose_args_for_converse_api(
     stream: bool = True,
     enable_reasoning: bool = False,
     prompt_caching_enabled: bool = False,
+    cache_messages: bool = True,
 ) -> ConverseStreamRequestTypeDef:
     arg_messages = simple_message_models_to_bedrock_messages(
         simple_messages=messages,
         model=model,
         guardrail=guardrail,
         search_results=search_results,
-        prompt_caching_enabled=prompt_caching_enabled,
     )
     tool_specs: list[ToolTypeDef] | None = (
         [
@@ -973,10 +1117,15 @@ def compose_args_for_converse_api(
             else []
         )
 
-    if prompt_caching_enabled and not (
-        tool_specs and not is_prompt_caching_supported(model, target="tool")
-    ):
-        if is_prompt_caching_supported(model, "system") and len(system_prompts) > 0:
+    if prompt_caching_enabled:
+        cache_plan = plan_prompt_cache(
+            model=model,
+            tool_specs=tool_specs,
+            system_prompts=system_prompts,
+            messages=arg_messages,
+            cache_messages=cache_messages,
+        )
+        if cache_plan["system"]:
             system_prompts.append(
                 {
                     "cachePoint": {
@@ -985,7 +1134,7 @@ def compose_args_for_converse_api(
                 }
             )
 
-        if is_prompt_caching_supported(model, target="tool") and tool_specs:
+        if cache_plan["tools"] and tool_specs:
             tool_specs.append(
                 {
                     "cachePoint": {
@@ -994,6 +1143,8 @@ def compose_args_for_converse_api(
                 }
             )
 
+        add_message_cache_points(arg_messages, cache_plan["messages"])
+
     # Construct the base arguments
     args: ConverseStreamRequestTypeDef = {
         "inferenceConfig": {},
@@ -9,13 +9,13 @@ from app.repositories.api_publication import (
     find_usage_plan_by_id,
 )
 from app.repositories.common import RecordNotFoundError, decompose_sk
+from app.repositories.custom_bot import delete_document_hashes
+from app.s3_utils import delete_objects, list_keys
 from app.utils import delete_api_key_from_secret_manager
 
 DOCUMENT_BUCKET = os.environ.get("DOCUMENT_BUCKET", "documents")
 BEDROCK_REGION = os.environ.get("BEDROCK_REGION", "us-east-1")
 
-s3_client = boto3.client("s3", BEDROCK_REGION)
-
 
 def delete_custom_bot_stack_by_bot_id(bot_id: str):
     client = boto3.client("cloudformation", BEDROCK_REGION)
@@ -31,18 +31,13 @@ def delete_from_s3(user_id: str, bot_id: str):
     """Delete all files in S3 bucket for the specified `user_id` and `bot_id`."""
     prefix = f"{user_id}/{bot_id}/"
     try:
-        # List all objects with the specific prefix
-        objects_to_delete = s3_client.list_objects_v2(
-            Bucket=DOCUMENT_BUCKET, Prefix=prefix
-        )
-        if "Contents" in objects_to_delete:
-            # Prepare the list of objects to delete
-            delete_keys = [{"Key": obj["Key"]} for obj in objects_to_delete["Contents"]]
-            # Delete the objects
-            s3_client.delete_objects(
-                Bucket=DOCUMENT_BUCKET, Delete={"Objects": delete_keys}
+        # List all objects with the specific prefix, beyond the first 1000 objects
+        keys_to_delete = list_keys(DOCUMENT_BUCKET, prefix)
+        if keys_to_delete:
+            delete_objects(DOCUMENT_BUCKET, keys_to_delete)
+            print(
+                f"Successfully deleted {len(keys_to_delete)} files from S3 for bot_id: {bot_id}"
             )
-            print(f"Successfully deleted files from S3 for bot_id: {bot_id}")
         else:
             print("No files found to delete in S3.")
     except Exception as e:
@@ -56,6 +51,7 @@ def handler(event: dict, context: Any) -> None:
     Following resources are deleted asynchronously when bot is deleted:
     - vector store record (postgres)
     - s3 files
+    - document hashes of the knowledge base data sources
     - cloudformation stack (if exists)
     """
 
@@ -75,6 +71,7 @@ def handler(event: dict, context: Any) -> None:
     bot_id = decompose_sk(sk)
 
     delete_from_s3(user_id, bot_id)
+    delete_document_hashes(user_id, bot_id)
     delete_custom_bot_stack_by_bot_id(bot_id)
     delete_api_key_from_secret_manager(user_id, bot_id, "firecrawl")
 
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Thread-safe in-memory cache whose entries expire after `ttl` seconds.
+    Instances are meant to live at module scope, so that entries are shared by
+    all requests handled by the same Lambda container.
+    When `maxsize` is exceeded, the least recently written entry is evicted.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key: K, factory: Callable[[], V]) -> V:
+        """Return the cached value, or compute it with `factory` and cache it.
+        NOTE: `factory` is called outside of the lock, so concurrent misses may compute the value twice.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = factory()
+        self.set(key, value)
+        return value
+
+    def invalidate(self, key: K):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _Call(Generic[V]):
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: V | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(Generic[K, V]):
+    """Deduplicate concurrent calls with the same key.
+    While a call for a key is in progress, callers with the same key wait for it and share
+    its result or exception, instead of calling the function again.
+    """
+
+    def __init__(self):
+        self._calls: dict[K, _Call[V]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: K, function: Callable[[], V]) -> V:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.value  # type: ignore[return-value]
+
+        try:
+            call.value = function()
+            return call.value
+
+        except BaseException as e:
+            call.error = e
+            raise
+
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
@@ -1,23 +1,47 @@
+import os
+import time
+
 from app.auth import verify_token
+from app.cache import TTLCache
 from app.user import User
-from fastapi import Depends, HTTPException, status
+from app.utils import is_running_on_lambda
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError
 
+PUBLISHED_API_ID = os.environ.get("PUBLISHED_API_ID", None)
+
+# Verified users are cached by token, so that the token is verified once even if
+# the user is resolved several times per request or across requests.
+# Entries never outlive the expiration of the token.
+VERIFIED_USER_CACHE_TTL = 300
+_verified_user_cache: TTLCache[str, User] = TTLCache(ttl=VERIFIED_USER_CACHE_TTL)
+
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_current_user(token: HTTPAuthorizationCredentials = Depends(security)):
+    user = _verified_user_cache.get(token.credentials)
+    if user is not None:
+        return user
+
     try:
         decoded = verify_token(token.credentials)
         # Return user information
-        return User(
+        user = User(
             id=decoded["sub"],
             name=decoded["cognito:username"],
             email=decoded["email"],
             groups=decoded.get("cognito:groups", []),
         )
+        _verified_user_cache.set(
+            token.credentials,
+            user,
+            ttl=min(VERIFIED_USER_CACHE_TTL, decoded["exp"] - time.time()),
+        )
+        return user
     except (IndexError, JWTError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -48,3 +72,40 @@ def check_publish_allowed(user: User = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User is not allowed to publish bot.",
         )
+
+
+def require_current_user(
+    token: HTTPAuthorizationCredentials | None = Depends(optional_security),
+) -> User:
+    """Verify the token of the request, for routes not behind the API Gateway authorizer."""
+    if token is None:
+        if not is_running_on_lambda():
+            return User(
+                id="test_user", name="test_user", email="user@example.com", groups=[]
+            )
+
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return get_current_user(token)
+
+
+def resolve_current_user(
+    request: Request,
+    token: HTTPAuthorizationCredentials | None = Depends(optional_security),
+):
+    """Resolve the user of the request and store it to `request.state.current_user`.
+    Registered as an app-wide dependency. Being a sync function, it runs in the worker thread pool,
+    so token verification does not block the event loop.
+    """
+    if PUBLISHED_API_ID is not None and is_running_on_lambda():
+        request.state.current_user = User.from_published_api_id(PUBLISHED_API_ID)
+    elif token is not None:
+        request.state.current_user = get_current_user(token)
+    elif not is_running_on_lambda():
+        request.state.current_user = User(
+            id="test_user", name="test_user", email="user@example.com", groups=[]
+        )
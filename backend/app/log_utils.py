@@ -0,0 +1,134 @@
+"""Logging helpers for hot paths (e.g. every chat turn).
+
+Pass payloads through `log_payload()` with %-style arguments, so that serialization is deferred
+until the record is actually emitted:
+
+    logger.info("Storing conversation: %s", log_payload(conversation))
+
+Rendered payloads have binary fields redacted and long strings and the total size capped.
+Rendering walks only as much of the payload as fits in the size cap, so logging a long
+conversation at INFO does not serialize all of it.
+Loggers listed in `LOG_SAMPLE_RATES` (e.g. `app.stream=0.1,app.repositories.conversation=0.1`)
+emit only a sample of their records below WARNING, see `configure_log_sampling`.
+"""
+
+import json
+import logging
+import os
+import random
+from typing import Any
+
+from pydantic import BaseModel
+
+# Max length of a rendered payload
+LOG_PAYLOAD_MAX_CHARS = int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", 2000))
+# Max length of each string in a payload, e.g. message bodies
+LOG_STRING_MAX_CHARS = int(os.environ.get("LOG_STRING_MAX_CHARS", 200))
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+
+
+def redact(value: Any, max_chars: int | None = None) -> Any:
+    """Replace binary values with their size and truncate long strings.
+
+    With `max_chars`, items beyond roughly that many rendered characters are left out,
+    without being visited.
+    """
+    return _redact(value, [max_chars if max_chars is not None else float("inf")])
+
+
+def _redact(value: Any, budget: list[float]) -> Any:
+    # `budget` holds the remaining number of characters, shared across the whole walk.
+    if isinstance(value, BaseModel):
+        # Read the fields instead of `model_dump()`, which would copy the whole model.
+        value = {name: getattr(value, name) for name in type(value).model_fields}
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        budget[0] -= 16
+        return f"<{len(value)} bytes>"
+    elif isinstance(value, str):
+        budget[0] -= min(len(value), LOG_STRING_MAX_CHARS)
+        if len(value) > LOG_STRING_MAX_CHARS:
+            return f"{value[:LOG_STRING_MAX_CHARS]}...<{len(value)} chars>"
+        return value
+    elif isinstance(value, dict):
+        redacted = {}
+        for key, item in value.items():
+            if budget[0] <= 0:
+                redacted["..."] = f"<{len(value) - len(redacted)} more items>"
+                break
+            budget[0] -= len(str(key))
+            redacted[key] = _redact(item, budget)
+        return redacted
+    elif isinstance(value, (list, tuple)):
+        redacted = []
+        for item in value:
+            if budget[0] <= 0:
+                redacted.append(f"...<{len(value) - len(redacted)} more items>")
+                break
+            redacted.append(_redact(item, budget))
+        return redacted
+
+    budget[0] -= 8
+    return value
+
+
+class _Payload:
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: int):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        rendered = json.dumps(
+            redact(self.value, self.max_chars), ensure_ascii=False, default=str
+        )
+        if len(rendered) > self.max_chars:
+            return f"{rendered[: self.max_chars]}...<{len(rendered)} chars>"
+        return rendered
+
+
+def log_payload(value: Any, max_chars: int = LOG_PAYLOAD_MAX_CHARS) -> _Payload:
+    """Wrap a value to be rendered lazily as a redacted and size-capped log argument."""
+    return _Payload(value, max_chars)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass only `rate` of the records below WARNING from the logger `name` and its children.
+
+    Warnings, errors and records of other loggers always pass. Attach it to handlers:
+    a filter on a logger does not see the records of its child loggers.
+    """
+
+    def __init__(self, rate: float, name: str = ""):
+        super().__init__(name)
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not super().filter(record):
+            return True
+        return random.random() < self.rate
+
+
+def configure_log_sampling(
+    sample_rates: str = LOG_SAMPLE_RATES,
+    handlers: list[logging.Handler] | None = None,
+):
+    """Attach a `SamplingFilter` per entry of the comma-separated `name=rate` list to `handlers`.
+
+    `handlers` defaults to the handlers of the root logger, so call this after logging is
+    configured. Filters from a previous call are replaced.
+    """
+    if handlers is None:
+        handlers = logging.getLogger().handlers
+
+    filters = []
+    for entry in filter(None, (e.strip() for e in sample_rates.split(","))):
+        name, rate = entry.split("=")
+        filters.append(SamplingFilter(float(rate), name.strip()))
+
+    for handler in handlers:
+        for existing in [f for f in handler.filters if isinstance(f, SamplingFilter)]:
+            handler.removeFilter(existing)
+        for sampling_filter in filters:
+            handler.addFilter(sampling_filter)
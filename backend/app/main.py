@@ -1,32 +1,25 @@
 import logging
 import os
 import traceback
+from contextlib import asynccontextmanager
 from typing import Callable
 
-from app.dependencies import get_current_user
+from anyio import to_thread
+from app.dependencies import resolve_current_user
+from app.log_utils import configure_log_sampling
+from app.middleware import RequestLogMiddleware
 from app.repositories.common import (
     RecordAccessNotAllowedError,
     RecordNotFoundError,
     ResourceConflictError,
 )
-from app.routes.admin import router as admin_router
-from app.routes.api_publication import router as api_publication_router
-from app.routes.bot import router as bot_router
-from app.routes.bot_store import router as bot_store_router
-from app.routes.conversation import router as conversation_router
-from app.routes.global_config import router as global_config_router
-from app.routes.published_api import router as published_api_router
-from app.routes.user import router as user_router
-from app.user import User
-from app.utils import is_running_on_lambda
+from app.warmup import warm_up_on_init
 from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import ValidationError
 from starlette.requests import Request
 from starlette.responses import Response
-from starlette.types import ASGIApp, Message
 
 # CloudWatch logging is automatically configured for Lambda
 # No need for custom logging setup in Lambda environment
@@ -36,12 +29,19 @@ logging.basicConfig(
     force=True,  # Ensure INFO-level handlers apply even when Lambda preconfigures logging
 )
 
+configure_log_sampling()
+
 # Explicitly set log level for memory compression modules
 for logger_name in ['app.usecases.chat', 'app.repositories.conversation']:
     logging.getLogger(logger_name).setLevel(logging.INFO)
 
 CORS_ALLOW_ORIGINS = os.environ.get("CORS_ALLOW_ORIGINS", "*")
 PUBLISHED_API_ID = os.environ.get("PUBLISHED_API_ID", None)
+# Ratio of successful requests to be logged. Errors are always logged.
+REQUEST_LOG_SAMPLE_RATE = float(os.environ.get("REQUEST_LOG_SAMPLE_RATE", 0.1))
+# Size of the thread pool running sync route handlers and dependencies.
+# Most handlers wait on AWS APIs, so the pool is larger than the number of vCPUs.
+WORKER_THREADS = int(os.environ.get("WORKER_THREADS", 40))
 
 is_published_api = PUBLISHED_API_ID is not None
 
@@ -64,13 +64,33 @@ else:
     title = "Bedrock Chat Published API"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+    # Lambda Web Adapter waits for the app to be ready, so this runs within the init phase
+    await to_thread.run_sync(warm_up_on_init)
+    yield
+
+
 app = FastAPI(
     openapi_tags=openapi_tags,
     title=title,
+    lifespan=lifespan,
+    # Resolve `request.state.current_user` for all routes
+    dependencies=[Depends(resolve_current_user)],
 )
 
 
+# NOTE: Routers are imported per app, so that the published API does not load the modules of the main app.
 if not is_published_api:
+    from app.routes.admin import router as admin_router
+    from app.routes.api_publication import router as api_publication_router
+    from app.routes.bot import router as bot_router
+    from app.routes.bot_store import router as bot_store_router
+    from app.routes.conversation import router as conversation_router
+    from app.routes.global_config import router as global_config_router
+    from app.routes.user import router as user_router
+
     app.include_router(conversation_router)
     app.include_router(bot_router)
     app.include_router(api_publication_router)
@@ -79,6 +99,8 @@ if not is_published_api:
     app.include_router(bot_store_router)
     app.include_router(global_config_router)
 else:
+    from app.routes.published_api import router as published_api_router
+
     app.include_router(published_api_router)
 
 
@@ -89,6 +111,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestLogMiddleware, sample_rate=REQUEST_LOG_SAMPLE_RATE)
 
 
 def error_handler_factory(status_code: int) -> Callable[[Request, Exception], Response]:
@@ -110,46 +133,3 @@ app.add_exception_handler(PermissionError, error_handler_factory(403))
 app.add_exception_handler(ValidationError, error_handler_factory(422))
 app.add_exception_handler(ResourceConflictError, error_handler_factory(409))
 app.add_exception_handler(Exception, error_handler_factory(500))
-
-
-@app.middleware("http")
-def add_current_user_to_request(request: Request, call_next: ASGIApp):
-    if is_running_on_lambda():
-        if not is_published_api:
-            authorization = request.headers.get("Authorization")
-            if authorization:
-                token_str = authorization.split(" ")[1]
-                token = HTTPAuthorizationCredentials(
-                    scheme="Bearer", credentials=token_str
-                )
-                request.state.current_user = get_current_user(token)
-        else:
-            assert PUBLISHED_API_ID is not None, "PUBLISHED_API_ID is not set."
-            request.state.current_user = User.from_published_api_id(PUBLISHED_API_ID)
-    else:
-        authorization = request.headers.get("Authorization")
-        if authorization:
-            token_str = authorization.split(" ")[1]
-            token = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token_str)
-            request.state.current_user = get_current_user(token)
-        else:
-            request.state.current_user = User(
-                id="test_user", name="test_user", email="user@example.com", groups=[]
-            )
-
-    response = call_next(request)  # type: ignore
-    return response
-
-
-@app.middleware("http")
-async def add_log_requests(request: Request, call_next: ASGIApp):
-    logger.info(f"Request path: {request.url.path}")
-    logger.info(f"Request method: {request.method}")
-    logger.info(f"Request headers: {request.headers}")
-
-    body = await request.body()
-    logger.info(f"Request body: {body.decode('utf-8')[:100]}...")
-
-    response = await call_next(request)  # type: ignore
-
-    return response
@@ -0,0 +1,51 @@
+import json
+import logging
+import random
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLogMiddleware:
+    """Log one structured line per request.
+    Request bodies and headers are never read, so that uploads are not buffered and tokens are not leaked to logs.
+    Successful requests are logged at `sample_rate`, while client and server errors are always logged.
+    Implemented as a pure ASGI middleware to keep streaming responses unbuffered.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if status_code >= 400 or random.random() < self.sample_rate:
+                logger.info(
+                    json.dumps(
+                        {
+                            "method": scope["method"],
+                            "path": scope["path"],
+                            "status": status_code,
+                            "duration_ms": round(
+                                (time.perf_counter() - start) * 1000, 1
+                            ),
+                        }
+                    )
+                )
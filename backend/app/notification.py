@@ -0,0 +1,102 @@
+"""Notifications of chat callbacks, shared by the websocket and server-sent event handlers."""
+
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+
+from app.agents.tools.agent_tool import ToolRunResult
+from app.stream import OnStopInput, OnThinking, OnToolProgress
+
+
+class ChatNotifier(ABC):
+    """Convert chat callbacks into JSON payloads, which subclasses send by `notify`.
+    Clients parse the payloads of the websocket and server-sent events the same way.
+    """
+
+    @abstractmethod
+    def notify(self, payload: bytes):
+        """Send the payload to the client."""
+
+    def notify_json(self, payload: dict[str, Any]):
+        self.notify(payload=json.dumps(payload).encode("utf-8"))
+
+    def on_stream(self, token: str):
+        # Send completion
+        self.notify_json(
+            dict(
+                status="STREAMING",
+                completion=token,
+            )
+        )
+
+    def on_stop(self, arg: OnStopInput):
+        self.notify_json(
+            dict(
+                status="STREAMING_END",
+                completion="",
+                stop_reason=arg["stop_reason"],
+                token_count=dict(
+                    input=arg["input_token_count"],
+                    output=arg["output_token_count"],
+                    cache_read_input=arg["cache_read_input_count"],
+                    cache_write_input=arg["cache_write_input_count"],
+                ),
+                price=arg["price"],
+            )
+        )
+
+    def on_agent_thinking(self, tool_use: OnThinking):
+        self.notify_json(
+            dict(
+                status="AGENT_THINKING",
+                log={
+                    tool_use["tool_use_id"]: {
+                        "name": tool_use["name"],
+                        "input": tool_use["input"],
+                    },
+                },
+            )
+        )
+
+    def on_agent_tool_result(self, run_result: ToolRunResult):
+        self.notify_json(
+            dict(
+                status="AGENT_TOOL_RESULT",
+                result={
+                    "toolUseId": run_result["tool_use_id"],
+                    "status": run_result["status"],
+                },
+            )
+        )
+
+        for related_document in run_result["related_documents"]:
+            self.notify_json(
+                dict(
+                    status="AGENT_RELATED_DOCUMENT",
+                    result={
+                        "toolUseId": run_result["tool_use_id"],
+                        "relatedDocument": related_document.to_schema().model_dump(
+                            by_alias=True
+                        ),
+                    },
+                )
+            )
+
+    def on_agent_tool_progress(self, progress: OnToolProgress):
+        self.notify_json(
+            dict(
+                status="AGENT_TOOL_PROGRESS",
+                result={
+                    "toolUseId": progress["tool_use_id"],
+                    "content": {"json": progress["content"]},
+                },
+            )
+        )
+
+    def on_reasoning(self, token: str):
+        self.notify_json(
+            dict(
+                status="REASONING",
+                completion=token,
+            )
+        )
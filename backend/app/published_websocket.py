@@ -7,11 +7,13 @@ from queue import SimpleQueue
 from threading import Thread
 
 import boto3
+from app.log_utils import configure_log_sampling, log_payload
+from app.notification import ChatNotifier
 from app.repositories.conversation import RecordNotFoundError
 from app.routes.schemas.conversation import ChatInput
-from app.stream import OnStopInput, OnThinking
 from app.usecases.chat import chat
 from app.user import User
+from app.warmup import warm_up_on_init
 from boto3.dynamodb.conditions import Key
 
 WEBSOCKET_SESSION_TABLE_NAME = os.environ["WEBSOCKET_SESSION_TABLE_NAME"]
@@ -25,6 +27,9 @@ ssm_client = boto3.client("ssm")
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+configure_log_sampling()
+warm_up_on_init()
+
 
 def verify_api_key(api_key: str) -> bool:
     """Verify API key from SSM Parameter Store"""
@@ -39,7 +44,7 @@ def verify_api_key(api_key: str) -> bool:
         return False
 
 
-class NotificationSender:
+class NotificationSender(ChatNotifier):
     def __init__(self, endpoint_url: str, connection_id: str) -> None:
         self.commands = SimpleQueue()
         self.endpoint_url = endpoint_url
@@ -76,63 +81,9 @@ class NotificationSender:
     def notify(self, payload: bytes):
         self.commands.put({"type": "notify", "payload": payload})
 
-    def on_stream(self, token: str):
-        payload = json.dumps(dict(status="STREAMING", completion=token)).encode(
-            "utf-8"
-        )
-        self.notify(payload=payload)
-
-    def on_stop(self, arg: OnStopInput):
-        payload = json.dumps(
-            dict(
-                status="STREAMING_END",
-                completion="",
-                stop_reason=arg["stop_reason"],
-                token_count=dict(
-                    input=arg["input_token_count"],
-                    output=arg["output_token_count"],
-                ),
-                price=arg["price"],
-            )
-        ).encode("utf-8")
-        self.notify(payload=payload)
-
-    def on_agent_thinking(self, tool_use: OnThinking):
-        payload = json.dumps(
-            dict(
-                status="AGENT_THINKING",
-                log={
-                    tool_use["tool_use_id"]: {
-                        "name": tool_use["name"],
-                        "input": tool_use["input"],
-                    }
-                },
-            )
-        ).encode("utf-8")
-        self.notify(payload=payload)
-
-    def on_agent_tool_result(self, run_result):
-        self.notify(
-            payload=json.dumps(
-                dict(
-                    status="AGENT_TOOL_RESULT",
-                    result={
-                        "toolUseId": run_result["tool_use_id"],
-                        "status": run_result["status"],
-                    },
-                )
-            ).encode("utf-8")
-        )
-
-    def on_reasoning(self, token: str):
-        payload = json.dumps(dict(status="REASONING", completion=token)).encode(
-            "utf-8"
-        )
-        self.notify(payload=payload)
-
 
 def handler(event, context):
-    logger.info(f"Received event: {event}")
+    logger.info("Received event: %s", log_payload(event))
     route_key = event["requestContext"]["routeKey"]
 
     if route_key == "$connect":
@@ -290,6 +241,9 @@ def handler(event, context):
                     on_tool_result=lambda run_result: notificator.on_agent_tool_result(
                         run_result=run_result
                     ),
+                    on_tool_progress=lambda progress: notificator.on_agent_tool_progress(
+                        progress=progress
+                    ),
                     on_reasoning=lambda token: notificator.on_reasoning(token=token),
                 )
                 # Send conversation metadata before finishing
@@ -1,16 +1,51 @@
+from __future__ import annotations
+
 import logging
 import os
 import random
 import time
-
-from app.repositories.common import get_opensearch_client
+from typing import TYPE_CHECKING, Literal
+
+from app.cache import TTLCache
+from app.repositories.common import (
+    compose_allowed_principals,
+    decode_search_cursor,
+    encode_search_cursor,
+    get_opensearch_client,
+)
 from app.repositories.models.custom_bot import BotMeta
 from app.user import User
-from opensearchpy import OpenSearch
+
+if TYPE_CHECKING:
+    from opensearchpy import OpenSearch
 
 env_prefix = os.environ.get("ENV_PREFIX", "")
 INDEX_NAME = f"{env_prefix}bot"
 
+# Public part of the popular / pickup feeds is materialized per container and
+# refreshed lazily after `BOT_STORE_FEED_TTL` seconds. Visibility changes made through
+# this container are applied immediately, see `invalidate_bot_feeds`; other containers
+# pick them up when their feeds expire.
+BOT_STORE_FEED_TTL = int(os.environ.get("BOT_STORE_FEED_TTL", "300"))
+# Assembled feed for each user is cached for a shorter time.
+BOT_STORE_USER_FEED_TTL = int(os.environ.get("BOT_STORE_USER_FEED_TTL", "30"))
+# Number of public bots kept in each materialized feed.
+# Requests with larger `limit` bypass the materialized feed.
+BOT_STORE_FEED_SIZE = 100
+
+type_feed_kind = Literal["popular", "pickup"]
+
+_public_feed_cache: TTLCache[type_feed_kind, list[dict]] = TTLCache(
+    ttl=BOT_STORE_FEED_TTL
+)
+_user_feed_cache: TTLCache[tuple, list[dict]] = TTLCache(
+    ttl=BOT_STORE_USER_FEED_TTL, maxsize=4096
+)
+# Bots withdrawn from the public feeds (made non-public or deleted) through this container.
+# The index is updated asynchronously, so they are filtered out of the feeds until a feed
+# materialized after the change has surely picked it up.
+_withdrawn_bot_ids: TTLCache[str, bool] = TTLCache(ttl=BOT_STORE_FEED_TTL)
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
@@ -19,10 +54,12 @@ def find_bots_by_query(
     query: str,
     user: User,
     limit: int = 20,
+    cursor: str | None = None,
     client: OpenSearch | None = None,
 ) -> list[BotMeta]:
     """Search bots by query string.
     This method is used for bot-store functionality.
+    To fetch the next page, pass `search_cursor` of the last bot as `cursor`.
 
     Query Structure Explanation:
 
@@ -41,10 +78,15 @@ def find_bots_by_query(
         - Admins can see all of them
         - Non-admins can see them if they are listed in `AllowedCognitoUsers`
           or belong to `AllowedCognitoGroups`
+        - Checked by `terms` query on the precomputed `AllowedPrincipals` field
 
     c) Private Bots (no `SharedScope` field):
         - Only accessible to the owner (`PK.keyword = user.id`)
         - Admins can see their own private bots (`PK.keyword = admin-user`)
+
+    3. Pagination:
+    - Sorted by relevance score, with `SK.keyword` as a stable tie-breaker
+    - The next page is fetched with `search_after`, so deep pages cost the same as the first one
     """
     client = client or get_opensearch_client()
     logger.info(f"Searching bots with query: {query}")
@@ -54,27 +96,7 @@ def find_bots_by_query(
     # Condition for bots that can be acquired
     filter_should = [
         {"term": {"SharedScope.keyword": "all"}},  # Everyone can get
-        # Owner AND (no SharedScope i.e. private OR SharedScope = "partial")
-        {
-            "bool": {
-                "must": [
-                    {"term": {"PK.keyword": user.id}},
-                    {
-                        "bool": {
-                            "should": [
-                                {
-                                    "bool": {
-                                        "must_not": {"exists": {"field": "SharedScope"}}
-                                    }
-                                },
-                                {"term": {"SharedScope.keyword": "partial"}},
-                            ],
-                            "minimum_should_match": 1,
-                        }
-                    },
-                ]
-            }
-        },
+        _compose_owned_bots_filter(user),
     ]
 
     if user.is_admin():
@@ -82,36 +104,7 @@ def find_bots_by_query(
         filter_should.append({"term": {"SharedScope.keyword": "partial"}})
     else:
         # For non-admin users, check the permissions of partial shared bots
-        filter_should.append(
-            {
-                "bool": {
-                    "must": [
-                        {"term": {"SharedScope.keyword": "partial"}},
-                        {
-                            "bool": {
-                                "should": [
-                                    {"term": {"AllowedCognitoUsers.keyword": user.id}},
-                                    {
-                                        "script": {
-                                            "script": {
-                                                "source": (
-                                                    "for (group in doc['AllowedCognitoGroups.keyword']) { "
-                                                    "if (params.user_groups.contains(group)) { return true; } } "
-                                                    "return false;"
-                                                ),
-                                                "params": {"user_groups": user.groups},
-                                                "lang": "painless",
-                                            }
-                                        }
-                                    },
-                                ],
-                                "minimum_should_match": 1,
-                            }
-                        },
-                    ]
-                }
-            }
-        )
+        filter_should.append(_compose_partial_shared_bots_filter(user))
 
     search_body = {
         "query": {
@@ -137,18 +130,25 @@ def find_bots_by_query(
                 },
             }
         },
+        "sort": [
+            {"_score": {"order": "desc"}},
+            {"SK.keyword": {"order": "asc"}},  # Tie-breaker for `search_after`
+        ],
         "size": limit,
     }
+    if cursor:
+        search_body["search_after"] = decode_search_cursor(cursor)
     logger.debug(f"Entire search body: {search_body}")
 
     try:
         response = client.search(index=INDEX_NAME, body=search_body)
-        logger.debug(f"Search response: {response}")
+        logger.debug("Search response: %s", response)
 
-        bots = [
-            BotMeta.from_opensearch_response(hit, user.id)
-            for hit in response["hits"]["hits"]
-        ]
+        bots = []
+        for hit in response["hits"]["hits"]:
+            bot = BotMeta.from_opensearch_response(hit, user.id)
+            bot.search_cursor = encode_search_cursor(hit["sort"])
+            bots.append(bot)
         logger.info(f"Found {len(bots)} bots matching query: {query}")
         return bots
 
@@ -157,202 +157,233 @@ def find_bots_by_query(
         raise
 
 
-def find_bots_sorted_by_usage_count(
-    user: User,
-    limit: int = 20,
-    client: OpenSearch | None = None,
-) -> list[BotMeta]:
-    """Search bots sorted by usage count while considering access control."""
-    client = client or get_opensearch_client()
-    logger.info(f"Searching bots sorted by usage count")
+def _compose_owned_bots_filter(user: User) -> dict:
+    """Compose filter for owner's bots (private or partial)."""
+    return {
+        "bool": {
+            "must": [
+                {"term": {"PK.keyword": user.id}},
+                {
+                    "bool": {
+                        "should": [
+                            {
+                                "bool": {
+                                    "must_not": {"exists": {"field": "SharedScope"}}
+                                }
+                            },
+                            {"term": {"SharedScope.keyword": "partial"}},
+                        ],
+                        "minimum_should_match": 1,
+                    }
+                },
+            ]
+        }
+    }
 
-    filter_must = [{"prefix": {"SK.keyword": "BOT"}}]
-    filter_should = [
-        {"term": {"SharedScope.keyword": "all"}},  # Public bots
-        # Owner's bots (private or partial)
-        {
-            "bool": {
-                "must": [
-                    {"term": {"PK.keyword": user.id}},
-                    {
-                        "bool": {
-                            "should": [
-                                {
-                                    "bool": {
-                                        "must_not": {"exists": {"field": "SharedScope"}}
-                                    }
-                                },
-                                {"term": {"SharedScope.keyword": "partial"}},
-                            ],
-                            "minimum_should_match": 1,
-                        }
-                    },
-                ]
-            }
-        },
-        # Partial shared bots with access permission
-        {
-            "bool": {
-                "must": [
-                    {"term": {"SharedScope.keyword": "partial"}},
-                    {
-                        "bool": {
-                            "should": [
-                                {"term": {"AllowedCognitoUsers.keyword": user.id}},
-                                {
-                                    "script": {
-                                        "script": {
-                                            "source": (
-                                                "for (group in doc['AllowedCognitoGroups.keyword']) { "
-                                                "if (params.user_groups.contains(group)) { return true; } } "
-                                                "return false;"
-                                            ),
-                                            "params": {"user_groups": user.groups},
-                                            "lang": "painless",
-                                        }
-                                    }
-                                },
-                            ],
-                            "minimum_should_match": 1,
-                        }
-                    },
-                ]
-            }
-        },
-    ]
 
-    search_body = {
-        "query": {
-            "bool": {
-                "filter": {
+def _compose_partial_shared_bots_filter(user: User) -> dict:
+    """Compose filter for partial shared bots with access permission.
+    Access is checked with a `terms` query against `AllowedPrincipals`, which is
+    maintained on every write to the bot table (see `compose_allowed_principals`),
+    so that OpenSearch can use the inverted index instead of evaluating a script per document.
+    """
+    principals = compose_allowed_principals([user.id], user.groups)
+    return {
+        "bool": {
+            "must": [
+                {"term": {"SharedScope.keyword": "partial"}},
+                {
                     "bool": {
-                        "must": filter_must,
-                        "should": filter_should,
+                        "should": [
+                            {"terms": {"AllowedPrincipals.keyword": principals}},
+                            # Fallback for documents written before `AllowedPrincipals` was introduced
+                            {
+                                "bool": {
+                                    "must_not": {
+                                        "exists": {"field": "AllowedPrincipals"}
+                                    },
+                                    "should": [
+                                        {
+                                            "term": {
+                                                "AllowedCognitoUsers.keyword": user.id
+                                            }
+                                        },
+                                        {
+                                            "terms": {
+                                                "AllowedCognitoGroups.keyword": user.groups
+                                            }
+                                        },
+                                    ],
+                                    "minimum_should_match": 1,
+                                }
+                            },
+                        ],
                         "minimum_should_match": 1,
                     }
+                },
+            ]
+        }
+    }
+
+
+def _compose_user_specific_filter(user: User) -> list[dict]:
+    """Compose filter for bots which are visible only to the given user.
+    Public bots (`SharedScope = "all"`) are NOT included.
+    """
+    return [
+        _compose_owned_bots_filter(user),
+        _compose_partial_shared_bots_filter(user),
+    ]
+
+
+def _compose_feed_query(
+    kind: type_feed_kind, filter_should: list[dict], limit: int
+) -> dict:
+    query = {
+        "bool": {
+            "filter": {
+                "bool": {
+                    "must": [{"prefix": {"SK.keyword": "BOT"}}],
+                    "should": filter_should,
+                    "minimum_should_match": 1,
                 }
             }
+        }
+    }
+
+    if kind == "popular":
+        return {
+            "query": query,
+            "sort": [{"UsageStats.usage_count": {"order": "desc"}}],
+            "size": limit,
+        }
+
+    seed = int(time.time()) + random.randint(0, 10000)
+    return {
+        "query": {
+            "function_score": {
+                "query": query,
+                "random_score": {"seed": seed},
+            }
         },
-        "sort": [{"UsageStats.usage_count": {"order": "desc"}}],
         "size": limit,
     }
 
-    logger.debug(f"Search body: {search_body}")
 
+def _search_hits(search_body: dict, client: OpenSearch) -> list[dict]:
+    logger.debug(f"Search body: {search_body}")
     try:
         response = client.search(index=INDEX_NAME, body=search_body)
-        logger.debug(f"Search response: {response}")
-
-        bots = [
-            BotMeta.from_opensearch_response(hit, user.id)
-            for hit in response["hits"]["hits"]
-        ]
-        logger.info(f"Found {len(bots)} bots sorted by usage count")
-        return bots
+        logger.debug("Search response: %s", response)
+        return response["hits"]["hits"]
 
     except Exception as e:
         logger.error(f"Error searching bots: {e}")
         raise
 
 
-def find_random_bots(
-    user: User,
-    limit: int = 20,
+def _find_public_bot_hits(
+    kind: type_feed_kind,
+    limit: int = BOT_STORE_FEED_SIZE,
     client: OpenSearch | None = None,
-) -> list[BotMeta]:
-    """Find random bots while considering access control."""
+) -> list[dict]:
     client = client or get_opensearch_client()
-    logger.info(f"Searching random bots")
+    search_body = _compose_feed_query(
+        kind, [{"term": {"SharedScope.keyword": "all"}}], limit
+    )
+    return _search_hits(search_body, client)
 
-    filter_must = [{"prefix": {"SK.keyword": "BOT"}}]
-    filter_should = [
-        {"term": {"SharedScope.keyword": "all"}},  # Public bots
-        # Owner's bots (private or partial)
-        {
-            "bool": {
-                "must": [
-                    {"term": {"PK.keyword": user.id}},
-                    {
-                        "bool": {
-                            "should": [
-                                {
-                                    "bool": {
-                                        "must_not": {"exists": {"field": "SharedScope"}}
-                                    }
-                                },
-                                {"term": {"SharedScope.keyword": "partial"}},
-                            ],
-                            "minimum_should_match": 1,
-                        }
-                    },
-                ]
-            }
-        },
-        # Partial shared bots with access permission
-        {
-            "bool": {
-                "must": [
-                    {"term": {"SharedScope.keyword": "partial"}},
-                    {
-                        "bool": {
-                            "should": [
-                                {"term": {"AllowedCognitoUsers.keyword": user.id}},
-                                {
-                                    "script": {
-                                        "script": {
-                                            "source": (
-                                                "for (group in doc['AllowedCognitoGroups.keyword']) { "
-                                                "if (params.user_groups.contains(group)) { return true; } } "
-                                                "return false;"
-                                            ),
-                                            "params": {"user_groups": user.groups},
-                                            "lang": "painless",
-                                        }
-                                    }
-                                },
-                            ],
-                            "minimum_should_match": 1,
-                        }
-                    },
-                ]
-            }
-        },
+
+def invalidate_bot_feeds(bot_id: str, withdrawn: bool):
+    """Drop the feeds cached by this container after the visibility of the bot has changed.
+    `withdrawn` tells whether the bot is no longer public, e.g. made private or deleted.
+    """
+    _public_feed_cache.clear()
+    _user_feed_cache.clear()
+    if withdrawn:
+        _withdrawn_bot_ids.set(bot_id, True)
+    else:
+        _withdrawn_bot_ids.invalidate(bot_id)
+
+
+def _get_public_feed_hits(
+    kind: type_feed_kind, limit: int, client: OpenSearch | None
+) -> list[dict]:
+    if limit > BOT_STORE_FEED_SIZE:
+        return _find_public_bot_hits(kind, limit=limit, client=client)
+
+    return _public_feed_cache.get_or_set(
+        kind, lambda: _find_public_bot_hits(kind, client=client)
+    )
+
+
+def _find_feed_hits(
+    kind: type_feed_kind,
+    user: User,
+    limit: int,
+    client: OpenSearch | None,
+) -> list[dict]:
+    """Assemble the feed for the given user.
+    The materialized public feed is merged with the user-specific bots, which are fetched with a cheap term query.
+    """
+    cache_key = (kind, user.id, tuple(sorted(user.groups)), limit)
+    cached = _user_feed_cache.get(cache_key)
+    if cached is not None:
+        logger.debug(f"Using cached {kind} feed for user: {user.id}")
+        return cached
+
+    public_hits = [
+        hit
+        for hit in _get_public_feed_hits(kind, limit, client)
+        if _withdrawn_bot_ids.get(hit["_source"].get("BotId")) is None
     ]
+    user_hits = _search_hits(
+        _compose_feed_query(kind, _compose_user_specific_filter(user), limit),
+        client or get_opensearch_client(),
+    )
+
+    # De-duplicate by document ID
+    merged = list({hit["_id"]: hit for hit in public_hits + user_hits}.values())
+    if kind == "popular":
+        merged.sort(
+            key=lambda hit: hit["_source"].get("UsageStats", {}).get("usage_count", 0),
+            reverse=True,
+        )
+        hits = merged[:limit]
+    else:
+        hits = random.sample(merged, min(limit, len(merged)))
 
-    seed = int(time.time()) + random.randint(0, 10000)
-    search_body = {
-        "query": {
-            "function_score": {
-                "query": {
-                    "bool": {
-                        "filter": {
-                            "bool": {
-                                "must": filter_must,
-                                "should": filter_should,
-                                "minimum_should_match": 1,
-                            }
-                        }
-                    }
-                },
-                "random_score": {"seed": seed},
-            }
-        },
-        "size": limit,
-    }
+    _user_feed_cache.set(cache_key, hits)
+    return hits
 
-    logger.debug(f"Search body: {search_body}")
 
-    try:
-        response = client.search(index=INDEX_NAME, body=search_body)
-        logger.debug(f"Search response: {response}")
+def find_bots_sorted_by_usage_count(
+    user: User,
+    limit: int = 20,
+    client: OpenSearch | None = None,
+) -> list[BotMeta]:
+    """Search bots sorted by usage count while considering access control.
+    Public bots are served from the materialized feed. See `_find_feed_hits`.
+    """
+    logger.info(f"Searching bots sorted by usage count")
 
-        bots = [
-            BotMeta.from_opensearch_response(hit, user.id)
-            for hit in response["hits"]["hits"]
-        ]
-        logger.info(f"Found {len(bots)} random bots")
-        return bots
+    hits = _find_feed_hits("popular", user, limit, client)
+    bots = [BotMeta.from_opensearch_response(hit, user.id) for hit in hits]
+    logger.info(f"Found {len(bots)} bots sorted by usage count")
+    return bots
 
-    except Exception as e:
-        logger.error(f"Error searching bots: {e}")
-        raise
+
+def find_random_bots(
+    user: User,
+    limit: int = 20,
+    client: OpenSearch | None = None,
+) -> list[BotMeta]:
+    """Find random bots while considering access control.
+    Bots are sampled from the materialized feed. See `_find_feed_hits`.
+    """
+    logger.info(f"Searching random bots")
+
+    hits = _find_feed_hits("pickup", user, limit, client)
+    bots = [BotMeta.from_opensearch_response(hit, user.id) for hit in hits]
+    logger.info(f"Found {len(bots)} random bots")
+    return bots
@@ -1,10 +1,15 @@
+import base64
 import json
 import os
-from typing import Literal
+import threading
+from functools import cache
+from typing import TYPE_CHECKING, Any, Literal
 
 import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
+from app.cache import TTLCache
+
+if TYPE_CHECKING:
+    from opensearchpy import OpenSearch
 
 DDB_ENDPOINT_URL = os.environ.get("DDB_ENDPOINT_URL")
 CONVERSATION_TABLE_NAME = os.environ.get("CONVERSATION_TABLE_NAME", "")
@@ -12,6 +17,9 @@ BOT_TABLE_NAME = os.environ.get("BOT_TABLE_NAME", "")
 ACCOUNT = os.environ.get("ACCOUNT", "")
 REGION = os.environ.get("REGION", "ap-northeast-1")
 TABLE_ACCESS_ROLE_ARN = os.environ.get("TABLE_ACCESS_ROLE_ARN", "")
+# Period to reuse assumed role credentials, which are valid for 1 hour, and the resources created with them.
+# Reusing them skips `AssumeRole` and keeps the connections to DynamoDB open across requests.
+ROLE_SESSION_CACHE_TTL = int(os.environ.get("ROLE_SESSION_CACHE_TTL", 900))
 
 OPENSEARCH_DOMAIN_ENDPOINT = os.environ.get(
     "OPENSEARCH_DOMAIN_ENDPOINT",
@@ -38,6 +46,52 @@ class ResourceConflictError(Exception):
     pass
 
 
+# Keyed by (service_name, table_name, user_id)
+_role_credentials_cache = TTLCache[tuple[str, str, str | None], dict[str, Any]](
+    ttl=ROLE_SESSION_CACHE_TTL, maxsize=256
+)
+# Creating clients from a shared session is not thread-safe
+_role_session_lock = threading.Lock()
+# boto3 resources are not thread-safe, so each worker thread creates its own ones
+# from the shared credentials. See `_get_thread_resource_cache`.
+_thread_local = threading.local()
+# Incremented by `reset_aws_clients` to drop the resources cached by every thread
+_resource_generation = 0
+
+
+@cache
+def _get_sts_client():
+    return boto3.client("sts")
+
+
+@cache
+def _get_role_session():
+    # Shared by all assumed role resources, so that service models are loaded only once
+    return boto3.Session()
+
+
+def reset_aws_clients():
+    """Drop cached clients and assumed role credentials, e.g. after restoring a snapshot."""
+    global _resource_generation
+    _resource_generation += 1
+    _role_credentials_cache.clear()
+    _get_sts_client.cache_clear()
+    _get_role_session.cache_clear()
+
+
+def _get_thread_resource_cache() -> TTLCache[tuple, Any]:
+    """Get the resource cache of the current thread.
+    Keyed by (service_name, table_name, user_id, access_key_id), so that resources are
+    recreated when the credentials are renewed.
+    """
+    if getattr(_thread_local, "generation", None) != _resource_generation:
+        _thread_local.generation = _resource_generation
+        _thread_local.resource_cache = TTLCache[tuple, Any](
+            ttl=ROLE_SESSION_CACHE_TTL, maxsize=32
+        )
+    return _thread_local.resource_cache
+
+
 def compose_conv_id(user_id: str, conversation_id: str):
     # Add user_id prefix for row level security to match with `LeadingKeys` condition
     return f"{user_id}#CONV#{conversation_id}"
@@ -79,6 +133,45 @@ def decompose_sk(sk: str):
     return sk.split("#")[-1]
 
 
+def compose_allowed_principals(user_ids: list[str], group_ids: list[str]) -> list[str]:
+    """Compose principals which are allowed to access the partial shared bot.
+    The `AllowedPrincipals` attribute is indexed to OpenSearch, so that access control can be done by a `terms` query.
+    """
+    return [f"USER#{user_id}" for user_id in user_ids] + [
+        f"GROUP#{group_id}" for group_id in group_ids
+    ]
+
+
+def encode_search_cursor(sort_values: list[Any]) -> str:
+    """Encode `sort` values of an OpenSearch hit into an opaque cursor.
+    The cursor is passed back as `search_after` to fetch the next page.
+    """
+    return base64.urlsafe_b64encode(json.dumps(sort_values).encode("utf-8")).decode(
+        "utf-8"
+    )
+
+
+def decode_search_cursor(cursor: str) -> list[Any]:
+    """Decode an opaque cursor into `search_after` values."""
+    try:
+        sort_values = json.loads(base64.urlsafe_b64decode(cursor).decode("utf-8"))
+    except ValueError as e:
+        raise ValueError(f"Invalid search cursor: {cursor}") from e
+
+    # `sort` values are scalars, so anything else has been tampered with.
+    if not (
+        isinstance(sort_values, list)
+        and sort_values
+        and all(
+            isinstance(value, (str, int, float, bool)) or value is None
+            for value in sort_values
+        )
+    ):
+        raise ValueError(f"Invalid search cursor: {cursor}")
+
+    return sort_values
+
+
 def _get_aws_resource(service_name, table_name: str, user_id: str | None = None):
     """Get AWS resource with optional row-level access control for DynamoDB.
     Ref: https://docs.aws.amazon.com/IAM/latest/UserGuide/reference_policies_examples_dynamodb_items.html
@@ -126,19 +219,32 @@ def _get_aws_resource(service_name, table_name: str, user_id: str | None = None)
             "ForAllValues:StringLike": {"dynamodb:LeadingKeys": [f"{user_id}*"]}
         }
 
-    sts_client = boto3.client("sts")
-    assumed_role_object = sts_client.assume_role(
-        RoleArn=TABLE_ACCESS_ROLE_ARN,
-        RoleSessionName="DynamoDBSession",
-        Policy=json.dumps(policy_document),
-    )
-    credentials = assumed_role_object["Credentials"]
-    session = boto3.Session(
-        aws_access_key_id=credentials["AccessKeyId"],
-        aws_secret_access_key=credentials["SecretAccessKey"],
-        aws_session_token=credentials["SessionToken"],
-    )
-    return session.resource(service_name, region_name=REGION)  # type: ignore[call-overload]
+    def assume_role():
+        assumed_role_object = _get_sts_client().assume_role(
+            RoleArn=TABLE_ACCESS_ROLE_ARN,
+            RoleSessionName="DynamoDBSession",
+            Policy=json.dumps(policy_document),
+        )
+        return assumed_role_object["Credentials"]
+
+    key = (service_name, table_name, user_id)
+    credentials = _role_credentials_cache.get_or_set(key, assume_role)
+
+    resource_cache = _get_thread_resource_cache()
+    resource_key = (*key, credentials["AccessKeyId"])
+    resource = resource_cache.get(resource_key)
+    if resource is None:
+        with _role_session_lock:
+            resource = _get_role_session().resource(  # type: ignore[call-overload]
+                service_name,
+                region_name=REGION,
+                aws_access_key_id=credentials["AccessKeyId"],
+                aws_secret_access_key=credentials["SecretAccessKey"],
+                aws_session_token=credentials["SessionToken"],
+            )
+        resource_cache.set(resource_key, resource)
+
+    return resource
 
 
 def get_dynamodb_client(user_id=None, table_type: type_table = "conversation"):
@@ -173,13 +279,17 @@ def get_bot_table_client():
     )
 
 
-def get_opensearch_client(collection_type: str = "bot") -> OpenSearch:
+def get_opensearch_client(collection_type: str = "bot") -> "OpenSearch":
     """Get OpenSearch client with AWS authentication.
 
     Args:
         collection_type: Type of collection to connect to ("bot" or "conversation")
         Note: This method now uses a single shared endpoint for both bot and conversation collections
     """
+    # Imported here to keep them out of the cold start of routes not using OpenSearch
+    from opensearchpy import OpenSearch, RequestsHttpConnection
+    from requests_aws4auth import AWS4Auth
+
     endpoint = OPENSEARCH_DOMAIN_ENDPOINT
     if not endpoint:
         raise ValueError("OPENSEARCH_DOMAIN_ENDPOINT is not set")
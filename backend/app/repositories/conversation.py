@@ -2,9 +2,11 @@ import json
 import logging
 import os
 from decimal import Decimal as decimal
+from functools import cache
 
 import boto3
 from typing import Dict
+from app.log_utils import log_payload
 from app.repositories.common import (
     TRANSACTION_BATCH_WRITE_SIZE,
     RecordNotFoundError,
@@ -35,13 +37,18 @@ THRESHOLD_LARGE_MESSAGE = 300 * 1024  # 300KB
 LARGE_MESSAGE_BUCKET = os.environ.get("LARGE_MESSAGE_BUCKET")
 
 BEDROCK_REGION = os.environ.get("BEDROCK_REGION", "us-east-1")
-s3_client = boto3.client("s3", BEDROCK_REGION)
+
+
+@cache
+def _get_s3_client():
+    # Created on first use to keep it out of the cold start
+    return boto3.client("s3", BEDROCK_REGION)
 
 
 def store_conversation(
     user_id: str, conversation: ConversationModel, threshold=THRESHOLD_LARGE_MESSAGE
 ):
-    logger.info(f"Storing conversation: {conversation.model_dump_json()}")
+    logger.info("Storing conversation: %s", log_payload(conversation))
     table = get_conversation_table_client(user_id)
 
     item_params = {
@@ -72,7 +79,7 @@ def store_conversation(
         large_message_path = f"{user_id}/{conversation.id}/message_map.json"
         item_params["LargeMessagePath"] = large_message_path
         # Store all message in S3
-        s3_client.put_object(
+        _get_s3_client().put_object(
             Bucket=LARGE_MESSAGE_BUCKET,
             Key=large_message_path,
             Body=json.dumps(message_map),
@@ -146,7 +153,7 @@ def find_conversation_by_user_id(user_id: str) -> list[ConversationMeta]:
             logger.warning(f"Query count exceeded {MAX_QUERY_COUNT}")
             break
 
-    logger.info(f"Found conversations: {conversations}")
+    logger.info("Found conversations: %s", log_payload(conversations))
     return conversations
 
 
@@ -164,7 +171,7 @@ def find_conversation_by_id(user_id: str, conversation_id: str) -> ConversationM
     item = response["Items"][0]
     if item.get("IsLargeMessage", False):
         large_message_path = item["LargeMessagePath"]
-        response = s3_client.get_object(
+        response = _get_s3_client().get_object(
             Bucket=LARGE_MESSAGE_BUCKET, Key=large_message_path
         )
         message_map = json.loads(response["Body"].read().decode("utf-8"))
@@ -181,7 +188,7 @@ def find_conversation_by_id(user_id: str, conversation_id: str) -> ConversationM
         bot_id=item["BotId"] if "BotId" in item else None,
         should_continue=item.get("ShouldContinue", False),
     )
-    logger.info(f"Found conversation: {conv}")
+    logger.info("Found conversation: %s", log_payload(conv))
     return conv
 
 
@@ -199,7 +206,7 @@ def delete_conversation_by_id(user_id: str, conversation_id: str):
         item = response.get("Item")
         if item and item.get("IsLargeMessage", False):
             # Delete the large message map from S3
-            s3_client.delete_object(
+            _get_s3_client().delete_object(
                 Bucket=LARGE_MESSAGE_BUCKET, Key=item["LargeMessagePath"]
             )
 
@@ -243,7 +250,7 @@ def delete_conversation_by_user_id(user_id: str):
     def delete_large_messages(items):
         for item in items:
             if item.get("IsLargeMessage", False):
-                s3_client.delete_object(
+                _get_s3_client().delete_object(
                     Bucket=LARGE_MESSAGE_BUCKET, Key=item["LargeMessagePath"]
                 )
 
@@ -1,11 +1,19 @@
+from __future__ import annotations
+
 import logging
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from app.repositories.common import get_opensearch_client
+from app.repositories.common import (
+    decode_search_cursor,
+    encode_search_cursor,
+    get_opensearch_client,
+)
 from app.repositories.models.conversation_search import ConversationSearchModel
 from app.user import User
-from opensearchpy import OpenSearch
+
+if TYPE_CHECKING:
+    from opensearchpy import OpenSearch
 
 env_prefix = os.environ.get("ENV_PREFIX", "")
 INDEX_NAME = f"{env_prefix}conversation"
@@ -18,10 +26,13 @@ def find_conversations_by_query(
     query: str,
     user: User,
     limit: int = 20,
+    cursor: str | None = None,
     client: OpenSearch | None = None,
 ) -> list[ConversationSearchModel]:
     """Search conversations by query string.
     This method searches through both the conversation title and message content.
+    To fetch the next page, pass `search_cursor` of the last conversation as `cursor`.
+    Highlights are computed only for the returned page.
     """
     client = client or get_opensearch_client(collection_type="conversation")
 
@@ -73,6 +84,8 @@ def find_conversations_by_query(
             }
         },
         "size": limit,
+        # Fetch only the fields used by `ConversationSearchModel`, not the whole message bodies
+        "_source": ["SK", "Title", "BotId", "messages.value.create_time"],
         "sort": [
             {"_score": {"order": "desc"}},  # 1. Primary sort by relevance score
             {
@@ -81,6 +94,7 @@ def find_conversations_by_query(
                     "mode": "max",  # Sort by the most recent message time
                 }
             },  # 2. Secondary sort by message recency
+            {"SK.keyword": {"order": "asc"}},  # 3. Tie-breaker for `search_after`
         ],
         "highlight": {
             "fields": {
@@ -114,11 +128,14 @@ def find_conversations_by_query(
         },
     }
 
+    if cursor:
+        search_body["search_after"] = decode_search_cursor(cursor)
+
     logger.debug(f"Search body: {search_body}")
 
     try:
         response = client.search(index=INDEX_NAME, body=search_body)
-        logger.debug(f"Search response: {response}")
+        logger.debug("Search response: %s", response)
 
         conversations = []
         for hit in response["hits"]["hits"]:
@@ -126,6 +143,7 @@ def find_conversations_by_query(
                 conversation_meta = ConversationSearchModel.from_opensearch_response(
                     hit
                 )
+                conversation_meta.search_cursor = encode_search_cursor(hit["sort"])
                 conversations.append(conversation_meta)
             except Exception as e:
                 logger.error(f"Error processing hit: {e}, hit: {hit}")
@@ -1,11 +1,18 @@
 import base64
 import json
 import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from decimal import Decimal as decimal
 
+from app.cache import TTLCache
+from app.log_utils import log_payload
 from app.repositories.common import (
+    BOT_TABLE_NAME,
     TRANSACTION_BATCH_READ_SIZE,
     RecordNotFoundError,
+    compose_allowed_principals,
     compose_item_type,
     compose_sk,
     get_bot_table_client,
@@ -32,6 +39,23 @@ from botocore.exceptions import ClientError
 logger = logging.getLogger(__name__)
 logger.setLevel("INFO")
 
+# Max concurrency of `BotIdIndex` queries when resolving many bots by id
+MAX_CONCURRENT_BOT_QUERIES = 16
+# Max concurrency of `batch_get_item` calls when resolving original bots of aliases
+MAX_CONCURRENT_BATCH_GET = 4
+# Max number of query pages (up to 1 MB each) read for starred or recently used bots
+MAX_BOT_LIST_QUERY_PAGES = 20
+# Retry settings for `UnprocessedKeys` returned by `batch_get_item`
+BATCH_GET_MAX_RETRIES = 5
+BATCH_GET_RETRY_BASE_DELAY = 0.05
+
+# Starred and recently used bot lists are cached per user for immediate re-reads
+# (e.g. sidebar refresh right after navigation). Writes by the user invalidate them.
+BOT_LIST_CACHE_TTL = float(os.environ.get("BOT_LIST_CACHE_TTL", 10))
+_bot_list_cache: TTLCache[tuple[str, str], list[BotMeta]] = TTLCache(
+    ttl=BOT_LIST_CACHE_TTL
+)
+
 
 class BotNotFoundException(Exception):
     """Exception raised when a bot is not found."""
@@ -45,9 +69,15 @@ class BotUpdateError(Exception):
     pass
 
 
+def _invalidate_bot_list_cache(user_id: str):
+    _bot_list_cache.invalidate(("starred", user_id))
+    _bot_list_cache.invalidate(("recently_used", user_id))
+
+
 def store_bot(custom_bot: BotModel):
     table = get_bot_table_client()
-    logger.info(f"Storing bot: {custom_bot}")
+    _invalidate_bot_list_cache(custom_bot.owner_user_id)
+    logger.info("Storing bot: %s", log_payload(custom_bot))
 
     item = {
         "PK": custom_bot.owner_user_id,
@@ -61,6 +91,9 @@ def store_bot(custom_bot: BotModel):
         "SharedStatus": custom_bot.shared_status,
         "AllowedCognitoGroups": custom_bot.allowed_cognito_groups,
         "AllowedCognitoUsers": custom_bot.allowed_cognito_users,
+        "AllowedPrincipals": compose_allowed_principals(
+            custom_bot.allowed_cognito_users, custom_bot.allowed_cognito_groups
+        ),
         "GenerationParams": custom_bot.generation_params.model_dump(),
         "AgentData": custom_bot.agent.model_dump(),
         "Knowledge": custom_bot.knowledge.model_dump(),
@@ -120,6 +153,7 @@ def update_bot(
     NOTE: Use `update_bot_shared_status` to update visibility.
     """
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(owner_user_id)
     logger.info(f"Updating bot: {bot_id}")
 
     update_expression = (
@@ -203,7 +237,8 @@ def update_bot(
 
 def store_alias(user_id: str, alias: BotAliasModel):
     table = get_bot_table_client()
-    logger.info(f"Storing alias: {alias}")
+    _invalidate_bot_list_cache(user_id)
+    logger.info("Storing alias: %s", log_payload(alias))
 
     item = {
         "PK": user_id,
@@ -236,6 +271,7 @@ def store_alias(user_id: str, alias: BotAliasModel):
 def update_bot_last_used_time(user_id: str, bot_id: str):
     """Update last used time for bot."""
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(user_id)
     logger.info(f"Updating last used time for bot: {bot_id}")
     try:
         response = table.update_item(
@@ -255,6 +291,7 @@ def update_bot_last_used_time(user_id: str, bot_id: str):
 def update_alias_last_used_time(user_id: str, original_bot_id: str):
     """Update last used time for alias."""
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(user_id)
     logger.info(f"Updating last used time for alias: {original_bot_id}")
     try:
         response = table.update_item(
@@ -271,9 +308,15 @@ def update_alias_last_used_time(user_id: str, original_bot_id: str):
     return response
 
 
-def update_bot_stats(owner_user_id: str, bot_id: str, increment: int):
+def update_bot_stats(
+    owner_user_id: str,
+    bot_id: str,
+    increment: int,
+    cache_read_input_tokens: int = 0,
+    cache_write_input_tokens: int = 0,
+):
     """Update usage stats for bot.
-    Currently only supports incrementing usage count.
+    Increments usage count, and the prompt cache tokens read and written, which give the cache hit rate.
     """
     table = get_bot_table_client()
     logger.info(f"Updating usage stats for bot: {bot_id}")
@@ -281,8 +324,17 @@ def update_bot_stats(owner_user_id: str, bot_id: str, increment: int):
     try:
         response = table.update_item(
             Key={"PK": owner_user_id, "SK": compose_sk(bot_id, "bot")},
-            UpdateExpression="SET UsageStats.usage_count = if_not_exists(UsageStats.usage_count, :zero) + :val",
-            ExpressionAttributeValues={":zero": 0, ":val": increment},
+            UpdateExpression=(
+                "SET UsageStats.usage_count = if_not_exists(UsageStats.usage_count, :zero) + :val, "
+                "UsageStats.cache_read_input_tokens = if_not_exists(UsageStats.cache_read_input_tokens, :zero) + :cache_read, "
+                "UsageStats.cache_write_input_tokens = if_not_exists(UsageStats.cache_write_input_tokens, :zero) + :cache_write"
+            ),
+            ExpressionAttributeValues={
+                ":zero": 0,
+                ":val": increment,
+                ":cache_read": cache_read_input_tokens,
+                ":cache_write": cache_write_input_tokens,
+            },
             ConditionExpression="attribute_exists(PK) AND attribute_exists(SK)",
             ReturnValues="ALL_NEW",
         )
@@ -297,6 +349,7 @@ def update_bot_stats(owner_user_id: str, bot_id: str, increment: int):
 def update_bot_star_status(user_id: str, bot_id: str, starred: bool):
     """Update starred status for bot."""
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(user_id)
     logger.info(f"Updating starred status for bot: {bot_id}")
 
     key = {"PK": user_id, "SK": compose_sk(bot_id, "bot")}
@@ -324,6 +377,7 @@ def update_bot_star_status(user_id: str, bot_id: str, starred: bool):
 def update_alias_star_status(user_id: str, original_bot_id: str, starred: bool):
     """Update starred status for alias."""
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(user_id)
     logger.info(f"Updating starred status for alias: {original_bot_id}")
 
     key = {"PK": user_id, "SK": compose_sk(original_bot_id, "alias")}
@@ -378,6 +432,94 @@ def update_knowledge_base_id(
     return response
 
 
+def _compose_document_hashes_sk(bot_id: str, data_source_id: str) -> str:
+    # Must not contain "BOT#", as `bot_remove` handles the removal of such items as deleted bots
+    return f"DOCUMENT_HASHES#{bot_id}#{data_source_id}"
+
+
+def find_document_hashes(
+    user_id: str, bot_id: str, data_source_id: str
+) -> dict[str, str]:
+    """Find the content hashes (S3 ETags) of the documents last ingested into the data source.
+    Returns a dict keyed by filename.
+    """
+    table = get_bot_table_client()
+    response = table.get_item(
+        Key={
+            "PK": user_id,
+            "SK": _compose_document_hashes_sk(bot_id, data_source_id),
+        },
+        ProjectionExpression="DocumentHashes",
+    )
+    document_hashes = response.get("Item", {}).get("DocumentHashes")
+    return json.loads(document_hashes) if isinstance(document_hashes, str) else {}
+
+
+def update_document_hashes(
+    user_id: str, bot_id: str, data_source_id: str, document_hashes: dict[str, str]
+):
+    """Replace the content hashes of the documents ingested into the data source.
+    The hashes are stored in an item per bot and data source, apart from the bot item, so that they
+    neither grow the bot item nor conflict with the ingestion into other data sources.
+    The item is written only if the bot exists, and deleted with the bot by `delete_document_hashes`.
+    """
+    client = get_dynamodb_client(table_type="bot")
+    logger.info(f"Updating document hashes for bot: {bot_id}")
+
+    try:
+        client.transact_write_items(
+            TransactItems=[
+                {
+                    "ConditionCheck": {
+                        "TableName": BOT_TABLE_NAME,
+                        "Key": {"PK": user_id, "SK": compose_sk(bot_id, "bot")},
+                        "ConditionExpression": "attribute_exists(PK)",
+                    }
+                },
+                {
+                    "Put": {
+                        "TableName": BOT_TABLE_NAME,
+                        "Item": {
+                            "PK": user_id,
+                            "SK": _compose_document_hashes_sk(bot_id, data_source_id),
+                            # Stored as a JSON string, not a map: items of the bot table are indexed
+                            # to OpenSearch with dynamic mapping, where each filename would become a field.
+                            "DocumentHashes": json.dumps(document_hashes),
+                        },
+                    }
+                },
+            ]
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "TransactionCanceledException" and any(
+            reason.get("Code") == "ConditionalCheckFailed"
+            for reason in e.response.get("CancellationReasons", [])
+        ):
+            raise RecordNotFoundError(f"Bot with id {bot_id} not found")
+        else:
+            raise e
+
+
+def delete_document_hashes(user_id: str, bot_id: str):
+    """Delete the content hashes of the documents of the bot in all data sources."""
+    table = get_bot_table_client()
+    query_params = {
+        "KeyConditionExpression": Key("PK").eq(user_id)
+        & Key("SK").begins_with(_compose_document_hashes_sk(bot_id, "")),
+        "ProjectionExpression": "PK, SK",
+    }
+    with table.batch_writer() as batch:
+        while True:
+            response = table.query(**query_params)
+            for item in response["Items"]:
+                batch.delete_item(Key={"PK": item["PK"], "SK": item["SK"]})
+
+            if "LastEvaluatedKey" not in response:
+                break
+
+            query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
 def update_guardrails_params(
     user_id: str, bot_id: str, guardrail_arn: str, guardrail_version: str
 ):
@@ -417,11 +559,14 @@ def update_bot_shared_status(
     table = get_bot_table_client()
     logger.info(f"Updating shared status for bot: {bot_id}")
 
-    update_expression = "SET SharedStatus = :shared_status, AllowedCognitoUsers = :allowed_user_ids, AllowedCognitoGroups = :allowed_group_ids"
+    update_expression = "SET SharedStatus = :shared_status, AllowedCognitoUsers = :allowed_user_ids, AllowedCognitoGroups = :allowed_group_ids, AllowedPrincipals = :allowed_principals"
     expression_attribute_values = {
         ":shared_status": shared_status,
         ":allowed_user_ids": allowed_user_ids,
         ":allowed_group_ids": allowed_group_ids,
+        ":allowed_principals": compose_allowed_principals(
+            allowed_user_ids, allowed_group_ids
+        ),
     }
 
     if shared_scope != "private":
@@ -452,6 +597,7 @@ def update_alias_is_origin_accessible(
 ):
     """Update is_origin_accessible for alias."""
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(user_id)
     logger.info(f"Updating is_origin_accessible for alias: {original_bot_id}")
     try:
         response = table.update_item(
@@ -536,105 +682,139 @@ def find_owned_bots_by_user_id(user_id: str, limit: int | None = None) -> list[B
     return bots
 
 
+def _batch_get_bot_items(client, keys: list[dict]) -> list[dict]:
+    """Batch get bot items by primary keys.
+    `UnprocessedKeys` (e.g. due to throttling) are retried with exponential backoff.
+    """
+    items: list[dict] = []
+    request_items = {BOT_TABLE_NAME: {"Keys": keys}}
+    for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+        if attempt > 0:
+            time.sleep(BATCH_GET_RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+
+        response = client.batch_get_item(RequestItems=request_items)
+        items.extend(response.get("Responses", {}).get(BOT_TABLE_NAME, []))
+
+        request_items = response.get("UnprocessedKeys")
+        if not request_items:
+            return items
+
+        logger.info(
+            f"Retrying {len(request_items[BOT_TABLE_NAME]['Keys'])} unprocessed keys"
+        )
+
+    raise Exception(
+        f"Failed to get {len(request_items[BOT_TABLE_NAME]['Keys'])} bots after {BATCH_GET_MAX_RETRIES} retries"
+    )
+
+
 def __find_bots_with_condition(
     query_params: dict,
-    max_query_count: int = 5,
+    max_query_count: int = MAX_BOT_LIST_QUERY_PAGES,
 ) -> list[BotMeta]:
-    """Find all bots with the given query parameters.
+    """Find all bots with the given query parameters, up to `max_query_count` pages.
     Process summary:
-    1. Query bots with the given query parameters.
+    1. Query bots with the given query parameters. The next page is prefetched while processing the current one.
     2. Separate bots and aliases.
     3. Process direct bot items.
-    4. Process aliases. Batch get their original bots using DynamoDB client.
+    4. Process aliases. Batch get their original bots concurrently using DynamoDB client.
     5. If original bot is not found, create a BotMeta object with `is_origin_accessible=False`.
     """
-    client = get_dynamodb_client(
-        table_type="bot"
-    )  # Use DynamoDB client for batch_get_item
-    table = get_bot_table_client()
-    bots = []
-    query_count = 0
+    # Use DynamoDB client for batch_get_item, which is thread-safe unlike the table resource
+    client = get_dynamodb_client(table_type="bot")
 
-    while query_count < max_query_count:
-        query_count += 1
-        response = table.query(**query_params)
+    def _query_page(exclusive_start_key: dict | None) -> dict:
+        params = {"TableName": BOT_TABLE_NAME, **query_params}
+        if exclusive_start_key:
+            params["ExclusiveStartKey"] = exclusive_start_key
+        return client.query(**params)
 
-        # Separate bots and aliases
-        bot_items = []
-        alias_items = []
-        for item in response["Items"]:
-            if "BOT" in item["ItemType"]:  # Direct bot
-                bot_items.append(item)
-            else:  # Alias
-                alias_items.append(item)
-
-        # Process direct bot items
-        for item in bot_items:
-            bots.append(
-                BotMeta.from_dynamo_item(item, owned=True, is_origin_accessible=True)
-            )
-
-        # Process aliases and batch get original bots
-        if alias_items:
-            original_bot_ids = [item["OriginalBotId"] for item in alias_items]
-
-            for i in range(0, len(original_bot_ids), TRANSACTION_BATCH_READ_SIZE):
-                batch_ids = original_bot_ids[i : i + TRANSACTION_BATCH_READ_SIZE]
-                batch_aliases = alias_items[i : i + TRANSACTION_BATCH_READ_SIZE]
-                request_items = {
-                    table.table_name: {
-                        "Keys": [
+    bots = []
+    pending_aliases: list[tuple[list[dict], list[Future[list[dict]]]]] = []
+    # Pages are queried by their own worker, so that prefetching the next page does not wait for batch gets.
+    with (
+        ThreadPoolExecutor(max_workers=1) as page_executor,
+        ThreadPoolExecutor(max_workers=MAX_CONCURRENT_BATCH_GET) as executor,
+    ):
+        page_future: Future[dict] | None = page_executor.submit(_query_page, None)
+        query_count = 1
+        while page_future is not None:
+            response = page_future.result()
+            page_future = None
+            if "LastEvaluatedKey" in response:
+                if query_count < max_query_count:
+                    page_future = page_executor.submit(
+                        _query_page, response["LastEvaluatedKey"]
+                    )
+                    query_count += 1
+                else:
+                    logger.warning(
+                        f"Reached the maximum query count ({max_query_count}). "
+                        "Some bots might not have been retrieved."
+                    )
+
+            # Separate bots and aliases
+            alias_items = []
+            for item in response["Items"]:
+                if "BOT" in item["ItemType"]:  # Direct bot
+                    bots.append(
+                        BotMeta.from_dynamo_item(
+                            item, owned=True, is_origin_accessible=True
+                        )
+                    )
+                else:  # Alias
+                    alias_items.append(item)
+
+            # Start batch getting original bots of aliases without waiting for the results
+            if alias_items:
+                batch_futures = [
+                    executor.submit(
+                        _batch_get_bot_items,
+                        client,
+                        [
                             {
                                 "PK": alias["OwnerUserId"],
-                                "SK": compose_sk(bot_id, "bot"),
+                                "SK": compose_sk(alias["OriginalBotId"], "bot"),
                             }
-                            for alias, bot_id in zip(batch_aliases, batch_ids)
-                        ]
-                    }
-                }
-                original_bots_response = client.batch_get_item(
-                    RequestItems=request_items
-                )
-
-                # Create a map of original bot details
-                original_bot_map = {
-                    item.get("BotId"): item
-                    for item in original_bots_response.get("Responses", {}).get(
-                        table.table_name, []
+                            for alias in alias_items[
+                                i : i + TRANSACTION_BATCH_READ_SIZE
+                            ]
+                        ],
                     )
-                }
-
-                # Create BotMeta objects for aliases
-                for alias in alias_items[i : i + TRANSACTION_BATCH_READ_SIZE]:
-                    original_bot = original_bot_map.get(alias["OriginalBotId"])
-                    if original_bot:
-                        bots.append(
-                            BotMeta.from_dynamo_item(
-                                original_bot,
-                                owned=False,
-                                is_origin_accessible=alias.get(
-                                    "IsOriginAccessible", False
-                                ),
-                                is_starred=alias.get("IsStarred", False),
-                            )
+                    for i in range(0, len(alias_items), TRANSACTION_BATCH_READ_SIZE)
+                ]
+                pending_aliases.append((alias_items, batch_futures))
+
+        for alias_items, batch_futures in pending_aliases:
+            # Create a map of original bot details
+            original_bot_map = {
+                item["BotId"]: item
+                for future in batch_futures
+                for item in future.result()
+            }
+
+            # Create BotMeta objects for aliases
+            for alias in alias_items:
+                original_bot = original_bot_map.get(alias["OriginalBotId"])
+                if original_bot:
+                    bots.append(
+                        BotMeta.from_dynamo_item(
+                            original_bot,
+                            owned=False,
+                            is_origin_accessible=alias.get("IsOriginAccessible", False),
+                            is_starred=alias.get("IsStarred", False),
                         )
-                    else:
-                        # If original bot is not found, create a BotMeta object with `is_origin_accessible=False`
-                        bots.append(
-                            BotMeta.from_dynamo_alias_item(
-                                alias,
-                                owned=False,
-                                is_origin_accessible=False,
-                                is_starred=alias.get("IsStarred", False),
-                            )
+                    )
+                else:
+                    # If original bot is not found, create a BotMeta object with `is_origin_accessible=False`
+                    bots.append(
+                        BotMeta.from_dynamo_alias_item(
+                            alias,
+                            owned=False,
+                            is_origin_accessible=False,
+                            is_starred=alias.get("IsStarred", False),
                         )
-
-        if "LastEvaluatedKey" not in response:
-            break
-        query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
-
-    if query_count == max_query_count:
-        logger.warning("There are more bots than the query limit.")
+                    )
 
     return bots
 
@@ -650,12 +830,15 @@ def find_starred_bots_by_user_id(
         "KeyConditionExpression": Key("PK").eq(user_id) & Key("IsStarred").eq("TRUE"),
     }
 
-    bots = __find_bots_with_condition(query_params)
+    bots = _bot_list_cache.get(("starred", user_id))
+    if bots is None:
+        bots = __find_bots_with_condition(query_params)
+        # Sort bots by last used time
+        bots.sort(key=lambda x: x.last_used_time, reverse=True)
+        _bot_list_cache.set(("starred", user_id), bots)
 
-    # Sort bots by last used time
-    bots.sort(key=lambda x: x.last_used_time, reverse=True)
-    if limit:
-        bots = bots[:limit]
+    # Copy to keep the cached list intact
+    bots = bots[:limit] if limit else bots[:]
 
     logger.info(f"Found all starred {len(bots)} bots.")
     return bots
@@ -673,12 +856,15 @@ def find_recently_used_bots_by_user_id(
         "ScanIndexForward": False,
     }
 
-    bots = __find_bots_with_condition(query_params)
+    bots = _bot_list_cache.get(("recently_used", user_id))
+    if bots is None:
+        bots = __find_bots_with_condition(query_params)
+        # Sort bots by last used time
+        bots.sort(key=lambda x: x.last_used_time, reverse=True)
+        _bot_list_cache.set(("recently_used", user_id), bots)
 
-    # Sort bots by last used time
-    bots.sort(key=lambda x: x.last_used_time, reverse=True)
-    if limit:
-        bots = bots[:limit]
+    # Copy to keep the cached list intact
+    bots = bots[:limit] if limit else bots[:]
 
     logger.info(f"Found all recently used {len(bots)} bots.")
     return bots
@@ -698,10 +884,39 @@ def find_bot_by_id(bot_id: str) -> BotModel:
 
     bot = BotModel.from_dynamo_item(items[0])
 
-    logger.info(f"Found bot: {bot}")
+    logger.info("Found bot: %s", log_payload(bot))
     return bot
 
 
+def find_bot_metas_by_ids(bot_ids: list[str]) -> dict[str, BotMetaWithStackInfo]:
+    """Find bot metadata by a list of bot ids and return a dict keyed by bot id.
+    Bot ids do not identify the primary key (owner user id is required), so `BotIdIndex` is queried
+    for each bot with bounded concurrency. Bots not found are omitted.
+    """
+    # Use DynamoDB client, which is thread-safe unlike the table resource
+    client = get_dynamodb_client(table_type="bot")
+
+    def _query_bot_item(bot_id: str) -> dict | None:
+        response = client.query(
+            TableName=BOT_TABLE_NAME,
+            IndexName="BotIdIndex",
+            KeyConditionExpression=Key("BotId").eq(bot_id),
+        )
+        items = response["Items"]
+        return items[0] if items else None
+
+    unique_bot_ids = list(dict.fromkeys(bot_ids))
+    logger.info(f"Finding {len(unique_bot_ids)} bots by ids")
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_BOT_QUERIES) as executor:
+        items = executor.map(_query_bot_item, unique_bot_ids)
+
+    return {
+        item["BotId"]: BotMetaWithStackInfo.from_dynamo_item(item)
+        for item in items
+        if item is not None
+    }
+
+
 def find_queued_bots() -> list[BotModel]:
     """Find all 'QUEUED' bots."""
     bot_table = get_bot_table_client()
@@ -724,6 +939,29 @@ def find_queued_bots() -> list[BotModel]:
     return bots
 
 
+def find_bots_by_knowledge_base_id(knowledge_base_id: str) -> list[BotModel]:
+    """Find all bots using the Knowledge Base, i.e. all tenants of a shared Knowledge Base."""
+    bot_table = get_bot_table_client()
+    bots: list[BotModel] = []
+    scan_params = {
+        "FilterExpression": Attr("BedrockKnowledgeBase.knowledge_base_id").eq(
+            knowledge_base_id
+        ),
+    }
+    while True:
+        response = bot_table.scan(**scan_params)
+        items = response["Items"]
+        bots.extend(BotModel.from_dynamo_item(item) for item in items)
+
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        if last_evaluated_key is None:
+            break
+
+        scan_params["ExclusiveStartKey"] = last_evaluated_key
+
+    return bots
+
+
 def find_pinned_public_bots() -> list[BotMeta]:
     """Find all pinned bots."""
     table = get_bot_table_client()
@@ -809,6 +1047,7 @@ def delete_bot_publication(owner_user_id: str, bot_id: str):
 
 def delete_bot_by_id(owner_user_id: str, bot_id: str):
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(owner_user_id)
     logger.info(f"Deleting bot with id: {bot_id}")
 
     try:
@@ -827,6 +1066,7 @@ def delete_bot_by_id(owner_user_id: str, bot_id: str):
 
 def delete_alias_by_id(user_id: str, bot_id: str):
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(user_id)
     logger.info(f"Deleting alias with id: {bot_id}")
 
     try:
@@ -846,6 +1086,7 @@ def delete_alias_by_id(user_id: str, bot_id: str):
 def remove_bot_last_used_time(user_id: str, bot_id: str):
     """Remove last used time for bot to exclude it from recently used bots."""
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(user_id)
     logger.info(f"Removing last used time for bot: {bot_id}")
     try:
         response = table.update_item(
@@ -864,6 +1105,7 @@ def remove_bot_last_used_time(user_id: str, bot_id: str):
 def remove_alias_last_used_time(user_id: str, original_bot_id: str):
     """Remove last used time for alias to exclude it from recently used bots."""
     table = get_bot_table_client()
+    _invalidate_bot_list_cache(user_id)
     logger.info(f"Removing last used time for alias: {original_bot_id}")
     try:
         response = table.update_item(
@@ -929,22 +1171,7 @@ def find_all_published_bots(
 
     response = table.query(**query_params)
 
-    bots = [
-        BotMetaWithStackInfo(
-            id=item["BotId"],
-            title=item["Title"],
-            description=item["Description"],
-            create_time=float(item["CreateTime"]),
-            last_used_time=float(item.get("LastUsedTime", item["CreateTime"])),
-            sync_status=item["SyncStatus"],
-            owner_user_id=item["PK"],
-            published_api_stack_name=item.get("ApiPublishmentStackName", None),
-            published_api_datetime=item.get("ApiPublishedDatetime", None),
-            shared_scope=item.get("SharedScope", "private"),
-            shared_status=item.get("SharedStatus"),
-        )
-        for item in response["Items"]
-    ]
+    bots = [BotMetaWithStackInfo.from_dynamo_item(item) for item in response["Items"]]
 
     next_token = None
     if "LastEvaluatedKey" in response:
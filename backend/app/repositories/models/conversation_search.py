@@ -26,6 +26,8 @@ class ConversationSearchModel(BaseModel):
     bot_id: str | None
     last_updated_time: float = Field(default=0.0)
     highlights: list[SearchHighlightModel] | None = None
+    # Opaque cursor to fetch the next page
+    search_cursor: str | None = None
 
     @classmethod
     def from_opensearch_response(cls, hit: dict) -> Self:
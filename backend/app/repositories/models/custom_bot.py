@@ -260,6 +260,8 @@ ToolModel = Annotated[
 
 class AgentModel(BaseModel):
     tools: list[ToolModel]
+    # Seconds which tools and retrieval may take in a turn, see `app.time_budget`
+    turn_time_budget: int | None = None
 
     @field_validator("tools", mode="before")
     def handle_legacy_tools(cls, v):
@@ -294,7 +296,7 @@ class AgentModel(BaseModel):
             elif tool_input.tool_type == "bedrock_agent":
                 tools.append(BedrockAgentToolModel.from_tool_input(tool_input))
 
-        return cls(tools=tools)
+        return cls(tools=tools, turn_time_budget=agent_input.turn_time_budget)
 
     def to_agent(self) -> Agent:
         """Convert to Agent schema while preserving secure strings."""
@@ -340,7 +342,7 @@ class AgentModel(BaseModel):
                     )
                 )
 
-        return Agent(tools=tools)
+        return Agent(tools=tools, turn_time_budget=self.turn_time_budget)
 
 
 class ConversationQuickStarterModel(BaseModel):
@@ -352,6 +354,12 @@ class UsageStatsModel(BaseModel):
     usage_count: int = Field(
         ..., description="The number of times the bot has been used."
     )
+    cache_read_input_tokens: int = Field(
+        default=0, description="The number of input tokens read from prompt cache."
+    )
+    cache_write_input_tokens: int = Field(
+        default=0, description="The number of input tokens written to prompt cache."
+    )
 
 
 class BotModel(BaseModel):
@@ -929,6 +937,9 @@ class BotMeta(BaseModel):
     # This can be `False` if the bot is not owned by the user and original bot is removed or not permitted to use.
     is_origin_accessible: bool
 
+    # Opaque cursor to fetch the next page. Only set for bot-store search results.
+    search_cursor: str | None = None
+
     # is_public: bool
     # # Whether the bot is available or not.
     # # This can be `False` if the bot is not owned by the user and original bot is removed.
@@ -1051,6 +1062,7 @@ class BotMeta(BaseModel):
             sync_status=self.sync_status,
             shared_scope=self.shared_scope,
             shared_status=self.shared_status,
+            search_cursor=self.search_cursor,
         )
 
 
@@ -1066,3 +1078,19 @@ class BotMetaWithStackInfo(BaseModel):
     published_api_datetime: int | None
     shared_scope: type_shared_scope
     shared_status: str
+
+    @classmethod
+    def from_dynamo_item(cls, item: dict) -> Self:
+        return cls(
+            id=item["BotId"],
+            title=item["Title"],
+            description=item["Description"],
+            create_time=float(item["CreateTime"]),
+            last_used_time=float(item.get("LastUsedTime", item["CreateTime"])),
+            sync_status=item["SyncStatus"],
+            owner_user_id=item["PK"],
+            published_api_stack_name=item.get("ApiPublishmentStackName", None),
+            published_api_datetime=item.get("ApiPublishedDatetime", None),
+            shared_scope=item.get("SharedScope", "private"),
+            shared_status=item.get("SharedStatus", "private"),
+        )
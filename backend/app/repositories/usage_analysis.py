@@ -3,14 +3,18 @@ import logging
 import os
 import re
 import time
-from datetime import date, timedelta
-from functools import partial
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import cache, partial
 from typing import Any
 
 import boto3
-from app.repositories.common import get_bot_table_client
+from app.cache import TTLCache
+from app.repositories.custom_bot import find_bot_metas_by_ids
 from app.repositories.models.custom_bot import BotMetaWithStackInfo
 from app.repositories.models.usage_analysis import UsagePerBot, UsagePerUser
+from app.repositories.user import find_user_by_id, find_users_by_ids
 from boto3.dynamodb.conditions import Attr, Key
 
 REGION = os.environ.get("REGION", "us-east-1")
@@ -24,84 +28,71 @@ USAGE_ANALYSIS_WORKGROUP = os.environ.get(
 USAGE_ANALYSIS_OUTPUT_LOCATION = os.environ.get(
     "USAGE_ANALYSIS_OUTPUT_LOCATION", "s3://bedrockchatstack-athena-results"
 )
-USER_POOL_ID = os.environ.get("USER_POOL_ID", "us-east-1_XXXXXXXXX")
+# Hourly per-bot / per-user cost rollups produced by `s3_exporter`.
+# If not set, usage is aggregated from the raw export by Athena.
+USAGE_ROLLUP_TABLE_NAME = os.environ.get("USAGE_ROLLUP_TABLE_NAME", "")
 QUERY_LIMIT = 1000
-
+# Athena reuses the result of an identical query run within this period.
+ATHENA_RESULT_REUSE_MAX_AGE_MINUTES = 60
+# Results are also cached in the container, keyed by normalized SQL.
+ATHENA_RESULT_CACHE_TTL = int(os.environ.get("ATHENA_RESULT_CACHE_TTL", "300"))
+# Polling interval of query status
+ATHENA_POLL_INITIAL_DELAY = 0.2
+ATHENA_POLL_MAX_DELAY = 5.0
+
+_athena_result_cache: TTLCache[str, list[dict]] = TTLCache(
+    ttl=ATHENA_RESULT_CACHE_TTL, maxsize=256
+)
 
 logger = logging.getLogger(__name__)
-athena = boto3.client("athena")
+
+
+@cache
+def _get_athena_client():
+    # Created on first use to keep it out of the cold start
+    return boto3.client("athena")
+
+
+@cache
+def _get_dynamodb_client():
+    # Shared by the executor threads querying rollups; unlike resources, clients are thread-safe
+    return boto3.client("dynamodb", region_name=REGION)
 
 
 def _find_cognito_user_by_id(user_id: str) -> dict | None:
     """Find user by id from cognito."""
-    cognito = boto3.client("cognito-idp")
-    try:
-        response = cognito.admin_get_user(UserPoolId=USER_POOL_ID, Username=user_id)
-    except cognito.exceptions.UserNotFoundException:
+    user = find_user_by_id(user_id)
+    if user is None:
         return None
-    user_attributes = response["UserAttributes"]
-
-    email = next(
-        (attr["Value"] for attr in user_attributes if attr["Name"] == "email"), None
-    )
 
     return {
         "id": user_id,
-        "email": email,
+        "email": user.email,
     }
 
 
 async def _find_cognito_users_by_ids(user_ids: list[str]) -> list[dict]:
-    """Find users by ids from cognito."""
+    """Find users by ids from cognito.
+    Users are resolved from the user directory cache. See `find_users_by_ids`.
+    """
     loop = asyncio.get_running_loop()
-    tasks = [
-        loop.run_in_executor(None, partial(_find_cognito_user_by_id, user_id))
+    users = await loop.run_in_executor(None, partial(find_users_by_ids, user_ids))
+    return [
+        {"id": user_id, "email": users[user_id].email}
         for user_id in user_ids
+        if user_id in users
     ]
-    results = await asyncio.gather(*tasks)
-    return [result for result in results if result is not None]
-
-
-async def _query_bot_by_id(bot_id: str) -> list[dict]:
-    """Query DynamoDB to find a public bot by bot_id."""
-    table = get_bot_table_client()
-    response = table.query(
-        IndexName="BotIdIndex",
-        KeyConditionExpression=Key("BotId").eq(bot_id),
-    )
-    return response["Items"]
 
 
 async def _find_bots_by_ids(bot_ids: list[str]) -> dict[str, BotMetaWithStackInfo]:
     """Find bot metadata by a list of bot ids and return a dict keyed by bot_id."""
     loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, partial(find_bot_metas_by_ids, bot_ids))
 
-    tasks = []
-    for bot_id in bot_ids:
-        tasks.append(loop.run_in_executor(None, _query_bot_by_id, bot_id))
-
-    results = await asyncio.gather(*tasks)
-
-    bots_dict = {}
-    for items_result in results:
-        items = await items_result  # Await the coroutine to get the actual items
-        for item in items:
-            bot_obj = BotMetaWithStackInfo(
-                id=item["BotId"],
-                title=item["Title"],
-                description=item["Description"],
-                create_time=float(item["CreateTime"]),
-                last_used_time=float(item.get("LastUsedTime", item["CreateTime"])),
-                sync_status=item["SyncStatus"],
-                owner_user_id=item["PK"],
-                published_api_stack_name=item.get("ApiPublishmentStackName", None),
-                published_api_datetime=item.get("ApiPublishedDatetime", None),
-                shared_scope=item.get("SharedScope", "private"),
-                shared_status=item.get("SharedStatus", "private"),
-            )
-            bots_dict[item["BotId"]] = bot_obj
 
-    return bots_dict
+def _normalize_query(query: str) -> str:
+    """Normalize whitespace so that the same query composed differently shares the cache."""
+    return " ".join(query.split())
 
 
 async def run_athena_query(
@@ -109,52 +100,74 @@ async def run_athena_query(
     database: str,
     workgroup: str,
     output_location: str,
-    query_limit: int = QUERY_LIMIT,
-):
-    """Run athena query."""
-    query_execution = athena.start_query_execution(
+    page_size: int = QUERY_LIMIT,
+) -> list[dict]:
+    """Run athena query and return all result rows, including the header row.
+    - Identical queries are served from the in-container cache, or reused by Athena.
+    - Query status is polled with exponential backoff.
+    - Results are paginated, so more than `QUERY_LIMIT` rows can be returned.
+    """
+    cache_key = _normalize_query(query)
+    cached_rows = _athena_result_cache.get(cache_key)
+    if cached_rows is not None:
+        logger.debug("Using cached athena query result")
+        return cached_rows
+
+    query_execution = _get_athena_client().start_query_execution(
         QueryString=query,
         QueryExecutionContext={"Database": database},
         WorkGroup=workgroup,
         ResultConfiguration={
             "OutputLocation": output_location,
         },
+        ResultReuseConfiguration={
+            "ResultReuseByAgeConfiguration": {
+                "Enabled": True,
+                "MaxAgeInMinutes": ATHENA_RESULT_REUSE_MAX_AGE_MINUTES,
+            }
+        },
     )
     execution_id = query_execution["QueryExecutionId"]
     logger.debug(f"query_execution_id: {execution_id}")
 
     # Wait until query completed
+    delay = ATHENA_POLL_INITIAL_DELAY
     while True:
-        query_execution = athena.get_query_execution(QueryExecutionId=execution_id)
+        query_execution = _get_athena_client().get_query_execution(
+            QueryExecutionId=execution_id
+        )
         status = query_execution["QueryExecution"]["Status"]["State"]
         logger.debug(f"status: {status}")
         if status == "SUCCEEDED":
             break
-        elif status == "FAILED":
-            reason = query_execution["QueryExecution"]["Status"]["StateChangeReason"]
+        elif status in ("FAILED", "CANCELLED"):
+            reason = query_execution["QueryExecution"]["Status"].get(
+                "StateChangeReason", status
+            )
             logger.error(f"query failed.")
             raise Exception(reason)
         else:
-            await asyncio.sleep(1)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, ATHENA_POLL_MAX_DELAY)
 
     # Get query results
-    results = athena.get_query_results(
-        QueryExecutionId=execution_id, MaxResults=query_limit
-    )
-    return results
+    rows: list[dict] = []
+    params: dict[str, Any] = {"QueryExecutionId": execution_id, "MaxResults": page_size}
+    while True:
+        results = _get_athena_client().get_query_results(**params)
+        rows.extend(results["ResultSet"]["Rows"])
+        if "NextToken" not in results:
+            break
+        params["NextToken"] = results["NextToken"]
 
+    _athena_result_cache.set(cache_key, rows)
+    return rows
 
-async def find_bots_sorted_by_price(
-    limit: int = 20,
-    from_: str | None = None,
-    to_: str | None = None,
-) -> list[UsagePerBot]:
-    """Find bots sorted by price. This is intended to be used by admin.
-    - start: start date of the period to be analyzed. The format is `YYYYMMDDHH`.
-    - end: end date of the period to be analyzed. The format is `YYYYMMDDHH`.
-    """
-    assert 1 <= limit <= 1000, "Limit must be between 1 and 1000."
 
+def _compose_period(from_: str | None, to_: str | None) -> tuple[str, str]:
+    """Convert `YYYYMMDDHH` period into `YYYY/MM/DD/HH` format of `datehour` partition.
+    If omitted, today's period is returned.
+    """
     assert (from_ and to_) or (
         not from_ and not to_
     ), "Both from_ and to_ must be specified or omitted."
@@ -167,79 +180,181 @@ async def find_bots_sorted_by_price(
         from_str = today.strftime("%Y/%m/%d/00")
         to_str = today.strftime("%Y/%m/%d/23")
 
-    # To avoid duplication of conversation, apply most the latest conversation by using subquery
+    return from_str, to_str
+
+
+def _query_rollup_day(pk: str, lower_hour: str, upper_hour: str) -> list[dict]:
+    """Query hourly rollup items of a day."""
+    query_params: dict[str, Any] = {
+        "TableName": USAGE_ROLLUP_TABLE_NAME,
+        "KeyConditionExpression": "PK = :pk AND SK BETWEEN :lower AND :upper",
+        "ExpressionAttributeValues": {
+            ":pk": {"S": pk},
+            ":lower": {"S": f"{lower_hour}#"},
+            ":upper": {"S": f"{upper_hour}#\uffff"},
+        },
+        "ProjectionExpression": "Id, TotalPrice",
+    }
+    items = []
+    while True:
+        response = _get_dynamodb_client().query(**query_params)
+        items.extend(
+            {
+                "Id": item["Id"]["S"],
+                "TotalPrice": Decimal(item["TotalPrice"]["N"]),
+            }
+            for item in response["Items"]
+        )
+        if "LastEvaluatedKey" not in response:
+            break
+        query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return items
+
+
+async def _find_rollup_sorted_by_price(
+    dimension: str, from_str: str, to_str: str, limit: int
+) -> list[tuple[str, float]]:
+    """Sum hourly rollups over the period and return `(id, total_price)` sorted by price.
+    Days are queried concurrently, so any period is answered in a few DynamoDB round-trips.
+    """
+    from_datehour = datetime.strptime(from_str, "%Y/%m/%d/%H")
+    to_datehour = datetime.strptime(to_str, "%Y/%m/%d/%H")
+
+    loop = asyncio.get_running_loop()
+    tasks = []
+    day = from_datehour.date()
+    while day <= to_datehour.date():
+        lower_hour = (
+            from_datehour.strftime("%H") if day == from_datehour.date() else "00"
+        )
+        upper_hour = to_datehour.strftime("%H") if day == to_datehour.date() else "23"
+        tasks.append(
+            loop.run_in_executor(
+                None,
+                partial(
+                    _query_rollup_day,
+                    f"{dimension}#{day.strftime('%Y/%m/%d')}",
+                    lower_hour,
+                    upper_hour,
+                ),
+            )
+        )
+        day += timedelta(days=1)
+
+    total_prices: dict[str, Decimal] = defaultdict(Decimal)
+    for items in await asyncio.gather(*tasks):
+        for item in items:
+            total_prices[item["Id"]] += item["TotalPrice"]
+
+    sorted_prices = sorted(total_prices.items(), key=lambda x: x[1], reverse=True)
+    return [(id, float(price)) for id, price in sorted_prices[:limit]]
+
+
+async def _find_bot_prices_by_athena(
+    from_str: str, to_str: str, limit: int
+) -> list[tuple[str, float]]:
+    """Aggregate the cost incurred in the period per bot from the raw export."""
+    # Each hourly export has the images of a conversation at the start and the end of the hour,
+    # so the differences of `TotalPrice` sum up to the cost incurred in the period.
+    # This is the same quantity as the rollup computed by `s3_exporter`.
     query = f"""
-WITH LatestRecords AS (
-    SELECT
-        newimage.BotId.S AS BotId,
-        newimage.SK.S AS SK,
-        MAX(datehour) AS LatestDateHour
-    FROM
-        {USAGE_ANALYSIS_DATABASE}.{USAGE_ANALYSIS_TABLE}
-    WHERE
-        datehour BETWEEN '{from_str}' AND '{to_str}'
-        AND Keys.SK.S LIKE CONCAT(Keys.PK.S, '#CONV#%')
-    GROUP BY
-        newimage.BotId.S,
-        newimage.SK.S
-),
-PreAggregatedData AS (
-    SELECT
-        d.newimage.BotId.S AS BotId,
-        d.newimage.SK.S AS SK,
-        d.datehour,
-        d.newimage.TotalPrice.N AS TotalPrice
-    FROM
-        {USAGE_ANALYSIS_DATABASE}.{USAGE_ANALYSIS_TABLE} d
-    WHERE
-        datehour BETWEEN '{from_str}' AND '{to_str}'
-        AND d.Keys.SK.S LIKE CONCAT(d.Keys.PK.S, '#CONV#%')
-),
-AggregatedData AS (
-    SELECT
-        p.BotId,
-        p.TotalPrice
-    FROM
-        PreAggregatedData p
-    JOIN
-        LatestRecords lr ON p.BotId = lr.BotId AND p.SK = lr.SK AND p.datehour = lr.LatestDateHour
-)
 SELECT
-    BotId,
-    SUM(TotalPrice) AS TotalPrice
+    newimage.BotId.S AS BotId,
+    SUM(COALESCE(newimage.TotalPrice.N, 0) - COALESCE(oldimage.TotalPrice.N, 0)) AS TotalPrice
 FROM
-    AggregatedData
+    {USAGE_ANALYSIS_DATABASE}.{USAGE_ANALYSIS_TABLE}
+WHERE
+    datehour BETWEEN '{from_str}' AND '{to_str}'
+    AND Keys.SK.S LIKE CONCAT(Keys.PK.S, '#CONV#%')
+    AND newimage.PK.S IS NOT NULL
 GROUP BY
-    BotId
+    newimage.BotId.S
 ORDER BY
     TotalPrice DESC
 LIMIT {limit};
 """
 
     logger.debug(query)
-    response = await run_athena_query(
+    result_rows = await run_athena_query(
         query,
         USAGE_ANALYSIS_DATABASE,
         USAGE_ANALYSIS_WORKGROUP,
         USAGE_ANALYSIS_OUTPUT_LOCATION,
     )
-    rows = response["ResultSet"]["Rows"][1:]
+    # Skip the header row
+    rows = result_rows[1:]
 
-    bot_ids = [
-        row["Data"][0].get("VarCharValue", "")
+    return [
+        (row["Data"][0]["VarCharValue"], float(row["Data"][1].get("VarCharValue", 0)))
         for row in rows
         if row["Data"][0].get("VarCharValue", None) is not None
     ]
 
+
+async def _find_user_prices_by_athena(
+    from_str: str, to_str: str, limit: int
+) -> list[tuple[str, float]]:
+    """Aggregate the cost incurred in the period per user from the raw export."""
+    # Same aggregation as `_find_bot_prices_by_athena`
+    query = f"""
+SELECT
+    newimage.PK.S AS UserId,
+    SUM(COALESCE(newimage.TotalPrice.N, 0) - COALESCE(oldimage.TotalPrice.N, 0)) AS TotalPrice
+FROM
+    {USAGE_ANALYSIS_DATABASE}.{USAGE_ANALYSIS_TABLE}
+WHERE
+    datehour BETWEEN '{from_str}' AND '{to_str}'
+    AND Keys.SK.S LIKE CONCAT(Keys.PK.S, '#CONV#%')
+    AND newimage.PK.S IS NOT NULL
+GROUP BY
+    newimage.PK.S
+ORDER BY
+    TotalPrice DESC
+LIMIT {limit};
+"""
+
+    logger.debug(query)
+    result_rows = await run_athena_query(
+        query,
+        USAGE_ANALYSIS_DATABASE,
+        USAGE_ANALYSIS_WORKGROUP,
+        USAGE_ANALYSIS_OUTPUT_LOCATION,
+    )
+    # Skip the header row
+    rows = result_rows[1:]
+
+    return [
+        (row["Data"][0]["VarCharValue"], float(row["Data"][1].get("VarCharValue", 0)))
+        for row in rows
+        if row["Data"][0].get("VarCharValue", None) is not None
+    ]
+
+
+async def find_bots_sorted_by_price(
+    limit: int = 20,
+    from_: str | None = None,
+    to_: str | None = None,
+) -> list[UsagePerBot]:
+    """Find bots sorted by price. This is intended to be used by admin.
+    - start: start date of the period to be analyzed. The format is `YYYYMMDDHH`.
+    - end: end date of the period to be analyzed. The format is `YYYYMMDDHH`.
+    The price is the cost incurred in the period, read from hourly rollups if the rollup table is configured.
+    """
+    assert 1 <= limit <= 1000, "Limit must be between 1 and 1000."
+
+    from_str, to_str = _compose_period(from_, to_)
+
+    if USAGE_ROLLUP_TABLE_NAME:
+        bot_prices = await _find_rollup_sorted_by_price("BOT", from_str, to_str, limit)
+    else:
+        bot_prices = await _find_bot_prices_by_athena(from_str, to_str, limit)
+
     # Fetch bot meta data directly
-    bots_dict = await _find_bots_by_ids(bot_ids)
+    bots_dict = await _find_bots_by_ids([bot_id for bot_id, _ in bot_prices])
 
     # Join bot meta data and usage data
     bot_usage = []
-    for row in rows:
-        bot_id = row["Data"][0].get("VarCharValue", "")
-        total_price = float(row["Data"][1].get("VarCharValue", 0))
-
+    for bot_id, total_price in bot_prices:
         bot = bots_dict.get(bot_id)
 
         if bot:
@@ -265,91 +380,26 @@ async def find_users_sorted_by_price(
     from_: str | None = None,
     to_: str | None = None,
 ) -> list[UsagePerUser]:
+    """Find users sorted by price. This is intended to be used by admin.
+    The price is the cost incurred in the period, read from hourly rollups if the rollup table is configured.
+    """
     assert 1 <= limit <= 1000, "Limit must be between 1 and 1000."
 
-    assert (from_ and to_) or (
-        not from_ and not to_
-    ), "Both from_ and to_ must be specified or omitted."
+    from_str, to_str = _compose_period(from_, to_)
 
-    if from_ is not None and to_ is not None:
-        from_str = re.sub(r"(\d{4})(\d{2})(\d{2})(\d{2})", r"\1/\2/\3/\4", from_)  # type: ignore
-        to_str = re.sub(r"(\d{4})(\d{2})(\d{2})(\d{2})", r"\1/\2/\3/\4", to_)  # type: ignore
+    if USAGE_ROLLUP_TABLE_NAME:
+        user_prices = await _find_rollup_sorted_by_price(
+            "USER", from_str, to_str, limit
+        )
     else:
-        today = date.today()
-        from_str = today.strftime("%Y/%m/%d/00")
-        to_str = today.strftime("%Y/%m/%d/23")
-
-    # To avoid duplication of conversation, apply most the latest conversation by using subquery
-    query = f"""
-WITH LatestRecords AS (
-    SELECT
-        newimage.PK.S AS UserId,
-        newimage.SK.S AS SK,
-        MAX(datehour) AS LatestDateHour
-    FROM
-        {USAGE_ANALYSIS_DATABASE}.{USAGE_ANALYSIS_TABLE}
-    WHERE
-        datehour BETWEEN '{from_str}' AND '{to_str}'
-        AND Keys.SK.S LIKE CONCAT(Keys.PK.S, '#CONV#%')
-    GROUP BY
-        newimage.PK.S,
-        newimage.SK.S
-),
-PreAggregatedData AS (
-    SELECT
-        d.newimage.PK.S AS UserId,
-        d.newimage.SK.S AS SK,
-        d.datehour,
-        d.newimage.TotalPrice.N AS TotalPrice
-    FROM
-        {USAGE_ANALYSIS_DATABASE}.{USAGE_ANALYSIS_TABLE} d
-    WHERE
-        datehour BETWEEN '{from_str}' AND '{to_str}'
-        AND d.Keys.SK.S LIKE CONCAT(d.Keys.PK.S, '#CONV#%')
-),
-AggregatedData AS (
-    SELECT
-        p.UserId,
-        p.TotalPrice
-    FROM
-        PreAggregatedData p
-    JOIN
-        LatestRecords lr ON p.UserId = lr.UserId AND p.SK = lr.SK AND p.datehour = lr.LatestDateHour
-)
-SELECT
-    UserId,
-    SUM(TotalPrice) AS TotalPrice
-FROM
-    AggregatedData
-GROUP BY
-    UserId
-ORDER BY
-    TotalPrice DESC
-LIMIT {limit};
-"""
-
-    logger.debug(query)
-    response = await run_athena_query(
-        query,
-        USAGE_ANALYSIS_DATABASE,
-        USAGE_ANALYSIS_WORKGROUP,
-        USAGE_ANALYSIS_OUTPUT_LOCATION,
-    )
-    rows = response["ResultSet"]["Rows"][1:]
+        user_prices = await _find_user_prices_by_athena(from_str, to_str, limit)
 
     users = await _find_cognito_users_by_ids(
-        user_ids=[
-            item["Data"][0]["VarCharValue"]
-            for item in rows
-            if item["Data"][0].get("VarCharValue", None) is not None
-        ]
+        user_ids=[user_id for user_id, _ in user_prices]
     )
     users_dict = {user["id"]: user for user in users}
     usages = []
-    for row in rows:
-        user_id = row["Data"][0].get("VarCharValue", "")
-        total_price = float(row["Data"][1].get("VarCharValue", 0))
-
+    for user_id, total_price in user_prices:
         user = users_dict.get(user_id)
         if user:
             usages.append(
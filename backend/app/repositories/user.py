@@ -1,7 +1,10 @@
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 
 import boto3
+from app.cache import TTLCache
 from app.user import UserGroup, UserWithoutGroups
 from botocore.exceptions import ClientError
 from reretry import retry
@@ -10,19 +13,106 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 USER_POOL_ID = os.environ.get("USER_POOL_ID")
+# Users and groups resolved from Cognito are kept in the container for this period.
+USER_DIRECTORY_CACHE_TTL = int(os.environ.get("USER_DIRECTORY_CACHE_TTL", "600"))
+# When more users than this are missing from the cache, the user directory is loaded
+# with `ListUsers` (60 users per call) instead of calling `AdminGetUser` for each user.
+USER_DIRECTORY_LOAD_THRESHOLD = 20
+USER_DIRECTORY_MAX_PAGES = 50
+# Max concurrency of `AdminGetUser` calls for the users not found in the directory.
+MAX_CONCURRENT_GET_USER = 8
 
-client = boto3.client("cognito-idp")
+
+@cache
+def _get_cognito_client():
+    # Created on first use to keep it out of the cold start
+    return boto3.client("cognito-idp")
+
+
+_user_cache: TTLCache[str, UserWithoutGroups] = TTLCache(
+    ttl=USER_DIRECTORY_CACHE_TTL, maxsize=100000
+)
+# Snapshot of the whole user directory. Only set when all users are loaded.
+_user_directory_cache: TTLCache[str, list[UserWithoutGroups]] = TTLCache(
+    ttl=USER_DIRECTORY_CACHE_TTL
+)
+_group_directory_cache: TTLCache[str, list[UserGroup]] = TTLCache(
+    ttl=USER_DIRECTORY_CACHE_TTL
+)
 
 
 class TooManyRequestsError(Exception):
     pass
 
 
+def _has_email(user: dict) -> bool:
+    return any(
+        attr["Name"] == "email"
+        for attr in user.get("Attributes", user.get("UserAttributes", []))
+    )
+
+
+@retry(TooManyRequestsError, tries=3, delay=1)
+def load_user_directory() -> list[UserWithoutGroups]:
+    """Load users page by page with `ListUsers` and put them into the cache.
+    If all users are loaded within `USER_DIRECTORY_MAX_PAGES`, the directory snapshot is cached as well.
+    """
+    users: list[UserWithoutGroups] = []
+    params: dict = {"UserPoolId": USER_POOL_ID, "AttributesToGet": ["email"]}
+
+    try:
+        for _ in range(USER_DIRECTORY_MAX_PAGES):
+            response = _get_cognito_client().list_users(**params)
+            for user in response.get("Users", []):
+                if not _has_email(user):
+                    continue
+                converted_user = UserWithoutGroups.from_cognito_idp_response(user)
+                _user_cache.set(converted_user.id, converted_user)
+                users.append(converted_user)
+
+            pagination_token = response.get("PaginationToken")
+            if not pagination_token:
+                _user_directory_cache.set("users", users)
+                break
+            params["PaginationToken"] = pagination_token
+        else:
+            logger.warning(
+                f"Reached the maximum pages ({USER_DIRECTORY_MAX_PAGES}) of the user directory. "
+                "Remaining users are resolved one by one."
+            )
+
+        logger.info(f"Loaded {len(users)} users into the user directory cache")
+        return users
+    except ClientError as e:
+        # Retry if rate limit.
+        # The quota is 30 RPS for ListUsers.
+        # See: https://docs.aws.amazon.com/cognito/latest/developerguide/quotas.html
+        if e.response["Error"]["Code"] == "TooManyRequestsException":
+            logger.warning(f"Rate limit exceeded. Retrying... Error: {e}")
+            raise TooManyRequestsError()
+        else:
+            raise
+
+
 @retry(TooManyRequestsError, tries=3, delay=1)
 def find_users_by_email_prefix(prefix: str, limit: int = 10) -> list[UserWithoutGroups]:
+    """Find users by email prefix.
+    Served from the user directory snapshot if any user matches, so users added within
+    `USER_DIRECTORY_CACHE_TTL` may be missing from the results. If no user matches,
+    e.g. a user has just been added, Cognito is queried with `Filter`.
+    """
+    directory = _user_directory_cache.get("users")
+    if directory is not None:
+        logger.debug(f"Searching users with email prefix from cache: {prefix}")
+        cached_users = [
+            user for user in directory if user.email.lower().startswith(prefix.lower())
+        ][:limit]
+        if cached_users:
+            return cached_users
+
     try:
         logger.debug(f"Searching users with email prefix: {prefix}")
-        response = client.list_users(
+        response = _get_cognito_client().list_users(
             UserPoolId=USER_POOL_ID, Filter=f'email ^= "{prefix.lower()}"', Limit=limit
         )
         logger.debug(f"Found {len(response['Users'])} users")
@@ -34,6 +124,8 @@ def find_users_by_email_prefix(prefix: str, limit: int = 10) -> list[UserWithout
             UserWithoutGroups.from_cognito_idp_response(user) for user in users
         ]
         logger.debug(f"Converted users: {converted_users}")
+        for converted_user in converted_users:
+            _user_cache.set(converted_user.id, converted_user)
         return converted_users
     except ClientError as e:
         # Retry if rate limit.
@@ -48,6 +140,14 @@ def find_users_by_email_prefix(prefix: str, limit: int = 10) -> list[UserWithout
 
 @retry(TooManyRequestsError, tries=3, delay=1)
 def find_group_by_name_prefix(prefix: str) -> list[UserGroup]:
+    cached_groups = _group_directory_cache.get("groups")
+    if cached_groups is not None:
+        return [
+            group
+            for group in cached_groups
+            if group.name.lower().startswith(prefix.lower())
+        ]
+
     groups = []
     next_token = None
     MAX_ATTEMPTS = 5
@@ -58,7 +158,7 @@ def find_group_by_name_prefix(prefix: str) -> list[UserGroup]:
             if next_token:
                 params["NextToken"] = next_token
 
-            response = client.list_groups(**params)
+            response = _get_cognito_client().list_groups(**params)
             groups.extend(response.get("Groups", []))
 
             next_token = response.get("NextToken")
@@ -71,12 +171,18 @@ def find_group_by_name_prefix(prefix: str) -> list[UserGroup]:
                 "Some groups might not have been retrieved."
             )
 
+        converted_groups = [
+            UserGroup.from_cognito_idp_response(group) for group in groups
+        ]
+        if not next_token:
+            _group_directory_cache.set("groups", converted_groups)
+
         # Cognito client does not support prefix filtering.
         # So we need to filter the groups on client side.
         filtered_groups = [
-            UserGroup.from_cognito_idp_response(group)
-            for group in groups
-            if group["GroupName"].lower().startswith(prefix.lower())
+            group
+            for group in converted_groups
+            if group.name.lower().startswith(prefix.lower())
         ]
         return filtered_groups
 
@@ -93,13 +199,20 @@ def find_group_by_name_prefix(prefix: str) -> list[UserGroup]:
 
 @retry(TooManyRequestsError, tries=3, delay=1)
 def find_user_by_id(id: str) -> UserWithoutGroups | None:
+    cached_user = _user_cache.get(id)
+    if cached_user is not None:
+        return cached_user
+
     try:
         logger.debug(f"get user with id: {id}")
-        response = client.admin_get_user(UserPoolId=USER_POOL_ID, Username=id)
+        response = _get_cognito_client().admin_get_user(
+            UserPoolId=USER_POOL_ID, Username=id
+        )
         logger.debug(response)
 
         converted_user = UserWithoutGroups.from_cognito_idp_response(response)
         logger.debug(f"Converted user: {converted_user}")
+        _user_cache.set(id, converted_user)
 
         return converted_user
     except ClientError as e:
@@ -117,3 +230,41 @@ def find_user_by_id(id: str) -> UserWithoutGroups | None:
 
         else:
             raise
+
+
+def find_users_by_ids(ids: list[str]) -> dict[str, UserWithoutGroups]:
+    """Resolve users by ids and return a dict keyed by user id.
+    Users are resolved from the cache first. If many users are missing, the user directory is loaded,
+    and the rest are fetched by `AdminGetUser` with bounded concurrency.
+    Users not found are omitted.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    users: dict[str, UserWithoutGroups] = {}
+
+    def _resolve_from_cache() -> list[str]:
+        missing_ids = []
+        for id in unique_ids:
+            if id in users:
+                continue
+            cached_user = _user_cache.get(id)
+            if cached_user is not None:
+                users[id] = cached_user
+            else:
+                missing_ids.append(id)
+        return missing_ids
+
+    missing_ids = _resolve_from_cache()
+    if len(missing_ids) > USER_DIRECTORY_LOAD_THRESHOLD:
+        load_user_directory()
+        missing_ids = _resolve_from_cache()
+
+    if missing_ids:
+        logger.debug(f"Resolving {len(missing_ids)} users by AdminGetUser")
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_GET_USER) as executor:
+            for id, user in zip(
+                missing_ids, executor.map(find_user_by_id, missing_ids)
+            ):
+                if user is not None:
+                    users[id] = user
+
+    return users
@@ -7,6 +7,9 @@ from app.routes.schemas.bot import (
     BotInput,
     BotMetaOutput,
     BotModifyInput,
+    BotMultipartUploadCompleteInput,
+    BotMultipartUploadInput,
+    BotMultipartUploadOutput,
     BotOutput,
     BotPresignedUrlOutput,
     BotStarredInput,
@@ -16,11 +19,13 @@ from app.routes.schemas.bot import (
 )
 from app.routes.schemas.conversation import type_model_name
 from app.usecases.bot import (
+    cancel_multipart_upload,
     create_new_bot,
     fetch_all_bots,
     fetch_all_pinned_bots,
     fetch_available_agent_tools,
     fetch_bot_summary,
+    finish_multipart_upload,
     issue_presigned_url,
     modify_bot_visibility,
     modify_owned_bot,
@@ -28,6 +33,7 @@ from app.usecases.bot import (
     remove_bot_by_id,
     remove_bot_from_recently_used,
     remove_uploaded_file,
+    start_multipart_upload,
 )
 from app.user import User
 from fastapi import APIRouter, Depends, Request
@@ -145,6 +151,46 @@ def get_bot_presigned_url(
     return BotPresignedUrlOutput(url=url)
 
 
+@router.post("/bot/{bot_id}/multipart-upload", response_model=BotMultipartUploadOutput)
+def post_bot_multipart_upload(
+    request: Request, bot_id: str, upload_input: BotMultipartUploadInput
+):
+    """Start multipart upload of a large file for bot, and get presigned urls for the parts"""
+    current_user: User = request.state.current_user
+    upload_id, part_urls = start_multipart_upload(
+        current_user,
+        bot_id,
+        upload_input.filename,
+        upload_input.content_type,
+        upload_input.part_count,
+    )
+    return BotMultipartUploadOutput(upload_id=upload_id, part_urls=part_urls)
+
+
+@router.post("/bot/{bot_id}/multipart-upload/complete")
+def complete_bot_multipart_upload(
+    request: Request, bot_id: str, complete_input: BotMultipartUploadCompleteInput
+):
+    """Complete multipart upload of a file for bot"""
+    current_user: User = request.state.current_user
+    finish_multipart_upload(
+        current_user,
+        bot_id,
+        complete_input.filename,
+        complete_input.upload_id,
+        [(part.part_number, part.etag) for part in complete_input.parts],
+    )
+
+
+@router.delete("/bot/{bot_id}/multipart-upload")
+def delete_bot_multipart_upload(
+    request: Request, bot_id: str, filename: str, uploadId: str
+):
+    """Abort multipart upload of a file for bot"""
+    current_user: User = request.state.current_user
+    cancel_multipart_upload(current_user, bot_id, filename, uploadId)
+
+
 @router.delete("/bot/{bot_id}/uploaded-file")
 def delete_bot_uploaded_file(request: Request, bot_id: str, filename: str):
     """Delete uploaded file for bot"""
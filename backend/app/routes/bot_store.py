@@ -11,16 +11,18 @@ def search_bots_by_query(
     request: Request,
     query: str,
     limit: int = 20,
+    cursor: str | None = None,
 ):
     """Search bots by query string.
     - This method is used for bot-store functionality.
     - Results include private bots if the user is the owner.
     - Only accessible bots are returned.
     - If admin, partial shared bots not accessible by the admin are returned.
+    - To fetch the next page, pass `searchCursor` of the last bot as `cursor`.
     """
     current_user: User = request.state.current_user
 
-    bots = search_bots(current_user, query, limit)
+    bots = search_bots(current_user, query, limit, cursor)
     return bots
 
 
@@ -129,10 +129,17 @@ def remove_all_conversations(request: Request):
 
 
 @router.get("/conversations/search", response_model=list[ConversationSearchResult])
-def search_conversations(request: Request, query: str):
-    """Search conversations by keyword"""
+def search_conversations(
+    request: Request,
+    query: str,
+    limit: int = 20,
+    cursor: str | None = None,
+):
+    """Search conversations by keyword.
+    To fetch the next page, pass `searchCursor` of the last result as `cursor`.
+    """
     current_user: User = request.state.current_user
-    output = search_conversations_usecase(query, current_user)
+    output = search_conversations_usecase(query, current_user, limit, cursor)
     return output
 
 
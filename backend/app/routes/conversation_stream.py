@@ -0,0 +1,23 @@
+from app.dependencies import require_current_user
+from app.routes.schemas.conversation import ChatInput
+from app.sse import stream_chat
+from app.user import User
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+router = APIRouter(tags=["conversation"])
+
+
+@router.post("/conversation/stream", response_class=StreamingResponse)
+def post_message_stream(
+    chat_input: ChatInput, current_user: User = Depends(require_current_user)
+):
+    """Send chat message and stream the response as server-sent events.
+    NOTE: Served by `app.stream_main` behind the function URL of the stream handler,
+    since API Gateway buffers the whole response.
+    """
+    return StreamingResponse(
+        stream_chat(user=current_user, chat_input=chat_input),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
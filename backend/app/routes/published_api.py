@@ -1,5 +1,6 @@
 import json
 import os
+from functools import cache
 from time import sleep
 
 import boto3
@@ -16,7 +17,13 @@ from ulid import ULID
 
 router = APIRouter(tags=["published_api"])
 
-sqs_client = boto3.client("sqs")
+
+@cache
+def _get_sqs_client():
+    # Created on first use to keep it out of the cold start
+    return boto3.client("sqs")
+
+
 QUEUE_URL = os.environ.get("QUEUE_URL", "")
 
 
@@ -61,7 +68,7 @@ def post_message(request: Request, message_input: ChatInputWithoutBotId):
     )
 
     try:
-        _ = sqs_client.send_message(
+        _ = _get_sqs_client().send_message(
             QueueUrl=QUEUE_URL, MessageBody=chat_input.model_dump_json()
         )
     except Exception as e:
@@ -143,6 +143,7 @@ Tool = Annotated[
 
 class Agent(BaseSchema):
     tools: list[Tool]
+    turn_time_budget: int | None = None
 
     @field_validator("tools", mode="before")
     def handle_legacy_tools(cls, v):
@@ -162,6 +163,12 @@ class Agent(BaseSchema):
 
 class AgentInput(BaseSchema):
     tools: list[Tool] = Field(..., description="List of tools")
+    turn_time_budget: int | None = Field(
+        None,
+        ge=10,
+        le=840,
+        description="Seconds which tools and retrieval may take in a turn. Uses the default if not set.",
+    )
 
 
 class Knowledge(BaseSchema):
@@ -471,6 +478,10 @@ class BotMetaOutput(BaseSchema):
         ...,
         description="Shared status of the bot. Possible values: `private`, `shared` and `pinned@xxx",
     )
+    search_cursor: str | None = Field(
+        None,
+        description="Opaque cursor of the search result. Pass it as `cursor` to fetch the next page.",
+    )
 
 
 class BotSummaryOutput(BaseSchema):
@@ -526,3 +537,27 @@ class BotStarredInput(BaseSchema):
 
 class BotPresignedUrlOutput(BaseSchema):
     url: str
+
+
+class BotMultipartUploadInput(BaseSchema):
+    filename: str
+    content_type: str
+    # S3 allows up to 10,000 parts per upload.
+    part_count: int = Field(..., ge=1, le=10000)
+
+
+class BotMultipartUploadOutput(BaseSchema):
+    upload_id: str
+    # Presigned URLs to upload the parts, in the order of part numbers starting from 1
+    part_urls: list[str]
+
+
+class BotMultipartUploadPart(BaseSchema):
+    part_number: int = Field(..., ge=1, le=10000)
+    etag: str
+
+
+class BotMultipartUploadCompleteInput(BaseSchema):
+    filename: str
+    upload_id: str
+    parts: list[BotMultipartUploadPart]
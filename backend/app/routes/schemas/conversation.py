@@ -240,6 +240,10 @@ class ConversationSearchResult(BaseSchema):
     last_updated_time: float
     bot_id: str | None
     highlights: list[SearchHighlight] | None = None
+    search_cursor: str | None = Field(
+        None,
+        description="Opaque cursor of the search result. Pass it as `cursor` to fetch the next page.",
+    )
 
 
 class Conversation(BaseSchema):
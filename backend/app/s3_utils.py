@@ -0,0 +1,188 @@
+"""Bulk operations on S3 objects, e.g. documents of bots.
+
+Objects are copied concurrently on the server side. Objects larger than `MULTIPART_COPY_THRESHOLD`
+are copied by multipart copy, which is also required for objects larger than 5 GB.
+Objects are deleted by `delete_objects` in batches of 1000 keys, and keys failed to be deleted are retried.
+Multipart uploads in progress can be aborted by prefix, e.g. when discarding uploaded files.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Callable, TypeVar
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.client import Config
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+BEDROCK_REGION = os.environ.get("BEDROCK_REGION", "us-east-1")
+
+# Max number of objects copied at the same time
+MAX_CONCURRENT_S3_REQUESTS = int(os.environ.get("MAX_CONCURRENT_S3_REQUESTS", 16))
+MULTIPART_COPY_THRESHOLD = 64 * 1024 * 1024  # 64MB
+MULTIPART_COPY_CHUNKSIZE = 64 * 1024 * 1024  # 64MB
+# Max number of keys per call of `delete_objects`
+DELETE_OBJECTS_BATCH_SIZE = 1000
+DELETE_OBJECTS_MAX_ATTEMPTS = 4
+DELETE_OBJECTS_RETRY_DELAY = 0.5
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class S3DeleteError(Exception):
+    def __init__(self, bucket: str, errors: list[dict]):
+        self.errors = errors
+        super().__init__(
+            f"Failed to delete {len(errors)} objects from bucket {bucket}: "
+            + ", ".join(f"{error['Key']} ({error['Code']})" for error in errors[:10])
+        )
+
+
+@cache
+def _get_s3_client():
+    # Each concurrent copy may use multiple connections for multipart copy.
+    return boto3.client(
+        "s3",
+        region_name=BEDROCK_REGION,
+        config=Config(max_pool_connections=MAX_CONCURRENT_S3_REQUESTS * 2),
+    )
+
+
+def _map_concurrently(function: Callable[[T], R], items: list[T]) -> list[R]:
+    """Call `function` for each item with bounded concurrency, and return the results in order.
+    Raises the first exception raised by `function`, if any.
+    """
+    if len(items) <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_CONCURRENT_S3_REQUESTS, len(items))
+    ) as executor:
+        return list(executor.map(function, items))
+
+
+def list_keys(bucket: str, prefix: str) -> list[str]:
+    """List the keys of all objects with the given prefix."""
+    paginator = _get_s3_client().get_paginator("list_objects_v2")
+    return [
+        content["Key"]
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+        for content in page.get("Contents", [])
+    ]
+
+
+def copy_objects(bucket: str, keys: list[tuple[str, str]]):
+    """Copy objects in the bucket concurrently. `keys` are pairs of the source key and the destination key.
+    Raises `FileNotFoundError` if any of the source objects does not exist.
+    """
+    client = _get_s3_client()
+    transfer_config = TransferConfig(
+        multipart_threshold=MULTIPART_COPY_THRESHOLD,
+        multipart_chunksize=MULTIPART_COPY_CHUNKSIZE,
+        max_concurrency=2,
+    )
+
+    def copy(item: tuple[str, str]):
+        source_key, destination_key = item
+        try:
+            client.copy(
+                CopySource={"Bucket": bucket, "Key": source_key},
+                Bucket=bucket,
+                Key=destination_key,
+                Config=transfer_config,
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError(
+                    f"The file {source_key} does not exist in bucket."
+                )
+            raise
+
+    _map_concurrently(copy, keys)
+
+
+def delete_objects(bucket: str, keys: list[str]):
+    """Delete objects in batches. Keys of non-existent objects are ignored.
+    Raises `S3DeleteError` if some objects could not be deleted after retries.
+    """
+    client = _get_s3_client()
+
+    def delete_batch(batch: list[str]) -> list[dict]:
+        errors: list[dict] = []
+        for attempt in range(DELETE_OBJECTS_MAX_ATTEMPTS):
+            if attempt > 0:
+                time.sleep(DELETE_OBJECTS_RETRY_DELAY * 2 ** (attempt - 1))
+
+            response = client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            # Deleting objects may partially fail, e.g. with `SlowDown`.
+            errors = response.get("Errors", [])
+            if not errors:
+                return []
+
+            logger.warning(
+                f"Failed to delete {len(errors)} objects from bucket {bucket} (attempt {attempt + 1})"
+            )
+            batch = [error["Key"] for error in errors]
+
+        return errors
+
+    batches = [
+        keys[i : i + DELETE_OBJECTS_BATCH_SIZE]
+        for i in range(0, len(keys), DELETE_OBJECTS_BATCH_SIZE)
+    ]
+    errors = [
+        error
+        for batch_errors in _map_concurrently(delete_batch, batches)
+        for error in batch_errors
+    ]
+    if errors:
+        raise S3DeleteError(bucket, errors)
+
+
+def delete_objects_with_prefix(bucket: str, prefix: str):
+    """Delete all objects with the given prefix."""
+    delete_objects(bucket, list_keys(bucket, prefix))
+
+
+def abort_multipart_uploads_with_prefix(bucket: str, prefix: str):
+    """Abort all multipart uploads in progress with the given prefix, and discard their uploaded parts.
+    Parts of abandoned uploads are also discarded by the lifecycle rule of the bucket.
+    """
+    client = _get_s3_client()
+    uploads = [
+        (upload["Key"], upload["UploadId"])
+        for page in client.get_paginator("list_multipart_uploads").paginate(
+            Bucket=bucket, Prefix=prefix
+        )
+        for upload in page.get("Uploads", [])
+    ]
+
+    def abort(upload: tuple[str, str]):
+        key, upload_id = upload
+        try:
+            client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        except ClientError as e:
+            # Completed or aborted after listed
+            if e.response["Error"]["Code"] != "NoSuchUpload":
+                raise
+
+    _map_concurrently(abort, uploads)
+
+
+def move_objects(bucket: str, keys: list[tuple[str, str]]):
+    """Move objects in the bucket. `keys` are pairs of the source key and the destination key.
+    The source objects are deleted once all of them have been copied.
+    Raises `FileNotFoundError` if any of the source objects does not exist.
+    """
+    copy_objects(bucket, keys)
+    delete_objects(bucket, [source_key for source_key, _ in keys])
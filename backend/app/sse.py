@@ -0,0 +1,122 @@
+import logging
+from queue import Empty, SimpleQueue
+from threading import Thread
+from typing import Iterator
+
+from app.log_utils import log_payload
+from app.notification import ChatNotifier
+from app.repositories.conversation import RecordNotFoundError
+from app.routes.schemas.conversation import ChatInput
+from app.usecases.chat import chat, chat_output_from_message
+from app.user import User
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Send a comment line when no event is sent for this period, so that idle connections are kept open
+# while tools or knowledge base retrieval are running.
+KEEP_ALIVE_INTERVAL = 15
+
+
+class ServerSentEventSender(ChatNotifier):
+    """Send the payloads of chat callbacks as server-sent event frames."""
+
+    def __init__(self) -> None:
+        # `None` marks the end of the stream
+        self.frames = SimpleQueue[str | None]()
+
+    def notify(self, payload: bytes):
+        self.frames.put(f"data: {payload.decode('utf-8')}\n\n")
+
+    def finish(self):
+        self.frames.put(None)
+
+    def on_error(self, reason: str):
+        self.notify_json(
+            dict(
+                status="ERROR",
+                reason=reason,
+            )
+        )
+
+    def iter_frames(self) -> Iterator[str]:
+        while True:
+            try:
+                frame = self.frames.get(timeout=KEEP_ALIVE_INTERVAL)
+            except Empty:
+                yield ": keep-alive\n\n"
+                continue
+
+            if frame is None:
+                break
+            yield frame
+
+
+def process_chat_input(
+    user: User,
+    chat_input: ChatInput,
+    sender: ServerSentEventSender,
+):
+    """Process chat input and send the events to the client.
+    The chat output, which is the same as the response of `POST /conversation`, is sent as the last event.
+    """
+    try:
+        conversation, message = chat(
+            user=user,
+            chat_input=chat_input,
+            on_stream=lambda token: sender.on_stream(
+                token=token,
+            ),
+            on_stop=lambda arg: sender.on_stop(arg=arg),
+            on_thinking=lambda tool_use: sender.on_agent_thinking(
+                tool_use=tool_use,
+            ),
+            on_tool_result=lambda run_result: sender.on_agent_tool_result(
+                run_result=run_result
+            ),
+            on_tool_progress=lambda progress: sender.on_agent_tool_progress(
+                progress=progress
+            ),
+            on_reasoning=lambda token: sender.on_reasoning(
+                token=token,
+            ),
+        )
+
+        output = chat_output_from_message(conversation=conversation, message=message)
+        sender.notify_json(
+            dict(
+                status="CHAT_OUTPUT",
+                output=output.model_dump(mode="json", by_alias=True),
+            )
+        )
+
+    except RecordNotFoundError:
+        if chat_input.bot_id:
+            sender.on_error(f"bot {chat_input.bot_id} not found.")
+        else:
+            sender.on_error("Invalid request.")
+
+    except Exception as e:
+        logger.exception(f"Failed to run stream handler: {e}")
+        sender.on_error(f"Failed to run stream handler: {e}")
+
+    finally:
+        sender.finish()
+
+
+def stream_chat(user: User, chat_input: ChatInput) -> Iterator[str]:
+    """Run chat in a background thread and yield server-sent event frames as they are produced.
+    NOTE: On Lambda, the chat only runs while the invocation streams the response. If the client
+    disconnects, the invocation ends and the execution environment may be frozen before the
+    conversation is stored.
+    """
+    logger.info("Received chat input: %s", log_payload(chat_input))
+
+    sender = ServerSentEventSender()
+    Thread(
+        target=process_chat_input,
+        kwargs=dict(user=user, chat_input=chat_input, sender=sender),
+        daemon=True,
+    ).start()
+
+    return sender.iter_frames()
@@ -5,9 +5,9 @@ Agent configuration utilities for Strands integration.
 import logging
 
 from app.bedrock import (
+    PromptCachePlan,
     get_model_id,
     generation_params_to_converse_configuration,
-    is_prompt_caching_supported,
 )
 from app.repositories.models.conversation import type_model_name
 from app.repositories.models.custom_bot import GenerationParamsModel
@@ -20,12 +20,10 @@ logger = logging.getLogger(__name__)
 
 def get_bedrock_model_config(
     model_name: type_model_name = "claude-v3.5-sonnet",
-    instructions: list[str] = [],
     generation_params: GenerationParamsModel | None = None,
     guardrail: BedrockGuardrailsModel | None = None,
     enable_reasoning: bool = False,
-    prompt_caching_enabled: bool = False,
-    has_tools: bool = False,
+    cache_plan: PromptCachePlan | None = None,
 ) -> BedrockModel.BedrockConfig:
     """Get Bedrock model configuration."""
 
@@ -73,24 +71,14 @@ def get_bedrock_model_config(
 
         logger.info(f"Enabled Guardrails: {guardrail_config["guardrailIdentifier"]}")
 
-    # Add prompt caching configuration
-    if prompt_caching_enabled and not (
-        has_tools and not is_prompt_caching_supported(model_name, target="tool")
-    ):
-        # Only enable system prompt caching if there are instructions
-        if is_prompt_caching_supported(model_name, "system") and len(instructions) > 0:
-            config["cache_prompt"] = "default"
-            logger.debug(f"Enabled system prompt caching for model {model_name}")
-
-        # Only enable tool caching if model supports it and tools are available
-        if is_prompt_caching_supported(model_name, target="tool") and has_tools:
-            config["cache_tools"] = "default"
-            logger.debug(f"Enabled tool caching for model {model_name}")
-
-    else:
-        logger.info(
-            f"Prompt caching disabled for model {model_name} (enabled={prompt_caching_enabled}, has_tools={has_tools})"
-        )
+    # Add prompt caching configuration. Message cache points are added to the messages.
+    if cache_plan and cache_plan["system"]:
+        config["cache_prompt"] = "default"
+        logger.debug(f"Enabled system prompt caching for model {model_name}")
+
+    if cache_plan and cache_plan["tools"]:
+        config["cache_tools"] = "default"
+        logger.debug(f"Enabled tool caching for model {model_name}")
 
     if "additionalModelRequestFields" in converse_config:
         config["additional_request_fields"] = converse_config[
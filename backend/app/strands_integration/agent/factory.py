@@ -5,15 +5,17 @@ Agent factory for Strands integration.
 import logging
 import os
 
+from app.bedrock import PromptCachePlan
 from app.repositories.models.conversation import type_model_name
-from app.repositories.models.custom_bot import BotModel, GenerationParamsModel
+from app.repositories.models.custom_bot import GenerationParamsModel
 from app.repositories.models.custom_bot_guardrails import BedrockGuardrailsModel
-from app.strands_integration.utils import get_strands_tools
 from strands import Agent
 from strands.hooks import HookProvider
 from strands.models import BedrockModel
+from strands.types.tools import AgentTool as StrandsAgentTool
 
 from app.strands_integration.agent.config import get_bedrock_model_config
+from app.strands_integration.agent.tool_executor import OrderedConcurrentToolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -21,25 +23,21 @@ BEDROCK_REGION = os.environ.get("BEDROCK_REGION", "us-east-1")
 
 
 def create_strands_agent(
-    bot: BotModel | None,
     instructions: list[str],
     model_name: type_model_name,
     generation_params: GenerationParamsModel | None = None,
     guardrail: BedrockGuardrailsModel | None = None,
     enable_reasoning: bool = False,
-    prompt_caching_enabled: bool = False,
-    has_tools: bool = False,
+    cache_plan: PromptCachePlan | None = None,
+    tools: list[StrandsAgentTool] | None = None,
     hooks: list[HookProvider] | None = None,
-    filter_metadata: dict | None = None,
 ) -> Agent:
     model_config = get_bedrock_model_config(
         model_name=model_name,
-        instructions=instructions,
         generation_params=generation_params,
         guardrail=guardrail,
         enable_reasoning=enable_reasoning,
-        prompt_caching_enabled=prompt_caching_enabled,
-        has_tools=has_tools,
+        cache_plan=cache_plan,
     )
     logger.debug(f"[AGENT_FACTORY] Model config: {model_config}")
     model = BedrockModel(
@@ -52,8 +50,10 @@ def create_strands_agent(
 
     agent = Agent(
         model=model,
-        tools=get_strands_tools(bot, model_name, filter_metadata=filter_metadata),  # type: ignore
+        tools=tools or [],  # type: ignore
         hooks=hooks or [],
         system_prompt=system_prompt,
+        # Tools requested in a single response, e.g. parallel searches, are run concurrently.
+        tool_executor=OrderedConcurrentToolExecutor(),
     )
     return agent
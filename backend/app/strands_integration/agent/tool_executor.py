@@ -0,0 +1,66 @@
+"""
+Tool executor for Strands integration.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, AsyncGenerator
+from weakref import WeakKeyDictionary
+
+from strands.tools.executors import ConcurrentToolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Max number of tools run at the same time for the tool uses in a single response
+MAX_CONCURRENT_TOOL_RUNS = int(os.environ.get("MAX_CONCURRENT_TOOL_RUNS", 4))
+
+
+class OrderedConcurrentToolExecutor(ConcurrentToolExecutor):
+    """Run the tool uses in a single response concurrently, up to `max_concurrency` at a time.
+
+    Each tool waits for a semaphore slot, so the next tool starts as soon as any running one completes.
+    Older `ConcurrentToolExecutor` append tool results in the order of completion, so they are sorted
+    into the order of the tool uses, which the tool result message and the thinking log keep.
+    Hooks such as `ToolResultCapture` are called as each tool starts and completes.
+
+    NOTE: `ConcurrentToolExecutor` has no public extension point, so `_execute` and `_task` are
+    overridden. `test_tool_executor` fails when their signatures change in strands.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_TOOL_RUNS):
+        super().__init__()
+        self.max_concurrency = max(1, max_concurrency)
+        # Semaphores are bound to the event loop, and strands runs each invocation in its own loop.
+        self._semaphores: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = WeakKeyDictionary()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _task(self, *args: Any, **kwargs: Any) -> None:
+        async with self._get_semaphore():
+            await super()._task(*args, **kwargs)
+
+    async def _execute(
+        self,
+        agent: Any,
+        tool_uses: list,
+        tool_results: list,
+        *args: Any,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Any, None]:
+        async for event in super()._execute(
+            agent, tool_uses, tool_results, *args, **kwargs
+        ):
+            yield event
+
+        order = {tool_use["toolUseId"]: i for i, tool_use in enumerate(tool_uses)}
+        tool_results.sort(
+            key=lambda tool_result: order.get(tool_result["toolUseId"], len(order))
+        )
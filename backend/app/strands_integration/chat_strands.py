@@ -7,7 +7,13 @@ import logging
 from typing import Callable
 
 from app.agents.tools.agent_tool import ToolRunResult
-from app.bedrock import calculate_price, BedrockGuardrailsModel
+from app.bedrock import (
+    BedrockGuardrailsModel,
+    add_message_cache_points,
+    calculate_price,
+    plan_prompt_cache,
+    should_cache_messages,
+)
 from app.repositories.models.conversation import SimpleMessageModel
 from app.repositories.models.custom_bot import (
     BotModel,
@@ -21,7 +27,9 @@ from app.strands_integration.converters import (
     strands_message_to_message_model,
 )
 from app.strands_integration.handlers import ToolResultCapture, create_callback_handler
-from app.stream import OnStopInput, OnThinking
+from app.strands_integration.utils import get_strands_tools
+from app.stream import OnStopInput, OnThinking, OnToolProgress
+from app.time_budget import TimeBudget
 from app.utils import get_current_time
 from app.vector_search import (
     SearchResult,
@@ -43,7 +51,9 @@ def converse_with_strands(
     on_stream: Callable[[str], None] | None = None,
     on_thinking: Callable[[OnThinking], None] | None = None,
     on_tool_result: Callable[[ToolRunResult], None] | None = None,
+    on_tool_progress: Callable[[OnToolProgress], None] | None = None,
     on_reasoning: Callable[[str], None] | None = None,
+    time_budget: TimeBudget | None = None,
 ) -> OnStopInput:
     """
     Chat with Strands agents.
@@ -57,8 +67,16 @@ def converse_with_strands(
     2. Tool Use/Result (Thinking Log):
        - Streaming: ToolResultCapture processes tool events for real-time display.
        - Persistence: CallbackHandler notifies the message including tool use/result content.
+       - Progress: Tools which take long, e.g. Bedrock Agent, notify their partial output
+         through `on_tool_progress` while running.
+       - Deadline: Tools share `time_budget` of the turn, and return a timeout error
+         (or a partial result) instead of running over it.
+
+    3. Prompt Caching:
+       - Cache points of tools, system prompt and messages are planned together by
+         `plan_prompt_cache`, from estimated token counts and the cache hit rate of the bot.
 
-    3. Related Documents (Citations):
+    4. Related Documents (Citations):
        - Source: ToolResultCapture notifies related document.
        - Reason: Requires access to raw tool results for source_link extraction
 
@@ -77,20 +95,47 @@ def converse_with_strands(
         on_tool_result=on_tool_result,
     )
 
-    prompt_caching_enabled = bot.prompt_caching_enabled if bot is not None else True
-    has_tools = bot is not None and bot.is_agent_enabled()
+    tools = get_strands_tools(
+        bot,
+        chat_input.message.model,
+        filter_metadata=chat_input.filter_metadata,
+        conversation_id=chat_input.conversation_id,
+        on_tool_progress=on_tool_progress,
+        time_budget=time_budget,
+    )
+
+    # Convert SimpleMessageModel list to Strands Messages format
+    strands_messages = simple_message_models_to_strands_messages(
+        simple_messages=messages,
+        model=chat_input.message.model,
+        guardrail=guardrail,
+        search_results=search_results,
+    )
+
+    cache_plan = None
+    if bot is None or bot.prompt_caching_enabled:
+        cache_plan = plan_prompt_cache(
+            model=chat_input.message.model,
+            tool_specs=[{"toolSpec": tool.tool_spec} for tool in tools],  # type: ignore
+            system_prompts=[{"text": instruction} for instruction in instructions],
+            messages=strands_messages,
+            cache_messages=(
+                should_cache_messages(bot.usage_stats, chat_input.conversation_id)
+                if bot is not None
+                else True
+            ),
+        )
+        add_message_cache_points(strands_messages, cache_plan["messages"])
 
     agent = create_strands_agent(
-        bot=bot,
         instructions=instructions,
         model_name=chat_input.message.model,
         generation_params=generation_params,
         guardrail=guardrail,
         enable_reasoning=chat_input.enable_reasoning,
-        prompt_caching_enabled=prompt_caching_enabled,
-        has_tools=has_tools,
+        cache_plan=cache_plan,
+        tools=tools,
         hooks=[tool_capture],
-        filter_metadata=chat_input.filter_metadata,
     )
 
     thinking_log: list[SimpleMessageModel] = []
@@ -108,15 +153,6 @@ def converse_with_strands(
         on_message=on_message,
     )
 
-    # Convert SimpleMessageModel list to Strands Messages format
-    strands_messages = simple_message_models_to_strands_messages(
-        simple_messages=messages,
-        model=chat_input.message.model,
-        guardrail=guardrail,
-        search_results=search_results,
-        prompt_caching_enabled=prompt_caching_enabled,
-    )
-
     result = agent(strands_messages)
 
     # Convert Strands Message to MessageModel
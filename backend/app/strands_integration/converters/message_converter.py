@@ -5,10 +5,7 @@ Message conversion utilities for Strands integration.
 import logging
 from typing import TypeGuard
 
-from app.bedrock import (
-    is_prompt_caching_supported,
-    is_unsigned_reasoning_content_supported,
-)
+from app.bedrock import is_unsigned_reasoning_content_supported
 from app.repositories.models.conversation import (
     ContentModel,
     MessageModel,
@@ -59,9 +56,10 @@ def simple_message_models_to_strands_messages(
     model: type_model_name,
     guardrail: BedrockGuardrailsModel | None = None,
     search_results: list[SearchResult] | None = None,
-    prompt_caching_enabled: bool = True,
 ) -> Messages:
-    """Convert SimpleMessageModel list to Strands Messages format."""
+    """Convert SimpleMessageModel list to Strands Messages format.
+    Cache points are not added here, but by `plan_prompt_cache` together with those of system prompt and tools.
+    """
 
     grounding_source = None
     if search_results and guardrail and guardrail.is_guardrail_enabled:
@@ -94,7 +92,7 @@ def simple_message_models_to_strands_messages(
 
         return content_model_to_strands_content_blocks(c)
 
-    messages: Messages = [
+    return [
         {
             "role": message.role,
             "content": [
@@ -107,24 +105,6 @@ def simple_message_models_to_strands_messages(
         if _is_conversation_role(message.role)
     ]
 
-    # Add message cache points (same logic as legacy bedrock.py)
-    if prompt_caching_enabled and is_prompt_caching_supported(model, target="message"):
-        for order, message in enumerate(
-            filter(lambda m: m["role"] == "user", reversed(messages))
-        ):
-            if order >= 2:
-                break
-
-            message["content"] = [
-                *(message["content"]),
-                {
-                    "cachePoint": {"type": "default"},
-                },
-            ]
-            logger.debug(f"Added message cache point to user message: {message}")
-
-    return messages
-
 
 def strands_message_to_simple_message_model(message: Message) -> SimpleMessageModel:
     return SimpleMessageModel(
@@ -1,10 +1,14 @@
 import json
 import logging
+import threading
 import uuid
+from typing import Callable
 
 from app.repositories.models.custom_bot import BotModel
+from app.stream import OnToolProgress
+from app.time_budget import TimeBudget, TimeBudgetExceededError
 from strands import tool
-from strands.types.tools import AgentTool as StrandsAgentTool
+from strands.types.tools import AgentTool as StrandsAgentTool, ToolContext
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -36,9 +40,17 @@ def _get_bedrock_agent_config(bot: BotModel | None):
 
 
 def _invoke_bedrock_agent_standalone(
-    agent_id: str, alias_id: str, input_text: str, session_id: str
+    agent_id: str,
+    alias_id: str,
+    input_text: str,
+    session_id: str,
+    on_result: Callable[[dict[str, str]], None] | None = None,
+    cancelled: threading.Event | None = None,
 ) -> list[dict[str, str]]:
-    """Standalone Bedrock Agent invocation implementation."""
+    """Standalone Bedrock Agent invocation implementation.
+    Each chunk and trace step is passed to `on_result` as soon as it is received from the completion stream.
+    Reading the stream stops once `cancelled` is set.
+    """
     try:
         from app.utils import get_bedrock_agent_runtime_client
 
@@ -55,94 +67,96 @@ def _invoke_bedrock_agent_standalone(
         )
 
         # Process response
-        result = []
-        trace_logs = []
+        chunk_results = []
+        trace_results = []
+        trace_count = 0
 
         for event in response["completion"]:
+            if cancelled is not None and cancelled.is_set():
+                logger.info("Bedrock Agent invocation cancelled")
+                response["completion"].close()
+                break
+
             # Process trace information
             if "trace" in event:
-                trace_data = event["trace"]
-                trace_logs.append(trace_data)
+                trace_count += 1
+                for formatted_trace in _format_trace_for_client_standalone(
+                    [event["trace"]]
+                ):
+                    trace_result = _trace_to_result(agent_id, formatted_trace)
+                    if trace_result is not None:
+                        trace_results.append(trace_result)
+                        if on_result:
+                            on_result(trace_result)
 
             if "chunk" in event:
                 content = event["chunk"]["bytes"].decode("utf-8")
                 # Create data structure for citation support
-                result.append(
-                    {
-                        "content": content,
-                        "source_name": f"Agent Final Result({agent_id})",
-                        "source_link": "",
-                    }
-                )
+                chunk_result = {
+                    "content": content,
+                    "source_name": f"Agent Final Result({agent_id})",
+                    "source_link": "",
+                }
+                chunk_results.append(chunk_result)
+                if on_result:
+                    on_result(chunk_result)
 
-        logger.debug(f"Processed {len(result)} chunks from Bedrock Agent response")
-        logger.debug(f"Collected {len(trace_logs)} trace logs")
+        logger.debug(
+            f"Processed {len(chunk_results)} chunks from Bedrock Agent response"
+        )
+        logger.debug(f"Collected {trace_count} trace logs")
 
         # Add trace log information to results
-        if trace_logs:
-            formatted_traces = _format_trace_for_client_standalone(trace_logs)
-            for formatted_trace in formatted_traces:
-                trace_type = formatted_trace.get("type")
-                trace_input = formatted_trace.get("input")
-                recipient = (
-                    trace_input.get("recipient", None)
-                    if trace_input is not None
-                    else None
-                )
-
-                if trace_type == "tool_use":
-                    if recipient is not None and trace_input is not None:
-                        result.append(
-                            {
-                                "content": json.dumps(
-                                    trace_input.get("content"),
-                                    default=str,
-                                ),
-                                "source_name": f"[Trace] Send Message ({agent_id}) -> ({recipient})",
-                                "source_link": "",
-                            }
-                        )
-                    elif trace_input is not None:
-                        result.append(
-                            {
-                                "content": json.dumps(
-                                    trace_input.get("content"),
-                                    default=str,
-                                ),
-                                "source_name": f"[Trace] Tool Use ({agent_id})",
-                                "source_link": "",
-                            }
-                        )
-
-                elif trace_type == "text":
-                    if "<thinking>" in formatted_trace.get("text", ""):
-                        result.append(
-                            {
-                                "content": json.dumps(
-                                    formatted_trace.get("text"), default=str
-                                ),
-                                "source_name": f"[Trace] Agent Thinking({agent_id})",
-                                "source_link": "",
-                            }
-                        )
-                    else:
-                        result.append(
-                            {
-                                "content": json.dumps(
-                                    formatted_trace.get("text"), default=str
-                                ),
-                                "source_name": f"[Trace] Agent ({agent_id})",
-                                "source_link": "",
-                            }
-                        )
-
-        return result
+        return chunk_results + trace_results
 
     except Exception as e:
         logger.error(f"Error invoking Bedrock Agent: {e}")
         raise e
 
 
+def _trace_to_result(agent_id: str, formatted_trace: dict) -> dict[str, str] | None:
+    """Convert a formatted trace step to a result with the source name of the step."""
+    trace_type = formatted_trace.get("type")
+    trace_input = formatted_trace.get("input")
+    recipient = trace_input.get("recipient", None) if trace_input is not None else None
+
+    if trace_type == "tool_use":
+        if recipient is not None and trace_input is not None:
+            return {
+                "content": json.dumps(
+                    trace_input.get("content"),
+                    default=str,
+                ),
+                "source_name": f"[Trace] Send Message ({agent_id}) -> ({recipient})",
+                "source_link": "",
+            }
+        elif trace_input is not None:
+            return {
+                "content": json.dumps(
+                    trace_input.get("content"),
+                    default=str,
+                ),
+                "source_name": f"[Trace] Tool Use ({agent_id})",
+                "source_link": "",
+            }
+
+    elif trace_type == "text":
+        if "<thinking>" in formatted_trace.get("text", ""):
+            return {
+                "content": json.dumps(formatted_trace.get("text"), default=str),
+                "source_name": f"[Trace] Agent Thinking({agent_id})",
+                "source_link": "",
+            }
+        else:
+            return {
+                "content": json.dumps(formatted_trace.get("text"), default=str),
+                "source_name": f"[Trace] Agent ({agent_id})",
+                "source_link": "",
+            }
+
+    return None
+
+
 def _format_trace_for_client_standalone(trace_logs: list) -> list[dict]:
     """Format trace log information for the client."""
     try:
@@ -202,11 +216,26 @@ def _format_trace_for_client_standalone(trace_logs: list) -> list[dict]:
         raise e
 
 
-def create_bedrock_agent_tool(bot: BotModel | None) -> StrandsAgentTool:
-    """Create a Bedrock Agent tool with bot context captured in closure."""
-
-    @tool
-    def bedrock_agent(query: str) -> dict:
+def create_bedrock_agent_tool(
+    bot: BotModel | None,
+    conversation_id: str | None = None,
+    on_progress: Callable[[OnToolProgress], None] | None = None,
+    time_budget: TimeBudget | None = None,
+) -> StrandsAgentTool:
+    """Create a Bedrock Agent tool with bot context captured in closure.
+
+    The session of the Bedrock Agent is identified by the conversation, so that the agent keeps
+    its memory of the previous turns. Invocations in the same session are serialized, because
+    Bedrock Agents do not accept concurrent requests in a session.
+    Chunks and trace steps are passed to `on_progress` while the agent is running.
+    If the agent overruns `time_budget` of the turn, it is cancelled and the steps received so far
+    are returned as a partial result.
+    """
+    session_lock = threading.Lock()
+    budget = time_budget or TimeBudget()
+
+    @tool(context=True)
+    def bedrock_agent(query: str, tool_context: ToolContext | None = None) -> dict:
         """
         Invoke Bedrock Agent for specialized tasks.
 
@@ -251,19 +280,61 @@ def create_bedrock_agent_tool(bot: BotModel | None) -> StrandsAgentTool:
                     ],
                 }
 
-            # Generate a session ID
-            session_id = str(uuid.uuid4())
+            # Reuse the session across turns of the conversation
+            session_id = conversation_id or str(uuid.uuid4())
+
+            received: list[dict[str, str]] = []
+            cancelled = threading.Event()
+            tool_use_id = (
+                tool_context.tool_use["toolUseId"] if tool_context is not None else None
+            )
+
+            def on_result(result: dict[str, str]):
+                # Drop the output received after the timeout
+                if cancelled.is_set():
+                    return
+
+                received.append(result)
+                if on_progress and tool_use_id is not None:
+                    on_progress(
+                        {
+                            "tool_use_id": tool_use_id,
+                            "content": result,  # type: ignore[typeddict-item]
+                        }
+                    )
+
+            agent_id, alias_id = agent_config.agent_id, agent_config.alias_id
+
+            def invoke() -> list[dict[str, str]]:
+                with session_lock:
+                    return _invoke_bedrock_agent_standalone(
+                        agent_id=agent_id,
+                        alias_id=alias_id,
+                        input_text=query,
+                        session_id=session_id,
+                        on_result=on_result,
+                        cancelled=cancelled,
+                    )
 
             logger.debug(
-                f"[BEDROCK_AGENT_V3] Using agent_id: {agent_config.agent_id}, alias_id: {agent_config.alias_id}"
+                f"[BEDROCK_AGENT_V3] Using agent_id: {agent_config.agent_id}, alias_id: {agent_config.alias_id}, session_id: {session_id}"
             )
             # Invoke Bedrock Agent
-            results = _invoke_bedrock_agent_standalone(
-                agent_id=agent_config.agent_id,
-                alias_id=agent_config.alias_id,
-                input_text=query,
-                session_id=session_id,
-            )
+            try:
+                results = budget.run("bedrock_agent", invoke)
+
+            except TimeBudgetExceededError as e:
+                cancelled.set()
+                logger.warning(f"[BEDROCK_AGENT_V3] {e}")
+                return {
+                    "status": "success",
+                    "content": [{"json": result} for result in list(received)]
+                    + [
+                        {
+                            "text": f"{e} The results above are partial output of the agent."
+                        }
+                    ],
+                }
 
             logger.debug(f"[BEDROCK_AGENT_V3] Invocation completed successfully")
             return {
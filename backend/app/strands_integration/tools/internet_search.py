@@ -1,7 +1,9 @@
-import json
 import logging
 
+from app.agents.tools.search_cache import search_with_cache
+from app.agents.tools.web_summary import WebPage, summarize_pages
 from app.repositories.models.custom_bot import BotModel
+from app.time_budget import TimeBudget
 from strands import tool
 from strands.types.tools import AgentTool as StrandsAgentTool
 
@@ -26,30 +28,41 @@ def _search_with_duckduckgo_standalone(
             f"Executing DuckDuckGo search: query={query}, region={REGION}, time_limit={time_limit}"
         )
 
-        with DDGS() as ddgs:
-            results = list(
-                ddgs.text(
-                    keywords=query,
-                    region=REGION,
-                    safesearch=SAFE_SEARCH,
-                    timelimit=time_limit,
-                    max_results=MAX_RESULTS,
-                    backend=BACKEND,
+        def search() -> list[dict[str, str]]:
+            with DDGS() as ddgs:
+                return list(
+                    ddgs.text(
+                        keywords=query,
+                        region=REGION,
+                        safesearch=SAFE_SEARCH,
+                        timelimit=time_limit,
+                        max_results=MAX_RESULTS,
+                        backend=BACKEND,
+                    )
                 )
-            )
+
+        results = search_with_cache("duckduckgo", query, locale, time_limit, search)
 
         # Format results for citation support
-        formatted_results = []
-        for result in results:
-            formatted_results.append(
+        summaries = summarize_pages(
+            [
                 {
-                    "content": _summarize_content_standalone(
-                        result["body"], result["title"], result["href"], query
-                    ),
-                    "source_name": result["title"],
-                    "source_link": result["href"],
+                    "content": result["body"],
+                    "title": result["title"],
+                    "url": result["href"],
                 }
-            )
+                for result in results
+            ],
+            query,
+        )
+        formatted_results = [
+            {
+                "content": summary,
+                "source_name": result["title"],
+                "source_link": result["href"],
+            }
+            for result, summary in zip(results, summaries)
+        ]
 
         logger.info(
             f"DuckDuckGo search completed. Found {len(formatted_results)} results"
@@ -62,7 +75,7 @@ def _search_with_duckduckgo_standalone(
 
 
 def _search_with_firecrawl_standalone(
-    query: str, api_key: str, locale: str, max_results: int = 10
+    query: str, api_key: str, locale: str, max_results: int = 10, time_limit: str = ""
 ) -> list[dict[str, str]]:
     """Standalone Firecrawl search implementation."""
     try:
@@ -72,44 +85,57 @@ def _search_with_firecrawl_standalone(
             f"Searching with Firecrawl: query={query}, max_results={max_results} locale={locale}"
         )
 
-        app = FirecrawlApp(api_key=api_key)
+        def search() -> list[WebPage]:
+            app = FirecrawlApp(api_key=api_key)
+
+            # Incoming locale is language-country (e.g. 'en-us').
+            language, country = locale.split("-", 1)
+            results = app.search(
+                query,
+                limit=max_results,
+                lang=language,
+                location=country,
+                scrape_options=ScrapeOptions(
+                    formats=["markdown"], onlyMainContent=True
+                ),
+            )
 
-        # Incoming locale is language-country (e.g. 'en-us').
-        language, country = locale.split("-", 1)
-        results = app.search(
-            query,
-            limit=max_results,
-            lang=language,
-            location=country,
-            scrape_options=ScrapeOptions(formats=["markdown"], onlyMainContent=True),
-        )
+            if not results or not hasattr(results, "data") or not results.data:
+                return []
+
+            # Format results
+            pages: list[WebPage] = []
+            for data in results.data:
+                if isinstance(data, dict):
+                    title = data.get("title", "")
+                    url = data.get("url", "") or (
+                        data.get("metadata", {}).get("sourceURL", "")
+                        if isinstance(data.get("metadata"), dict)
+                        else ""
+                    )
+                    content = data.get("markdown", "") or data.get("content", "")
 
-        if not results or not hasattr(results, "data") or not results.data:
+                    if title or content:
+                        pages.append({"content": content, "title": title, "url": url})
+
+            return pages
+
+        # Firecrawl does not limit the time range, but the time limit decides how long results are cached.
+        pages = search_with_cache(
+            "firecrawl", query, locale, time_limit, search, max_results
+        )
+        if not pages:
             logger.warning("No results found from Firecrawl")
             return []
 
-        # Format results
-        formatted_results = []
-        for data in results.data:
-            if isinstance(data, dict):
-                title = data.get("title", "")
-                url = data.get("url", "") or (
-                    data.get("metadata", {}).get("sourceURL", "")
-                    if isinstance(data.get("metadata"), dict)
-                    else ""
-                )
-                content = data.get("markdown", "") or data.get("content", "")
-
-                if title or content:
-                    formatted_results.append(
-                        {
-                            "content": _summarize_content_standalone(
-                                content, title, url, query
-                            ),
-                            "source_name": title,
-                            "source_link": url,
-                        }
-                    )
+        formatted_results = [
+            {
+                "content": summary,
+                "source_name": page["title"],
+                "source_link": page["url"],
+            }
+            for page, summary in zip(pages, summarize_pages(pages, query))
+        ]
 
         logger.info(
             f"Firecrawl search completed. Found {len(formatted_results)} results"
@@ -122,56 +148,6 @@ def _search_with_firecrawl_standalone(
         return []
 
 
-def _summarize_content_standalone(
-    content: str, title: str, url: str, query: str
-) -> str:
-    """Standalone content summarization."""
-    try:
-        from app.utils import get_bedrock_runtime_client
-
-        # Truncate content if too long
-        max_input_length = 8000
-        if len(content) > max_input_length:
-            content = content[:max_input_length] + "..."
-
-        client = get_bedrock_runtime_client()
-
-        prompt = f"""Please provide a concise summary of the following web content in 500-800 tokens maximum. Focus on information that directly answers or relates to the user's query: "{query}"
-
-Title: {title}
-URL: {url}
-Content: {content}
-
-Summary:"""
-
-        response = client.invoke_model(
-            modelId="anthropic.claude-3-haiku-20240307-v1:0",
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps(
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 800,
-                    "messages": [{"role": "user", "content": prompt}],
-                }
-            ),
-        )
-
-        response_body = json.loads(response["body"].read())
-        summary = response_body["content"][0]["text"].strip()
-
-        logger.info(
-            f"Summarized content from {len(content)} chars to {len(summary)} chars"
-        )
-        return summary
-
-    except Exception as e:
-        logger.error(f"Error summarizing content: {e}")
-        # Fallback: return truncated content
-        fallback_content = content[:1000] + "..." if len(content) > 1000 else content
-        return fallback_content
-
-
 def _get_internet_tool_config(bot: BotModel | None):
     """Extract internet tool configuration from bot."""
     if not bot or not bot.agent or not bot.agent.tools:
@@ -184,8 +160,52 @@ def _get_internet_tool_config(bot: BotModel | None):
     return None
 
 
-def create_internet_search_tool(bot: BotModel | None) -> StrandsAgentTool:
-    """Create an internet search tool with bot context captured in closure."""
+def _search_standalone(
+    bot: BotModel | None, query: str, locale: str, time_limit: str
+) -> list[dict[str, str]]:
+    # Use DuckDuckGo if no bot context
+    if not bot:
+        logger.debug("[INTERNET_SEARCH_V3] No bot context, using DuckDuckGo")
+        return _search_with_duckduckgo_standalone(query, time_limit, locale)
+
+    internet_tool = _get_internet_tool_config(bot)
+
+    if (
+        internet_tool
+        and internet_tool.search_engine == "firecrawl"
+        and internet_tool.firecrawl_config
+        and internet_tool.firecrawl_config.api_key
+    ):
+
+        logger.debug("[INTERNET_SEARCH_V3] Using Firecrawl search")
+        results = _search_with_firecrawl_standalone(
+            query=query,
+            api_key=internet_tool.firecrawl_config.api_key,
+            locale=locale,
+            max_results=internet_tool.firecrawl_config.max_results,
+            time_limit=time_limit,
+        )
+
+        # If no results from Firecrawl, fallback to DuckDuckGo
+        if not results:
+            logger.warning(
+                "[INTERNET_SEARCH_V3] Firecrawl returned no results, falling back to DuckDuckGo"
+            )
+            results = _search_with_duckduckgo_standalone(query, time_limit, locale)
+
+        return results
+
+    logger.debug("[INTERNET_SEARCH_V3] Using DuckDuckGo search")
+    return _search_with_duckduckgo_standalone(query, time_limit, locale)
+
+
+def create_internet_search_tool(
+    bot: BotModel | None, time_budget: TimeBudget | None = None
+) -> StrandsAgentTool:
+    """Create an internet search tool with bot context captured in closure.
+    Searches overrunning `time_budget` of the turn return a timeout error, which the model can work around.
+    """
+    budget = time_budget or TimeBudget()
 
     @tool
     def internet_search(
@@ -207,44 +227,11 @@ def create_internet_search_tool(bot: BotModel | None) -> StrandsAgentTool:
         )
 
         try:
-            # # Bot is captured on closure
-            current_bot = bot
-
-            # Use DuckDuckGo if no bot context
-            if not current_bot:
-                logger.debug("[INTERNET_SEARCH_V3] No bot context, using DuckDuckGo")
-                results = _search_with_duckduckgo_standalone(query, time_limit, locale)
-            else:
-                internet_tool = _get_internet_tool_config(current_bot)
-
-                if (
-                    internet_tool
-                    and internet_tool.search_engine == "firecrawl"
-                    and internet_tool.firecrawl_config
-                    and internet_tool.firecrawl_config.api_key
-                ):
-
-                    logger.debug("[INTERNET_SEARCH_V3] Using Firecrawl search")
-                    results = _search_with_firecrawl_standalone(
-                        query=query,
-                        api_key=internet_tool.firecrawl_config.api_key,
-                        locale=locale,
-                        max_results=internet_tool.firecrawl_config.max_results,
-                    )
-
-                    # If no results from Firecrawl, fallback to DuckDuckGo
-                    if not results:
-                        logger.warning(
-                            "[INTERNET_SEARCH_V3] Firecrawl returned no results, falling back to DuckDuckGo"
-                        )
-                        results = _search_with_duckduckgo_standalone(
-                            query, time_limit, locale
-                        )
-                else:
-                    logger.debug("[INTERNET_SEARCH_V3] Using DuckDuckGo search")
-                    results = _search_with_duckduckgo_standalone(
-                        query, time_limit, locale
-                    )
+            # Bot is captured on closure
+            results = budget.run(
+                "internet_search",
+                lambda: _search_standalone(bot, query, locale, time_limit),
+            )
 
             # Return in ToolResult format to prevent Strands from converting to string
             return {
@@ -2,6 +2,7 @@ import logging
 import traceback
 
 from app.repositories.models.custom_bot import BotModel
+from app.time_budget import TimeBudget
 from strands import tool
 from strands.types.tools import AgentTool as StrandsAgentTool
 
@@ -29,8 +30,15 @@ def _search_knowledge_standalone(bot: BotModel, query: str, filter_metadata: dic
         raise e
 
 
-def create_knowledge_search_tool(bot: BotModel | None, filter_metadata: dict | None = None) -> StrandsAgentTool:
-    """Create a knowledge search tool with bot context captured in closure."""
+def create_knowledge_search_tool(
+    bot: BotModel | None,
+    filter_metadata: dict | None = None,
+    time_budget: TimeBudget | None = None,
+) -> StrandsAgentTool:
+    """Create a knowledge search tool with bot context captured in closure.
+    Searches overrunning `time_budget` of the turn return a timeout error.
+    """
+    budget = time_budget or TimeBudget()
 
     @tool
     def knowledge_base_tool(query: str) -> dict:
@@ -80,7 +88,12 @@ def create_knowledge_search_tool(bot: BotModel | None, filter_metadata: dict | N
 
             # Run knowledge search
             logger.info(f"[KNOWLEDGE_SEARCH_V3] filter_metadata from closure: {filter_metadata}")
-            results = _search_knowledge_standalone(current_bot, query, filter_metadata=filter_metadata)
+            results = budget.run(
+                "knowledge_base_tool",
+                lambda: _search_knowledge_standalone(
+                    current_bot, query, filter_metadata=filter_metadata
+                ),
+            )
 
             logger.debug(f"[KNOWLEDGE_SEARCH_V3] Search completed successfully")
             return {
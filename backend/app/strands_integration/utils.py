@@ -3,18 +3,25 @@ Strands integration utilities - Independent tool management.
 """
 
 import logging
-from typing import Dict
+from typing import Callable, Dict
 
 from app.bedrock import is_tooluse_supported
 from app.repositories.models.custom_bot import BedrockAgentToolModel, BotModel
 from app.routes.schemas.conversation import type_model_name
+from app.stream import OnToolProgress
+from app.time_budget import TimeBudget
 from strands.types.tools import AgentTool as StrandsAgentTool
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-def get_strands_registered_tools(bot: BotModel | None = None) -> list[StrandsAgentTool]:
+def get_strands_registered_tools(
+    bot: BotModel | None = None,
+    conversation_id: str | None = None,
+    on_tool_progress: Callable[[OnToolProgress], None] | None = None,
+    time_budget: TimeBudget | None = None,
+) -> list[StrandsAgentTool]:
     """Get list of available Strands tools."""
     from app.strands_integration.tools.bedrock_agent import create_bedrock_agent_tool
     from app.strands_integration.tools.calculator import create_calculator_tool
@@ -24,8 +31,15 @@ def get_strands_registered_tools(bot: BotModel | None = None) -> list[StrandsAge
     from app.strands_integration.tools.simple_list import simple_list, structured_list
 
     tools: list[StrandsAgentTool] = []
-    tools.append(create_internet_search_tool(bot))
-    tools.append(create_bedrock_agent_tool(bot))
+    tools.append(create_internet_search_tool(bot, time_budget=time_budget))
+    tools.append(
+        create_bedrock_agent_tool(
+            bot,
+            conversation_id=conversation_id,
+            on_progress=on_tool_progress,
+            time_budget=time_budget,
+        )
+    )
     # tools.append(create_calculator_tool(bot))  # For testing purposes
     return tools
 
@@ -33,6 +47,9 @@ def get_strands_registered_tools(bot: BotModel | None = None) -> list[StrandsAge
 def get_strands_tools(
     bot: BotModel | None, model_name: type_model_name,
     filter_metadata: dict | None = None,
+    conversation_id: str | None = None,
+    on_tool_progress: Callable[[OnToolProgress], None] | None = None,
+    time_budget: TimeBudget | None = None,
 ) -> list[StrandsAgentTool]:
     """
     Get Strands tools based on bot configuration.
@@ -49,7 +66,12 @@ def get_strands_tools(
     if not bot or not bot.is_agent_enabled():
         return []
 
-    registered_tools = get_strands_registered_tools(bot)
+    registered_tools = get_strands_registered_tools(
+        bot,
+        conversation_id=conversation_id,
+        on_tool_progress=on_tool_progress,
+        time_budget=time_budget,
+    )
     tools: list[StrandsAgentTool] = []
 
     # Get tools based on bot's tool configuration
@@ -70,7 +92,9 @@ def get_strands_tools(
             create_knowledge_search_tool,
         )
 
-        knowledge_tool = create_knowledge_search_tool(bot, filter_metadata=filter_metadata)
+        knowledge_tool = create_knowledge_search_tool(
+            bot, filter_metadata=filter_metadata, time_budget=time_budget
+        )
         tools.append(knowledge_tool)
 
     if len(tools) == 0:
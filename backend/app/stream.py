@@ -8,6 +8,7 @@ from app.bedrock import (
     calculate_price,
     compose_args_for_converse_api,
 )
+from app.log_utils import log_payload
 from app.repositories.models.conversation import (
     ContentModel,
     MessageModel,
@@ -49,6 +50,13 @@ class OnThinking(TypedDict):
     input: dict[str, JsonValue]
 
 
+class OnToolProgress(TypedDict):
+    """Partial output of a running tool, e.g. each step of a Bedrock Agent."""
+
+    tool_use_id: str
+    content: dict[str, JsonValue]
+
+
 class _PartialTextContent(TypedDict):
     text: str
 
@@ -178,6 +186,7 @@ class ConverseApiStreamHandler:
         search_results: list[SearchResult] | None = None,
         enable_reasoning: bool = False,
         prompt_caching_enabled: bool = False,
+        cache_messages: bool = True,
     ) -> OnStopInput:
         try:
             # Create payload to invoke Bedrock
@@ -191,8 +200,9 @@ class ConverseApiStreamHandler:
                 tools=self.tools,
                 enable_reasoning=enable_reasoning,
                 prompt_caching_enabled=prompt_caching_enabled,
+                cache_messages=cache_messages,
             )
-            logger.info(f"args for converse_stream: {args}")
+            logger.info("args for converse_stream: %s", log_payload(args))
 
             client = get_bedrock_runtime_client()
             try:
@@ -215,7 +225,7 @@ class ConverseApiStreamHandler:
             cache_read_input_count = 0
             cache_write_input_count = 0
             for event in response["stream"]:
-                logger.debug(f"event: {event}")
+                logger.debug("event: %s", event)
                 if "messageStart" in event:
                     message_start = event["messageStart"]
                     current_message["role"] = message_start["role"]
@@ -0,0 +1,47 @@
+"""App of the stream handler, which serves `POST /conversation/stream` through a function URL.
+
+The function URL is not behind the API Gateway authorizer, so this app serves no other routes,
+and the route verifies the Cognito token by itself. Requests to any other path are rejected with 404.
+"""
+
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
+from app.log_utils import configure_log_sampling
+from app.middleware import RequestLogMiddleware
+from app.routes.conversation_stream import router as conversation_stream_router
+from app.warmup import warm_up_on_init
+from fastapi import FastAPI
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+    force=True,
+)
+
+configure_log_sampling()
+
+# Ratio of successful requests to be logged. Errors are always logged.
+REQUEST_LOG_SAMPLE_RATE = float(os.environ.get("REQUEST_LOG_SAMPLE_RATE", 0.1))
+# Size of the thread pool running sync route handlers and dependencies.
+WORKER_THREADS = int(os.environ.get("WORKER_THREADS", 40))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+    await to_thread.run_sync(warm_up_on_init)
+    yield
+
+
+app = FastAPI(
+    title="Bedrock Chat Stream",
+    lifespan=lifespan,
+    # API documents are served by the main API
+    openapi_url=None,
+)
+app.include_router(conversation_stream_router)
+# CORS is handled by the function URL.
+app.add_middleware(RequestLogMiddleware, sample_rate=REQUEST_LOG_SAMPLE_RATE)
@@ -0,0 +1,138 @@
+"""Time budget of a chat turn.
+
+Each turn is given a time budget, set per bot in the agent settings or `DEFAULT_TURN_TIME_BUDGET`.
+Tools and knowledge retrieval are called through `TimeBudget.run`, which stops waiting for a call
+overrunning the rest of the budget, so that a slow external site cannot hang the turn until the
+Lambda timeout. The time used by each tool is emitted as CloudWatch metrics at the end of the turn.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_TURN_TIME_BUDGET = float(os.environ.get("TURN_TIME_BUDGET", 300))
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "BedrockChat")
+
+T = TypeVar("T")
+
+
+class TimeBudgetExceededError(TimeoutError):
+    def __init__(self, name: str, budget: float):
+        self.name = name
+        super().__init__(
+            f"{name} timed out: the time budget of {budget:g} seconds for this turn is exhausted."
+        )
+
+
+class TimeBudget:
+    """Deadline of a turn shared by the tools and retrieval calls of the turn."""
+
+    def __init__(self, seconds: float | None = None):
+        self.seconds = seconds if seconds is not None else DEFAULT_TURN_TIME_BUDGET
+        self.deadline = time.monotonic() + self.seconds
+        # Seconds used by each tool, and the tools which overran
+        self.usage: dict[str, float] = {}
+        self.timeouts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def _record(self, name: str, elapsed: float, timed_out: bool):
+        with self._lock:
+            self.usage[name] = self.usage.get(name, 0.0) + elapsed
+            if timed_out:
+                self.timeouts[name] = self.timeouts.get(name, 0) + 1
+
+    def run(self, name: str, function: Callable[[], T]) -> T:
+        """Call `function` within the rest of the budget.
+        Raises `TimeBudgetExceededError` as soon as the budget is exhausted, without waiting for the call.
+        The call is left to finish in the background and its result is discarded, since a running call
+        cannot be interrupted. Use `remaining()` to also pass the deadline to the call, e.g. as a timeout.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            self._record(name, 0.0, timed_out=True)
+            raise TimeBudgetExceededError(name, self.seconds)
+
+        future: Future[T] = Future()
+
+        def target():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(function())
+            except BaseException as e:
+                future.set_exception(e)
+
+        start = time.monotonic()
+        # A daemon thread per call, so that abandoned calls do not occupy a pool.
+        # The call runs in a copy of the caller's context, so that context variables
+        # (e.g. of tracing or the request) are visible to it.
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run, args=(target,), name=f"time-budget-{name}", daemon=True
+        ).start()
+        try:
+            result = future.result(timeout=remaining)
+
+        except FuturesTimeoutError:
+            self._record(name, time.monotonic() - start, timed_out=True)
+            logger.warning(f"{name} overran the time budget of {self.seconds} seconds")
+            raise TimeBudgetExceededError(name, self.seconds)
+
+        except Exception:
+            self._record(name, time.monotonic() - start, timed_out=False)
+            raise
+
+        self._record(name, time.monotonic() - start, timed_out=False)
+        return result
+
+    def emit_metrics(self, bot_id: str | None = None):
+        """Emit the time used by each tool in CloudWatch embedded metric format."""
+        if not self.usage:
+            return
+
+        # BotId is a property rather than a dimension, as a metric per bot would be unbounded.
+        # Records of a bot can still be found by CloudWatch Logs Insights.
+        properties = {"BotId": bot_id} if bot_id else {}
+        for name, elapsed in self.usage.items():
+            # Printed rather than logged, as EMF records must be plain JSON lines.
+            print(
+                json.dumps(
+                    {
+                        "_aws": {
+                            "Timestamp": int(time.time() * 1000),
+                            "CloudWatchMetrics": [
+                                {
+                                    "Namespace": METRICS_NAMESPACE,
+                                    "Dimensions": [["Tool"]],
+                                    "Metrics": [
+                                        {"Name": "ToolTime", "Unit": "Seconds"},
+                                        {"Name": "ToolTimeouts", "Unit": "Count"},
+                                        {"Name": "ToolBudgetShare", "Unit": "Percent"},
+                                    ],
+                                }
+                            ],
+                        },
+                        "Tool": name,
+                        **properties,
+                        "ToolTime": round(elapsed, 3),
+                        "ToolTimeouts": self.timeouts.get(name, 0),
+                        "ToolBudgetShare": round(elapsed / self.seconds * 100, 1),
+                    }
+                ),
+                flush=True,
+            )
@@ -4,6 +4,7 @@ from typing import Literal, TypeGuard
 
 from app.agents.tools.agent_tool import AgentTool as LegacyAgentTool
 from app.config import DEFAULT_GENERATION_CONFIG
+from app.repositories.bot_store import invalidate_bot_feeds
 from app.repositories.common import RecordNotFoundError
 from app.repositories.custom_bot import (
     alias_exists,
@@ -68,16 +69,19 @@ from app.routes.schemas.bot import (
 )
 from app.routes.schemas.bot_guardrails import BedrockGuardrailsOutput
 from app.routes.schemas.bot_kb import BedrockKnowledgeBaseOutput
-from app.strands_integration.utils import get_strands_registered_tools
+from app.s3_utils import delete_objects, move_objects
 from app.user import User
 from app.utils import (
     compose_upload_document_s3_path,
     compose_upload_temp_s3_path,
     compose_upload_temp_s3_prefix,
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
     delete_file_from_s3,
     delete_files_with_prefix_from_s3,
+    generate_presigned_upload_part_urls,
     generate_presigned_url,
-    move_file_in_s3,
     start_embedding_state_machine,
 )
 
@@ -93,17 +97,27 @@ def _update_s3_documents_by_diff(
     added_filenames: list[str],
     deleted_filenames: list[str],
 ):
-    for filename in added_filenames:
-        tmp_path = compose_upload_temp_s3_path(user_id, bot_id, filename)
-        document_path = compose_upload_document_s3_path(user_id, bot_id, filename)
-        move_file_in_s3(DOCUMENT_BUCKET, tmp_path, document_path)
-
-    for filename in deleted_filenames:
-        document_path = compose_upload_document_s3_path(user_id, bot_id, filename)
+    # Files are copied concurrently, so that bots with many files are saved quickly.
+    move_objects(
+        DOCUMENT_BUCKET,
+        [
+            (
+                compose_upload_temp_s3_path(user_id, bot_id, filename),
+                compose_upload_document_s3_path(user_id, bot_id, filename),
+            )
+            for filename in added_filenames
+        ],
+    )
 
-        # Ignore errors when deleting a non-existent file from the S3 bucket used in knowledge bases.
-        # This allows users to update bot if the uploaded file is missing after the bot is created.
-        delete_file_from_s3(DOCUMENT_BUCKET, document_path, ignore_not_exist=True)
+    # Non-existent files are ignored when deleting from the S3 bucket used in knowledge bases.
+    # This allows users to update bot if the uploaded file is missing after the bot is created.
+    delete_objects(
+        DOCUMENT_BUCKET,
+        [
+            compose_upload_document_s3_path(user_id, bot_id, filename)
+            for filename in deleted_filenames
+        ],
+    )
 
 
 def create_new_bot(user: User, bot_input: BotInput) -> BotOutput:
@@ -488,6 +502,7 @@ def remove_bot_by_id(user: User, bot_id: str):
     if bot.is_editable_by_user(user):
         owner_user_id = bot.owner_user_id
         delete_bot_by_id(owner_user_id, bot_id)
+        invalidate_bot_feeds(bot_id, withdrawn=True)
     else:
         delete_alias_by_id(user.id, bot_id)
 
@@ -572,6 +587,7 @@ def modify_bot_visibility(
         target_allowed_user_ids,
         target_allowed_group_ids,
     )
+    invalidate_bot_feeds(bot_id, withdrawn=target_shared_scope != "all")
 
 
 def modify_pinning_status(bot_id: str, push_input: PushBotInput):
@@ -613,14 +629,26 @@ def modify_bot_last_used_time(user: User, bot: BotModel):
         return update_alias_last_used_time(user.id, bot.id)
 
 
-def modify_bot_stats(user: User, bot: BotModel, increment: int):
+def modify_bot_stats(
+    user: User,
+    bot: BotModel,
+    increment: int,
+    cache_read_input_tokens: int = 0,
+    cache_write_input_tokens: int = 0,
+):
     """Modify bot stats."""
     if bot.is_owned_by_user(user):
         owner_id = user.id
     else:
         owner_id = bot.owner_user_id
 
-    return update_bot_stats(owner_id, bot.id, increment)
+    return update_bot_stats(
+        owner_id,
+        bot.id,
+        increment,
+        cache_read_input_tokens=cache_read_input_tokens,
+        cache_write_input_tokens=cache_write_input_tokens,
+    )
 
 
 def issue_presigned_url(
@@ -636,6 +664,45 @@ def issue_presigned_url(
     return response
 
 
+def start_multipart_upload(
+    user: User, bot_id: str, filename: str, content_type: str, part_count: int
+) -> tuple[str, list[str]]:
+    """Initiate a multipart upload of the file to the upload temp directory.
+    Returns the upload ID and presigned URLs to upload the parts, which can be uploaded in parallel.
+    """
+    key = compose_upload_temp_s3_path(user.id, bot_id, filename)
+    upload_id = create_multipart_upload(DOCUMENT_BUCKET, key, content_type)
+    part_urls = generate_presigned_upload_part_urls(
+        DOCUMENT_BUCKET,
+        key,
+        upload_id,
+        part_numbers=list(range(1, part_count + 1)),
+        expiration=3600,
+    )
+    return upload_id, part_urls
+
+
+def finish_multipart_upload(
+    user: User, bot_id: str, filename: str, upload_id: str, parts: list[tuple[int, str]]
+):
+    """Complete the multipart upload, which creates the file in the upload temp directory."""
+    complete_multipart_upload(
+        DOCUMENT_BUCKET,
+        compose_upload_temp_s3_path(user.id, bot_id, filename),
+        upload_id,
+        parts,
+    )
+
+
+def cancel_multipart_upload(user: User, bot_id: str, filename: str, upload_id: str):
+    """Abort the multipart upload and discard its uploaded parts."""
+    abort_multipart_upload(
+        DOCUMENT_BUCKET,
+        compose_upload_temp_s3_path(user.id, bot_id, filename),
+        upload_id,
+    )
+
+
 def remove_bot_from_recently_used(user: User, bot_id: str):
     """Remove bot from recently used bots by removing LastUsedTime attribute."""
     try:
@@ -674,6 +741,9 @@ def fetch_available_agent_tools() -> list[Tool]:
 
     if use_strands:
         # Use Strands integration
+        # NOTE: Imported here to keep Strands out of the cold start
+        from app.strands_integration.utils import get_strands_registered_tools
+
         tools = get_strands_registered_tools()
         result: list[Tool] = []
         for tool in tools:
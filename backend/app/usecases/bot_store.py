@@ -18,12 +18,14 @@ def search_bots(
     user: User,
     query: str,
     limit: int = 20,
+    cursor: str | None = None,
 ) -> list[BotMetaOutput]:
     """Search bots by query string."""
     bots = find_bots_by_query(
         query,
         user,
         limit=limit,
+        cursor=cursor,
     )
     bot_metas = []
     for bot in bots:
@@ -1,5 +1,7 @@
 import logging
-from typing import Callable
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Literal
 
 from app.agents.tools.agent_tool import ToolRunResult
 from app.agents.utils import get_tools
@@ -8,7 +10,9 @@ from app.bedrock import (
     call_converse_api,
     compose_args_for_converse_api,
     is_tooluse_supported,
+    should_cache_messages,
 )
+from app.log_utils import log_payload
 from app.prompt import build_rag_prompt, get_prompt_to_cite_tool_results
 from app.repositories.conversation import (
     RecordNotFoundError,
@@ -44,7 +48,13 @@ from app.routes.schemas.conversation import (
     SearchHighlight,
     type_model_name,
 )
-from app.stream import ConverseApiStreamHandler, OnStopInput, OnThinking
+from app.stream import (
+    ConverseApiStreamHandler,
+    OnStopInput,
+    OnThinking,
+    OnToolProgress,
+)
+from app.time_budget import TimeBudget, TimeBudgetExceededError
 from app.usecases.bot import fetch_bot, modify_bot_last_used_time, modify_bot_stats
 from app.user import User
 from app.utils import get_current_time
@@ -59,6 +69,9 @@ from ulid import ULID
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Max number of tools run at the same time for the tool uses in a single response
+MAX_CONCURRENT_TOOL_RUNS = int(os.environ.get("MAX_CONCURRENT_TOOL_RUNS", 4))
+
 
 def prepare_conversation(
     user: User,
@@ -70,7 +83,7 @@ def prepare_conversation(
     try:
         # Fetch existing conversation
         conversation = find_conversation_by_id(user.id, chat_input.conversation_id)
-        logger.info(f"Found conversation: {conversation}")
+        logger.info("Found conversation: %s", log_payload(conversation))
         parent_id = chat_input.message.parent_message_id
         if chat_input.message.parent_message_id == "system" and chat_input.bot_id:
             # The case editing first user message and use bot
@@ -213,6 +226,7 @@ def chat(
     on_stop: Callable[[OnStopInput], None] | None = None,
     on_thinking: Callable[[OnThinking], None] | None = None,
     on_tool_result: Callable[[ToolRunResult], None] | None = None,
+    on_tool_progress: Callable[[OnToolProgress], None] | None = None,
     on_reasoning: Callable[[str], None] | None = None,
 ) -> tuple[ConversationModel, MessageModel]:
     user_msg_id, conversation, bot = prepare_conversation(user, chat_input)
@@ -229,6 +243,9 @@ def chat(
         else []
     )
 
+    # Tools and retrieval of this turn share the time budget.
+    time_budget = TimeBudget(bot.agent.turn_time_budget if bot is not None else None)
+
     related_documents: list[RelatedDocumentModel] = []
     search_results: list[SearchResult] = []
     if bot is not None:
@@ -257,16 +274,31 @@ def chat(
                         }
                     )
 
-                search_results = search_related_docs(
-                    bot=bot, query=content.body, filter_metadata=chat_input.filter_metadata
-                )
-                logger.info(f"Search results from vector store: {search_results}")
+                search_status: Literal["success", "error"] = "success"
+                try:
+                    search_results = time_budget.run(
+                        "knowledge_base_tool",
+                        lambda: search_related_docs(
+                            bot=bot,
+                            query=content.body,
+                            filter_metadata=chat_input.filter_metadata,
+                        ),
+                    )
+                    logger.info(
+                        "Search results from vector store: %s",
+                        log_payload(search_results),
+                    )
+
+                except TimeBudgetExceededError as e:
+                    # Answer without the documents rather than failing the turn
+                    logger.warning(e)
+                    search_status = "error"
 
                 if on_tool_result:
                     on_tool_result(
                         {
                             "tool_use_id": pseudo_tool_use_id,
-                            "status": "success",
+                            "status": search_status,
                             "related_documents": [
                                 search_result_to_related_document(
                                     search_result=result,
@@ -346,6 +378,8 @@ def chat(
             on_stream=on_stream,
             on_thinking=on_thinking,
             on_tool_result=on_tool_run_result,
+            on_tool_progress=on_tool_progress,
+            time_budget=time_budget,
             on_reasoning=on_reasoning,
         )
 
@@ -362,9 +396,12 @@ def chat(
             on_stream=on_stream,
             on_thinking=on_thinking,
             on_tool_result=on_tool_run_result,
+            time_budget=time_budget,
             on_reasoning=on_reasoning,
         )
 
+    time_budget.emit_metrics(bot_id=bot.id if bot is not None else None)
+
     # Post handling: process the result and update conversation
     return post_process_result(
         result=result,
@@ -394,6 +431,7 @@ def converse_legacy(
     on_thinking: Callable[[OnThinking], None] | None = None,
     on_tool_result: Callable[[ToolRunResult], None] | None = None,
     on_reasoning: Callable[[str], None] | None = None,
+    time_budget: TimeBudget | None = None,
 ) -> OnStopInput:
     """
     Legacy converse implementation.
@@ -430,6 +468,11 @@ def converse_legacy(
             prompt_caching_enabled=(
                 bot.prompt_caching_enabled if bot is not None else True
             ),
+            cache_messages=(
+                should_cache_messages(bot.usage_stats, chat_input.conversation_id)
+                if bot is not None
+                else True
+            ),
         )
 
         message = result["message"]
@@ -481,19 +524,41 @@ def converse_legacy(
             if isinstance(content, ToolUseContentModel)
         ]
 
-        run_results: list[ToolRunResult] = []
-        for content in tool_use_contents:
+        def run_tool(content: ToolUseContentModel) -> ToolRunResult:
             tool = tools[content.body.name]
-            run_result = tool.run(
+            return tool.run(
                 tool_use_id=content.body.tool_use_id,
                 input=content.body.input,
                 model=chat_input.message.model,
                 bot=bot,
+                time_budget=time_budget,
             )
-            run_results.append(run_result)
 
-            if on_tool_result:
-                on_tool_result(run_result)
+        run_results: list[ToolRunResult] = []
+        if len(tool_use_contents) <= 1:
+            for content in tool_use_contents:
+                run_result = run_tool(content)
+                run_results.append(run_result)
+
+                if on_tool_result:
+                    on_tool_result(run_result)
+
+        else:
+            # Run the tools concurrently, so that the latency is that of the slowest tool.
+            with ThreadPoolExecutor(
+                max_workers=min(MAX_CONCURRENT_TOOL_RUNS, len(tool_use_contents))
+            ) as executor:
+                futures = [
+                    executor.submit(run_tool, content) for content in tool_use_contents
+                ]
+
+                # Notify each result as soon as it is available, on the calling thread.
+                for future in as_completed(futures):
+                    if on_tool_result:
+                        on_tool_result(future.result())
+
+                # Tool results are returned in the order of the tool uses.
+                run_results = [future.result() for future in futures]
 
         tool_result_message = SimpleMessageModel(
             role="user",
@@ -590,7 +655,14 @@ def post_process_result(
         # Update bot last used time
         modify_bot_last_used_time(user, bot)
         # Update bot stats
-        modify_bot_stats(user, bot, increment=1)
+        # Cache tokens are accumulated to measure the cache hit rate of the bot.
+        modify_bot_stats(
+            user,
+            bot,
+            increment=1,
+            cache_read_input_tokens=result["cache_read_input_count"],
+            cache_write_input_tokens=result["cache_write_input_count"],
+        )
 
     return conversation, message
 
@@ -752,9 +824,14 @@ def fetch_conversation(user_id: str, conversation_id: str) -> Conversation:
     return output
 
 
-def search_conversations(query: str, user: User) -> list[ConversationSearchResult]:
+def search_conversations(
+    query: str,
+    user: User,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> list[ConversationSearchResult]:
     """Search conversations by keyword"""
-    conversations = find_conversations_by_query(query, user)
+    conversations = find_conversations_by_query(query, user, limit=limit, cursor=cursor)
     output = []
 
     for conversation in conversations:
@@ -776,6 +853,7 @@ def search_conversations(query: str, user: User) -> list[ConversationSearchResul
                 last_updated_time=conversation.last_updated_time,
                 bot_id=conversation.bot_id,
                 highlights=schema_highlights,
+                search_cursor=conversation.search_cursor,
             )
         )
 
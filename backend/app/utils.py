@@ -2,12 +2,18 @@ import json
 import logging
 import os
 from datetime import datetime
+from functools import cache
 from typing import Literal
 
 import boto3
 from botocore.client import Config
 from botocore.exceptions import ClientError
 
+from app.s3_utils import (
+    abort_multipart_uploads_with_prefix,
+    delete_objects_with_prefix,
+    move_objects,
+)
 from app.user import User
 
 logger = logging.getLogger(__name__)
@@ -42,7 +48,9 @@ def get_bedrock_client(region=BEDROCK_REGION):
     return client
 
 
+@cache
 def get_bedrock_runtime_client(region=BEDROCK_REGION):
+    # Shared across requests to reuse the connections to Bedrock. Clients are thread-safe.
     client = boto3.client("bedrock-runtime", region_name=region)
     return client
 
@@ -62,6 +70,16 @@ def get_current_time():
     return int(datetime.now().timestamp() * 1000)
 
 
+@cache
+def _get_presign_s3_client():
+    # See: https://github.com/boto/boto3/issues/421#issuecomment-1849066655
+    return boto3.client(
+        "s3",
+        region_name=BEDROCK_REGION,
+        config=Config(signature_version="v4", s3={"addressing_style": "path"}),
+    )
+
+
 def generate_presigned_url(
     bucket: str,
     key: str,
@@ -69,12 +87,7 @@ def generate_presigned_url(
     expiration=3600,
     client_method: Literal["put_object", "get_object"] = "put_object",
 ) -> str:
-    # See: https://github.com/boto/boto3/issues/421#issuecomment-1849066655
-    client = boto3.client(
-        "s3",
-        region_name=BEDROCK_REGION,
-        config=Config(signature_version="v4", s3={"addressing_style": "path"}),
-    )
+    client = _get_presign_s3_client()
     params = {"Bucket": bucket, "Key": key}
     if content_type:
         params["ContentType"] = content_type
@@ -88,6 +101,72 @@ def generate_presigned_url(
     return response
 
 
+def create_multipart_upload(
+    bucket: str, key: str, content_type: str | None = None
+) -> str:
+    """Initiate a multipart upload and return its upload ID."""
+    client = _get_presign_s3_client()
+    params = {"Bucket": bucket, "Key": key}
+    if content_type:
+        params["ContentType"] = content_type
+    response = client.create_multipart_upload(**params)
+    return response["UploadId"]
+
+
+def generate_presigned_upload_part_urls(
+    bucket: str,
+    key: str,
+    upload_id: str,
+    part_numbers: list[int],
+    expiration=3600,
+) -> list[str]:
+    """Presign `upload_part` for each part number, so that clients can upload the parts in parallel."""
+    client = _get_presign_s3_client()
+    return [
+        client.generate_presigned_url(
+            ClientMethod="upload_part",
+            Params={
+                "Bucket": bucket,
+                "Key": key,
+                "UploadId": upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=expiration,
+            HttpMethod="PUT",
+        )
+        for part_number in part_numbers
+    ]
+
+
+def complete_multipart_upload(
+    bucket: str, key: str, upload_id: str, parts: list[tuple[int, str]]
+):
+    """Complete a multipart upload. `parts` are pairs of the part number and the ETag of the part."""
+    client = _get_presign_s3_client()
+    client.complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={
+            "Parts": [
+                {"PartNumber": part_number, "ETag": etag}
+                for part_number, etag in sorted(parts)
+            ]
+        },
+    )
+
+
+def abort_multipart_upload(bucket: str, key: str, upload_id: str):
+    """Abort a multipart upload and discard its uploaded parts."""
+    client = _get_presign_s3_client()
+    try:
+        client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+    except ClientError as e:
+        # Already completed or aborted
+        if e.response["Error"]["Code"] != "NoSuchUpload":
+            raise
+
+
 def compose_upload_temp_s3_prefix(user_id: str, bot_id: str) -> str:
     return f"{user_id}/{bot_id}/_temp/"
 
@@ -125,15 +204,11 @@ def delete_file_from_s3(bucket: str, key: str, ignore_not_exist: bool = False):
 
 
 def delete_files_with_prefix_from_s3(bucket: str, prefix: str):
-    """Delete all objects with the given prefix from the given bucket."""
-    client = boto3.client("s3", region_name=BEDROCK_REGION)
-    response = client.list_objects_v2(Bucket=bucket, Prefix=prefix)
-
-    if "Contents" not in response:
-        return
-
-    for obj in response["Contents"]:
-        client.delete_object(Bucket=bucket, Key=obj["Key"])
+    """Delete all objects with the given prefix from the given bucket.
+    Multipart uploads in progress under the prefix are also aborted.
+    """
+    delete_objects_with_prefix(bucket, prefix)
+    abort_multipart_uploads_with_prefix(bucket, prefix)
 
 
 def check_if_file_exists_in_s3(bucket: str, key: str):
@@ -152,22 +227,10 @@ def check_if_file_exists_in_s3(bucket: str, key: str):
 
 
 def move_file_in_s3(bucket: str, key: str, new_key: str):
-    client = boto3.client("s3", region_name=BEDROCK_REGION)
-
-    # Check if the file exists
-    try:
-        client.head_object(Bucket=bucket, Key=key)
-    except ClientError as e:
-        if e.response["Error"]["Code"] == "404":
-            raise FileNotFoundError(f"The file does not exist in bucket.")
-        else:
-            raise
-
-    response = client.copy_object(
-        Bucket=bucket, Key=new_key, CopySource={"Bucket": bucket, "Key": key}
-    )
-    response = client.delete_object(Bucket=bucket, Key=key)
-    return response
+    """Move a file in the bucket. Large files are copied by multipart copy.
+    To move many files, use `app.s3_utils.move_objects` to copy them concurrently.
+    """
+    move_objects(bucket, [(key, new_key)])
 
 
 def start_codebuild_project(environment_variables: dict) -> str:
@@ -1,4 +1,5 @@
 import logging
+from functools import cache
 from typing import Any, TypedDict
 from urllib.parse import urlparse
 
@@ -19,7 +20,12 @@ from mypy_boto3_bedrock_agent_runtime.type_defs import (
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-agent_client = get_bedrock_agent_runtime_client()
+
+
+@cache
+def _get_agent_client():
+    # Created on first use to keep it out of the cold start
+    return get_bedrock_agent_runtime_client()
 
 
 class SearchResult(TypedDict):
@@ -147,7 +153,7 @@ def _bedrock_knowledge_base_search(
         # Send retrieve request
         filter_applied = retrieve_parameter.get('retrievalConfiguration', {}).get('vectorSearchConfiguration', {}).get('filter')
         logger.info(f"[KB_SEARCH] About to retrieve with filter: {filter_applied}")
-        response = agent_client.retrieve(**retrieve_parameter)
+        response = _get_agent_client().retrieve(**retrieve_parameter)
 
         def extract_source_from_retrieval_result(
             retrieval_result: KnowledgeBaseRetrievalResultTypeDef,
@@ -0,0 +1,95 @@
+"""Warm-up of the per-container state that the first request would otherwise pay for.
+
+`warm_up_on_init()` is called while the handler is initialized, i.e. at cold start, when provisioned
+concurrency is allocated, or before Lambda SnapStart takes a snapshot. It builds pydantic validators
+and opens connections to DynamoDB, S3 and Bedrock, which are reused by the following requests.
+
+With SnapStart, the snapshot is restored in many execution environments, so the after restore hook
+re-seeds `random` and drops the cached clients, whose connections and assumed role credentials
+belong to the snapshotted environment. The hook is only called for the websocket handlers: the API
+runs behind Lambda Web Adapter, which does not run Python runtime hooks. Stale connections of the
+API are reestablished by botocore retries.
+"""
+
+import logging
+import os
+import random
+import time
+
+from app.repositories.common import (
+    get_bot_table_client,
+    get_conversation_table_public_client,
+    reset_aws_clients,
+)
+from app.repositories.conversation import LARGE_MESSAGE_BUCKET, _get_s3_client
+from app.repositories.models.conversation import ConversationModel, MessageModel
+from app.repositories.models.custom_bot import BotModel
+from app.routes.schemas.conversation import ChatInput, ChatOutput
+from app.utils import get_bedrock_runtime_client, is_running_on_lambda
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+WARM_UP_ON_INIT = (
+    os.environ.get("WARM_UP_ON_INIT", str(is_running_on_lambda())).lower() == "true"
+)
+
+# Models validated or serialized on every chat turn
+WARM_UP_MODELS = (BotModel, MessageModel, ConversationModel, ChatInput, ChatOutput)
+
+
+def _build_validators():
+    # Models referring to types defined later in their module are completed on first use
+    for model in WARM_UP_MODELS:
+        model.model_rebuild()
+
+
+def _open_connections():
+    # The tables are accessed by the table-wide clients, whose assumed role credentials are cached
+    for table in (get_bot_table_client(), get_conversation_table_public_client()):
+        table.meta.client.describe_table(TableName=table.name)
+
+    if LARGE_MESSAGE_BUCKET:
+        _get_s3_client().head_bucket(Bucket=LARGE_MESSAGE_BUCKET)
+
+    # Bedrock runtime has no cheaper read-only API
+    get_bedrock_runtime_client().list_async_invokes(maxResults=1)
+
+
+def warm_up():
+    """Build validators and open connections. Failures are logged and do not fail the init."""
+    for step in (_build_validators, _open_connections):
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {step.__name__} failed: {e}")
+            continue
+
+        logger.info(
+            "Warm-up step %s took %.0f ms",
+            step.__name__,
+            (time.perf_counter() - start) * 1000,
+        )
+
+
+def after_restore():
+    """Re-seed randomness and drop connections and credentials restored from the snapshot."""
+    random.seed()
+    reset_aws_clients()
+    _get_s3_client.cache_clear()
+    get_bedrock_runtime_client.cache_clear()
+
+
+def warm_up_on_init():
+    """Warm up if `WARM_UP_ON_INIT` is enabled, and register the SnapStart after restore hook."""
+    if WARM_UP_ON_INIT:
+        warm_up()
+
+    try:
+        # Available in the Lambda managed runtimes for Python 3.12 and later
+        from snapshot_restore_py import register_after_restore
+    except ImportError:
+        return
+
+    register_after_restore(after_restore)
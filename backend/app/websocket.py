@@ -9,13 +9,14 @@ from threading import Thread
 from typing import BinaryIO, Literal, TypedDict
 
 import boto3
-from app.agents.tools.agent_tool import ToolRunResult
 from app.auth import verify_token
+from app.log_utils import configure_log_sampling, log_payload
+from app.notification import ChatNotifier
 from app.repositories.conversation import RecordNotFoundError
 from app.routes.schemas.conversation import ChatInput
-from app.stream import OnStopInput, OnThinking
 from app.usecases.chat import chat
 from app.user import User
+from app.warmup import warm_up_on_init
 from boto3.dynamodb.conditions import Attr, Key
 
 WEBSOCKET_SESSION_TABLE_NAME = os.environ["WEBSOCKET_SESSION_TABLE_NAME"]
@@ -26,6 +27,9 @@ table = dynamodb_client.Table(WEBSOCKET_SESSION_TABLE_NAME)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+configure_log_sampling()
+warm_up_on_init()
+
 
 class _NotifyCommand(TypedDict):
     type: Literal["notify"]
@@ -39,7 +43,7 @@ class _FinishCommand(TypedDict):
 _Command = _NotifyCommand | _FinishCommand
 
 
-class NotificationSender:
+class NotificationSender(ChatNotifier):
     def __init__(self, endpoint_url: str, connection_id: str) -> None:
         self.commands = SimpleQueue[_Command]()
         self.endpoint_url = endpoint_url
@@ -58,14 +62,17 @@ class NotificationSender:
             if command["type"] == "notify":
                 try:
                     logger.debug(
-                        f"[WEBSOCKET_SEND] Sending to connection {self.connection_id}: {command['payload'][:200]}..."
+                        "[WEBSOCKET_SEND] Sending to connection %s: %s",
+                        self.connection_id,
+                        log_payload(command["payload"]),
                     )
                     gatewayapi.post_to_connection(
                         ConnectionId=self.connection_id,
                         Data=command["payload"],
                     )
                     logger.debug(
-                        f"[WEBSOCKET_SEND] Successfully sent to connection {self.connection_id}"
+                        "[WEBSOCKET_SEND] Successfully sent to connection %s",
+                        self.connection_id,
                     )
 
                 except (
@@ -91,102 +98,14 @@ class NotificationSender:
         )
 
     def notify(self, payload: bytes | BinaryIO):
-        logger.debug(
-            f"[WEBSOCKET_NOTIFY] Adding payload to queue: {len(str(payload))} chars"
-        )
+        logger.debug("[WEBSOCKET_NOTIFY] Adding payload to queue")
         self.commands.put(
             {
                 "type": "notify",
                 "payload": payload,
             }
         )
-        logger.debug(f"[WEBSOCKET_NOTIFY] Payload added to queue successfully")
-
-    def on_stream(self, token: str):
-        # Send completion
-        payload = json.dumps(
-            dict(
-                status="STREAMING",
-                completion=token,
-            )
-        ).encode("utf-8")
-
-        self.notify(payload=payload)
-
-    def on_stop(self, arg: OnStopInput):
-        logger.debug(f"[WEBSOCKET_ON_STOP] WebSocket on_stop called with: {arg}")
-        payload = json.dumps(
-            dict(
-                status="STREAMING_END",
-                completion="",
-                stop_reason=arg["stop_reason"],
-                token_count=dict(
-                    input=arg["input_token_count"],
-                    output=arg["output_token_count"],
-                    cache_read_input=arg["cache_read_input_count"],
-                    cache_write_input=arg["cache_write_input_count"],
-                ),
-                price=arg["price"],
-            )
-        ).encode("utf-8")
-
-        logger.debug(
-            f"[WEBSOCKET_ON_STOP] Sending STREAMING_END payload: {payload.decode('utf-8')}"
-        )
-        self.notify(payload=payload)
-        logger.debug(f"[WEBSOCKET_ON_STOP] STREAMING_END payload sent successfully")
-
-    def on_agent_thinking(self, tool_use: OnThinking):
-        payload = json.dumps(
-            dict(
-                status="AGENT_THINKING",
-                log={
-                    tool_use["tool_use_id"]: {
-                        "name": tool_use["name"],
-                        "input": tool_use["input"],
-                    },
-                },
-            )
-        ).encode("utf-8")
-
-        self.notify(payload=payload)
-
-    def on_agent_tool_result(self, run_result: ToolRunResult):
-        self.notify(
-            payload=json.dumps(
-                dict(
-                    status="AGENT_TOOL_RESULT",
-                    result={
-                        "toolUseId": run_result["tool_use_id"],
-                        "status": run_result["status"],
-                    },
-                )
-            ).encode("utf-8")
-        )
-
-        for related_document in run_result["related_documents"]:
-            self.notify(
-                payload=json.dumps(
-                    dict(
-                        status="AGENT_RELATED_DOCUMENT",
-                        result={
-                            "toolUseId": run_result["tool_use_id"],
-                            "relatedDocument": related_document.to_schema().model_dump(
-                                by_alias=True
-                            ),
-                        },
-                    )
-                ).encode("utf-8")
-            )
-
-    def on_reasoning(self, token: str):
-        payload = json.dumps(
-            dict(
-                status="REASONING",
-                completion=token,
-            )
-        ).encode("utf-8")
-        self.notify(payload=payload)
+        logger.debug("[WEBSOCKET_NOTIFY] Payload added to queue successfully")
 
 
 def process_chat_input(
@@ -195,7 +114,7 @@ def process_chat_input(
     notificator: NotificationSender,
 ) -> dict:
     """Process chat input and send the message to the client."""
-    logger.info(f"Received chat input: {chat_input}")
+    logger.info("Received chat input: %s", log_payload(chat_input))
 
     try:
         chat(
@@ -211,6 +130,9 @@ def process_chat_input(
             on_tool_result=lambda run_result: notificator.on_agent_tool_result(
                 run_result=run_result
             ),
+            on_tool_progress=lambda progress: notificator.on_agent_tool_progress(
+                progress=progress
+            ),
             on_reasoning=lambda token: notificator.on_reasoning(
                 token=token,
             ),
@@ -254,7 +176,7 @@ def process_chat_input(
 
 
 def handler(event, context):
-    logger.info(f"Received event: {event}")
+    logger.info("Received event: %s", log_payload(event))
     route_key = event["requestContext"]["routeKey"]
 
     if route_key == "$connect":
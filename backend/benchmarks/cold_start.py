@@ -0,0 +1,99 @@
+"""Measure the import time of the API app, which dominates the Lambda init duration.
+
+Imports `app.main` in fresh interpreters and reports the median import time, then prints
+an `-X importtime` report of the packages and modules taking the longest to import.
+
+Usage (from `backend`):
+    python benchmarks/cold_start.py --runs 5 --top 20
+    python benchmarks/cold_start.py --published  # Published API app
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import app.main
+print(time.perf_counter() - start)
+"""
+
+# e.g. "import time:       291 |       1093 |   app.repositories.common"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_import(env: dict[str, str], importtime: bool) -> subprocess.CompletedProcess:
+    args = [sys.executable]
+    if importtime:
+        args += ["-X", "importtime"]
+    args += ["-c", IMPORT_SCRIPT]
+    return subprocess.run(
+        args, env=env, capture_output=True, text=True, check=True, cwd="."
+    )
+
+
+def print_importtime_report(stderr: str, top: int):
+    self_per_package: dict[str, int] = defaultdict(int)
+    cumulative_per_module: dict[str, int] = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        self_per_package[module.split(".")[0]] += int(self_us)
+        cumulative_per_module[module] = int(cumulative_us)
+
+    print(f"\nTop {top} packages by self import time:")
+    for package, self_us in sorted(
+        self_per_package.items(), key=lambda x: x[1], reverse=True
+    )[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    print(f"\nTop {top} app modules by cumulative import time:")
+    app_modules = {
+        module: cumulative_us
+        for module, cumulative_us in cumulative_per_module.items()
+        if module.startswith("app.")
+    }
+    for module, cumulative_us in sorted(
+        app_modules.items(), key=lambda x: x[1], reverse=True
+    )[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument(
+        "--published", action="store_true", help="Measure the published API app"
+    )
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    if args.published:
+        env["PUBLISHED_API_ID"] = env.get("PUBLISHED_API_ID", "benchmark")
+
+    # Warm up to compile bytecode, which is included in the deployment package
+    run_import(env, importtime=False)
+
+    durations = [
+        float(run_import(env, importtime=False).stdout.strip().splitlines()[-1])
+        for _ in range(args.runs)
+    ]
+    print(
+        f"import app.main: median {statistics.median(durations) * 1000:.0f} ms, "
+        f"min {min(durations) * 1000:.0f} ms ({args.runs} runs)"
+    )
+
+    print_importtime_report(run_import(env, importtime=True).stderr, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Benchmark logging cost of a chat turn.
+
+Compares eager f-string logging of whole payloads, which was done on every turn
+(`Storing conversation: {conversation.model_dump_json()}`, `Found conversation: {conversation}`
+and `args for converse_stream: {args}`), with `log_payload` and per-module sampling.
+Each configuration, including building the Converse args without logging, is measured directly.
+Configurations are run in turn for each repeat after a warm-up run, so that drift affects all of them.
+Reports min / median CPU time and bytes written to the log stream
+(i.e. ingested by CloudWatch) per turn.
+
+Usage (from `backend`):
+    python benchmarks/hot_path_logging.py --turns 200 --repeats 5 --messages 20 --image-size 1048576
+"""
+
+import argparse
+import io
+import logging
+import statistics
+import sys
+import time
+
+sys.path.append(".")
+
+from app.log_utils import SamplingFilter, log_payload
+from app.repositories.models.conversation import (
+    ConversationModel,
+    ImageContentModel,
+    MessageModel,
+    TextContentModel,
+)
+
+
+def build_conversation(messages: int, image_size: int) -> ConversationModel:
+    message_map = {}
+    parent = None
+    for i in range(messages):
+        content: list = [
+            TextContentModel(content_type="text", body="Lorem ipsum dolor sit " * 50)
+        ]
+        if i == 0:
+            content.append(
+                ImageContentModel(
+                    content_type="image",
+                    media_type="image/png",
+                    body=b"\x89PNG" + b"\x00" * image_size,
+                )
+            )
+        message_map[str(i)] = MessageModel(
+            role="user" if i % 2 == 0 else "assistant",
+            content=content,
+            model="claude-v3.5-sonnet",
+            children=[str(i + 1)] if i + 1 < messages else [],
+            parent=parent,
+            create_time=time.time(),
+        )
+        parent = str(i)
+
+    return ConversationModel(
+        id="conversation",
+        create_time=time.time(),
+        title="Benchmark",
+        total_price=0,
+        message_map=message_map,
+        last_message_id=str(messages - 1),
+        bot_id=None,
+        should_continue=False,
+    )
+
+
+def converse_args(conversation: ConversationModel) -> dict:
+    return {
+        "modelId": "anthropic.claude-3-5-sonnet",
+        "messages": [
+            {
+                "role": message.role,
+                "content": [
+                    content.model_dump(exclude={"content_type"})
+                    for content in message.content
+                ],
+            }
+            for message in conversation.message_map.values()
+        ],
+    }
+
+
+def run_without_logging(logger: logging.Logger, conversation: ConversationModel):
+    converse_args(conversation)
+
+
+def run_previous(logger: logging.Logger, conversation: ConversationModel):
+    args = converse_args(conversation)
+    logger.info(f"Found conversation: {conversation}")
+    logger.info(f"args for converse_stream: {args}")
+    logger.info(f"Storing conversation: {conversation.model_dump_json()}")
+
+
+def run_current(logger: logging.Logger, conversation: ConversationModel):
+    args = converse_args(conversation)
+    logger.info("Found conversation: %s", log_payload(conversation))
+    logger.info("args for converse_stream: %s", log_payload(args))
+    logger.info("Storing conversation: %s", log_payload(conversation))
+
+
+def measure(
+    run, conversation: ConversationModel, turns: int, sample_rate: float
+) -> tuple[float, float]:
+    """Return CPU time in ms and log bytes per turn."""
+    stream = io.StringIO()
+    logger = logging.getLogger(f"benchmark.{run.__name__}.{sample_rate}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers = [logging.StreamHandler(stream)]
+    logger.filters = [SamplingFilter(sample_rate)] if sample_rate < 1 else []
+
+    start = time.process_time()
+    for _ in range(turns):
+        run(logger, conversation)
+    cpu_time = time.process_time() - start
+
+    return cpu_time / turns * 1000, len(stream.getvalue().encode("utf-8")) / turns
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--image-size", type=int, default=1024 * 1024)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    conversation = build_conversation(args.messages, args.image_size)
+    configurations = [
+        ("without logging", run_without_logging, 1.0),
+        ("previous", run_previous, 1.0),
+        ("current", run_current, 1.0),
+        (f"current (sampled {args.sample_rate})", run_current, args.sample_rate),
+    ]
+    for _, run, sample_rate in configurations:
+        measure(run, conversation, args.turns, sample_rate)
+
+    results_per_configuration: list[list[tuple[float, float]]] = [
+        [] for _ in configurations
+    ]
+    for _ in range(args.repeats):
+        for (_, run, sample_rate), results in zip(
+            configurations, results_per_configuration
+        ):
+            results.append(measure(run, conversation, args.turns, sample_rate))
+
+    for (name, _, _), results in zip(configurations, results_per_configuration):
+        cpu_ms = [cpu_ms for cpu_ms, _ in results]
+        log_bytes = statistics.median(log_bytes for _, log_bytes in results)
+        print(
+            f"{name:>24}: min {min(cpu_ms):8.2f} / median {statistics.median(cpu_ms):8.2f}"
+            f" ms CPU/turn, {log_bytes:12.0f} log bytes/turn"
+            f" ({args.repeats} x {args.turns} turns)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Benchmark the request pipeline (auth, request logging and worker threads) of the API.
+
+Compares the previous pipeline, which verified the token and read the request body in
+`@app.middleware("http")` on the event loop, with the current one, which resolves the user in
+a cached dependency on the worker thread pool and logs without reading the body.
+Token verification is replaced with a sleep of `--auth-latency` ms to simulate fetching the key set.
+
+Usage (from `backend`):
+    python benchmarks/request_pipeline.py --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.append(".")
+
+import app.dependencies as dependencies
+from app.dependencies import resolve_current_user
+from app.middleware import RequestLogMiddleware
+from app.user import User
+from fastapi import Depends, FastAPI, Request
+
+logging.basicConfig(level=logging.WARNING)
+
+CLAIMS = {
+    "sub": "user",
+    "cognito:username": "user",
+    "email": "user@example.com",
+    "exp": time.time() + 3600,
+}
+
+
+def build_previous_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/echo")
+    def echo(request: Request):
+        return {"user": request.state.current_user.id}
+
+    @app.middleware("http")
+    def add_current_user_to_request(request: Request, call_next):
+        # The token was verified on every request without caching
+        authorization = request.headers.get("Authorization")
+        decoded = dependencies.verify_token(authorization.split(" ")[1])
+        request.state.current_user = User(
+            id=decoded["sub"],
+            name=decoded["cognito:username"],
+            email=decoded["email"],
+            groups=[],
+        )
+        return call_next(request)
+
+    @app.middleware("http")
+    async def add_log_requests(request: Request, call_next):
+        logging.info(f"Request headers: {request.headers}")
+        body = await request.body()
+        logging.info(f"Request body: {body.decode('utf-8')[:100]}...")
+        return await call_next(request)
+
+    return app
+
+
+def build_current_app() -> FastAPI:
+    app = FastAPI(dependencies=[Depends(resolve_current_user)])
+
+    @app.post("/echo")
+    def echo(request: Request):
+        return {"user": request.state.current_user.id}
+
+    app.add_middleware(RequestLogMiddleware, sample_rate=0.1)
+    return app
+
+
+async def call(app: FastAPI, body: bytes):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/echo",
+        "raw_path": b"/echo",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"authorization", b"Bearer token"),
+            (b"content-type", b"application/json"),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 8000),
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    await app(scope, receive, send)
+
+
+async def run(app: FastAPI, requests: int, concurrency: int, body: bytes) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded_call():
+        async with semaphore:
+            await call(app, body)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded_call() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--auth-latency", type=float, default=20)
+    parser.add_argument("--body-size", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    def verify_token(token: str) -> dict:
+        time.sleep(args.auth_latency / 1000)
+        return CLAIMS
+
+    body = b'{"message": "' + b"a" * args.body_size + b'"}'
+    with (
+        patch("app.dependencies.verify_token", verify_token),
+        patch("app.dependencies.is_running_on_lambda", lambda: True),
+    ):
+        for name, app in (
+            ("previous", build_previous_app()),
+            ("current", build_current_app()),
+        ):
+            rps = asyncio.run(run(app, args.requests, args.concurrency, body))
+            print(f"{name:>8}: {rps:8.1f} requests/sec")
+
+
+if __name__ == "__main__":
+    main()
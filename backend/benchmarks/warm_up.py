@@ -0,0 +1,80 @@
+"""Measure the latency of the first requests to a container with and without warm-up.
+
+Starts the API app in fresh interpreters with `WARM_UP_ON_INIT` disabled (cold) and enabled (warm),
+and reports the init duration, which includes the warm-up, and the latency of the first requests.
+Requests are sent in-process, so the latency excludes Lambda Web Adapter and API Gateway.
+
+Requires AWS credentials and the environment variables of the API (e.g. `CONVERSATION_TABLE_NAME`,
+`BOT_TABLE_NAME` and `LARGE_MESSAGE_BUCKET`). Without `AWS_EXECUTION_ENV` the local test user is used.
+
+Usage (from `backend`):
+    python benchmarks/warm_up.py --runs 3 --requests 3 --path /conversations
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REQUEST_SCRIPT = """
+import json
+import sys
+import time
+start = time.perf_counter()
+from app.main import app
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    init = time.perf_counter() - start
+    latencies = []
+    for _ in range({requests}):
+        request_start = time.perf_counter()
+        client.get({path!r}).raise_for_status()
+        latencies.append(time.perf_counter() - request_start)
+print(json.dumps(dict(init=init, latencies=latencies)))
+"""
+
+
+def run_container(warm_up: bool, requests: int, path: str) -> dict:
+    env = dict(os.environ, WARM_UP_ON_INIT=str(warm_up).lower())
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            REQUEST_SCRIPT.format(requests=requests, path=path),
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=".",
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=3)
+    parser.add_argument("--path", default="/conversations")
+    args = parser.parse_args()
+
+    for name, warm_up in (("cold", False), ("warm", True)):
+        results = [
+            run_container(warm_up, args.requests, args.path) for _ in range(args.runs)
+        ]
+        init = statistics.median(result["init"] for result in results)
+        latencies = [
+            statistics.median(result["latencies"][i] for result in results)
+            for i in range(args.requests)
+        ]
+        print(
+            f"{name}: init {init * 1000:.0f} ms, requests "
+            + ", ".join(f"#{i + 1} {l * 1000:.0f} ms" for i, l in enumerate(latencies))
+            + f" (median of {args.runs} runs)"
+        )
+
+
+if __name__ == "__main__":
+    main()
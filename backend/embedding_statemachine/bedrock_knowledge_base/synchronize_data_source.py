@@ -1,19 +1,68 @@
+import json
 import os
-from itertools import islice
-from typing import TypedDict
-
-from app.utils import (
-    compose_upload_document_s3_path,
-    get_bedrock_agent_client,
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypedDict, TypeVar
+
+import boto3
+from app.repositories.common import RecordNotFoundError
+from app.repositories.custom_bot import (
+    find_bot_metas_by_ids,
+    find_bots_by_knowledge_base_id,
+    find_document_hashes,
+    update_document_hashes,
 )
+from app.utils import compose_upload_document_s3_path
+from botocore.config import Config
 
+BEDROCK_REGION = os.environ.get("BEDROCK_REGION")
 DOCUMENT_BUCKET = os.environ.get("DOCUMENT_BUCKET")
-bedrock_agent = get_bedrock_agent_client()
+
+# Max number of documents per call of `*_knowledge_base_documents` APIs
+DOCUMENTS_BATCH_SIZE = 10
+# Max concurrency of the calls. The APIs have low rate quotas, which are shared by all bots.
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("MAX_CONCURRENT_REQUESTS", 4))
+
+# Adaptive retry mode backs off on throttling errors and limits the client-side request rate,
+# which is shared by all threads using the client.
+bedrock_agent = boto3.client(
+    service_name="bedrock-agent",
+    region_name=BEDROCK_REGION,
+    config=Config(
+        retries={"mode": "adaptive", "max_attempts": 10},
+        max_pool_connections=MAX_CONCURRENT_REQUESTS,
+    ),
+)
+s3 = boto3.client(
+    service_name="s3",
+    region_name=BEDROCK_REGION,
+    config=Config(max_pool_connections=MAX_CONCURRENT_REQUESTS),
+)
+
+# Bounds of the interval between checks for the completion of ingestion, in seconds
+MIN_CHECK_INTERVAL = int(os.environ.get("MIN_CHECK_INTERVAL", 5))
+MAX_CHECK_INTERVAL = int(os.environ.get("MAX_CHECK_INTERVAL", 120))
+# Rough indexing throughput of a data source, used to estimate when pending documents are indexed
+ESTIMATED_SECONDS_PER_DOCUMENT = 0.5
+ESTIMATED_BYTES_PER_SECOND = 1024 * 1024
+# Growth of the interval for each check finding the ingestion still in progress
+CHECK_INTERVAL_BACKOFF_RATE = 1.5
+# Max size of `DocumentsDiff` in JSON. It is kept in the state of the state machine, which is limited to 256KB,
+# so larger diffs are synchronized by an ingestion job instead of ingesting the documents directly.
+MAX_DOCUMENTS_DIFF_BYTES = int(os.environ.get("MAX_DOCUMENTS_DIFF_BYTES", 128 * 1024))
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def handler(event, context):
     """Perform data source synchronization for a Knowledge Base."""
     match event["Action"]:
+        case "Enqueue":
+            return handle_enqueue(event)
+
         case "Ingest":
             return handle_ingest(event)
 
@@ -29,16 +78,513 @@ class DocumentsDiff(TypedDict):
     Deleted: list[str]
 
 
+class BotFilesDiff(TypedDict):
+    OwnerUserId: str
+    BotId: str
+    Added: list[str]
+    Unchanged: list[str]
+    Deleted: list[str]
+
+
+class DocumentObject(TypedDict):
+    ETag: str
+    Size: int
+
+
+class BotDocuments(TypedDict):
+    """Documents of a bot to be synchronized into the data source."""
+
+    OwnerUserId: str
+    BotId: str
+    # Current files of the bot. `True` if the file is known to be unchanged since the last sync.
+    Filenames: dict[str, bool]
+    Deleted: list[str]
+
+
 def compose_upload_document_s3_uri(user_id: str, bot_id: str, filename: str) -> str:
     return f"s3://{DOCUMENT_BUCKET}/{compose_upload_document_s3_path(user_id, bot_id, filename)}"
 
 
-def get_data_source_type(knowledge_base_id: str, data_source_id: str):
+def decompose_upload_document_s3_uri(uri: str) -> tuple[str, str, str] | None:
+    """Get the owner user ID, bot ID and filename of a document uploaded to a bot.
+    Returns `None` if the URI is not of an uploaded document.
+    """
+    prefix = f"s3://{DOCUMENT_BUCKET}/"
+    if not uri.startswith(prefix):
+        return None
+
+    parts = uri[len(prefix) :].split("/", 3)
+    if len(parts) != 4 or parts[2] != "documents":
+        return None
+
+    user_id, bot_id, _, filename = parts
+    return user_id, bot_id, filename
+
+
+def get_data_source_configuration(knowledge_base_id: str, data_source_id: str):
     get_data_source_response = bedrock_agent.get_data_source(
         knowledgeBaseId=knowledge_base_id,
         dataSourceId=data_source_id,
     )
-    return get_data_source_response["dataSource"]["dataSourceConfiguration"]["type"]
+    return get_data_source_response["dataSource"]["dataSourceConfiguration"]
+
+
+def list_document_objects(user_id: str, bot_id: str) -> dict[str, DocumentObject]:
+    """List the documents of the bot with their ETags, which are used as content hashes, and sizes.
+    Keyed by filename.
+    """
+    prefix = compose_upload_document_s3_path(user_id, bot_id, "")
+    objects: dict[str, DocumentObject] = {}
+    for page in s3.get_paginator("list_objects_v2").paginate(
+        Bucket=DOCUMENT_BUCKET, Prefix=prefix
+    ):
+        for content in page.get("Contents", []):
+            objects[content["Key"][len(prefix) :]] = {
+                "ETag": content["ETag"],
+                "Size": content["Size"],
+            }
+
+    return objects
+
+
+def map_concurrently(function: Callable[[T], R], items: list[T]) -> list[R]:
+    """Call `function` for each item with bounded concurrency, and return the results in order."""
+    if len(items) <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        return list(executor.map(function, items))
+
+
+def map_document_batches(
+    function: Callable[[list[str]], list[dict]], document_uris: list[str]
+) -> list[dict]:
+    """Call `function` for batches of documents concurrently, and return the concatenated `documentDetails`."""
+    batches = [
+        document_uris[i : i + DOCUMENTS_BATCH_SIZE]
+        for i in range(0, len(document_uris), DOCUMENTS_BATCH_SIZE)
+    ]
+    return [
+        document_detail
+        for document_details in map_concurrently(function, batches)
+        for document_detail in document_details
+    ]
+
+
+def compose_document_identifiers(document_uris: list[str]) -> list[dict]:
+    return [
+        {
+            "dataSourceType": "S3",
+            "s3": {
+                "uri": document_identifier,
+            },
+        }
+        for document_identifier in document_uris
+    ]
+
+
+def get_document_statuses(
+    knowledge_base_id: str, data_source_id: str, document_uris: list[str]
+) -> dict[str, str]:
+    """Get statuses of the documents in the data source. Keyed by S3 URI."""
+
+    def get_documents(batch: list[str]) -> list[dict]:
+        return bedrock_agent.get_knowledge_base_documents(
+            knowledgeBaseId=knowledge_base_id,
+            dataSourceId=data_source_id,
+            documentIdentifiers=compose_document_identifiers(batch),
+        )["documentDetails"]
+
+    return {
+        document["identifier"]["s3"]["uri"]: document["status"]
+        for document in map_document_batches(get_documents, document_uris)
+        if "s3" in document["identifier"]
+    }
+
+
+def ingest_documents(
+    knowledge_base_id: str, data_source_id: str, document_uris: list[str]
+) -> list[dict]:
+    """Ingest the documents into the data source directly, and return their `documentDetails`."""
+
+    def ingest(batch: list[str]) -> list[dict]:
+        return bedrock_agent.ingest_knowledge_base_documents(
+            knowledgeBaseId=knowledge_base_id,
+            dataSourceId=data_source_id,
+            documents=[
+                {
+                    "content": {
+                        "dataSourceType": "S3",
+                        "s3": {
+                            "s3Location": {
+                                "uri": document_identifier,
+                            },
+                        },
+                    },
+                }
+                for document_identifier in batch
+            ],
+        )["documentDetails"]
+
+    return map_document_batches(ingest, document_uris)
+
+
+def delete_documents(
+    knowledge_base_id: str, data_source_id: str, document_uris: list[str]
+) -> list[dict]:
+    """Delete the documents from the data source directly, and return their `documentDetails`."""
+
+    def delete(batch: list[str]) -> list[dict]:
+        return bedrock_agent.delete_knowledge_base_documents(
+            knowledgeBaseId=knowledge_base_id,
+            dataSourceId=data_source_id,
+            documentIdentifiers=compose_document_identifiers(batch),
+        )["documentDetails"]
+
+    return map_document_batches(delete, document_uris)
+
+
+def list_document_statuses(
+    knowledge_base_id: str, data_source_id: str
+) -> dict[str, str]:
+    """List statuses of all documents in the data source. Keyed by S3 URI."""
+    statuses: dict[str, str] = {}
+    list_params = {
+        "knowledgeBaseId": knowledge_base_id,
+        "dataSourceId": data_source_id,
+    }
+    while True:
+        list_documents_response = bedrock_agent.list_knowledge_base_documents(
+            **list_params
+        )
+        statuses.update(
+            (document["identifier"]["s3"]["uri"], document["status"])
+            for document in list_documents_response["documentDetails"]
+            if "s3" in document["identifier"]
+        )
+
+        next_token = list_documents_response.get("nextToken")
+        if next_token is None:
+            break
+
+        list_params["nextToken"] = next_token
+
+    return statuses
+
+
+def is_document_up_to_date(
+    status: str | None, stored_hash: str | None, etag: str | None, unchanged: bool
+) -> bool:
+    """Whether the indexed document has the current content of the file."""
+    if status != "INDEXED" or etag is None:
+        return False
+
+    if stored_hash is None:
+        # Documents ingested before content hashes were stored
+        return unchanged
+
+    return stored_hash == etag
+
+
+def plan_bot_documents(
+    knowledge_base_id: str,
+    data_source_id: str,
+    bot_documents: list[BotDocuments],
+    document_statuses: dict[str, str] | None = None,
+) -> tuple[list[str], list[str], dict[tuple[str, str], dict[str, str]], int]:
+    """Compare the files of the bots with the documents in the data source by their content hashes.
+
+    Returns S3 URIs of the documents to be ingested and deleted, the hashes of the current files
+    of each bot, which are stored once the documents are ingested, and the total size of the documents
+    to be ingested.
+    `document_statuses` of all documents in the data source can be passed to skip looking them up.
+    """
+    added_documents: list[str] = []
+    added_bytes = 0
+    deleted_documents: list[str] = []
+    current_hashes: dict[tuple[str, str], dict[str, str]] = {}
+
+    def find_hashes(
+        bot: BotDocuments,
+    ) -> tuple[dict[str, DocumentObject], dict[str, str]]:
+        user_id = bot["OwnerUserId"]
+        bot_id = bot["BotId"]
+        return (
+            list_document_objects(user_id, bot_id),
+            find_document_hashes(user_id, bot_id, data_source_id),
+        )
+
+    bot_hashes = map_concurrently(find_hashes, bot_documents)
+
+    if document_statuses is None:
+        document_statuses = get_document_statuses(
+            knowledge_base_id,
+            data_source_id,
+            [
+                compose_upload_document_s3_uri(
+                    bot["OwnerUserId"], bot["BotId"], filename
+                )
+                for bot in bot_documents
+                for filename in bot["Filenames"]
+            ],
+        )
+
+    for bot, (objects, stored_hashes) in zip(bot_documents, bot_hashes):
+        user_id = bot["OwnerUserId"]
+        bot_id = bot["BotId"]
+        uris = {
+            filename: compose_upload_document_s3_uri(user_id, bot_id, filename)
+            for filename in bot["Filenames"]
+        }
+
+        for filename, unchanged in bot["Filenames"].items():
+            document_object = objects.get(filename)
+            if not is_document_up_to_date(
+                status=document_statuses.get(uris[filename]),
+                stored_hash=stored_hashes.get(filename),
+                etag=document_object["ETag"] if document_object else None,
+                unchanged=unchanged,
+            ):
+                added_documents.append(uris[filename])
+                added_bytes += document_object["Size"] if document_object else 0
+
+        deleted_documents.extend(
+            compose_upload_document_s3_uri(user_id, bot_id, deleted_file)
+            for deleted_file in bot["Deleted"]
+        )
+        current_hashes[(user_id, bot_id)] = {
+            filename: objects[filename]["ETag"]
+            for filename in bot["Filenames"]
+            if filename in objects
+        }
+
+    return added_documents, deleted_documents, current_hashes, added_bytes
+
+
+def plan_knowledge_base_tenants(
+    knowledge_base_id: str, data_source_id: str, inclusion_prefixes: list[str]
+) -> tuple[list[str], list[str], dict[tuple[str, str], dict[str, str]], int] | None:
+    """Compute the diff between the files of all bots using the Knowledge Base and the documents in the data source.
+    Returns `None` if no bots use the Knowledge Base.
+    """
+    bots = find_bots_by_knowledge_base_id(knowledge_base_id)
+    if not bots:
+        return None
+
+    bot_documents: list[BotDocuments] = [
+        {
+            "OwnerUserId": bot.owner_user_id,
+            "BotId": bot.id,
+            "Filenames": {
+                filename: True
+                for filename in bot.knowledge.filenames
+                if not inclusion_prefixes
+                or any(
+                    compose_upload_document_s3_path(
+                        bot.owner_user_id, bot.id, filename
+                    ).startswith(prefix)
+                    for prefix in inclusion_prefixes
+                )
+            },
+            "Deleted": [],
+        }
+        for bot in bots
+    ]
+
+    document_statuses = list_document_statuses(knowledge_base_id, data_source_id)
+    added_documents, _, current_hashes, added_bytes = plan_bot_documents(
+        knowledge_base_id, data_source_id, bot_documents, document_statuses
+    )
+
+    # Documents whose files no longer exist: removed from their bot, or of deleted bots.
+    # The bots are found by a scan, which may miss bots updated meanwhile, so the documents of bots
+    # not found by the scan are deleted only if the bots are confirmed to be deleted.
+    current_documents = set(
+        compose_upload_document_s3_uri(user_id, bot_id, filename)
+        for (user_id, bot_id), hashes in current_hashes.items()
+        for filename in hashes
+    )
+    tenant_bot_ids = set(bot.id for bot in bots)
+    stale_documents: dict[str, str] = {}
+    for uri in document_statuses:
+        components = decompose_upload_document_s3_uri(uri)
+        if components is not None and uri not in current_documents:
+            stale_documents[uri] = components[1]
+
+    other_bot_ids = set(stale_documents.values()) - tenant_bot_ids
+    existing_bot_ids = (
+        set(find_bot_metas_by_ids(list(other_bot_ids))) if other_bot_ids else set()
+    )
+    deleted_documents = [
+        uri
+        for uri, bot_id in stale_documents.items()
+        if bot_id in tenant_bot_ids or bot_id not in existing_bot_ids
+    ]
+
+    return added_documents, deleted_documents, current_hashes, added_bytes
+
+
+def estimate_check_interval(
+    pending_documents: int, pending_bytes: int, check_count: int
+) -> int:
+    """Estimate the seconds to wait before checking for the completion of ingestion.
+
+    The interval is scaled to the estimated time to index the pending documents, so that small updates
+    complete without waiting for a fixed interval and large ones are not checked needlessly often.
+    It grows with each check finding the ingestion still in progress, and is jittered so that the checks
+    of concurrent ingestions spread across the rate quota of the APIs.
+    """
+    estimate = (
+        pending_documents * ESTIMATED_SECONDS_PER_DOCUMENT / MAX_CONCURRENT_REQUESTS
+        + pending_bytes / ESTIMATED_BYTES_PER_SECOND
+    )
+    interval = max(MIN_CHECK_INTERVAL, estimate) * (
+        CHECK_INTERVAL_BACKOFF_RATE**check_count
+    )
+    interval *= random.uniform(0.8, 1.2)
+    return round(min(MAX_CHECK_INTERVAL, max(MIN_CHECK_INTERVAL, interval)))
+
+
+def compose_ingestion_queue_prefix(knowledge_base_id: str, data_source_id: str) -> str:
+    # Note: files in `.temp/` are automatically deleted after 1 day (see also: cdk/lib/bedrock-region-resources.ts)
+    return f".temp/.ingestion-queue/{knowledge_base_id}/{data_source_id}/"
+
+
+def handle_enqueue(event):
+    """Queue `FilesDiffs` to be ingested into the data source.
+
+    Queued diffs are merged and ingested at once by whichever execution holds the lock of the data source next,
+    so that bursts of bot updates share a single ingestion. An empty `FilesDiffs` requests entire synchronization.
+    Returns the ID of the entry, which is unique and used as the owner of the lock.
+    """
+    # Prefixed with the time, so that entries are listed in the queued order
+    entry_id = f"{time.time_ns():020d}-{uuid.uuid4().hex}"
+    s3.put_object(
+        Bucket=DOCUMENT_BUCKET,
+        Key=compose_ingestion_queue_prefix(
+            event["KnowledgeBaseId"], event["DataSourceId"]
+        )
+        + entry_id,
+        Body=json.dumps({"FilesDiffs": event.get("FilesDiffs") or []}),
+    )
+
+    return {
+        "EntryId": entry_id,
+    }
+
+
+def dequeue_files_diffs(
+    knowledge_base_id: str, data_source_id: str
+) -> tuple[list[str], list[list[BotFilesDiff]]]:
+    """Read the queued `FilesDiffs` in the queued order. Returns the S3 keys of the entries and their `FilesDiffs`.
+    The entries should be deleted once they have been ingested.
+    """
+    keys: list[str] = []
+    for page in s3.get_paginator("list_objects_v2").paginate(
+        Bucket=DOCUMENT_BUCKET,
+        Prefix=compose_ingestion_queue_prefix(knowledge_base_id, data_source_id),
+    ):
+        keys.extend(content["Key"] for content in page.get("Contents", []))
+
+    def read_entry(key: str) -> list[BotFilesDiff]:
+        response = s3.get_object(Bucket=DOCUMENT_BUCKET, Key=key)
+        return json.loads(response["Body"].read())["FilesDiffs"]
+
+    return keys, map_concurrently(read_entry, keys)
+
+
+def delete_queue_entries(keys: list[str]):
+    for i in range(0, len(keys), 1000):
+        s3.delete_objects(
+            Bucket=DOCUMENT_BUCKET,
+            Delete={"Objects": [{"Key": key} for key in keys[i : i + 1000]]},
+        )
+
+
+def merge_files_diffs(
+    queued_files_diffs: list[list[BotFilesDiff]],
+) -> list[BotFilesDiff] | None:
+    """Merge `FilesDiffs` into one per bot, where later changes of a file take precedence.
+    Returns `None` if any of them requests entire synchronization.
+    """
+    bot_files: dict[tuple[str, str], dict[str, str]] = {}
+    for files_diffs in queued_files_diffs:
+        if not files_diffs:
+            return None
+
+        for files_diff in files_diffs:
+            files = bot_files.setdefault(
+                (files_diff["OwnerUserId"], files_diff["BotId"]), {}
+            )
+            for filename in files_diff["Unchanged"]:
+                # Files added by an earlier update are not ingested yet
+                files.setdefault(filename, "Unchanged")
+            for filename in files_diff["Added"]:
+                files[filename] = "Added"
+            for filename in files_diff["Deleted"]:
+                files[filename] = "Deleted"
+
+    return [
+        {
+            "OwnerUserId": user_id,
+            "BotId": bot_id,
+            "Added": [name for name, change in files.items() if change == "Added"],
+            "Unchanged": [
+                name for name, change in files.items() if change == "Unchanged"
+            ],
+            "Deleted": [name for name, change in files.items() if change == "Deleted"],
+        }
+        for (user_id, bot_id), files in bot_files.items()
+    ]
+
+
+def store_document_hashes(
+    data_source_id: str,
+    current_hashes: dict[tuple[str, str], dict[str, str]],
+    ignored_documents: set[str],
+):
+    """Store the content hashes of the ingested documents, so that unchanged ones are skipped next time.
+    Documents failed to be indexed are ingested again regardless of the hashes, see `is_document_up_to_date`.
+    """
+
+    def store_hashes(item: tuple[tuple[str, str], dict[str, str]]):
+        (user_id, bot_id), hashes = item
+        try:
+            update_document_hashes(
+                user_id,
+                bot_id,
+                data_source_id,
+                {
+                    filename: etag
+                    for filename, etag in hashes.items()
+                    if compose_upload_document_s3_uri(user_id, bot_id, filename)
+                    not in ignored_documents
+                },
+            )
+        except RecordNotFoundError:
+            # The bot has been deleted during ingestion. Its documents are deleted by the next entire synchronization.
+            print(f"Bot {bot_id} not found. Skipping storing document hashes.")
+
+    map_concurrently(store_hashes, list(current_hashes.items()))
+
+
+def start_entire_synchronization(knowledge_base_id: str, data_source_id: str):
+    """Start the ingestion job synchronizing the entire data source, and return the state to check it."""
+    start_job_response = bedrock_agent.start_ingestion_job(
+        knowledgeBaseId=knowledge_base_id,
+        dataSourceId=data_source_id,
+    )
+    return {
+        "KnowledgeBaseId": knowledge_base_id,
+        "DataSourceId": data_source_id,
+        "DocumentsDiff": None,
+        "IngestionJobId": start_job_response["ingestionJob"]["ingestionJobId"],
+        "Completed": False,
+        "CheckCount": 0,
+        "PendingBytes": 0,
+        "WaitSeconds": estimate_check_interval(0, 0, check_count=0),
+        "WaitedSeconds": 0,
+    }
 
 
 def handle_ingest(event):
@@ -50,230 +596,274 @@ def handle_ingest(event):
 
     Shared KB bots with file diffs reach here via MapQueuedBots flow but still
     update the shared Knowledge Base's DataSources with bot-specific file changes.
+
+    File diffs are read from the queue of the data source, see `handle_enqueue`. They have been merged
+    with the ones queued by other executions while waiting for the lock of the data source.
+    Documents are ingested directly, skipping the ones indexed with the same content hash (S3 ETag).
+    Without file diffs, the diff is computed across all bots using the Knowledge Base.
+    The entire synchronization job is started for data sources outside the document bucket, and for diffs
+    too large to be tracked in the state of the state machine (see `MAX_DOCUMENTS_DIFF_BYTES`).
     """
     knowledge_base_id = event["KnowledgeBaseId"]
     data_source_id = event["DataSourceId"]
 
-    bot_files_diffs = event.get("FilesDiffs")
-    if (
-        bot_files_diffs
-        and get_data_source_type(
-            knowledge_base_id=knowledge_base_id,
-            data_source_id=data_source_id,
+    queue_keys, queued_files_diffs = dequeue_files_diffs(
+        knowledge_base_id, data_source_id
+    )
+    if not queue_keys:
+        # The queued diffs have been ingested by the previous holder of the lock.
+        return {
+            "KnowledgeBaseId": knowledge_base_id,
+            "DataSourceId": data_source_id,
+            "DocumentsDiff": {
+                "Added": [],
+                "Deleted": [],
+            },
+            "IngestionJobId": None,
+            "Completed": True,
+            "CheckCount": 0,
+            "PendingBytes": 0,
+            "WaitSeconds": 0,
+            "WaitedSeconds": 0,
+        }
+
+    data_source_configuration = get_data_source_configuration(
+        knowledge_base_id=knowledge_base_id,
+        data_source_id=data_source_id,
+    )
+    s3_configuration = data_source_configuration.get("s3Configuration", {})
+
+    plan = None
+    bot_files_diffs = merge_files_diffs(queued_files_diffs)
+    if data_source_configuration["type"] == "S3" and bot_files_diffs:
+        # If the bot specifies which files should be ingested, compare only these files.
+        plan = plan_bot_documents(
+            knowledge_base_id,
+            data_source_id,
+            [
+                {
+                    "OwnerUserId": bot_files_diff["OwnerUserId"],
+                    "BotId": bot_files_diff["BotId"],
+                    "Filenames": {
+                        **{
+                            unchanged_file: True
+                            for unchanged_file in bot_files_diff["Unchanged"]
+                        },
+                        **{added_file: False for added_file in bot_files_diff["Added"]},
+                    },
+                    "Deleted": bot_files_diff["Deleted"],
+                }
+                for bot_files_diff in bot_files_diffs
+            ],
         )
-        == "S3"
+
+    elif (
+        data_source_configuration["type"] == "S3"
+        and s3_configuration.get("bucketArn") == f"arn:aws:s3:::{DOCUMENT_BUCKET}"
     ):
-        # If the bot specifies which files should be ingested, perform direct ingestion.
-        added_documents: list[str] = []
-        unchanged_documents: list[str] = []
-        deleted_documents: list[str] = []
-
-        for bot_files_diff in bot_files_diffs:
-            user_id = bot_files_diff["OwnerUserId"]
-            bot_id = bot_files_diff["BotId"]
-
-            added_documents.extend(
-                compose_upload_document_s3_uri(user_id, bot_id, added_file)
-                for added_file in bot_files_diff["Added"]
-            )
-            unchanged_documents.extend(
-                compose_upload_document_s3_uri(user_id, bot_id, unchanged_file)
-                for unchanged_file in bot_files_diff["Unchanged"]
-            )
-            deleted_documents.extend(
-                compose_upload_document_s3_uri(user_id, bot_id, deleted_file)
-                for deleted_file in bot_files_diff["Deleted"]
-            )
+        # Otherwise, compare the files of all bots using the Knowledge Base.
+        plan = plan_knowledge_base_tenants(
+            knowledge_base_id,
+            data_source_id,
+            s3_configuration.get("inclusionPrefixes", []),
+        )
 
-        # If an 'unchanged' document doesn't actually exist, treat it as an 'added' document.
-        for i in range(0, len(unchanged_documents), 10):
-            get_documents_response = bedrock_agent.get_knowledge_base_documents(
-                knowledgeBaseId=knowledge_base_id,
-                dataSourceId=data_source_id,
-                documentIdentifiers=[
-                    {
-                        "dataSourceType": "S3",
-                        "s3": {
-                            "uri": document_identifier,
-                        },
-                    }
-                    for document_identifier in islice(unchanged_documents, i, i + 10)
-                ],
+    if plan is not None:
+        added_documents, deleted_documents, current_hashes, added_bytes = plan
+
+        documents_diff_bytes = len(
+            json.dumps({"Added": added_documents, "Deleted": deleted_documents})
+        )
+        if documents_diff_bytes > MAX_DOCUMENTS_DIFF_BYTES:
+            print(
+                f"Diff of {len(added_documents)} added and {len(deleted_documents)} deleted documents "
+                f"({documents_diff_bytes} bytes) is too large to track. Starting entire synchronization."
             )
-            added_documents.extend(
-                document["identifier"]["s3"]["uri"]
-                for document in get_documents_response["documentDetails"]
-                if document["status"] == "NOT_FOUND" and "s3" in document["identifier"]
+            ingestion_job = start_entire_synchronization(
+                knowledge_base_id, data_source_id
             )
+            # The job ingests the current files, whose hashes are stored the same way as direct ingestion.
+            store_document_hashes(data_source_id, current_hashes, set())
+            delete_queue_entries(queue_keys)
+            return ingestion_job
 
         documents_diff: DocumentsDiff = {
             "Added": [],
             "Deleted": [],
         }
+        ignored_documents: set[str] = set()
 
         # Ingest 'added' documents to the data source.
-        for i in range(0, len(added_documents), 10):
-            ingest_response = bedrock_agent.ingest_knowledge_base_documents(
-                knowledgeBaseId=knowledge_base_id,
-                dataSourceId=data_source_id,
-                documents=[
-                    {
-                        "content": {
-                            "dataSourceType": "S3",
-                            "s3": {
-                                "s3Location": {
-                                    "uri": document_identifier,
-                                },
-                            },
-                        },
-                    }
-                    for document_identifier in islice(added_documents, i, i + 10)
-                ],
-            )
-            documents_diff["Added"].extend(
-                document["identifier"]["s3"]["uri"]
-                for document in ingest_response["documentDetails"]
-                if document["status"] != "IGNORED" and "s3" in document["identifier"]
-            )
+        for document in ingest_documents(
+            knowledge_base_id, data_source_id, added_documents
+        ):
+            if "s3" not in document["identifier"]:
+                continue
+
+            uri = document["identifier"]["s3"]["uri"]
+            if document["status"] == "IGNORED":
+                ignored_documents.add(uri)
+            else:
+                documents_diff["Added"].append(uri)
 
         # Delete 'deleted' documents from the data source.
-        for i in range(0, len(deleted_documents), 10):
-            delete_response = bedrock_agent.delete_knowledge_base_documents(
-                knowledgeBaseId=knowledge_base_id,
-                dataSourceId=data_source_id,
-                documentIdentifiers=[
-                    {
-                        "dataSourceType": "S3",
-                        "s3": {
-                            "uri": document_identifier,
-                        },
-                    }
-                    for document_identifier in islice(deleted_documents, i, i + 10)
-                ],
-            )
-            documents_diff["Deleted"].extend(
-                document["identifier"]["s3"]["uri"]
-                for document in delete_response["documentDetails"]
-                if "s3" in document["identifier"]
+        documents_diff["Deleted"].extend(
+            document["identifier"]["s3"]["uri"]
+            for document in delete_documents(
+                knowledge_base_id, data_source_id, deleted_documents
             )
+            if "s3" in document["identifier"]
+        )
+
+        store_document_hashes(data_source_id, current_hashes, ignored_documents)
+        delete_queue_entries(queue_keys)
 
+        # Nothing to wait for if all documents are up to date.
+        pending_documents = len(documents_diff["Added"]) + len(
+            documents_diff["Deleted"]
+        )
         return {
             "KnowledgeBaseId": knowledge_base_id,
             "DataSourceId": data_source_id,
             "DocumentsDiff": documents_diff,
             "IngestionJobId": None,
+            "Completed": pending_documents == 0,
+            "CheckCount": 0,
+            "PendingBytes": added_bytes,
+            "WaitSeconds": estimate_check_interval(
+                pending_documents, added_bytes, check_count=0
+            ),
+            "WaitedSeconds": 0,
         }
 
     else:
         # Otherwise, start the entire synchronization job.
-        start_job_response = bedrock_agent.start_ingestion_job(
-            knowledgeBaseId=knowledge_base_id,
-            dataSourceId=data_source_id,
-        )
-        ingestion_job_id = start_job_response["ingestionJob"]["ingestionJobId"]
-
-        return {
-            "KnowledgeBaseId": knowledge_base_id,
-            "DataSourceId": data_source_id,
-            "DocumentsDiff": None,
-            "IngestionJobId": ingestion_job_id,
-        }
-
-
-class RetryException(Exception):
-    pass
+        ingestion_job = start_entire_synchronization(knowledge_base_id, data_source_id)
+        delete_queue_entries(queue_keys)
+        return ingestion_job
 
 
 def handle_check(event):
-    """Check for the completion of direct ingestion or entire synchronization."""
+    """Check for the completion of direct ingestion or entire synchronization.
+
+    Returns the ingestion job with `Completed`, `DocumentsDiff` narrowed down to the documents
+    still in progress, so that the next check only looks them up, and `WaitSeconds` until the next check.
+    Raises an exception if the job does not complete within `TimeoutSeconds`.
+    """
     ingestion_job = event["IngestionJob"]
     knowledge_base_id = ingestion_job["KnowledgeBaseId"]
     data_source_id = ingestion_job["DataSourceId"]
+    check_count = ingestion_job.get("CheckCount", 0) + 1
+    waited_seconds = ingestion_job.get("WaitedSeconds", 0) + ingestion_job.get(
+        "WaitSeconds", 0
+    )
+    timeout_seconds = event.get("TimeoutSeconds")
+    pending_bytes = ingestion_job.get("PendingBytes", 0)
 
     documents_diff = ingestion_job.get("DocumentsDiff")
+    ingestion_job_id = ingestion_job.get("IngestionJobId")
     if documents_diff:
+        pending_documents_diff: DocumentsDiff = {
+            "Added": [],
+            "Deleted": [],
+        }
+
         # Check for the completion of indexing of 'added' documents.
-        added_documents = documents_diff["Added"]
-        for i in range(0, len(added_documents), 10):
-            get_documents_response = bedrock_agent.get_knowledge_base_documents(
-                knowledgeBaseId=knowledge_base_id,
-                dataSourceId=data_source_id,
-                documentIdentifiers=[
-                    {
-                        "dataSourceType": "S3",
-                        "s3": {
-                            "uri": document_identifier,
-                        },
-                    }
-                    for document_identifier in islice(added_documents, i, i + 10)
-                ],
-            )
-            for document in get_documents_response["documentDetails"]:
-                status = document["status"]
-                uri = document["identifier"].get("s3", {})["uri"]
-                match status:
-                    case "INDEXED":
-                        pass
+        # Documents missing from the statuses are not visible yet, so keep them pending.
+        added_statuses = get_document_statuses(
+            knowledge_base_id, data_source_id, documents_diff["Added"]
+        )
+        for uri in documents_diff["Added"]:
+            status = added_statuses.get(uri)
+            match status:
+                case "INDEXED":
+                    pass
 
-                    case "PENDING" | "STARTING" | "IN_PROGRESS" | "PARTIALLY_INDEXED":
-                        raise RetryException()
+                case (
+                    None | "PENDING" | "STARTING" | "IN_PROGRESS" | "PARTIALLY_INDEXED"
+                ):
+                    pending_documents_diff["Added"].append(uri)
 
-                    case _:
-                        raise Exception(f"File {uri}: Bad status '{status}'.")
+                case _:
+                    raise Exception(f"File {uri}: Bad status '{status}'.")
 
         # Check for the absence of 'deleted' documents.
-        deleted_documents = documents_diff["Deleted"]
-        for i in range(0, len(deleted_documents), 10):
-            get_documents_response = bedrock_agent.get_knowledge_base_documents(
-                knowledgeBaseId=knowledge_base_id,
-                dataSourceId=data_source_id,
-                documentIdentifiers=[
-                    {
-                        "dataSourceType": "S3",
-                        "s3": {
-                            "uri": document_identifier,
-                        },
-                    }
-                    for document_identifier in islice(deleted_documents, i, i + 10)
-                ],
-            )
-            for document in get_documents_response["documentDetails"]:
-                status = document["status"]
-                uri = document["identifier"].get("s3", {})["uri"]
-                match status:
-                    case "NOT_FOUND":
-                        pass
+        deleted_statuses = get_document_statuses(
+            knowledge_base_id, data_source_id, documents_diff["Deleted"]
+        )
+        for uri in documents_diff["Deleted"]:
+            status = deleted_statuses.get(uri)
+            match status:
+                case "NOT_FOUND":
+                    pass
 
-                    case "PENDING" | "DELETING" | "DELETE_IN_PROGRESS":
-                        raise RetryException()
+                case None | "PENDING" | "DELETING" | "DELETE_IN_PROGRESS":
+                    pending_documents_diff["Deleted"].append(uri)
 
-                    case _:
-                        raise Exception(f"File '{uri}': Bad status '{status}'.")
+                case _:
+                    raise Exception(f"File '{uri}': Bad status '{status}'.")
 
-        return
+        completed = (
+            not pending_documents_diff["Added"]
+            and not pending_documents_diff["Deleted"]
+        )
+        pending_documents = len(pending_documents_diff["Added"]) + len(
+            pending_documents_diff["Deleted"]
+        )
+        if documents_diff["Added"]:
+            # Sizes are not tracked per document, so assume the pending ones are of average size.
+            pending_bytes = (
+                pending_bytes
+                * len(pending_documents_diff["Added"])
+                // len(documents_diff["Added"])
+            )
+        documents_diff = pending_documents_diff
 
-    else:
+    elif ingestion_job_id:
         # Check the completion of entire synchronization job.
-        ingestion_job_id = ingestion_job.get("IngestionJobId")
-        if ingestion_job_id:
-            get_job_response = bedrock_agent.get_ingestion_job(
-                knowledgeBaseId=knowledge_base_id,
-                dataSourceId=data_source_id,
-                ingestionJobId=ingestion_job_id,
-            )
-            status = get_job_response["ingestionJob"]["status"]
-            match status:
-                case "COMPLETE":
-                    pass
+        get_job_response = bedrock_agent.get_ingestion_job(
+            knowledgeBaseId=knowledge_base_id,
+            dataSourceId=data_source_id,
+            ingestionJobId=ingestion_job_id,
+        )
+        status = get_job_response["ingestionJob"]["status"]
+        match status:
+            case "COMPLETE":
+                completed = True
 
-                case "STARTING" | "IN_PROGRESS":
-                    raise RetryException()
+            case "STARTING" | "IN_PROGRESS":
+                completed = False
 
-                case _:
-                    raise Exception(
-                        f"Ingestion Job '{ingestion_job_id}': Bad status '{status}'."
-                    )
+            case _:
+                raise Exception(
+                    f"Ingestion Job '{ingestion_job_id}': Bad status '{status}'."
+                )
 
-            return
+        # The statistics of the job do not tell how many documents are left, so rely on the backoff.
+        pending_documents = 0
+
+    else:
+        raise Exception("Invalid parameters.")
+
+    if (
+        not completed
+        and timeout_seconds is not None
+        and waited_seconds >= timeout_seconds
+    ):
+        raise Exception(
+            f"Ingestion into data source '{data_source_id}' did not complete in time."
+        )
 
-    raise Exception("Invalid parameters.")
+    return {
+        "KnowledgeBaseId": knowledge_base_id,
+        "DataSourceId": data_source_id,
+        "DocumentsDiff": documents_diff,
+        "IngestionJobId": ingestion_job_id,
+        "Completed": completed,
+        "CheckCount": check_count,
+        "PendingBytes": pending_bytes,
+        "WaitSeconds": estimate_check_interval(
+            pending_documents, pending_bytes, check_count
+        ),
+        "WaitedSeconds": waited_seconds,
+    }
@@ -1,5 +1,6 @@
 #!/bin/bash
 
+# `APP_MODULE` selects the app, e.g. `app.stream_main:app` for the stream handler.
 PATH=$PATH:$LAMBDA_TASK_ROOT/bin \
     PYTHONPATH=$PYTHONPATH:/opt/python:$LAMBDA_RUNTIME_DIR \
-    exec python -m uvicorn --port=$PORT app.main:app
+    exec python -m uvicorn --port=$PORT ${APP_MODULE:-app.main:app}
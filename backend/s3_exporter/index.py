@@ -1,18 +1,133 @@
 import os
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 import boto3
 
 TABLE_ARN = os.environ["TABLE_ARN"]
 BUCKET_NAME = os.environ["BUCKET_NAME"]
+USAGE_ANALYSIS_DATABASE = os.environ.get("USAGE_ANALYSIS_DATABASE", "")
+USAGE_ANALYSIS_TABLE = os.environ.get("USAGE_ANALYSIS_TABLE", "")
+USAGE_ANALYSIS_WORKGROUP = os.environ.get("USAGE_ANALYSIS_WORKGROUP", "")
+USAGE_ROLLUP_TABLE_NAME = os.environ.get("USAGE_ROLLUP_TABLE_NAME", "")
+
+# Exports complete asynchronously, so the previous few hours are rolled up again on every run.
+# Rolling up is idempotent because each hour is overwritten.
+ROLLUP_LOOKBACK_HOURS = 3
+ROLLUP_ITEM_TTL_DAYS = 400
 
 client = boto3.client("dynamodb")
+athena = boto3.client("athena")
+rollup_table = (
+    boto3.resource("dynamodb").Table(USAGE_ROLLUP_TABLE_NAME)
+    if USAGE_ROLLUP_TABLE_NAME
+    else None
+)
+
+
+def run_athena_query(query: str) -> list[list[str | None]]:
+    """Run athena query and return all rows except the header."""
+    execution_id = athena.start_query_execution(
+        QueryString=query,
+        QueryExecutionContext={"Database": USAGE_ANALYSIS_DATABASE},
+        WorkGroup=USAGE_ANALYSIS_WORKGROUP,
+    )["QueryExecutionId"]
+
+    delay = 0.5
+    while True:
+        status = athena.get_query_execution(QueryExecutionId=execution_id)[
+            "QueryExecution"
+        ]["Status"]
+        if status["State"] == "SUCCEEDED":
+            break
+        elif status["State"] in ("FAILED", "CANCELLED"):
+            raise Exception(status.get("StateChangeReason", status["State"]))
+        time.sleep(delay)
+        delay = min(delay * 2, 5)
+
+    rows = []
+    paginator = athena.get_paginator("get_query_results")
+    for page in paginator.paginate(QueryExecutionId=execution_id):
+        rows.extend(
+            [data.get("VarCharValue") for data in row["Data"]]
+            for row in page["ResultSet"]["Rows"]
+        )
+    return rows[1:]
+
+
+def rollup_hour(datehour: datetime):
+    """Aggregate the cost of the exported hour per bot and per user, and store it to the rollup table.
+    Each incremental export contains the image of a conversation at the start and the end of the hour,
+    so the difference of `TotalPrice` is the cost incurred in the hour.
+    """
+    assert rollup_table is not None
+
+    partition = datehour.strftime("%Y/%m/%d/%H")
+    query = f"""
+SELECT
+    newimage.BotId.S AS BotId,
+    newimage.PK.S AS UserId,
+    SUM(COALESCE(newimage.TotalPrice.N, 0) - COALESCE(oldimage.TotalPrice.N, 0)) AS TotalPrice
+FROM
+    {USAGE_ANALYSIS_DATABASE}.{USAGE_ANALYSIS_TABLE}
+WHERE
+    datehour = '{partition}'
+    AND Keys.SK.S LIKE CONCAT(Keys.PK.S, '#CONV#%')
+    AND newimage.PK.S IS NOT NULL
+GROUP BY
+    newimage.BotId.S,
+    newimage.PK.S
+"""
+    rows = run_athena_query(query)
+
+    price_per_bot: dict[str, Decimal] = defaultdict(Decimal)
+    price_per_user: dict[str, Decimal] = defaultdict(Decimal)
+    for bot_id, user_id, total_price in rows:
+        price = Decimal(total_price or "0")
+        if bot_id:
+            price_per_bot[bot_id] += price
+        if user_id:
+            price_per_user[user_id] += price
+
+    day = datehour.strftime("%Y/%m/%d")
+    hour = datehour.strftime("%H")
+    expire_time = int((datehour + timedelta(days=ROLLUP_ITEM_TTL_DAYS)).timestamp())
+    with rollup_table.batch_writer(overwrite_by_pkeys=["PK", "SK"]) as batch:
+        for dimension, prices in (("BOT", price_per_bot), ("USER", price_per_user)):
+            for id, price in prices.items():
+                batch.put_item(
+                    Item={
+                        # e.g. PK: "BOT#2024/01/01", SK: "13#<bot_id>"
+                        "PK": f"{dimension}#{day}",
+                        "SK": f"{hour}#{id}",
+                        "Id": id,
+                        "TotalPrice": price,
+                        "ExpireTime": expire_time,
+                    }
+                )
+
+    print(
+        f"Rolled up {partition}: {len(price_per_bot)} bots, {len(price_per_user)} users"
+    )
 
 
 def handler(event, context):
-    """Export the dynamodb table to S3 for the last hour to analyze the usage for admin."""
+    """Export the dynamodb table to S3 for the last hour to analyze the usage for admin.
+    After exporting, previous exports are rolled up into hourly per-bot and per-user costs.
+    To backfill the rollup, invoke with `{"backfill_from": "YYYYMMDDHH", "backfill_to": "YYYYMMDDHH"}`.
+    """
     print(event)
 
+    if "backfill_from" in event:
+        datehour = datetime.strptime(event["backfill_from"], "%Y%m%d%H")
+        backfill_to = datetime.strptime(event["backfill_to"], "%Y%m%d%H")
+        while datehour <= backfill_to:
+            rollup_hour(datehour)
+            datehour += timedelta(hours=1)
+        return
+
     execution_time = datetime.strptime(event["time"], "%Y-%m-%dT%H:%M:%SZ")
 
     last_hour = (execution_time - timedelta(hours=1)).replace(
@@ -42,3 +157,10 @@ def handler(event, context):
             "ExportViewType": "NEW_AND_OLD_IMAGES",
         },
     )
+
+    if rollup_table is None:
+        return
+
+    # The export started in this run is still in progress, so roll up the previous ones.
+    for hours_ago in range(1, ROLLUP_LOOKBACK_HOURS + 1):
+        rollup_hour(current_hour - timedelta(hours=hours_ago))
@@ -6,8 +6,8 @@ import unittest
 from app.agents.tools.internet_search import (
     InternetSearchInput,
     internet_search_tool,
-    _summarize_content,
 )
+from app.agents.tools.web_summary import summarize_content
 
 
 class TestInternetSearchTool(unittest.TestCase):
@@ -46,7 +46,7 @@ class TestInternetSearchTool(unittest.TestCase):
         test_title = "Test Title"
         test_url = "https://example.com"
 
-        summary = _summarize_content(test_content, test_title, test_url)
+        summary = summarize_content(test_content, test_title, test_url, "test")
 
         # Verify the summary is shorter than the original content
         self.assertLess(len(summary), len(test_content))
@@ -0,0 +1,70 @@
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.append(".")
+
+from app.agents.tools import search_cache
+from app.agents.tools.search_cache import (
+    RateLimiter,
+    SearchRateLimitError,
+    get_search_cache_ttl,
+    search_with_cache,
+)
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        search_cache._search_cache.clear()
+
+    def test_cache_results(self):
+        calls = []
+
+        def search():
+            calls.append(1)
+            return [{"title": "result"}]
+
+        first = search_with_cache("duckduckgo", "query", "en-us", "d", search)
+        second = search_with_cache("duckduckgo", "query", "en-us", "d", search)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+
+        # Different time limit is a different search
+        search_with_cache("duckduckgo", "query", "en-us", "w", search)
+        self.assertEqual(len(calls), 2)
+
+    def test_empty_results_are_not_cached(self):
+        calls = []
+
+        def search():
+            calls.append(1)
+            return []
+
+        search_with_cache("firecrawl", "query", "en-us", "", search, 10)
+        search_with_cache("firecrawl", "query", "en-us", "", search, 10)
+        self.assertEqual(len(calls), 2)
+
+    def test_raise_when_queue_is_full(self):
+        with patch.dict(
+            search_cache._rate_limiters, {"duckduckgo": RateLimiter(rate=0.01)}
+        ), patch.object(search_cache, "SEARCH_QUEUE_TIMEOUT", 1):
+            search_with_cache("duckduckgo", "a", "en-us", "", lambda: [1])
+            with self.assertRaises(SearchRateLimitError):
+                search_with_cache("duckduckgo", "b", "en-us", "", lambda: [1])
+
+    def test_cache_ttl_by_time_limit(self):
+        self.assertLess(get_search_cache_ttl("d"), get_search_cache_ttl("y"))
+        self.assertEqual(get_search_cache_ttl("1w"), get_search_cache_ttl("w"))
+        self.assertEqual(get_search_cache_ttl(""), get_search_cache_ttl("y"))
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_space_out_requests(self):
+        rate_limiter = RateLimiter(rate=1)
+        self.assertTrue(rate_limiter.acquire(timeout=0))
+        # Next slot is a second later
+        self.assertFalse(rate_limiter.acquire(timeout=0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
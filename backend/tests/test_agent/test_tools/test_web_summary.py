@@ -0,0 +1,68 @@
+import sys
+
+sys.path.append(".")
+import unittest
+from unittest.mock import patch
+
+from app.agents.tools import web_summary
+from app.agents.tools.web_summary import summarize_content, summarize_pages
+
+
+class TestWebSummary(unittest.TestCase):
+    def setUp(self):
+        web_summary._summary_cache.clear()
+        patcher = patch.object(
+            web_summary,
+            "_invoke_summarizer",
+            autospec=True,
+            side_effect=lambda content, title, url, query: f"summary of {url}",
+        )
+        self.invoke_summarizer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_short_content_is_not_summarized(self):
+        content = "Short page"
+        self.assertEqual(
+            summarize_content(content, "title", "https://example.com", "query"),
+            content,
+        )
+        self.invoke_summarizer.assert_not_called()
+
+    def test_summary_is_cached_by_query_intent(self):
+        content = "Long page. " * 1000
+        url = "https://example.com"
+
+        summarize_content(content, "title", url, "Tokyo weather")
+        summary = summarize_content(content, "title", url, "weather  tokyo")
+        self.assertEqual(summary, f"summary of {url}")
+        self.assertEqual(self.invoke_summarizer.call_count, 1)
+
+        # Changed content is summarized again
+        summarize_content(content + "Updated.", "title", url, "Tokyo weather")
+        self.assertEqual(self.invoke_summarizer.call_count, 2)
+
+    def test_failed_summary_is_not_cached(self):
+        content = "Long page. " * 1000
+        self.invoke_summarizer.side_effect = Exception("throttled")
+
+        summary = summarize_content(content, "title", "https://example.com", "query")
+        self.assertEqual(summary, content[: web_summary.FALLBACK_LENGTH] + "...")
+
+        self.invoke_summarizer.side_effect = None
+        self.invoke_summarizer.return_value = "summary"
+        summarize_content(content, "title", "https://example.com", "query")
+        self.assertEqual(self.invoke_summarizer.call_count, 2)
+
+    def test_summarize_pages_keeps_order(self):
+        pages: list[web_summary.WebPage] = [
+            {"content": "Long page. " * 1000, "title": str(i), "url": f"https://{i}"}
+            for i in range(8)
+        ]
+        self.assertEqual(
+            summarize_pages(pages, "query"),
+            [f"summary of https://{i}" for i in range(8)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,8 +15,16 @@ import unittest
 from pprint import pprint
 from unittest.mock import patch
 
-from app.bedrock import call_converse_api, compose_args_for_converse_api, get_model_id
+from app.bedrock import (
+    MIN_CACHE_WRITE_SAMPLE,
+    call_converse_api,
+    compose_args_for_converse_api,
+    get_model_id,
+    plan_prompt_cache,
+    should_cache_messages,
+)
 from app.repositories.models.conversation import SimpleMessageModel, TextContentModel
+from app.repositories.models.custom_bot import UsageStatsModel
 from app.repositories.models.custom_bot_guardrails import BedrockGuardrailsModel
 from app.routes.schemas.conversation import type_model_name
 
@@ -125,6 +133,103 @@ class TestGetModelId(unittest.TestCase):
         )
 
 
+def _text_message(role: str, tokens: int) -> dict:
+    return {"role": role, "content": [{"text": "abcd" * tokens}]}
+
+
+class TestPlanPromptCache(unittest.TestCase):
+    def test_short_prompt_is_not_cached(self):
+        plan = plan_prompt_cache(
+            model="claude-v3.7-sonnet",
+            tool_specs=None,
+            system_prompts=[{"text": "You are a helpful assistant."}],
+            messages=[_text_message("user", 10)],
+        )
+        self.assertEqual(plan, {"system": False, "tools": False, "messages": []})
+
+    def test_cache_points_after_minimum_tokens(self):
+        messages = [
+            _text_message("user", 200),
+            _text_message("assistant", 200),
+            _text_message("user", 200),
+            _text_message("assistant", 200),
+            _text_message("user", 200),
+        ]
+        plan = plan_prompt_cache(
+            model="claude-v3.7-sonnet",
+            tool_specs=None,
+            system_prompts=[{"text": "abcd" * 500}],
+            messages=messages,
+        )
+        # System prompt alone is shorter than 1024 tokens.
+        self.assertFalse(plan["system"])
+        self.assertEqual(plan["messages"], [2, 4])
+
+    def test_minimum_tokens_by_model(self):
+        args = {
+            "tool_specs": None,
+            "system_prompts": [{"text": "abcd" * 1500}],
+            "messages": [_text_message("user", 10)],
+        }
+        self.assertTrue(plan_prompt_cache(model="claude-v3.7-sonnet", **args)["system"])
+        self.assertFalse(plan_prompt_cache(model="claude-v4.5-haiku", **args)["system"])
+
+    def test_no_cache_for_tools_unsupported_model(self):
+        plan = plan_prompt_cache(
+            model="amazon-nova-pro",
+            tool_specs=[{"toolSpec": {"name": "search", "description": "abcd" * 1500}}],
+            system_prompts=[{"text": "abcd" * 1500}],
+            messages=[_text_message("user", 10)],
+        )
+        self.assertFalse(plan["tools"])
+        self.assertFalse(plan["system"])
+
+    def test_messages_not_cached(self):
+        plan = plan_prompt_cache(
+            model="claude-v3.7-sonnet",
+            tool_specs=None,
+            system_prompts=[{"text": "abcd" * 1500}],
+            messages=[_text_message("user", 2000)],
+            cache_messages=False,
+        )
+        self.assertTrue(plan["system"])
+        self.assertEqual(plan["messages"], [])
+
+    def test_should_cache_messages_by_hit_rate(self):
+        self.assertTrue(should_cache_messages(None, "conversation"))
+        self.assertTrue(
+            should_cache_messages(
+                UsageStatsModel(
+                    usage_count=10,
+                    cache_read_input_tokens=0,
+                    cache_write_input_tokens=MIN_CACHE_WRITE_SAMPLE - 1,
+                ),
+                "conversation",
+            )
+        )
+        self.assertTrue(
+            should_cache_messages(
+                UsageStatsModel(
+                    usage_count=10,
+                    cache_read_input_tokens=MIN_CACHE_WRITE_SAMPLE,
+                    cache_write_input_tokens=MIN_CACHE_WRITE_SAMPLE,
+                ),
+                "conversation",
+            )
+        )
+        low_hit_rate = UsageStatsModel(
+            usage_count=10,
+            cache_read_input_tokens=0,
+            cache_write_input_tokens=MIN_CACHE_WRITE_SAMPLE,
+        )
+        # Only a small share of conversations keep caching messages.
+        cached = [
+            should_cache_messages(low_hit_rate, f"conversation-{i}")
+            for i in range(1000)
+        ]
+        self.assertLess(sum(cached), 200)
+
+
 class TestCallConverseApi(unittest.TestCase):
     def test_call_converse_api_with_global_inference(self):
         """Actual LLM call using global inference profile"""
@@ -0,0 +1,101 @@
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(".")
+
+from app.cache import SingleFlight, TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_get_and_set(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=60)
+        self.assertIsNone(cache.get("a"))
+
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+
+    def test_expire(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+
+    def test_evict_oldest(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_get_or_set(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=60)
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return 42
+
+        self.assertEqual(cache.get_or_set("a", factory), 42)
+        self.assertEqual(cache.get_or_set("a", factory), 42)
+        self.assertEqual(len(calls), 1)
+
+    def test_invalidate(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=60)
+        cache.set("a", 1)
+        cache.invalidate("a")
+        self.assertIsNone(cache.get("a"))
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_deduplicate_concurrent_calls(self):
+        single_flight: SingleFlight[str, int] = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def function():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return 42
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(single_flight.do("a", function))
+            )
+            for _ in range(5)
+        ]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+
+        # Let the followers join the call in progress
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [42] * 5)
+
+    def test_share_exception(self):
+        single_flight: SingleFlight[str, int] = SingleFlight()
+
+        def function():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            single_flight.do("a", function)
+
+        # The failed call is not remembered
+        self.assertEqual(single_flight.do("a", lambda: 1), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,681 @@
+import io
+import json
+import random
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, ".")
+
+from app.repositories.common import RecordNotFoundError
+from embedding_statemachine.bedrock_knowledge_base import (
+    synchronize_data_source as sync,
+)
+
+MODULE = "embedding_statemachine.bedrock_knowledge_base.synchronize_data_source"
+
+
+def _uri(user_id: str, bot_id: str, filename: str) -> str:
+    return f"s3://documents/{user_id}/{bot_id}/documents/{filename}"
+
+
+def _bot(user_id: str, bot_id: str, filenames: list[str]) -> MagicMock:
+    bot = MagicMock()
+    bot.owner_user_id = user_id
+    bot.id = bot_id
+    bot.knowledge.filenames = filenames
+    return bot
+
+
+class _SyncTestCase(unittest.TestCase):
+    def patch(self, name: str, **kwargs) -> MagicMock:
+        patcher = patch(f"{MODULE}.{name}", **kwargs)
+        mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mock
+
+    def setUp(self):
+        self.patch("DOCUMENT_BUCKET", new="documents")
+
+
+class TestIsDocumentUpToDate(unittest.TestCase):
+    def test_not_indexed(self):
+        for status in [None, "PENDING", "FAILED", "IGNORED"]:
+            self.assertFalse(
+                sync.is_document_up_to_date(status, '"a"', '"a"', unchanged=True)
+            )
+
+    def test_file_missing(self):
+        self.assertFalse(
+            sync.is_document_up_to_date("INDEXED", '"a"', None, unchanged=True)
+        )
+
+    def test_same_hash(self):
+        self.assertTrue(
+            sync.is_document_up_to_date("INDEXED", '"a"', '"a"', unchanged=False)
+        )
+
+    def test_changed_hash(self):
+        self.assertFalse(
+            sync.is_document_up_to_date("INDEXED", '"a"', '"b"', unchanged=True)
+        )
+
+    def test_without_stored_hash(self):
+        self.assertTrue(
+            sync.is_document_up_to_date("INDEXED", None, '"a"', unchanged=True)
+        )
+        self.assertFalse(
+            sync.is_document_up_to_date("INDEXED", None, '"a"', unchanged=False)
+        )
+
+
+class TestPlanBotDocuments(_SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patch(
+            "list_document_objects",
+            return_value={
+                "same.pdf": {"ETag": '"1"', "Size": 10},
+                "changed.pdf": {"ETag": '"2"', "Size": 20},
+                "new.pdf": {"ETag": '"3"', "Size": 30},
+            },
+        )
+        self.patch(
+            "find_document_hashes",
+            return_value={"same.pdf": '"1"', "changed.pdf": '"old"'},
+        )
+        self.get_document_statuses = self.patch(
+            "get_document_statuses",
+            return_value={
+                _uri("user1", "bot1", "same.pdf"): "INDEXED",
+                _uri("user1", "bot1", "changed.pdf"): "INDEXED",
+            },
+        )
+        self.bot_documents: list[sync.BotDocuments] = [
+            {
+                "OwnerUserId": "user1",
+                "BotId": "bot1",
+                "Filenames": {
+                    "same.pdf": True,
+                    "changed.pdf": True,
+                    "new.pdf": False,
+                    "missing.pdf": False,
+                },
+                "Deleted": ["removed.pdf"],
+            }
+        ]
+
+    def test_plan(self):
+        added, deleted, current_hashes, added_bytes = sync.plan_bot_documents(
+            "kb1", "ds1", self.bot_documents
+        )
+
+        self.assertEqual(
+            added,
+            [
+                _uri("user1", "bot1", "changed.pdf"),
+                _uri("user1", "bot1", "new.pdf"),
+                _uri("user1", "bot1", "missing.pdf"),
+            ],
+        )
+        self.assertEqual(deleted, [_uri("user1", "bot1", "removed.pdf")])
+        self.assertEqual(
+            current_hashes,
+            {
+                ("user1", "bot1"): {
+                    "same.pdf": '"1"',
+                    "changed.pdf": '"2"',
+                    "new.pdf": '"3"',
+                }
+            },
+        )
+        self.assertEqual(added_bytes, 50)
+
+    def test_passed_statuses(self):
+        added, _, _, _ = sync.plan_bot_documents(
+            "kb1",
+            "ds1",
+            self.bot_documents,
+            document_statuses={
+                _uri("user1", "bot1", name): "INDEXED"
+                for name in ["same.pdf", "changed.pdf", "new.pdf"]
+            },
+        )
+
+        self.get_document_statuses.assert_not_called()
+        # `new.pdf` has no stored hash and is not known to be unchanged.
+        self.assertEqual(
+            added,
+            [
+                _uri("user1", "bot1", "changed.pdf"),
+                _uri("user1", "bot1", "new.pdf"),
+                _uri("user1", "bot1", "missing.pdf"),
+            ],
+        )
+
+
+class TestPlanKnowledgeBaseTenants(_SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.find_bots = self.patch(
+            "find_bots_by_knowledge_base_id",
+            return_value=[_bot("user1", "bot1", ["a.pdf", "b.pdf"])],
+        )
+        self.patch(
+            "list_document_objects",
+            return_value={
+                "a.pdf": {"ETag": '"a"', "Size": 1},
+                "b.pdf": {"ETag": '"b"', "Size": 2},
+            },
+        )
+        self.patch("find_document_hashes", return_value={"a.pdf": '"a"'})
+        self.list_document_statuses = self.patch(
+            "list_document_statuses",
+            return_value={
+                _uri("user1", "bot1", "a.pdf"): "INDEXED",
+                # Removed from the tenant
+                _uri("user1", "bot1", "removed.pdf"): "INDEXED",
+                # Of a deleted bot
+                _uri("user2", "deleted", "c.pdf"): "INDEXED",
+                # Of a bot not found by the scan, e.g. updated meanwhile
+                _uri("user3", "existing", "d.pdf"): "INDEXED",
+                # Outside of the uploaded documents
+                "s3://other-bucket/e.pdf": "INDEXED",
+            },
+        )
+        self.find_bot_metas_by_ids = self.patch(
+            "find_bot_metas_by_ids", return_value={"existing": MagicMock()}
+        )
+
+    def test_no_tenants(self):
+        self.find_bots.return_value = []
+        self.assertIsNone(sync.plan_knowledge_base_tenants("kb1", "ds1", []))
+        self.list_document_statuses.assert_not_called()
+
+    def test_plan(self):
+        added, deleted, current_hashes, added_bytes = sync.plan_knowledge_base_tenants(
+            "kb1", "ds1", []
+        )
+
+        self.assertEqual(added, [_uri("user1", "bot1", "b.pdf")])
+        self.assertEqual(added_bytes, 2)
+        self.assertEqual(
+            current_hashes, {("user1", "bot1"): {"a.pdf": '"a"', "b.pdf": '"b"'}}
+        )
+        # Only documents of bots confirmed to be deleted are deleted.
+        self.assertEqual(
+            deleted,
+            [
+                _uri("user1", "bot1", "removed.pdf"),
+                _uri("user2", "deleted", "c.pdf"),
+            ],
+        )
+        self.assertEqual(
+            set(self.find_bot_metas_by_ids.call_args.args[0]), {"deleted", "existing"}
+        )
+
+    def test_inclusion_prefixes(self):
+        added, _, current_hashes, _ = sync.plan_knowledge_base_tenants(
+            "kb1", "ds1", ["user1/bot1/documents/a"]
+        )
+
+        self.assertEqual(added, [])
+        self.assertEqual(current_hashes, {("user1", "bot1"): {"a.pdf": '"a"'}})
+
+    def test_lookup_skipped_without_other_bots(self):
+        self.list_document_statuses.return_value = {
+            _uri("user1", "bot1", "removed.pdf"): "INDEXED"
+        }
+        _, deleted, _, _ = sync.plan_knowledge_base_tenants("kb1", "ds1", [])
+
+        self.assertEqual(deleted, [_uri("user1", "bot1", "removed.pdf")])
+        self.find_bot_metas_by_ids.assert_not_called()
+
+
+def _files_diff(
+    bot_id: str,
+    added: list[str] | None = None,
+    unchanged: list[str] | None = None,
+    deleted: list[str] | None = None,
+) -> sync.BotFilesDiff:
+    return {
+        "OwnerUserId": "user1",
+        "BotId": bot_id,
+        "Added": added or [],
+        "Unchanged": unchanged or [],
+        "Deleted": deleted or [],
+    }
+
+
+class TestMergeFilesDiffs(unittest.TestCase):
+    def test_single_entry(self):
+        files_diffs = [_files_diff("bot1", added=["a"], unchanged=["b"])]
+        self.assertEqual(sync.merge_files_diffs([files_diffs]), files_diffs)
+
+    def test_later_change_takes_precedence(self):
+        merged = sync.merge_files_diffs(
+            [
+                [_files_diff("bot1", added=["a", "b"], unchanged=["c"])],
+                [_files_diff("bot1", added=["c"], deleted=["a"], unchanged=["b"])],
+                [_files_diff("bot1", added=["a"])],
+            ]
+        )
+        self.assertEqual(len(merged), 1)
+        # `b` stays added, although later updates report it as unchanged.
+        self.assertEqual(sorted(merged[0]["Added"]), ["a", "b", "c"])
+        self.assertEqual(merged[0]["Unchanged"], [])
+        self.assertEqual(merged[0]["Deleted"], [])
+
+    def test_deleted_after_added(self):
+        merged = sync.merge_files_diffs(
+            [
+                [_files_diff("bot1", added=["a"])],
+                [_files_diff("bot1", deleted=["a"], unchanged=["b"])],
+            ]
+        )
+        self.assertEqual(merged, [_files_diff("bot1", unchanged=["b"], deleted=["a"])])
+
+    def test_bots_are_merged_separately(self):
+        merged = sync.merge_files_diffs(
+            [
+                [_files_diff("bot1", added=["a"])],
+                [_files_diff("bot2", deleted=["a"]), _files_diff("bot1", added=["b"])],
+            ]
+        )
+        self.assertEqual(
+            merged,
+            [
+                _files_diff("bot1", added=["a", "b"]),
+                _files_diff("bot2", deleted=["a"]),
+            ],
+        )
+
+    def test_entire_synchronization(self):
+        self.assertIsNone(
+            sync.merge_files_diffs([[_files_diff("bot1", added=["a"])], []])
+        )
+
+
+class TestIngestionQueue(_SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.s3 = self.patch("s3")
+
+    def test_enqueue(self):
+        result = sync.handle_enqueue(
+            {
+                "KnowledgeBaseId": "kb1",
+                "DataSourceId": "ds1",
+                "FilesDiffs": [_files_diff("bot1", added=["a"])],
+            }
+        )
+
+        kwargs = self.s3.put_object.call_args.kwargs
+        self.assertEqual(
+            kwargs["Key"], f".temp/.ingestion-queue/kb1/ds1/{result['EntryId']}"
+        )
+        self.assertEqual(
+            json.loads(kwargs["Body"]),
+            {"FilesDiffs": [_files_diff("bot1", added=["a"])]},
+        )
+
+    def test_dequeue_in_order(self):
+        bodies = {
+            "queue/1": [_files_diff("bot1", added=["a"])],
+            "queue/2": [],
+            "queue/3": [_files_diff("bot2", deleted=["b"])],
+        }
+        self.s3.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "queue/1"}, {"Key": "queue/2"}]},
+            {"Contents": [{"Key": "queue/3"}]},
+        ]
+        self.s3.get_object.side_effect = lambda Bucket, Key: {
+            "Body": io.BytesIO(json.dumps({"FilesDiffs": bodies[Key]}).encode())
+        }
+
+        keys, files_diffs = sync.dequeue_files_diffs("kb1", "ds1")
+
+        self.assertEqual(keys, ["queue/1", "queue/2", "queue/3"])
+        self.assertEqual(files_diffs, list(bodies.values()))
+        self.s3.delete_objects.assert_not_called()
+
+    def test_delete_in_batches(self):
+        keys = [f"queue/{i}" for i in range(2500)]
+        sync.delete_queue_entries(keys)
+
+        deleted = [
+            [o["Key"] for o in call.kwargs["Delete"]["Objects"]]
+            for call in self.s3.delete_objects.call_args_list
+        ]
+        self.assertEqual([len(batch) for batch in deleted], [1000, 1000, 500])
+        self.assertEqual(sum(deleted, []), keys)
+
+
+class TestHandleIngest(_SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patch(
+            "dequeue_files_diffs",
+            return_value=(
+                ["queue/1"],
+                [
+                    [
+                        {
+                            "OwnerUserId": "user1",
+                            "BotId": "bot1",
+                            "Added": ["a.pdf"],
+                            "Unchanged": [],
+                            "Deleted": [],
+                        },
+                        {
+                            "OwnerUserId": "user2",
+                            "BotId": "bot2",
+                            "Added": ["b.pdf"],
+                            "Unchanged": [],
+                            "Deleted": [],
+                        },
+                    ]
+                ],
+            ),
+        )
+        self.patch("get_data_source_configuration", return_value={"type": "S3"})
+        self.patch(
+            "plan_bot_documents",
+            return_value=(
+                [_uri("user1", "bot1", "a.pdf"), _uri("user2", "bot2", "b.pdf")],
+                [],
+                {
+                    ("user1", "bot1"): {"a.pdf": '"a"'},
+                    ("user2", "bot2"): {"b.pdf": '"b"'},
+                },
+                2,
+            ),
+        )
+        self.patch(
+            "ingest_documents",
+            side_effect=lambda kb, ds, uris: [
+                {"identifier": {"s3": {"uri": uri}}, "status": "STARTING"}
+                for uri in uris
+            ],
+        )
+        self.patch("delete_documents", return_value=[])
+        self.update_document_hashes = self.patch("update_document_hashes")
+        self.delete_queue_entries = self.patch("delete_queue_entries")
+
+    def _ingest(self):
+        return sync.handle_ingest({"KnowledgeBaseId": "kb1", "DataSourceId": "ds1"})
+
+    def test_skip_deleted_bot(self):
+        def update_document_hashes(user_id, bot_id, data_source_id, hashes):
+            if bot_id == "bot1":
+                raise RecordNotFoundError()
+
+        self.update_document_hashes.side_effect = update_document_hashes
+        result = self._ingest()
+
+        self.assertEqual(self.update_document_hashes.call_count, 2)
+        self.update_document_hashes.assert_any_call(
+            "user2", "bot2", "ds1", {"b.pdf": '"b"'}
+        )
+        self.delete_queue_entries.assert_called_once_with(["queue/1"])
+        self.assertEqual(len(result["DocumentsDiff"]["Added"]), 2)
+
+    def test_delete_queue_entries_after_success(self):
+        self.update_document_hashes.side_effect = (
+            lambda *args: self.delete_queue_entries.assert_not_called()
+        )
+        result = self._ingest()
+
+        self.delete_queue_entries.assert_called_once_with(["queue/1"])
+        self.assertFalse(result["Completed"])
+
+    def test_keep_queue_entries_on_failure(self):
+        for target in ["ingest_documents", "update_document_hashes"]:
+            with self.subTest(target=target):
+                with patch(f"{MODULE}.{target}", side_effect=Exception("throttled")):
+                    with self.assertRaises(Exception):
+                        self._ingest()
+
+                self.delete_queue_entries.assert_not_called()
+
+    def test_empty_queue(self):
+        self.patch("dequeue_files_diffs", return_value=([], []))
+        get_data_source_configuration = self.patch("get_data_source_configuration")
+
+        result = self._ingest()
+
+        self.assertTrue(result["Completed"])
+        get_data_source_configuration.assert_not_called()
+        self.delete_queue_entries.assert_not_called()
+
+    def test_entire_synchronization(self):
+        self.patch("dequeue_files_diffs", return_value=(["queue/1"], [[]]))
+        bedrock_agent = self.patch("bedrock_agent")
+        bedrock_agent.start_ingestion_job.side_effect = Exception("conflict")
+        with self.assertRaises(Exception):
+            self._ingest()
+        self.delete_queue_entries.assert_not_called()
+
+        bedrock_agent.start_ingestion_job.side_effect = None
+        bedrock_agent.start_ingestion_job.return_value = {
+            "ingestionJob": {"ingestionJobId": "job1"}
+        }
+        result = self._ingest()
+
+        self.assertEqual(result["IngestionJobId"], "job1")
+        self.delete_queue_entries.assert_called_once_with(["queue/1"])
+
+    def test_large_diff_falls_back_to_entire_synchronization(self):
+        self.patch("MAX_DOCUMENTS_DIFF_BYTES", new=100)
+        ingest_documents = self.patch("ingest_documents")
+        bedrock_agent = self.patch("bedrock_agent")
+        bedrock_agent.start_ingestion_job.return_value = {
+            "ingestionJob": {"ingestionJobId": "job1"}
+        }
+
+        result = self._ingest()
+
+        ingest_documents.assert_not_called()
+        self.assertIsNone(result["DocumentsDiff"])
+        self.assertEqual(result["IngestionJobId"], "job1")
+        self.assertFalse(result["Completed"])
+        # The job ingests the current files, so their hashes are stored
+        self.update_document_hashes.assert_any_call(
+            "user1", "bot1", "ds1", {"a.pdf": '"a"'}
+        )
+        self.delete_queue_entries.assert_called_once_with(["queue/1"])
+
+    def test_small_diff_is_ingested_directly(self):
+        self.patch("MAX_DOCUMENTS_DIFF_BYTES", new=1024)
+        bedrock_agent = self.patch("bedrock_agent")
+
+        result = self._ingest()
+
+        bedrock_agent.start_ingestion_job.assert_not_called()
+        self.assertEqual(len(result["DocumentsDiff"]["Added"]), 2)
+
+
+class TestHandleCheck(_SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.statuses = {
+            "added/indexed": "INDEXED",
+            "added/pending": "PENDING",
+            "added/in-progress": "IN_PROGRESS",
+            "deleted/not-found": "NOT_FOUND",
+            "deleted/deleting": "DELETING",
+        }
+        self.patch(
+            "get_document_statuses",
+            side_effect=lambda kb, ds, uris: {
+                uri: self.statuses[uri] for uri in uris if uri in self.statuses
+            },
+        )
+
+    def _check(self, documents_diff: sync.DocumentsDiff, **ingestion_job):
+        return sync.handle_check(
+            {
+                "IngestionJob": {
+                    "KnowledgeBaseId": "kb1",
+                    "DataSourceId": "ds1",
+                    "DocumentsDiff": documents_diff,
+                    "IngestionJobId": None,
+                    "CheckCount": 0,
+                    "PendingBytes": 400,
+                    "WaitSeconds": 10,
+                    "WaitedSeconds": 0,
+                    **ingestion_job,
+                },
+                "TimeoutSeconds": 3600,
+            }
+        )
+
+    def test_narrow_to_pending_documents(self):
+        result = self._check(
+            {
+                "Added": [
+                    "added/indexed",
+                    "added/pending",
+                    "added/in-progress",
+                    # Not visible in the data source yet
+                    "added/missing",
+                ],
+                "Deleted": ["deleted/not-found", "deleted/deleting"],
+            }
+        )
+
+        self.assertFalse(result["Completed"])
+        self.assertEqual(
+            result["DocumentsDiff"],
+            {
+                "Added": ["added/pending", "added/in-progress", "added/missing"],
+                "Deleted": ["deleted/deleting"],
+            },
+        )
+        # Scaled to the pending share of the added documents
+        self.assertEqual(result["PendingBytes"], 300)
+        self.assertEqual(result["CheckCount"], 1)
+        self.assertEqual(result["WaitedSeconds"], 10)
+
+    def test_failed_document_is_not_dropped(self):
+        self.statuses["added/failed"] = "FAILED"
+        with self.assertRaisesRegex(Exception, "added/failed"):
+            self._check({"Added": ["added/indexed", "added/failed"], "Deleted": []})
+
+    def test_completed(self):
+        result = self._check(
+            {"Added": ["added/indexed"], "Deleted": ["deleted/not-found"]}
+        )
+
+        self.assertTrue(result["Completed"])
+        self.assertEqual(result["DocumentsDiff"], {"Added": [], "Deleted": []})
+        self.assertEqual(result["PendingBytes"], 0)
+
+    def test_timeout(self):
+        with self.assertRaisesRegex(Exception, "did not complete in time"):
+            self._check({"Added": ["added/pending"], "Deleted": []}, WaitedSeconds=3590)
+
+
+class TestEstimateCheckInterval(_SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patch("MIN_CHECK_INTERVAL", new=5)
+        self.patch("MAX_CHECK_INTERVAL", new=120)
+        self.patch("MAX_CONCURRENT_REQUESTS", new=4)
+        self.uniform = self.patch("random.uniform", return_value=1.0)
+
+    def test_zero_documents(self):
+        self.assertEqual(sync.estimate_check_interval(0, 0, check_count=0), 5)
+
+    def test_scaled_to_pending_documents(self):
+        # 80 documents * 0.5 s / 4 + 10 MiB / 1 MiB/s
+        self.assertEqual(
+            sync.estimate_check_interval(80, 10 * 1024 * 1024, check_count=0), 20
+        )
+
+    def test_backoff(self):
+        # 5 s * 1.5^3
+        self.assertEqual(sync.estimate_check_interval(0, 0, check_count=3), 17)
+
+    def test_clamped_to_max(self):
+        self.assertEqual(
+            sync.estimate_check_interval(1_000_000, 10**12, check_count=0), 120
+        )
+        self.assertEqual(sync.estimate_check_interval(0, 0, check_count=100), 120)
+
+    def test_jitter(self):
+        self.uniform.return_value = 1.2
+        self.assertEqual(sync.estimate_check_interval(80, 0, check_count=0), 12)
+        self.uniform.return_value = 0.8
+        self.assertEqual(sync.estimate_check_interval(80, 0, check_count=0), 8)
+        self.uniform.assert_called_with(0.8, 1.2)
+
+    def test_jitter_is_clamped(self):
+        self.uniform.return_value = 0.8
+        self.assertEqual(sync.estimate_check_interval(0, 0, check_count=0), 5)
+        self.uniform.return_value = 1.2
+        self.assertEqual(sync.estimate_check_interval(0, 0, check_count=100), 120)
+
+    def test_real_jitter_within_bounds(self):
+        self.uniform.side_effect = random.Random(0).uniform
+        for _ in range(100):
+            self.assertTrue(
+                16 <= sync.estimate_check_interval(160, 0, check_count=0) <= 24
+            )
+
+
+class TestCheckTimeout(_SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bedrock_agent = self.patch("bedrock_agent")
+        self.bedrock_agent.get_ingestion_job.return_value = {
+            "ingestionJob": {"status": "IN_PROGRESS"}
+        }
+
+    def _check(self, timeout_seconds: int | None, **ingestion_job):
+        return sync.handle_check(
+            {
+                "IngestionJob": {
+                    "KnowledgeBaseId": "kb1",
+                    "DataSourceId": "ds1",
+                    "DocumentsDiff": None,
+                    "IngestionJobId": "job1",
+                    **ingestion_job,
+                },
+                "TimeoutSeconds": timeout_seconds,
+            }
+        )
+
+    def test_waited_seconds_accumulate(self):
+        result = self._check(600, CheckCount=2, WaitSeconds=30, WaitedSeconds=100)
+
+        self.assertEqual(result["WaitedSeconds"], 130)
+        self.assertEqual(result["CheckCount"], 3)
+        self.assertGreaterEqual(result["WaitSeconds"], sync.MIN_CHECK_INTERVAL)
+        self.assertLessEqual(result["WaitSeconds"], sync.MAX_CHECK_INTERVAL)
+
+    def test_first_check(self):
+        result = self._check(600)
+
+        self.assertEqual(result["WaitedSeconds"], 0)
+        self.assertEqual(result["CheckCount"], 1)
+
+    def test_timeout_boundary(self):
+        self._check(600, WaitSeconds=30, WaitedSeconds=569)
+        with self.assertRaisesRegex(Exception, "did not complete in time"):
+            self._check(600, WaitSeconds=30, WaitedSeconds=570)
+
+    def test_completed_at_timeout(self):
+        self.bedrock_agent.get_ingestion_job.return_value = {
+            "ingestionJob": {"status": "COMPLETE"}
+        }
+        result = self._check(600, WaitSeconds=30, WaitedSeconds=1000)
+        self.assertTrue(result["Completed"])
+
+    def test_without_timeout(self):
+        result = self._check(None, WaitSeconds=30, WaitedSeconds=10**6)
+        self.assertFalse(result["Completed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import logging
+import sys
+import unittest
+
+sys.path.append(".")
+
+from app.log_utils import (
+    SamplingFilter,
+    configure_log_sampling,
+    log_payload,
+    redact,
+)
+from unittest.mock import patch
+
+from pydantic import BaseModel
+
+
+class _Attachment(BaseModel):
+    name: str
+    body: bytes
+
+
+class TestRedact(unittest.TestCase):
+    def test_redact_bytes(self):
+        redacted = redact(_Attachment(name="a.png", body=b"\x00" * 1024))
+        self.assertEqual(redacted, {"name": "a.png", "body": "<1024 bytes>"})
+
+    def test_truncate_long_string(self):
+        redacted = redact({"body": "a" * 1000})
+        self.assertTrue(redacted["body"].endswith("...<1000 chars>"))
+        self.assertLess(len(redacted["body"]), 1000)
+
+    def test_stop_at_max_chars(self):
+        redacted = redact([{"body": "a" * 100} for _ in range(10000)], max_chars=500)
+        self.assertLess(len(redacted), 10)
+        self.assertTrue(redacted[-1].endswith("more items>"))
+
+    def test_model_is_not_dumped(self):
+        attachment = _Attachment(name="a.png", body=b"\x00")
+        with patch.object(_Attachment, "model_dump", side_effect=AssertionError):
+            redacted = redact(attachment, max_chars=100)
+        self.assertEqual(redacted, {"name": "a.png", "body": "<1 bytes>"})
+
+
+class TestLogPayload(unittest.TestCase):
+    def test_render_lazily(self):
+        rendered = []
+
+        class _Spy:
+            def __str__(self):
+                rendered.append(1)
+                return "spy"
+
+        logger = logging.getLogger("test_log_utils.lazy")
+        logger.setLevel(logging.INFO)
+        logger.debug("payload: %s", log_payload(_Spy()))
+        self.assertEqual(len(rendered), 0)
+
+    def test_cap_size(self):
+        rendered = str(log_payload([str(i) for i in range(1000)], max_chars=100))
+        self.assertTrue(rendered.endswith("chars>"))
+        self.assertLess(len(rendered), 200)
+
+
+class TestSamplingFilter(unittest.TestCase):
+    def test_filter(self):
+        sampling_filter = SamplingFilter(rate=0)
+        info = logging.LogRecord("test", logging.INFO, "", 0, "info", None, None)
+        error = logging.LogRecord("test", logging.ERROR, "", 0, "error", None, None)
+        self.assertFalse(sampling_filter.filter(info))
+        self.assertTrue(sampling_filter.filter(error))
+
+    def test_filter_by_name(self):
+        sampling_filter = SamplingFilter(rate=0, name="app.repositories")
+        child = logging.LogRecord(
+            "app.repositories.conversation", logging.INFO, "", 0, "info", None, None
+        )
+        other = logging.LogRecord("app.stream", logging.INFO, "", 0, "info", None, None)
+        self.assertFalse(sampling_filter.filter(child))
+        self.assertTrue(sampling_filter.filter(other))
+
+    def test_configure_on_handlers(self):
+        records = []
+
+        class _Handler(logging.Handler):
+            def emit(self, record):
+                records.append(record)
+
+        handler = _Handler()
+        parent = logging.getLogger("test_log_utils.sampled")
+        parent.addHandler(handler)
+        parent.setLevel(logging.INFO)
+        self.addCleanup(parent.removeHandler, handler)
+
+        configure_log_sampling("test_log_utils.sampled=0", handlers=[handler])
+        configure_log_sampling("test_log_utils.sampled=0", handlers=[handler])
+        self.assertEqual(len(handler.filters), 1)
+
+        child = logging.getLogger("test_log_utils.sampled.child")
+        child.info("sampled out")
+        child.warning("always emitted")
+        self.assertEqual([r.getMessage() for r in records], ["always emitted"])
+
+
+if __name__ == "__main__":
+    unittest.main()
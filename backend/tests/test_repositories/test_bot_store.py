@@ -6,13 +6,17 @@ sys.path.insert(0, ".")
 
 import logging
 import time
+from unittest.mock import patch
 
+from app.repositories import bot_store
 from app.repositories.bot_store import (
+    _find_feed_hits,
     find_bots_by_query,
     find_bots_sorted_by_usage_count,
     find_random_bots,
     get_opensearch_client,
 )
+from app.repositories.common import compose_allowed_principals
 from app.repositories.models.custom_bot import BotMeta
 from app.user import User
 from opensearchpy import NotFoundError, OpenSearch
@@ -120,6 +124,9 @@ class TestFindBotsWithOpenSearch(unittest.TestCase):
                 "SK": f"BOT#{bot.id}",
                 "AllowedCognitoUsers": bot.allowed_cognito_users,
                 "AllowedCognitoGroups": bot.allowed_cognito_groups,
+                "AllowedPrincipals": compose_allowed_principals(
+                    bot.allowed_cognito_users, bot.allowed_cognito_groups
+                ),
                 "SyncStatus": bot.sync_status,
                 "BedrockKnowledgeBase": bot.bedrock_knowledge_base,
                 "UsageStats": bot.usage_stats.model_dump(),
@@ -254,5 +261,92 @@ class TestFindBotsWithOpenSearch(unittest.TestCase):
         self.assertEqual(len(result), 5)
 
 
+def _hit(bot_id: str, usage_count: int = 0) -> dict:
+    return {
+        "_id": f"doc-{bot_id}",
+        "_source": {"BotId": bot_id, "UsageStats": {"usage_count": usage_count}},
+    }
+
+
+class TestFindFeedHits(unittest.TestCase):
+    def setUp(self):
+        self.user = User(id="user1", name="user1", email="user1@example.com", groups=[])
+        self.public_hits = [_hit("public1", 5), _hit("public2", 1), _hit("shared1", 3)]
+        self.user_hits = [_hit("shared1", 3), _hit("own1", 4)]
+
+        get_public_feed_hits = patch.object(
+            bot_store, "_get_public_feed_hits", return_value=self.public_hits
+        )
+        search_hits = patch.object(
+            bot_store, "_search_hits", return_value=self.user_hits
+        )
+        self.get_public_feed_hits = get_public_feed_hits.start()
+        self.search_hits = search_hits.start()
+        self.addCleanup(patch.stopall)
+
+        for cache in (
+            bot_store._public_feed_cache,
+            bot_store._user_feed_cache,
+            bot_store._withdrawn_bot_ids,
+        ):
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+    def _bot_ids(self, hits: list[dict]) -> list[str]:
+        return [hit["_source"]["BotId"] for hit in hits]
+
+    def test_popular_merges_and_sorts_by_usage_count(self):
+        hits = _find_feed_hits("popular", self.user, 10, client=object())
+
+        self.assertListEqual(
+            self._bot_ids(hits), ["public1", "own1", "shared1", "public2"]
+        )
+
+    def test_popular_is_truncated_to_limit(self):
+        hits = _find_feed_hits("popular", self.user, 2, client=object())
+
+        self.assertListEqual(self._bot_ids(hits), ["public1", "own1"])
+
+    def test_pickup_samples_from_merged_hits(self):
+        hits = _find_feed_hits("pickup", self.user, 3, client=object())
+
+        self.assertEqual(len(hits), 3)
+        self.assertEqual(len(set(self._bot_ids(hits))), 3)
+        self.assertLessEqual(
+            set(self._bot_ids(hits)), {"public1", "public2", "shared1", "own1"}
+        )
+
+    def test_pickup_returns_all_when_limit_exceeds_hits(self):
+        hits = _find_feed_hits("pickup", self.user, 10, client=object())
+
+        self.assertSetEqual(
+            set(self._bot_ids(hits)), {"public1", "public2", "shared1", "own1"}
+        )
+
+    def test_feed_is_cached_per_user(self):
+        first = _find_feed_hits("popular", self.user, 10, client=object())
+        second = _find_feed_hits("popular", self.user, 10, client=object())
+
+        self.assertIs(first, second)
+        self.search_hits.assert_called_once()
+
+    def test_withdrawn_bot_is_filtered_out(self):
+        _find_feed_hits("popular", self.user, 10, client=object())
+        bot_store.invalidate_bot_feeds("public1", withdrawn=True)
+
+        hits = _find_feed_hits("popular", self.user, 10, client=object())
+
+        self.assertNotIn("public1", self._bot_ids(hits))
+        self.assertEqual(self.search_hits.call_count, 2)
+
+    def test_republished_bot_is_not_filtered_out(self):
+        bot_store.invalidate_bot_feeds("public1", withdrawn=True)
+        bot_store.invalidate_bot_feeds("public1", withdrawn=False)
+
+        hits = _find_feed_hits("popular", self.user, 10, client=object())
+
+        self.assertIn("public1", self._bot_ids(hits))
+
+
 if __name__ == "__main__":
     unittest.main()
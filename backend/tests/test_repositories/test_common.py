@@ -0,0 +1,120 @@
+import sys
+import unittest
+
+sys.path.insert(0, ".")
+
+import base64
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from app.repositories.common import (
+    _get_aws_resource,
+    decode_search_cursor,
+    encode_search_cursor,
+    reset_aws_clients,
+)
+
+
+def _encode(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("utf-8")
+
+
+class TestSearchCursor(unittest.TestCase):
+    def test_round_trip(self):
+        sort_values = [12.5, 1700000000000, "BOT#01HXYZ", None]
+        cursor = encode_search_cursor(sort_values)
+        self.assertEqual(decode_search_cursor(cursor), sort_values)
+
+    def test_cursor_is_url_safe(self):
+        # Characters which are encoded to `+` and `/` by standard base64
+        cursor = encode_search_cursor(["~~~???>>>"])
+        self.assertNotIn("+", cursor)
+        self.assertNotIn("/", cursor)
+        self.assertEqual(decode_search_cursor(cursor), ["~~~???>>>"])
+
+    def test_invalid_base64(self):
+        with self.assertRaises(ValueError):
+            decode_search_cursor("not a cursor!")
+
+    def test_invalid_json(self):
+        cursor = base64.urlsafe_b64encode(b"[1, 2").decode("utf-8")
+        with self.assertRaises(ValueError):
+            decode_search_cursor(cursor)
+
+    def test_invalid_utf8(self):
+        cursor = base64.urlsafe_b64encode(b"\xff\xfe").decode("utf-8")
+        with self.assertRaises(ValueError):
+            decode_search_cursor(cursor)
+
+    def test_not_list(self):
+        with self.assertRaises(ValueError):
+            decode_search_cursor(_encode({"search_after": [1]}))
+
+    def test_empty_list(self):
+        with self.assertRaises(ValueError):
+            decode_search_cursor(_encode([]))
+
+    def test_tampered_values(self):
+        # `sort` values are scalars, so nested values cannot come from `encode_search_cursor`.
+        with self.assertRaises(ValueError):
+            decode_search_cursor(_encode([1.0, {"match_all": {}}]))
+
+        with self.assertRaises(ValueError):
+            decode_search_cursor(_encode([[1, 2]]))
+
+
+@patch.dict(os.environ, {"AWS_EXECUTION_ENV": "AWS_Lambda_python3.13"})
+class TestRoleResources(unittest.TestCase):
+    def setUp(self):
+        reset_aws_clients()
+        self.addCleanup(reset_aws_clients)
+
+        self.sts_client = MagicMock()
+        self.sts_client.assume_role.side_effect = lambda **kwargs: {
+            "Credentials": {
+                "AccessKeyId": f"key{self.sts_client.assume_role.call_count}",
+                "SecretAccessKey": "secret",
+                "SessionToken": "token",
+            }
+        }
+        self.session = MagicMock()
+        self.session.resource.side_effect = lambda *args, **kwargs: MagicMock()
+
+        for target, value in [
+            ("app.repositories.common._get_sts_client", self.sts_client),
+            ("app.repositories.common._get_role_session", self.session),
+        ]:
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_reuse_in_same_thread(self):
+        resource = _get_aws_resource("dynamodb", "table", "user1")
+        self.assertIs(_get_aws_resource("dynamodb", "table", "user1"), resource)
+        self.assertIsNot(_get_aws_resource("dynamodb", "table", "user2"), resource)
+        self.assertEqual(self.sts_client.assume_role.call_count, 2)
+
+    def test_resource_per_thread(self):
+        resource = _get_aws_resource("dynamodb", "table", "user1")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other = executor.submit(
+                _get_aws_resource, "dynamodb", "table", "user1"
+            ).result()
+
+        self.assertIsNot(other, resource)
+        # Credentials are shared by the threads
+        self.assertEqual(self.sts_client.assume_role.call_count, 1)
+        for call in self.session.resource.call_args_list:
+            self.assertEqual(call.kwargs["aws_access_key_id"], "key1")
+
+    def test_reset(self):
+        resource = _get_aws_resource("dynamodb", "table", "user1")
+        reset_aws_clients()
+        self.assertIsNot(_get_aws_resource("dynamodb", "table", "user1"), resource)
+        self.assertEqual(self.sts_client.assume_role.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,7 @@ import json
 import os
 import sys
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 sys.path.insert(0, ".")
 from app.repositories.conversation import (
@@ -32,9 +32,9 @@ from app.repositories.models.conversation import (
 class TestConversationRepository(unittest.TestCase):
     def setUp(self):
         self.patcher1 = patch("boto3.resource")
-        self.patcher2 = patch("app.repositories.conversation.s3_client")
+        self.patcher2 = patch("app.repositories.conversation._get_s3_client")
         self.mock_boto3_resource = self.patcher1.start()
-        self.mock_s3_client = self.patcher2.start()
+        self.mock_s3_client = self.patcher2.start().return_value
 
         self.mock_table = MagicMock()
         self.mock_boto3_resource.return_value.Table.return_value = self.mock_table
@@ -388,12 +388,17 @@ class TestConversationRepository(unittest.TestCase):
         # Test storing large conversation
         response = store_conversation("user", large_conversation, threshold=1)
         self.assertIsNotNone(response)
+        put_object_kwargs = self.mock_s3_client.put_object.call_args.kwargs
+        self.assertEqual(put_object_kwargs["Key"], "user/2/message_map.json")
 
         # Test finding large conversation by id
         found_conversation = find_conversation_by_id(
             user_id="user", conversation_id="2"
         )
         self.assertEqual(found_conversation.id, "2")
+        self.mock_s3_client.get_object.assert_called_once_with(
+            Bucket=ANY, Key="user/2/message_map.json"
+        )
         self.assertEqual(found_conversation.title, "Large Conversation")
         self.assertEqual(found_conversation.total_price, 200)
         self.assertEqual(found_conversation.last_message_id, "msg_9")
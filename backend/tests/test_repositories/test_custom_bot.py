@@ -1,17 +1,27 @@
+import json
 import sys
 import unittest
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
 
 sys.path.insert(0, ".")
 
 from app.repositories.common import RecordNotFoundError
 from app.repositories.custom_bot import (
+    MAX_BOT_LIST_QUERY_PAGES,
+    _bot_list_cache,
     alias_exists,
     delete_alias_by_id,
     delete_bot_by_id,
     delete_bot_publication,
+    delete_document_hashes,
     find_alias_by_bot_id,
     find_all_published_bots,
     find_bot_by_id,
+    find_bot_metas_by_ids,
+    find_bots_by_knowledge_base_id,
+    find_document_hashes,
     find_owned_bots_by_user_id,
     find_pinned_public_bots,
     find_recently_used_bots_by_user_id,
@@ -29,6 +39,7 @@ from app.repositories.custom_bot import (
     update_bot_shared_status,
     update_bot_star_status,
     update_bot_stats,
+    update_document_hashes,
     update_knowledge_base_id,
 )
 from app.repositories.models.custom_bot import (
@@ -300,6 +311,30 @@ class TestCustomBotRepository(unittest.TestCase):
         bot = find_bot_by_id("1")
         self.assertEqual(bot.bedrock_knowledge_base.knowledge_base_id, "kb1")
         self.assertEqual(bot.bedrock_knowledge_base.data_source_ids, ["ds1", "ds2"])
+
+        bots = find_bots_by_knowledge_base_id("kb1")
+        self.assertEqual([bot.id for bot in bots], ["1"])
+        delete_bot_by_id("user1", "1")
+
+    def test_update_document_hashes(self):
+        bot = create_test_private_bot("1", False, "user1")
+        store_bot(bot)
+        self.assertEqual(find_document_hashes("user1", "1", "ds1"), {})
+
+        update_document_hashes("user1", "1", "ds1", {"a.pdf": '"etag-a"'})
+        update_document_hashes("user1", "1", "ds2", {"b.pdf": '"etag-b"'})
+        self.assertEqual(
+            find_document_hashes("user1", "1", "ds1"), {"a.pdf": '"etag-a"'}
+        )
+        self.assertEqual(
+            find_document_hashes("user1", "1", "ds2"), {"b.pdf": '"etag-b"'}
+        )
+
+        with self.assertRaises(RecordNotFoundError):
+            update_document_hashes("user1", "2", "ds1", {})
+
+        delete_document_hashes("user1", "1")
+        self.assertEqual(find_document_hashes("user1", "1", "ds1"), {})
         delete_bot_by_id("user1", "1")
 
     def test_update_bot(self):
@@ -562,6 +597,15 @@ class TestFindAllBots(unittest.TestCase):
         self.assertIn("3", bot_ids)
         self.assertIn("5", bot_ids)
 
+    def test_find_starred_bots_after_update(self):
+        result = find_starred_bots_by_user_id(user_id="user1")
+        self.assertEqual(len(result), 2)
+
+        # Cached list should be invalidated by the update
+        update_bot_star_status("user1", "1", True)
+        result = find_starred_bots_by_user_id(user_id="user1")
+        self.assertEqual(len(result), 3)
+
     def test_limit(self):
         # Only private bots
         bots = find_owned_bots_by_user_id("user1", limit=2)
@@ -583,6 +627,12 @@ class TestFindAllBots(unittest.TestCase):
         # Next token should be None
         self.assertIsNone(next_token)
 
+    def test_find_bot_metas_by_ids(self):
+        bots = find_bot_metas_by_ids(["1", "5", "5", "not-exist"])
+        self.assertEqual(set(bots.keys()), {"1", "5"})
+        self.assertEqual(bots["1"].owner_user_id, "user1")
+        self.assertEqual(bots["5"].owner_user_id, "user2")
+
 
 class TestUpdateBotSharedStatus(unittest.TestCase):
     def setUp(self) -> None:
@@ -676,5 +726,127 @@ class TestRemoveFromRecentlyUsed(unittest.TestCase):
         self.assertNotIn("shared_bot", bot_ids_after)
 
 
+class TestFindBotsPagination(unittest.TestCase):
+    def setUp(self):
+        _bot_list_cache.clear()
+        self.addCleanup(_bot_list_cache.clear)
+
+    def test_query_stops_at_max_pages(self):
+        client = MagicMock()
+        # Every page has a next page
+        client.query.return_value = {"Items": [], "LastEvaluatedKey": {"PK": "user1"}}
+        with (
+            patch(
+                "app.repositories.custom_bot.get_dynamodb_client", return_value=client
+            ),
+            self.assertLogs("app.repositories.custom_bot", level="WARNING"),
+        ):
+            bots = find_recently_used_bots_by_user_id("user1")
+
+        self.assertEqual(bots, [])
+        self.assertEqual(client.query.call_count, MAX_BOT_LIST_QUERY_PAGES)
+
+    def test_query_reads_all_pages(self):
+        client = MagicMock()
+        client.query.side_effect = [
+            {"Items": [], "LastEvaluatedKey": {"PK": "user1"}},
+            {"Items": []},
+        ]
+        with patch(
+            "app.repositories.custom_bot.get_dynamodb_client", return_value=client
+        ):
+            find_starred_bots_by_user_id("user1")
+
+        self.assertEqual(client.query.call_count, 2)
+        self.assertEqual(
+            client.query.call_args.kwargs["ExclusiveStartKey"], {"PK": "user1"}
+        )
+
+
+class TestDocumentHashesMocked(unittest.TestCase):
+    def setUp(self):
+        self.table = MagicMock()
+        self.client = MagicMock()
+        for name, mock in [
+            ("get_bot_table_client", self.table),
+            ("get_dynamodb_client", self.client),
+        ]:
+            patcher = patch(f"app.repositories.custom_bot.{name}", return_value=mock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _transaction_canceled(self, code: str):
+        return ClientError(
+            {
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [{"Code": code}, {"Code": "None"}],
+            },
+            "TransactWriteItems",
+        )
+
+    def test_stored_apart_from_bot_item(self):
+        update_document_hashes("user1", "1", "ds1", {"a.pdf": "1"})
+
+        condition_check, put = self.client.transact_write_items.call_args.kwargs[
+            "TransactItems"
+        ]
+        self.assertEqual(
+            condition_check["ConditionCheck"]["Key"], {"PK": "user1", "SK": "BOT#1"}
+        )
+        item = put["Put"]["Item"]
+        self.assertEqual(item["SK"], "DOCUMENT_HASHES#1#ds1")
+        # Not handled as a bot item by `bot_remove`
+        self.assertNotIn("BOT#", item["SK"])
+        self.assertEqual(json.loads(item["DocumentHashes"]), {"a.pdf": "1"})
+
+    def test_find(self):
+        self.table.get_item.return_value = {
+            "Item": {"DocumentHashes": json.dumps({"a.pdf": "1"})}
+        }
+        self.assertEqual(find_document_hashes("user1", "1", "ds1"), {"a.pdf": "1"})
+        self.assertEqual(
+            self.table.get_item.call_args.kwargs["Key"],
+            {"PK": "user1", "SK": "DOCUMENT_HASHES#1#ds1"},
+        )
+
+    def test_find_not_stored(self):
+        self.table.get_item.return_value = {}
+        self.assertEqual(find_document_hashes("user1", "1", "ds1"), {})
+
+    def test_bot_deleted(self):
+        self.client.transact_write_items.side_effect = self._transaction_canceled(
+            "ConditionalCheckFailed"
+        )
+        with self.assertRaises(RecordNotFoundError):
+            update_document_hashes("user1", "1", "ds1", {})
+
+    def test_other_cancellation_is_raised(self):
+        self.client.transact_write_items.side_effect = self._transaction_canceled(
+            "TransactionConflict"
+        )
+        with self.assertRaises(ClientError):
+            update_document_hashes("user1", "1", "ds1", {})
+
+    def test_delete_all_data_sources(self):
+        self.table.query.side_effect = [
+            {
+                "Items": [{"PK": "user1", "SK": "DOCUMENT_HASHES#1#ds1"}],
+                "LastEvaluatedKey": {"PK": "user1", "SK": "DOCUMENT_HASHES#1#ds1"},
+            },
+            {"Items": [{"PK": "user1", "SK": "DOCUMENT_HASHES#1#ds2"}]},
+        ]
+        delete_document_hashes("user1", "1")
+
+        batch = self.table.batch_writer.return_value.__enter__.return_value
+        self.assertEqual(
+            [call.kwargs["Key"]["SK"] for call in batch.delete_item.call_args_list],
+            ["DOCUMENT_HASHES#1#ds1", "DOCUMENT_HASHES#1#ds2"],
+        )
+        self.assertEqual(
+            self.table.query.call_args.kwargs["ExclusiveStartKey"],
+            {"PK": "user1", "SK": "DOCUMENT_HASHES#1#ds1"},
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
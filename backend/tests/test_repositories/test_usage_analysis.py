@@ -3,13 +3,21 @@ import unittest
 
 sys.path.append(".")
 
+from decimal import Decimal
 from pprint import pprint
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.repositories.usage_analysis import (
+    ATHENA_RESULT_REUSE_MAX_AGE_MINUTES,
+    _athena_result_cache,
     _find_cognito_user_by_id,
     _find_cognito_users_by_ids,
+    _find_rollup_sorted_by_price,
+    _query_rollup_day,
     find_bots_sorted_by_price,
     find_users_sorted_by_price,
+    run_athena_query,
 )
 
 
@@ -27,6 +35,263 @@ class TestUsageAnalysis(unittest.IsolatedAsyncioTestCase):
         pprint([user.model_dump() for user in users])
 
 
+class TestRunAthenaQuery(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        _athena_result_cache.clear()
+        self.client = MagicMock()
+        self.client.start_query_execution.return_value = {"QueryExecutionId": "id1"}
+        self.client.get_query_execution.return_value = {
+            "QueryExecution": {"Status": {"State": "SUCCEEDED"}}
+        }
+        self.client.get_query_results.return_value = {
+            "ResultSet": {"Rows": [{"Data": [{"VarCharValue": "BotId"}]}]}
+        }
+        patcher = patch(
+            "app.repositories.usage_analysis._get_athena_client",
+            return_value=self.client,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(_athena_result_cache.clear)
+
+    async def _run(self, query: str) -> list[dict]:
+        return await run_athena_query(query, "db", "wg", "s3://output")
+
+    async def test_result_reuse_is_requested(self):
+        await self._run("SELECT 1")
+
+        kwargs = self.client.start_query_execution.call_args.kwargs
+        self.assertEqual(
+            kwargs["ResultReuseConfiguration"],
+            {
+                "ResultReuseByAgeConfiguration": {
+                    "Enabled": True,
+                    "MaxAgeInMinutes": ATHENA_RESULT_REUSE_MAX_AGE_MINUTES,
+                }
+            },
+        )
+
+    async def test_cache_hit(self):
+        rows = await self._run("SELECT BotId\nFROM t")
+        # Differently formatted, but the same query
+        cached_rows = await self._run("  SELECT   BotId FROM t ")
+
+        self.assertEqual(cached_rows, rows)
+        self.client.start_query_execution.assert_called_once()
+
+    async def test_cache_miss(self):
+        await self._run("SELECT BotId FROM t")
+        await self._run("SELECT UserId FROM t")
+
+        self.assertEqual(self.client.start_query_execution.call_count, 2)
+
+    async def test_failed_query_is_not_cached(self):
+        self.client.get_query_execution.return_value = {
+            "QueryExecution": {
+                "Status": {"State": "FAILED", "StateChangeReason": "syntax error"}
+            }
+        }
+        with self.assertRaises(Exception):
+            await self._run("SELECT")
+
+        self.client.get_query_execution.return_value = {
+            "QueryExecution": {"Status": {"State": "SUCCEEDED"}}
+        }
+        await self._run("SELECT")
+        self.assertEqual(self.client.start_query_execution.call_count, 2)
+
+    async def test_polls_until_completed(self):
+        self.client.get_query_execution.side_effect = [
+            {"QueryExecution": {"Status": {"State": "RUNNING"}}},
+            {"QueryExecution": {"Status": {"State": "SUCCEEDED"}}},
+        ]
+        with patch(
+            "app.repositories.usage_analysis.asyncio.sleep", new=AsyncMock()
+        ) as mock_sleep:
+            await self._run("SELECT 1")
+
+        mock_sleep.assert_awaited_once()
+        self.assertEqual(self.client.get_query_execution.call_count, 2)
+
+    async def test_results_are_paginated(self):
+        self.client.get_query_results.side_effect = [
+            {"ResultSet": {"Rows": [{"Data": []}]}, "NextToken": "token"},
+            {"ResultSet": {"Rows": [{"Data": []}, {"Data": []}]}},
+        ]
+        rows = await self._run("SELECT 1")
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            self.client.get_query_results.call_args.kwargs["NextToken"], "token"
+        )
+
+
+class TestUsageRollup(unittest.IsolatedAsyncioTestCase):
+    async def test_rollup_is_queried_per_day(self):
+        items_by_day = {
+            "BOT#2024/01/01": [
+                {"Id": "bot1", "TotalPrice": Decimal("1.5")},
+                {"Id": "bot2", "TotalPrice": Decimal("0.25")},
+            ],
+            "BOT#2024/01/02": [{"Id": "bot2", "TotalPrice": Decimal("3")}],
+            "BOT#2024/01/03": [{"Id": "bot3", "TotalPrice": Decimal("0.1")}],
+        }
+        with patch(
+            "app.repositories.usage_analysis._query_rollup_day",
+            side_effect=lambda pk, lower_hour, upper_hour: items_by_day[pk],
+        ) as mock_query:
+            prices = await _find_rollup_sorted_by_price(
+                "BOT", "2024/01/01/22", "2024/01/03/01", limit=2
+            )
+
+        self.assertCountEqual(
+            [call.args for call in mock_query.call_args_list],
+            [
+                ("BOT#2024/01/01", "22", "23"),
+                ("BOT#2024/01/02", "00", "23"),
+                ("BOT#2024/01/03", "00", "01"),
+            ],
+        )
+        # Summed across days, sorted by price and limited
+        self.assertEqual(prices, [("bot2", 3.25), ("bot1", 1.5)])
+
+    async def test_rollup_within_a_day(self):
+        with patch(
+            "app.repositories.usage_analysis._query_rollup_day", return_value=[]
+        ) as mock_query:
+            prices = await _find_rollup_sorted_by_price(
+                "USER", "2024/01/01/03", "2024/01/01/05", limit=10
+            )
+
+        mock_query.assert_called_once_with("USER#2024/01/01", "03", "05")
+        self.assertEqual(prices, [])
+
+    def test_query_rollup_day_paginates(self):
+        pages = [
+            {
+                "Items": [{"Id": {"S": "bot1"}, "TotalPrice": {"N": "1.5"}}],
+                "LastEvaluatedKey": {"PK": {"S": "p"}, "SK": {"S": "s"}},
+            },
+            {"Items": [{"Id": {"S": "bot2"}, "TotalPrice": {"N": "2"}}]},
+        ]
+        exclusive_start_keys = []
+
+        def query(**kwargs):
+            exclusive_start_keys.append(kwargs.get("ExclusiveStartKey"))
+            return pages[len(exclusive_start_keys) - 1]
+
+        client = MagicMock()
+        client.query.side_effect = query
+        with patch(
+            "app.repositories.usage_analysis._get_dynamodb_client",
+            return_value=client,
+        ):
+            items = _query_rollup_day("BOT#2024/01/01", "00", "23")
+
+        self.assertEqual(
+            items,
+            [
+                {"Id": "bot1", "TotalPrice": Decimal("1.5")},
+                {"Id": "bot2", "TotalPrice": Decimal("2")},
+            ],
+        )
+        self.assertEqual(
+            exclusive_start_keys, [None, {"PK": {"S": "p"}, "SK": {"S": "s"}}]
+        )
+        self.assertEqual(
+            client.query.call_args.kwargs["ExpressionAttributeValues"],
+            {
+                ":pk": {"S": "BOT#2024/01/01"},
+                ":lower": {"S": "00#"},
+                ":upper": {"S": "23#\uffff"},
+            },
+        )
+
+    async def test_bots_from_rollup(self):
+        bot = SimpleNamespace(
+            title="Bot 1",
+            description="",
+            published_api_stack_name=None,
+            published_api_datetime=None,
+            owner_user_id="user1",
+            shared_scope="private",
+            shared_status="unshared",
+        )
+        with (
+            patch("app.repositories.usage_analysis.USAGE_ROLLUP_TABLE_NAME", "rollup"),
+            patch(
+                "app.repositories.usage_analysis._find_rollup_sorted_by_price",
+                new=AsyncMock(return_value=[("bot1", 2.0), ("deleted-bot", 1.0)]),
+            ) as mock_rollup,
+            patch(
+                "app.repositories.usage_analysis._find_bot_prices_by_athena",
+                new=AsyncMock(),
+            ) as mock_athena,
+            patch(
+                "app.repositories.usage_analysis._find_bots_by_ids",
+                new=AsyncMock(return_value={"bot1": bot}),
+            ),
+        ):
+            bots = await find_bots_sorted_by_price(
+                limit=10, from_="2024010100", to_="2024010123"
+            )
+
+        mock_rollup.assert_awaited_once_with(
+            "BOT", "2024/01/01/00", "2024/01/01/23", 10
+        )
+        mock_athena.assert_not_awaited()
+        # Bots which no longer exist are skipped
+        self.assertEqual([(bot.id, bot.total_price) for bot in bots], [("bot1", 2.0)])
+
+    async def test_bots_fallback_to_athena(self):
+        with (
+            patch("app.repositories.usage_analysis.USAGE_ROLLUP_TABLE_NAME", ""),
+            patch(
+                "app.repositories.usage_analysis._find_rollup_sorted_by_price",
+                new=AsyncMock(),
+            ) as mock_rollup,
+            patch(
+                "app.repositories.usage_analysis._find_bot_prices_by_athena",
+                new=AsyncMock(return_value=[]),
+            ) as mock_athena,
+            patch(
+                "app.repositories.usage_analysis._find_bots_by_ids",
+                new=AsyncMock(return_value={}),
+            ),
+        ):
+            bots = await find_bots_sorted_by_price(
+                limit=10, from_="2024010100", to_="2024010123"
+            )
+
+        mock_athena.assert_awaited_once_with("2024/01/01/00", "2024/01/01/23", 10)
+        mock_rollup.assert_not_awaited()
+        self.assertEqual(bots, [])
+
+    async def test_users_fallback_to_athena(self):
+        with (
+            patch("app.repositories.usage_analysis.USAGE_ROLLUP_TABLE_NAME", ""),
+            patch(
+                "app.repositories.usage_analysis._find_rollup_sorted_by_price",
+                new=AsyncMock(),
+            ) as mock_rollup,
+            patch(
+                "app.repositories.usage_analysis._find_user_prices_by_athena",
+                new=AsyncMock(return_value=[("user1", 1.0)]),
+            ) as mock_athena,
+            patch(
+                "app.repositories.usage_analysis._find_cognito_users_by_ids",
+                new=AsyncMock(return_value=[{"id": "user1", "email": "a@example.com"}]),
+            ),
+        ):
+            users = await find_users_sorted_by_price(
+                limit=10, from_="2024010100", to_="2024010123"
+            )
+
+        mock_athena.assert_awaited_once_with("2024/01/01/00", "2024/01/01/23", 10)
+        mock_rollup.assert_not_awaited()
+        self.assertEqual([user.email for user in users], ["a@example.com"])
+
+
 class TestCognitoUser(unittest.IsolatedAsyncioTestCase):
     async def test_find_cognito_user_by_id(self):
         user = _find_cognito_user_by_id("07645ad8-b041-702e-9852-98b169c9f1b1")
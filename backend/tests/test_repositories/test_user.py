@@ -4,8 +4,19 @@ import unittest
 sys.path.insert(0, ".")
 
 import time
-
-from app.repositories.user import find_group_by_name_prefix, find_users_by_email_prefix
+from unittest.mock import MagicMock, patch
+
+from app.repositories.user import (
+    USER_DIRECTORY_LOAD_THRESHOLD,
+    _user_cache,
+    _user_directory_cache,
+    find_group_by_name_prefix,
+    find_users_by_email_prefix,
+    find_users_by_ids,
+    load_user_directory,
+)
+from app.user import UserWithoutGroups
+from botocore.exceptions import ClientError
 from tests.test_usecases.utils.user_factory import (
     create_test_user,
     delete_cognito_group,
@@ -64,5 +75,142 @@ class TestUserGroupRepository(unittest.TestCase):
         self.assertEqual(groups[0].name, self.group_name)
 
 
+def _cognito_user(id: str, email: str | None = None) -> dict:
+    return {
+        "Username": id,
+        "Attributes": [{"Name": "email", "Value": email or f"{id}@example.com"}],
+    }
+
+
+class TestUserDirectory(unittest.TestCase):
+    def setUp(self):
+        _user_cache.clear()
+        _user_directory_cache.clear()
+        self.client = MagicMock()
+        patcher = patch(
+            "app.repositories.user._get_cognito_client", return_value=self.client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(_user_cache.clear)
+        self.addCleanup(_user_directory_cache.clear)
+
+    def test_load_user_directory(self):
+        self.client.list_users.side_effect = [
+            {
+                "Users": [_cognito_user("user1"), {"Username": "no-email"}],
+                "PaginationToken": "token",
+            },
+            {"Users": [_cognito_user("user2")]},
+        ]
+        users = load_user_directory()
+
+        self.assertEqual([user.id for user in users], ["user1", "user2"])
+        self.assertEqual(
+            self.client.list_users.call_args_list[1].kwargs["PaginationToken"],
+            "token",
+        )
+        self.assertEqual(_user_cache.get("user2").email, "user2@example.com")
+        self.assertEqual(len(_user_directory_cache.get("users")), 2)
+
+    def test_load_user_directory_max_pages(self):
+        self.client.list_users.return_value = {
+            "Users": [_cognito_user("user1")],
+            "PaginationToken": "token",
+        }
+        with patch("app.repositories.user.USER_DIRECTORY_MAX_PAGES", 3):
+            load_user_directory()
+
+        self.assertEqual(self.client.list_users.call_count, 3)
+        # Partial directory is not used for searching
+        self.assertIsNone(_user_directory_cache.get("users"))
+        self.assertIsNotNone(_user_cache.get("user1"))
+
+    def test_find_users_by_ids_from_cache(self):
+        _user_cache.set(
+            "user1", UserWithoutGroups.from_cognito_idp_response(_cognito_user("user1"))
+        )
+        users = find_users_by_ids(["user1", "user1"])
+
+        self.assertEqual(list(users), ["user1"])
+        self.client.admin_get_user.assert_not_called()
+        self.client.list_users.assert_not_called()
+
+    def test_find_users_by_ids_get_user(self):
+        def admin_get_user(UserPoolId, Username):
+            if Username == "deleted":
+                raise ClientError(
+                    {"Error": {"Code": "UserNotFoundException", "Message": ""}},
+                    "AdminGetUser",
+                )
+            return {
+                "Username": Username,
+                "UserAttributes": [
+                    {"Name": "email", "Value": f"{Username}@example.com"}
+                ],
+            }
+
+        self.client.admin_get_user.side_effect = admin_get_user
+        users = find_users_by_ids(["user1", "deleted", "user2"])
+
+        self.assertEqual(sorted(users), ["user1", "user2"])
+        self.client.list_users.assert_not_called()
+
+    def test_find_users_by_ids_loads_directory(self):
+        ids = [f"user{i}" for i in range(USER_DIRECTORY_LOAD_THRESHOLD + 1)]
+        self.client.list_users.return_value = {
+            "Users": [_cognito_user(id) for id in ids[:-1]]
+        }
+        self.client.admin_get_user.return_value = {
+            "Username": ids[-1],
+            "UserAttributes": [{"Name": "email", "Value": "last@example.com"}],
+        }
+        users = find_users_by_ids(ids)
+
+        self.assertEqual(len(users), len(ids))
+        self.client.list_users.assert_called_once()
+        # Only the user missing from the directory is fetched one by one
+        self.client.admin_get_user.assert_called_once_with(
+            UserPoolId=unittest.mock.ANY, Username=ids[-1]
+        )
+
+    def test_find_users_by_email_prefix_from_directory(self):
+        _user_directory_cache.set(
+            "users",
+            [
+                UserWithoutGroups.from_cognito_idp_response(
+                    _cognito_user("user1", "Alice@example.com")
+                ),
+                UserWithoutGroups.from_cognito_idp_response(
+                    _cognito_user("user2", "bob@example.com")
+                ),
+            ],
+        )
+        users = find_users_by_email_prefix("alice")
+
+        self.assertEqual([user.id for user in users], ["user1"])
+        self.client.list_users.assert_not_called()
+
+    def test_find_users_by_email_prefix_falls_back_to_cognito(self):
+        # The directory snapshot does not have a user added after it was loaded.
+        _user_directory_cache.set(
+            "users",
+            [
+                UserWithoutGroups.from_cognito_idp_response(
+                    _cognito_user("user1", "alice@example.com")
+                )
+            ],
+        )
+        self.client.list_users.return_value = {
+            "Users": [_cognito_user("user3", "carol@example.com")]
+        }
+        users = find_users_by_email_prefix("carol")
+
+        self.assertEqual([user.id for user in users], ["user3"])
+        self.assertEqual(
+            self.client.list_users.call_args.kwargs["Filter"], 'email ^= "carol"'
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,152 @@
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(".")
+
+from app.main import app
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+
+# Uploads go to the upload temp directory of the bot, see `compose_upload_temp_s3_path`
+UPLOAD_KEY = "test_user/bot1/_temp/large.pdf"
+
+
+class TestBotMultipartUpload(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app, raise_server_exceptions=False)
+
+        self.s3_client = MagicMock()
+        self.s3_client.create_multipart_upload.return_value = {"UploadId": "upload1"}
+        self.s3_client.generate_presigned_url.side_effect = (
+            lambda ClientMethod, Params, ExpiresIn, HttpMethod: (
+                f"https://s3/{Params['Key']}?partNumber={Params['PartNumber']}"
+                f"&uploadId={Params['UploadId']}"
+            )
+        )
+        for target, kwargs in [
+            ("app.utils._get_presign_s3_client", {"return_value": self.s3_client}),
+            ("app.usecases.bot.DOCUMENT_BUCKET", {"new": "documents"}),
+        ]:
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_create(self):
+        response = self.client.post(
+            "/bot/bot1/multipart-upload",
+            json={
+                "filename": "large.pdf",
+                "contentType": "application/pdf",
+                "partCount": 3,
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["uploadId"], "upload1")
+        self.assertEqual(
+            body["partUrls"],
+            [
+                f"https://s3/{UPLOAD_KEY}?partNumber={part_number}&uploadId=upload1"
+                for part_number in [1, 2, 3]
+            ],
+        )
+        self.s3_client.create_multipart_upload.assert_called_once_with(
+            Bucket="documents", Key=UPLOAD_KEY, ContentType="application/pdf"
+        )
+        for call in self.s3_client.generate_presigned_url.call_args_list:
+            self.assertEqual(call.kwargs["ClientMethod"], "upload_part")
+            self.assertEqual(call.kwargs["HttpMethod"], "PUT")
+
+    def test_create_with_invalid_part_count(self):
+        for part_count in [0, 10001]:
+            with self.subTest(part_count=part_count):
+                response = self.client.post(
+                    "/bot/bot1/multipart-upload",
+                    json={
+                        "filename": "large.pdf",
+                        "contentType": "application/pdf",
+                        "partCount": part_count,
+                    },
+                )
+                self.assertEqual(response.status_code, 422)
+
+        self.s3_client.create_multipart_upload.assert_not_called()
+
+    def test_complete(self):
+        response = self.client.post(
+            "/bot/bot1/multipart-upload/complete",
+            json={
+                "filename": "large.pdf",
+                "uploadId": "upload1",
+                # Parts uploaded in parallel are reported in completion order
+                "parts": [
+                    {"partNumber": 2, "etag": '"etag2"'},
+                    {"partNumber": 1, "etag": '"etag1"'},
+                ],
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.s3_client.complete_multipart_upload.assert_called_once_with(
+            Bucket="documents",
+            Key=UPLOAD_KEY,
+            UploadId="upload1",
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": 1, "ETag": '"etag1"'},
+                    {"PartNumber": 2, "ETag": '"etag2"'},
+                ]
+            },
+        )
+
+    def test_complete_with_invalid_part_number(self):
+        response = self.client.post(
+            "/bot/bot1/multipart-upload/complete",
+            json={
+                "filename": "large.pdf",
+                "uploadId": "upload1",
+                "parts": [{"partNumber": 0, "etag": '"etag0"'}],
+            },
+        )
+
+        self.assertEqual(response.status_code, 422)
+        self.s3_client.complete_multipart_upload.assert_not_called()
+
+    def test_abort(self):
+        response = self.client.delete(
+            "/bot/bot1/multipart-upload",
+            params={"filename": "large.pdf", "uploadId": "upload1"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.s3_client.abort_multipart_upload.assert_called_once_with(
+            Bucket="documents", Key=UPLOAD_KEY, UploadId="upload1"
+        )
+
+    def test_abort_completed_upload(self):
+        self.s3_client.abort_multipart_upload.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchUpload"}}, "AbortMultipartUpload"
+        )
+        response = self.client.delete(
+            "/bot/bot1/multipart-upload",
+            params={"filename": "large.pdf", "uploadId": "upload1"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_abort_error(self):
+        self.s3_client.abort_multipart_upload.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied"}}, "AbortMultipartUpload"
+        )
+        response = self.client.delete(
+            "/bot/bot1/multipart-upload",
+            params={"filename": "large.pdf", "uploadId": "upload1"},
+        )
+
+        self.assertEqual(response.status_code, 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
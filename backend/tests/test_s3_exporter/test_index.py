@@ -0,0 +1,298 @@
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import unittest
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+sys.path.insert(0, ".")
+
+os.environ.setdefault("TABLE_ARN", "arn:aws:dynamodb:us-east-1:123456789012:table/test")
+os.environ.setdefault("BUCKET_NAME", "usage-analysis")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from app.repositories import usage_analysis
+from s3_exporter import index
+
+MODULE = "s3_exporter.index"
+
+# Records of the incremental exports, one per conversation changed in the hour:
+# (datehour, user_id, conversation_id, bot_id, old TotalPrice, new TotalPrice).
+# New TotalPrice of None means the conversation was deleted in the hour.
+EXPORT_RECORDS = [
+    # Created in the first hour of the period and updated twice
+    ("2024/01/01/00", "user1", "conv1", "bot1", None, 1.0),
+    ("2024/01/01/01", "user1", "conv1", "bot1", 1.0, 1.5),
+    ("2024/01/01/02", "user1", "conv1", "bot1", 1.5, 2.5),
+    # Created before the period, so only the increase counts
+    ("2024/01/01/01", "user2", "conv2", "bot1", 5.0, 6.0),
+    ("2024/01/01/02", "user1", "conv3", "bot2", None, 0.5),
+    # Conversation without bot
+    ("2024/01/01/02", "user2", "conv4", None, None, 0.25),
+    # Deleted conversation
+    ("2024/01/01/01", "user1", "conv5", "bot2", 3.0, None),
+    # Outside of the period
+    ("2024/01/01/03", "user1", "conv1", "bot1", 2.5, 4.0),
+]
+
+
+class _ExportTable:
+    """Runs the Athena queries on the raw export against sqlite.
+    Nested columns such as `newimage.TotalPrice.N` are flattened to `newimage_TotalPrice_N`.
+    """
+
+    def __init__(self, records):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.create_function("CONCAT", 2, lambda a, b: f"{a}{b}")
+        self.connection.execute(
+            "CREATE TABLE ddb_export (datehour, Keys_PK_S, Keys_SK_S,"
+            " newimage_PK_S, newimage_SK_S, newimage_BotId_S,"
+            " newimage_TotalPrice_N, oldimage_TotalPrice_N)"
+        )
+        for datehour, user_id, conversation_id, bot_id, old, new in records:
+            sk = f"{user_id}#CONV#{conversation_id}"
+            deleted = new is None
+            self.connection.execute(
+                "INSERT INTO ddb_export VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    datehour,
+                    user_id,
+                    sk,
+                    None if deleted else user_id,
+                    None if deleted else sk,
+                    None if deleted else bot_id,
+                    new,
+                    old,
+                ),
+            )
+
+    def query(self, query: str) -> list[list[str | None]]:
+        query = query.replace("usage.ddb_export", "ddb_export")
+        query = re.sub(r"\b(Keys|newimage|oldimage)\.(\w+)\.(\w+)", r"\1_\2_\3", query)
+        return [
+            [None if value is None else str(value) for value in row]
+            for row in self.connection.execute(query).fetchall()
+        ]
+
+
+def _rollup_table(items: list[dict]) -> MagicMock:
+    table = MagicMock()
+    batch = table.batch_writer.return_value.__enter__.return_value
+    batch.put_item.side_effect = lambda Item: items.append(Item)
+    return table
+
+
+class _ExporterTestCase(unittest.TestCase):
+    def patch(self, name: str, **kwargs) -> MagicMock:
+        patcher = patch(f"{MODULE}.{name}", **kwargs)
+        mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mock
+
+    def setUp(self):
+        self.export = _ExportTable(EXPORT_RECORDS)
+        self.rollup_items: list[dict] = []
+        self.patch("USAGE_ANALYSIS_DATABASE", new="usage")
+        self.patch("USAGE_ANALYSIS_TABLE", new="ddb_export")
+        self.patch("rollup_table", new=_rollup_table(self.rollup_items))
+        self.run_athena_query = self.patch(
+            "run_athena_query", side_effect=self.export.query
+        )
+
+
+class TestRollupHour(_ExporterTestCase):
+    def test_cost_of_the_hour(self):
+        index.rollup_hour(datetime(2024, 1, 1, 1))
+
+        self.assertIn(
+            "datehour = '2024/01/01/01'", self.run_athena_query.call_args.args[0]
+        )
+        self.assertCountEqual(
+            [
+                (item["PK"], item["SK"], item["TotalPrice"])
+                for item in self.rollup_items
+            ],
+            [
+                ("BOT#2024/01/01", "01#bot1", Decimal("1.5")),
+                ("USER#2024/01/01", "01#user1", Decimal("0.5")),
+                ("USER#2024/01/01", "01#user2", Decimal("1.0")),
+            ],
+        )
+
+    def test_conversation_without_bot_counts_for_user(self):
+        index.rollup_hour(datetime(2024, 1, 1, 2))
+
+        prices = {item["SK"]: item["TotalPrice"] for item in self.rollup_items}
+        self.assertEqual(
+            prices,
+            {
+                "02#bot1": Decimal("1.0"),
+                "02#bot2": Decimal("0.5"),
+                "02#user1": Decimal("1.5"),
+                "02#user2": Decimal("0.25"),
+            },
+        )
+
+    def test_items_expire(self):
+        index.rollup_hour(datetime(2024, 1, 1, 0))
+
+        expire_time = int(datetime(2025, 2, 4, 0).timestamp())
+        self.assertEqual(
+            self.rollup_items,
+            [
+                {
+                    "PK": "BOT#2024/01/01",
+                    "SK": "00#bot1",
+                    "Id": "bot1",
+                    "TotalPrice": Decimal("1.0"),
+                    "ExpireTime": expire_time,
+                },
+                {
+                    "PK": "USER#2024/01/01",
+                    "SK": "00#user1",
+                    "Id": "user1",
+                    "TotalPrice": Decimal("1.0"),
+                    "ExpireTime": expire_time,
+                },
+            ],
+        )
+
+    def test_empty_hour(self):
+        index.rollup_hour(datetime(2024, 1, 2, 0))
+
+        self.assertEqual(self.rollup_items, [])
+
+
+class TestHandler(unittest.TestCase):
+    def setUp(self):
+        patchers = {
+            "client": patch(f"{MODULE}.client"),
+            "rollup_hour": patch(f"{MODULE}.rollup_hour"),
+            "rollup_table": patch(f"{MODULE}.rollup_table"),
+        }
+        self.mocks = {name: patcher.start() for name, patcher in patchers.items()}
+        self.addCleanup(patch.stopall)
+
+    def test_exports_last_hour_and_rolls_up_previous_exports(self):
+        index.handler({"time": "2024-01-01T13:05:00Z"}, None)
+
+        export = self.mocks["client"].export_table_to_point_in_time.call_args.kwargs
+        self.assertEqual(export["S3Prefix"], "2024/01/01/13")
+        self.assertEqual(
+            export["IncrementalExportSpecification"]["ExportFromTime"],
+            datetime(2024, 1, 1, 12),
+        )
+        self.assertEqual(
+            export["IncrementalExportSpecification"]["ExportToTime"],
+            datetime(2024, 1, 1, 13),
+        )
+        self.assertListEqual(
+            self.mocks["rollup_hour"].call_args_list,
+            [
+                call(datetime(2024, 1, 1, 12)),
+                call(datetime(2024, 1, 1, 11)),
+                call(datetime(2024, 1, 1, 10)),
+            ],
+        )
+
+    def test_no_rollup_without_table(self):
+        with patch(f"{MODULE}.rollup_table", new=None):
+            index.handler({"time": "2024-01-01T13:05:00Z"}, None)
+
+        self.mocks["client"].export_table_to_point_in_time.assert_called_once()
+        self.mocks["rollup_hour"].assert_not_called()
+
+    def test_backfill(self):
+        index.handler(
+            {"backfill_from": "2024010123", "backfill_to": "2024010201"}, None
+        )
+
+        self.mocks["client"].export_table_to_point_in_time.assert_not_called()
+        self.assertListEqual(
+            self.mocks["rollup_hour"].call_args_list,
+            [
+                call(datetime(2024, 1, 1, 23)),
+                call(datetime(2024, 1, 2, 0)),
+                call(datetime(2024, 1, 2, 1)),
+            ],
+        )
+
+
+class TestRollupMatchesAthenaFallback(_ExporterTestCase):
+    """The admin usage analysis must not depend on whether the rollup table is configured."""
+
+    def setUp(self):
+        super().setUp()
+        for hour in range(4):
+            index.rollup_hour(datetime(2024, 1, 1, hour))
+
+        for name, value in [
+            ("USAGE_ANALYSIS_DATABASE", "usage"),
+            ("USAGE_ANALYSIS_TABLE", "ddb_export"),
+        ]:
+            patcher = patch.object(usage_analysis, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _query_rollup_day(self, pk: str, lower_hour: str, upper_hour: str):
+        return [
+            item
+            for item in self.rollup_items
+            if item["PK"] == pk
+            and f"{lower_hour}#" <= item["SK"] <= f"{upper_hour}#\uffff"
+        ]
+
+    async def _athena_query(self, query: str, *args) -> list[dict]:
+        rows = [["Id", "TotalPrice"], *self.export.query(query)]
+        return [
+            {
+                "Data": [
+                    {} if value is None else {"VarCharValue": value} for value in row
+                ]
+            }
+            for row in rows
+        ]
+
+    def _prices_from_rollup(self, dimension: str) -> list[tuple[str, float]]:
+        with patch.object(
+            usage_analysis, "_query_rollup_day", side_effect=self._query_rollup_day
+        ):
+            return asyncio.run(
+                usage_analysis._find_rollup_sorted_by_price(
+                    dimension, "2024/01/01/00", "2024/01/01/02", limit=10
+                )
+            )
+
+    def _prices_from_athena(self, find_prices) -> list[tuple[str, float]]:
+        with patch.object(
+            usage_analysis,
+            "run_athena_query",
+            new=AsyncMock(side_effect=self._athena_query),
+        ):
+            return asyncio.run(find_prices("2024/01/01/00", "2024/01/01/02", limit=10))
+
+    def test_bot_prices(self):
+        from_rollup = self._prices_from_rollup("BOT")
+        from_athena = self._prices_from_athena(
+            usage_analysis._find_bot_prices_by_athena
+        )
+
+        self.assertEqual(from_rollup, [("bot1", 3.5), ("bot2", 0.5)])
+        self.assertEqual(from_athena, from_rollup)
+
+    def test_user_prices(self):
+        from_rollup = self._prices_from_rollup("USER")
+        from_athena = self._prices_from_athena(
+            usage_analysis._find_user_prices_by_athena
+        )
+
+        self.assertEqual(from_rollup, [("user1", 3.0), ("user2", 1.25)])
+        self.assertEqual(from_athena, from_rollup)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(".")
+
+from app import s3_utils
+
+
+class TestS3Utils(unittest.TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        patcher = patch.object(
+            s3_utils, "_get_s3_client", autospec=True, return_value=self.client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_list_keys_paginates(self):
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": f"prefix/{i}"} for i in range(1000)]},
+            {"Contents": [{"Key": "prefix/1000"}]},
+        ]
+
+        keys = s3_utils.list_keys("bucket", "prefix/")
+        self.assertEqual(len(keys), 1001)
+        self.assertEqual(keys[-1], "prefix/1000")
+
+    def test_delete_objects_in_batches(self):
+        self.client.delete_objects.return_value = {}
+
+        s3_utils.delete_objects("bucket", [f"key{i}" for i in range(2500)])
+        batch_sizes = sorted(
+            len(call.kwargs["Delete"]["Objects"])
+            for call in self.client.delete_objects.call_args_list
+        )
+        self.assertEqual(batch_sizes, [500, 1000, 1000])
+
+    def test_delete_objects_retries_failed_keys(self):
+        self.client.delete_objects.side_effect = [
+            {"Errors": [{"Key": "key1", "Code": "SlowDown"}]},
+            {},
+        ]
+
+        with patch.object(s3_utils, "DELETE_OBJECTS_RETRY_DELAY", 0):
+            s3_utils.delete_objects("bucket", ["key0", "key1"])
+
+        retried = self.client.delete_objects.call_args_list[1].kwargs["Delete"]
+        self.assertEqual(retried["Objects"], [{"Key": "key1"}])
+
+    def test_delete_objects_raises_on_persistent_errors(self):
+        self.client.delete_objects.return_value = {
+            "Errors": [{"Key": "key0", "Code": "AccessDenied"}]
+        }
+
+        with (
+            patch.object(s3_utils, "DELETE_OBJECTS_RETRY_DELAY", 0),
+            self.assertRaises(s3_utils.S3DeleteError) as context,
+        ):
+            s3_utils.delete_objects("bucket", ["key0"])
+
+        self.assertEqual(context.exception.errors[0]["Key"], "key0")
+        self.assertEqual(
+            self.client.delete_objects.call_count,
+            s3_utils.DELETE_OBJECTS_MAX_ATTEMPTS,
+        )
+
+    def test_move_objects_deletes_sources_after_copying(self):
+        self.client.delete_objects.return_value = {}
+
+        s3_utils.move_objects("bucket", [("tmp/a", "doc/a"), ("tmp/b", "doc/b")])
+        self.assertEqual(self.client.copy.call_count, 2)
+        self.assertEqual(
+            self.client.delete_objects.call_args.kwargs["Delete"]["Objects"],
+            [{"Key": "tmp/a"}, {"Key": "tmp/b"}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
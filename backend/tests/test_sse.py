@@ -0,0 +1,181 @@
+import sys
+import unittest
+
+sys.path.append(".")
+
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+from app.repositories.conversation import RecordNotFoundError
+from app.routes.schemas.conversation import ChatInput, MessageInput, TextContent
+from app.sse import ServerSentEventSender, stream_chat
+from app.stream_main import app
+from app.user import User
+from fastapi.testclient import TestClient
+
+USER = User(id="user1", name="user1", email="user1@example.com", groups=[])
+
+
+def _chat_input(bot_id: str | None = None) -> ChatInput:
+    return ChatInput(
+        conversation_id="conversation1",
+        message=MessageInput(
+            role="user",
+            content=[TextContent(content_type="text", body="Hello")],
+            model="claude-v3.7-sonnet",
+            parent_message_id=None,
+        ),
+        bot_id=bot_id,
+    )
+
+
+def _parse_frames(frames: list[str]) -> list[dict]:
+    return [
+        json.loads(frame.removeprefix("data: "))
+        for frame in frames
+        if frame.startswith("data: ")
+    ]
+
+
+class TestServerSentEventSender(unittest.TestCase):
+    def test_frames(self):
+        sender = ServerSentEventSender()
+        sender.on_stream("Hello")
+        sender.on_reasoning("Thinking")
+        sender.on_agent_thinking(
+            {"tool_use_id": "tool1", "name": "calculator", "input": {"x": 1}}
+        )
+        sender.finish()
+
+        frames = list(sender.iter_frames())
+
+        self.assertTrue(all(frame.endswith("\n\n") for frame in frames))
+        self.assertEqual(
+            _parse_frames(frames),
+            [
+                {"status": "STREAMING", "completion": "Hello"},
+                {"status": "REASONING", "completion": "Thinking"},
+                {
+                    "status": "AGENT_THINKING",
+                    "log": {"tool1": {"name": "calculator", "input": {"x": 1}}},
+                },
+            ],
+        )
+
+    def test_keep_alive(self):
+        sender = ServerSentEventSender()
+        with patch("app.sse.KEEP_ALIVE_INTERVAL", 0.01):
+            frames = sender.iter_frames()
+            self.assertEqual(next(frames), ": keep-alive\n\n")
+
+            sender.on_stream("Hello")
+            sender.finish()
+            self.assertEqual(
+                _parse_frames(list(frames)),
+                [{"status": "STREAMING", "completion": "Hello"}],
+            )
+
+
+class TestStreamChat(unittest.TestCase):
+    def test_chat_output_is_last_frame(self):
+        def chat(user, chat_input, on_stream, on_stop, **kwargs):
+            on_stream("Hello")
+            on_stop(
+                {
+                    "message": MagicMock(),
+                    "stop_reason": "end_turn",
+                    "input_token_count": 10,
+                    "output_token_count": 2,
+                    "cache_read_input_count": 0,
+                    "cache_write_input_count": 0,
+                    "price": 0.001,
+                }
+            )
+            return MagicMock(), MagicMock()
+
+        output = MagicMock()
+        output.model_dump.return_value = {"conversationId": "conversation1"}
+        with (
+            patch("app.sse.chat", side_effect=chat),
+            patch("app.sse.chat_output_from_message", return_value=output),
+        ):
+            events = _parse_frames(list(stream_chat(USER, _chat_input())))
+
+        self.assertEqual(
+            [event["status"] for event in events],
+            ["STREAMING", "STREAMING_END", "CHAT_OUTPUT"],
+        )
+        self.assertEqual(events[1]["token_count"]["input"], 10)
+        self.assertEqual(events[2]["output"], {"conversationId": "conversation1"})
+
+    def test_bot_not_found(self):
+        with patch("app.sse.chat", side_effect=RecordNotFoundError()):
+            events = _parse_frames(list(stream_chat(USER, _chat_input("bot1"))))
+
+        self.assertEqual(events, [{"status": "ERROR", "reason": "bot bot1 not found."}])
+
+    def test_error(self):
+        with patch("app.sse.chat", side_effect=Exception("boom")):
+            events = _parse_frames(list(stream_chat(USER, _chat_input())))
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["status"], "ERROR")
+
+
+@patch.dict(os.environ, {"AWS_EXECUTION_ENV": "AWS_Lambda_python3.13"})
+class TestStreamApp(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.body = _chat_input().model_dump(by_alias=True)
+
+    def test_unauthenticated(self):
+        response = self.client.post("/conversation/stream", json=self.body)
+        self.assertEqual(response.status_code, 401)
+
+    def test_invalid_token(self):
+        with patch("app.dependencies.verify_token", side_effect=IndexError()):
+            response = self.client.post(
+                "/conversation/stream",
+                json=self.body,
+                headers={"Authorization": "Bearer invalid"},
+            )
+        self.assertEqual(response.status_code, 403)
+
+    def test_other_routes_are_not_served(self):
+        self.assertEqual(
+            self.client.post("/conversation", json=self.body).status_code, 404
+        )
+        self.assertEqual(self.client.get("/bot/mine").status_code, 404)
+        self.assertEqual(self.client.get("/docs").status_code, 404)
+
+    def test_stream(self):
+        decoded = {
+            "sub": "user1",
+            "cognito:username": "user1",
+            "email": "user1@example.com",
+            "exp": 9999999999,
+        }
+        with (
+            patch("app.dependencies.verify_token", return_value=decoded),
+            patch(
+                "app.routes.conversation_stream.stream_chat",
+                return_value=iter(["data: {}\n\n"]),
+            ) as mock_stream_chat,
+        ):
+            response = self.client.post(
+                "/conversation/stream",
+                json=self.body,
+                headers={"Authorization": "Bearer valid"},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.headers["content-type"].startswith("text/event-stream")
+        )
+        self.assertEqual(response.text, "data: {}\n\n")
+        self.assertEqual(mock_stream_chat.call_args.kwargs["user"].id, "user1")
+
+
+if __name__ == "__main__":
+    unittest.main()
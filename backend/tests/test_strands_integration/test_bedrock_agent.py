@@ -3,6 +3,7 @@ import logging
 import sys
 import time
 import uuid
+from unittest.mock import MagicMock, patch
 
 import boto3
 
@@ -19,7 +20,10 @@ from app.repositories.models.custom_bot import (
     ReasoningParamsModel,
     UsageStatsModel,
 )
-from app.strands_integration.tools.bedrock_agent import create_bedrock_agent_tool
+from app.strands_integration.tools.bedrock_agent import (
+    _invoke_bedrock_agent_standalone,
+    create_bedrock_agent_tool,
+)
 
 sys.path.append("tests")
 from app.utils import get_bedrock_agent_client
@@ -307,5 +311,59 @@ class TestBedrockAgentTool(unittest.TestCase):
         )
 
 
+class TestInvokeBedrockAgentStreaming(unittest.TestCase):
+    def test_results_are_passed_as_received(self):
+        trace = {
+            "trace": {
+                "orchestrationTrace": {
+                    "modelInvocationOutput": {
+                        "rawResponse": {
+                            "content": json.dumps(
+                                {
+                                    "content": [
+                                        {
+                                            "type": "text",
+                                            "text": "<thinking>...</thinking>",
+                                        }
+                                    ]
+                                }
+                            )
+                        }
+                    }
+                }
+            }
+        }
+        received = []
+
+        def completion():
+            yield {"trace": trace}
+            # The trace step is passed before the rest of the stream is read
+            self.assertEqual(len(received), 1)
+            yield {"chunk": {"bytes": b"4"}}
+
+        runtime_client = MagicMock()
+        runtime_client.invoke_agent.return_value = {"completion": completion()}
+        with patch(
+            "app.utils.get_bedrock_agent_runtime_client", return_value=runtime_client
+        ):
+            results = _invoke_bedrock_agent_standalone(
+                agent_id="agent",
+                alias_id="alias",
+                input_text="What is 2 + 2?",
+                session_id="conversation",
+                on_result=received.append,
+            )
+
+        self.assertEqual(
+            [result["source_name"] for result in received],
+            ["[Trace] Agent Thinking(agent)", "Agent Final Result(agent)"],
+        )
+        # Chunks come first in the final result
+        self.assertEqual(results, received[::-1])
+        self.assertEqual(
+            runtime_client.invoke_agent.call_args.kwargs["sessionId"], "conversation"
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
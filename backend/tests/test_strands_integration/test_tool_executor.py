@@ -0,0 +1,177 @@
+import inspect
+import sys
+import threading
+import time
+import unittest
+from typing import Any, AsyncGenerator
+
+sys.path.append(".")
+
+from app.strands_integration.agent.tool_executor import OrderedConcurrentToolExecutor
+from strands import Agent, tool
+from strands.models import Model
+from strands.tools.executors import ConcurrentToolExecutor
+
+
+class _ToolUseModel(Model):
+    """Model requesting the given tools in a single response, then ending the turn."""
+
+    def __init__(self, tool_names: list[str]):
+        self.tool_names = tool_names
+
+    def update_config(self, **model_config: Any):
+        pass
+
+    def get_config(self) -> Any:
+        return {}
+
+    async def structured_output(self, *args: Any, **kwargs: Any):
+        raise NotImplementedError()
+        yield
+
+    async def stream(self, messages: list, *args: Any, **kwargs: Any) -> AsyncGenerator:
+        yield {"messageStart": {"role": "assistant"}}
+        if (
+            messages[-1]["role"] == "user"
+            and "toolResult" in messages[-1]["content"][0]
+        ):
+            yield {"contentBlockDelta": {"delta": {"text": "done"}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            return
+
+        for i, name in enumerate(self.tool_names):
+            yield {
+                "contentBlockStart": {
+                    "start": {"toolUse": {"toolUseId": f"tool{i}", "name": name}}
+                }
+            }
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": "{}"}}}}
+            yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "tool_use"}}
+
+
+class _Concurrency:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def run(self, seconds: float):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(seconds)
+        with self.lock:
+            self.running -= 1
+
+
+class TestOrderedConcurrentToolExecutor(unittest.TestCase):
+    def setUp(self):
+        concurrency = self.concurrency = _Concurrency()
+
+        @tool
+        def slow() -> str:
+            """Finish last."""
+            concurrency.run(0.3)
+            return "slow"
+
+        @tool
+        def medium() -> str:
+            """Finish second."""
+            concurrency.run(0.15)
+            return "medium"
+
+        @tool
+        def fast() -> str:
+            """Finish first."""
+            concurrency.run(0.01)
+            return "fast"
+
+        @tool
+        def failing() -> str:
+            """Fail."""
+            concurrency.run(0.05)
+            raise RuntimeError("boom")
+
+        self.tools = [slow, medium, fast, failing]
+
+    def _run(self, tool_names: list[str], max_concurrency: int) -> list[dict]:
+        agent = Agent(
+            model=_ToolUseModel(tool_names),
+            tools=self.tools,
+            tool_executor=OrderedConcurrentToolExecutor(max_concurrency),
+            callback_handler=None,
+        )
+        agent("Run the tools")
+
+        tool_result_message = agent.messages[2]
+        self.assertEqual(tool_result_message["role"], "user")
+        return [content["toolResult"] for content in tool_result_message["content"]]
+
+    def test_results_in_tool_use_order(self):
+        started_at = time.monotonic()
+        results = self._run(["slow", "medium", "fast"], max_concurrency=4)
+        elapsed = time.monotonic() - started_at
+
+        self.assertEqual(
+            [result["toolUseId"] for result in results], ["tool0", "tool1", "tool2"]
+        )
+        self.assertEqual(
+            [result["content"][0]["text"] for result in results],
+            ["slow", "medium", "fast"],
+        )
+        self.assertEqual(self.concurrency.max_running, 3)
+        # Bounded by the slowest tool, not the sum of them
+        self.assertLess(elapsed, 0.45)
+
+    def test_max_concurrency(self):
+        results = self._run(["slow", "medium", "fast"], max_concurrency=2)
+
+        self.assertEqual(
+            [result["toolUseId"] for result in results], ["tool0", "tool1", "tool2"]
+        )
+        self.assertEqual(self.concurrency.max_running, 2)
+
+    def test_next_tool_starts_when_any_completes(self):
+        started_at = time.monotonic()
+        results = self._run(["slow", "fast", "medium"], max_concurrency=2)
+        elapsed = time.monotonic() - started_at
+
+        self.assertEqual(
+            [result["toolUseId"] for result in results], ["tool0", "tool1", "tool2"]
+        )
+        self.assertEqual(self.concurrency.max_running, 2)
+        # "medium" runs while "slow" is running, instead of after the first two tools
+        self.assertLess(elapsed, 0.4)
+
+    def test_failing_tool_does_not_drop_others(self):
+        results = self._run(["slow", "failing", "fast"], max_concurrency=4)
+
+        self.assertEqual(
+            [(result["toolUseId"], result["status"]) for result in results],
+            [("tool0", "success"), ("tool1", "error"), ("tool2", "success")],
+        )
+        self.assertIn("boom", results[1]["content"][0]["text"])
+
+
+class TestConcurrentToolExecutorInterface(unittest.TestCase):
+    """`OrderedConcurrentToolExecutor` overrides private methods of strands."""
+
+    def test_execute_signature(self):
+        self.assertTrue(inspect.isasyncgenfunction(ConcurrentToolExecutor._execute))
+        self.assertEqual(
+            list(inspect.signature(ConcurrentToolExecutor._execute).parameters)[:4],
+            ["self", "agent", "tool_uses", "tool_results"],
+        )
+
+    def test_task_signature(self):
+        self.assertTrue(inspect.iscoroutinefunction(ConcurrentToolExecutor._task))
+        self.assertEqual(
+            list(inspect.signature(ConcurrentToolExecutor._task).parameters)[:3],
+            ["self", "agent", "tool_use"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
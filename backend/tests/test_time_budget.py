@@ -0,0 +1,93 @@
+import contextvars
+import io
+import json
+import sys
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+
+sys.path.append(".")
+
+from app.time_budget import TimeBudget, TimeBudgetExceededError
+
+
+class TestTimeBudget(unittest.TestCase):
+    def test_run_within_budget(self):
+        budget = TimeBudget(seconds=10)
+        self.assertEqual(budget.run("tool", lambda: 42), 42)
+        self.assertIn("tool", budget.usage)
+        self.assertEqual(budget.timeouts, {})
+
+    def test_stop_waiting_on_overrun(self):
+        budget = TimeBudget(seconds=0.05)
+        release = threading.Event()
+
+        start = time.monotonic()
+        with self.assertRaises(TimeBudgetExceededError) as context:
+            budget.run("slow_tool", release.wait)
+
+        release.set()
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(context.exception.name, "slow_tool")
+        self.assertEqual(budget.timeouts, {"slow_tool": 1})
+
+        # The rest of the turn has no budget left
+        with self.assertRaises(TimeBudgetExceededError):
+            budget.run("tool", lambda: 42)
+
+    def test_propagate_exception(self):
+        budget = TimeBudget(seconds=10)
+
+        def function():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            budget.run("tool", function)
+
+        self.assertEqual(budget.timeouts, {})
+
+    def test_run_in_caller_context(self):
+        request_id = contextvars.ContextVar("request_id", default=None)
+        request_id.set("request1")
+        budget = TimeBudget(seconds=10)
+
+        self.assertEqual(budget.run("tool", request_id.get), "request1")
+
+
+class TestEmitMetrics(unittest.TestCase):
+    def _emit(self, bot_id: str | None) -> list[dict]:
+        budget = TimeBudget(seconds=10)
+        budget.run("tool", lambda: None)
+
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            budget.emit_metrics(bot_id=bot_id)
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_bot_is_property_not_dimension(self):
+        (record,) = self._emit("bot1")
+
+        self.assertEqual(
+            record["_aws"]["CloudWatchMetrics"][0]["Dimensions"], [["Tool"]]
+        )
+        self.assertEqual(record["Tool"], "tool")
+        self.assertEqual(record["BotId"], "bot1")
+
+    def test_dimensions_without_bot(self):
+        (record,) = self._emit(None)
+
+        self.assertEqual(
+            record["_aws"]["CloudWatchMetrics"][0]["Dimensions"], [["Tool"]]
+        )
+        self.assertNotIn("BotId", record)
+
+    def test_no_usage(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            TimeBudget(seconds=10).emit_metrics(bot_id="bot1")
+        self.assertEqual(stdout.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
 import os
 import sys
+import threading
+import time
+from unittest.mock import patch
 
 from ulid import ULID
 
@@ -11,7 +14,7 @@ import unittest
 from pprint import pprint
 
 import boto3
-from app.agents.tools.agent_tool import ToolRunResult
+from app.agents.tools.agent_tool import AgentTool, ToolRunResult
 from app.prompt import build_rag_prompt
 from app.repositories.conversation import (
     delete_conversation_by_id,
@@ -30,6 +33,9 @@ from app.repositories.models.conversation import (
     ConversationModel,
     MessageModel,
     TextContentModel,
+    ToolResultContentModel,
+    ToolUseContentModel,
+    ToolUseContentModelBody,
 )
 from app.repositories.models.custom_bot import BotAliasModel
 from app.repositories.models.custom_bot_guardrails import BedrockGuardrailsModel
@@ -45,11 +51,13 @@ from app.stream import OnStopInput, OnThinking
 from app.usecases.chat import (
     chat,
     chat_output_from_message,
+    converse_legacy,
     fetch_conversation,
     propose_conversation_title,
     trace_to_root,
 )
 from app.vector_search import SearchResult
+from pydantic import BaseModel
 from tests.test_repositories.utils.bot_factory import (
     create_test_private_bot,
     create_test_public_bot,
@@ -182,6 +190,132 @@ class TestTraceToRoot(unittest.TestCase):
         self.assertEqual(messages[4].content[0].body, "user_3b")
 
 
+class _NoInput(BaseModel):
+    pass
+
+
+class TestConverseLegacyToolRuns(unittest.TestCase):
+    def setUp(self):
+        def sleep_tool(name: str, seconds: float) -> AgentTool:
+            def function(arg, bot, model):
+                time.sleep(seconds)
+                if name == "failing":
+                    raise RuntimeError("boom")
+                return name
+
+            return AgentTool(
+                name=name, description=name, args_schema=_NoInput, function=function
+            )
+
+        self.tools = {
+            name: sleep_tool(name, seconds)
+            for name, seconds in [
+                ("slow", 0.3),
+                ("medium", 0.15),
+                ("fast", 0.01),
+                ("failing", 0.05),
+            ]
+        }
+
+    def _message(self, contents: list, stop_reason: str) -> OnStopInput:
+        return OnStopInput(
+            message=MessageModel(
+                role="assistant",
+                content=contents,
+                model=MODEL,
+                children=[],
+                parent=None,
+                create_time=0,
+            ),
+            stop_reason=stop_reason,
+            input_token_count=0,
+            output_token_count=0,
+            cache_read_input_count=0,
+            cache_write_input_count=0,
+            price=0,
+        )
+
+    def _converse(self, tool_names: list[str]):
+        tool_use = self._message(
+            [
+                ToolUseContentModel(
+                    content_type="toolUse",
+                    body=ToolUseContentModelBody(
+                        tool_use_id=f"tool{i}", name=name, input={}
+                    ),
+                )
+                for i, name in enumerate(tool_names)
+            ],
+            "tool_use",
+        )
+        end_turn = self._message(
+            [TextContentModel(content_type="text", body="done")], "end_turn"
+        )
+
+        notified: list[tuple[str, int]] = []
+        messages = []
+        with (
+            patch("app.usecases.chat.get_tools", return_value=self.tools),
+            patch("app.usecases.chat.ConverseApiStreamHandler") as stream_handler,
+        ):
+            stream_handler.return_value.run.side_effect = [tool_use, end_turn]
+            converse_legacy(
+                bot=None,
+                chat_input=ChatInput(
+                    conversation_id="conversation1",
+                    message=MessageInput(
+                        role="user",
+                        content=[TextContent(content_type="text", body="Hello")],
+                        model=MODEL,
+                        parent_message_id=None,
+                        message_id=None,
+                    ),
+                ),
+                instructions=[],
+                generation_params=None,
+                guardrail=None,
+                display_citation=False,
+                messages=messages,
+                search_results=[],
+                on_tool_result=lambda result: notified.append(
+                    (result["tool_use_id"], threading.get_ident())
+                ),
+            )
+
+        tool_results = [
+            content.body
+            for content in messages[-1].content
+            if isinstance(content, ToolResultContentModel)
+        ]
+        return tool_results, notified
+
+    def test_results_in_tool_use_order(self):
+        started_at = time.monotonic()
+        tool_results, notified = self._converse(["slow", "medium", "fast"])
+        elapsed = time.monotonic() - started_at
+
+        self.assertEqual(
+            [result.tool_use_id for result in tool_results],
+            ["tool0", "tool1", "tool2"],
+        )
+        # Notified in the order of completion, on the calling thread
+        self.assertEqual(
+            notified,
+            [(f"tool{i}", threading.get_ident()) for i in [2, 1, 0]],
+        )
+        # Bounded by the slowest tool, not the sum of them
+        self.assertLess(elapsed, 0.45)
+
+    def test_failing_tool_does_not_drop_others(self):
+        tool_results, notified = self._converse(["slow", "failing", "fast"])
+
+        self.assertEqual(
+            [(result.tool_use_id, result.status) for result in tool_results],
+            [("tool0", "success"), ("tool1", "error"), ("tool2", "success")],
+        )
+        self.assertEqual(len(notified), 3)
+
+
 class TestStartChat(unittest.TestCase):
     user = create_test_user("user1")
 
@@ -0,0 +1,36 @@
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.append(".")
+
+from app import warmup
+from app.utils import get_bedrock_runtime_client
+
+
+class TestWarmUp(unittest.TestCase):
+    def test_warm_up_ignores_failures(self):
+        with (
+            patch.object(
+                warmup,
+                "_open_connections",
+                autospec=True,
+                side_effect=Exception("no network"),
+            ),
+            patch.object(
+                warmup, "_build_validators", autospec=True
+            ) as build_validators,
+        ):
+            warmup.warm_up()
+            build_validators.assert_called_once()
+
+    def test_after_restore_recreates_clients(self):
+        client = get_bedrock_runtime_client()
+        self.assertIs(get_bedrock_runtime_client(), client)
+
+        warmup.after_restore()
+        self.assertIsNot(get_bedrock_runtime_client(), client)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -320,6 +320,8 @@ export class BedrockChatStack extends cdk.Stack {
         "*",
       ],
       allowedHeaders: ["*"],
+      // ETags of the uploaded parts are required to complete multipart uploads.
+      exposedHeaders: ["ETag"],
       maxAge: 3000,
     });
 
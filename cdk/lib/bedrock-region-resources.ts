@@ -52,6 +52,10 @@ export class BedrockRegionResourcesStack extends Stack {
       prefix: ".temp/",
       expiration: Duration.days(1),
     });
+    // Discard the parts of multipart uploads abandoned by browsers.
+    this.documentBucket.addLifecycleRule({
+      abortIncompleteMultipartUploadAfter: Duration.days(1),
+    });
 
     new CfnOutput(this, "DocumentBucketName", {
       value: this.documentBucket.bucketName,
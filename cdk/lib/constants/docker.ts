@@ -3,6 +3,7 @@ export const excludeDockerImage = [
   ".venv",
   "test",
   "tests",
+  "benchmarks",
   "node_modules",
   "dist",
   "dev-dist",
@@ -5,7 +5,10 @@ import { HttpLambdaIntegration } from "aws-cdk-lib/aws-apigatewayv2-integrations
 import { HttpUserPoolAuthorizer } from "aws-cdk-lib/aws-apigatewayv2-authorizers";
 import {
   Architecture,
+  FunctionUrlAuthType,
+  HttpMethod as LambdaHttpMethod,
   IFunction,
+  InvokeMode,
   LayerVersion,
   Runtime,
   SnapStartConf,
@@ -25,7 +28,10 @@ import * as codebuild from "aws-cdk-lib/aws-codebuild";
 import * as sfn from "aws-cdk-lib/aws-stepfunctions";
 import { UsageAnalysis } from "./usage-analysis";
 import { excludeDockerImage } from "../constants/docker";
-import { PythonFunction } from "@aws-cdk/aws-lambda-python-alpha";
+import {
+  PythonFunction,
+  PythonFunctionProps,
+} from "@aws-cdk/aws-lambda-python-alpha";
 import { Database } from "./database";
 
 export interface ApiProps {
@@ -53,6 +59,7 @@ export interface ApiProps {
 export class Api extends Construct {
   readonly api: HttpApi;
   readonly handler: IFunction;
+  readonly streamUrl: string;
   constructor(scope: Construct, id: string, props: ApiProps) {
     super(scope, id);
 
@@ -234,9 +241,10 @@ export class Api extends Construct {
     );
     props.usageAnalysis?.resultOutputBucket.grantReadWrite(handlerRole);
     props.usageAnalysis?.ddbBucket.grantRead(handlerRole);
+    props.usageAnalysis?.rollupTable.grantReadData(handlerRole);
     props.largeMessageBucket.grantReadWrite(handlerRole);
 
-    const handler = new PythonFunction(this, "HandlerV2", {
+    const handlerProps: PythonFunctionProps = {
       entry: path.join(__dirname, "../../../backend"),
       index: "app/main.py",
       bundling: {
@@ -269,6 +277,8 @@ export class Api extends Construct {
           props.usageAnalysis?.ddbExportTable.tableName || "",
         USAGE_ANALYSIS_WORKGROUP: props.usageAnalysis?.workgroupName || "",
         USAGE_ANALYSIS_OUTPUT_LOCATION: usageAnalysisOutputLocation,
+        USAGE_ROLLUP_TABLE_NAME:
+          props.usageAnalysis?.rollupTable.tableName || "",
         ENABLE_BEDROCK_GLOBAL_INFERENCE:
           props.enableBedrockGlobalInference.toString(),
         ENABLE_BEDROCK_CROSS_REGION_INFERENCE:
@@ -297,13 +307,42 @@ export class Api extends Construct {
           }:753240598075:layer:LambdaAdapterLayerX86:23`
         ),
       ],
-    });
+    };
+    const handler = new PythonFunction(this, "HandlerV2", handlerProps);
     // https://github.com/awslabs/aws-lambda-web-adapter/tree/main/examples/fastapi-zip
     (handler.node.defaultChild as CfnResource).addPropertyOverride(
       "Handler",
       "run.sh"
     );
 
+    // API Gateway buffers the whole response, so `POST /conversation/stream` is served by
+    // the function URL of a handler running the web adapter in response streaming mode.
+    // The function URL is not behind the Cognito authorizer, so the handler runs `app.stream_main`,
+    // which serves only the stream route and verifies the Cognito token itself.
+    // Ref: https://github.com/awslabs/aws-lambda-web-adapter/tree/main/examples/fastapi-response-streaming-zip
+    const streamHandler = new PythonFunction(this, "StreamHandler", {
+      ...handlerProps,
+      environment: {
+        ...handlerProps.environment,
+        AWS_LWA_INVOKE_MODE: "response_stream",
+        APP_MODULE: "app.stream_main:app",
+      },
+    });
+    (streamHandler.node.defaultChild as CfnResource).addPropertyOverride(
+      "Handler",
+      "run.sh"
+    );
+    const streamFunctionUrl = streamHandler.addFunctionUrl({
+      authType: FunctionUrlAuthType.NONE,
+      invokeMode: InvokeMode.RESPONSE_STREAM,
+      cors: {
+        allowedOrigins: allowOrigins,
+        allowedHeaders: ["*"],
+        allowedMethods: [LambdaHttpMethod.POST],
+        maxAge: Duration.days(10),
+      },
+    });
+
     const api = new HttpApi(this, "Default", {
       description: `Main API for ${Stack.of(this).stackName}`,
       corsPreflight: {
@@ -350,7 +389,9 @@ export class Api extends Construct {
 
     this.api = api;
     this.handler = handler;
+    this.streamUrl = streamFunctionUrl.url;
 
     new CfnOutput(this, "BackendApiUrl", { value: api.apiEndpoint });
+    new CfnOutput(this, "BackendStreamUrl", { value: streamFunctionUrl.url });
   }
 }
@@ -18,6 +18,9 @@ import * as tasks from "aws-cdk-lib/aws-stepfunctions-tasks";
 import { Platform } from "aws-cdk-lib/aws-ecr-assets";
 import { Database } from "./database";
 
+// Max number of data sources synchronized in parallel by an execution
+const MAX_CONCURRENT_INGESTION_JOBS = 4;
+
 export interface EmbeddingProps {
   readonly database: Database;
   readonly bedrockRegion: string;
@@ -217,6 +220,9 @@ export class Embedding extends Construct {
         REGION: Stack.of(this).region,
         BEDROCK_REGION: props.bedrockRegion,
         DOCUMENT_BUCKET: props.documentBucket.bucketName,
+        // Content hashes of the ingested documents are stored in the bot table.
+        BOT_TABLE_NAME: props.database.botTable.tableName,
+        TABLE_ACCESS_ROLE_ARN: props.database.tableAccessRole.roleArn,
       },
       role: handlerRole,
       logRetention: logs.RetentionDays.THREE_MONTHS,
@@ -349,10 +355,11 @@ export class Embedding extends Construct {
       },
     });
 
+    // Data sources are locked individually, so that they are synchronized in parallel.
     const mapIngestionJobsForSharedKnowledgeBases = new sfn.Map(this, "MapIngestionJobsForSharedKnowledgeBases", {
       inputPath: "$.DataSources",
       resultPath: sfn.JsonPath.DISCARD,
-      maxConcurrency: 1,
+      maxConcurrency: MAX_CONCURRENT_INGESTION_JOBS,
     });
     // Perform entire synchronization into the data source of shared Knowledge Bases.
     const ingestionJobForSharedKnowledgeBases = this.createIngestionTask("Shared", {});
@@ -376,11 +383,25 @@ export class Embedding extends Construct {
     finalizeSharedKnowledgeBasesBuild.addCatch(syncSharedKnowledgeBasesFallback, {
       resultPath: "$.Error",
     });
-    mapIngestionJobsForSharedKnowledgeBases.addCatch(syncSharedKnowledgeBasesFallback, {
-      resultPath: "$.Error",
+
+    // The lock for shared Knowledge Bases has been released before the ingestion.
+    const updateSyncStatusFailedForSharedKnowledgeBasesIngestion = new tasks.LambdaInvoke(this, "UpdateSyncStatusFailedForSharedKnowledgeBasesIngestion", {
+      lambdaFunction: this._updateSyncStatusHandler,
+      payload: sfn.TaskInput.fromObject({
+        QueuedBots: sfn.JsonPath.objectAt("$.QueuedBots"),
+        SyncStatus: "FAILED",
+      }),
+      resultPath: sfn.JsonPath.DISCARD,
     });
+    mapIngestionJobsForSharedKnowledgeBases.addCatch(
+      updateSyncStatusFailedForSharedKnowledgeBasesIngestion.next(syncSharedKnowledgeBasesFailed),
+      {
+        resultPath: "$.Error",
+      }
+    );
 
-    // Release the acquired lock for shared Knowledge Bases.
+    // Release the acquired lock for shared Knowledge Bases once they are built.
+    // Ingestion into their data sources is serialized by the locks for each data source.
     const releaseLockForSharedKnowledgeBases = this.createReleaseLockTask("ForSharedKnowledgeBases", {
       name: "shared-knowledge-bases",
       lockId: sfn.JsonPath.stringAt("$.Lock.LockId"),
@@ -494,7 +515,7 @@ export class Embedding extends Construct {
     const mapIngestionJobsForCustomBot = new sfn.Map(this, "MapIngestionJobsForCustomBot", {
       inputPath: "$.DataSources",
       resultPath: sfn.JsonPath.DISCARD,
-      maxConcurrency: 1,
+      maxConcurrency: MAX_CONCURRENT_INGESTION_JOBS,
     });
     // Perform direct ingestion or entire synchronization into the data source of dedicated Knowledge Bases.
     const ingestionJobForCustomBot = this.createIngestionTask("CustomBot", {});
@@ -569,12 +590,12 @@ export class Embedding extends Construct {
                 .next(updateSyncStatusRunning)
                 .next(buildSharedKnowledgeBases)
                 .next(finalizeSharedKnowledgeBasesBuild)
+                .next(releaseLockForSharedKnowledgeBases)
                 .next(
                   mapIngestionJobsForSharedKnowledgeBases.itemProcessor(
                     ingestionJobForSharedKnowledgeBases
                   )
                 )
-                .next(releaseLockForSharedKnowledgeBases)
                 .next(mapQueuedBots)
             ))
             .otherwise(
@@ -703,48 +724,118 @@ export class Embedding extends Construct {
   }: {
     timeout?: Duration,
   }) {
-    // Perform direct ingestion or entire synchronization into the data source
+    // Queue the file diffs of the data source, which are merged with the ones queued by other executions.
+    const enqueueFilesDiffs = new tasks.LambdaInvoke(this, `EnqueueFilesDiffs${idSuffix}`, {
+      lambdaFunction: this._synchronizeDataSourceHandler,
+      payload: sfn.TaskInput.fromObject({
+        Action: "Enqueue",
+        KnowledgeBaseId: sfn.JsonPath.stringAt("$.KnowledgeBaseId"),
+        DataSourceId: sfn.JsonPath.stringAt("$.DataSourceId"),
+        FilesDiffs: sfn.JsonPath.objectAt("$.FilesDiffs"),
+      }),
+      resultSelector: {
+        EntryId: sfn.JsonPath.stringAt("$.Payload.EntryId"),
+      },
+      resultPath: "$.QueueEntry",
+    });
+
+    // Acquire a distributed lock for the data source, so that independent data sources are synchronized in parallel.
+    const lockName = sfn.JsonPath.format(
+      "data-source-{}-{}",
+      sfn.JsonPath.stringAt("$.KnowledgeBaseId"),
+      sfn.JsonPath.stringAt("$.DataSourceId"),
+    );
+    const acquireLockForDataSource = this.createAcquireLockTask(`ForDataSource${idSuffix}`, {
+      name: lockName,
+      // Unique per queue entry, as the same data source may be synchronized for multiple bots in an execution.
+      owner: sfn.JsonPath.stringAt("$.QueueEntry.EntryId"),
+      resultPath: "$.DataSourceLock",
+    });
+    const releaseLockForDataSource = this.createReleaseLockTask(`ForDataSource${idSuffix}`, {
+      name: lockName,
+      lockId: sfn.JsonPath.stringAt("$.DataSourceLock.LockId"),
+    });
+    const releaseLockForDataSourceOnFailed = this.createReleaseLockTask(`ForDataSourceOnFailed${idSuffix}`, {
+      name: lockName,
+      lockId: sfn.JsonPath.stringAt("$.DataSourceLock.LockId"),
+    });
+    const ingestionFailed = new sfn.Fail(this, `IngestionFailed${idSuffix}`, {
+      cause: "Data source ingestion failed",
+    });
+
+    // Perform direct ingestion of the queued file diffs or entire synchronization into the data source
     const startIngestionJob = new tasks.LambdaInvoke(this, `StartIngestionJob${idSuffix}`, {
       lambdaFunction: this._synchronizeDataSourceHandler,
       payload: sfn.TaskInput.fromObject({
         Action: "Ingest",
         KnowledgeBaseId: sfn.JsonPath.stringAt("$.KnowledgeBaseId"),
         DataSourceId: sfn.JsonPath.stringAt("$.DataSourceId"),
-        FilesDiffs: sfn.JsonPath.objectAt("$.FilesDiffs"),
       }),
       resultSelector: {
         KnowledgeBaseId: sfn.JsonPath.stringAt("$.Payload.KnowledgeBaseId"),
         DataSourceId: sfn.JsonPath.stringAt("$.Payload.DataSourceId"),
         DocumentsDiff: sfn.JsonPath.objectAt("$.Payload.DocumentsDiff"),
         IngestionJobId: sfn.JsonPath.stringAt("$.Payload.IngestionJobId"),
+        Completed: sfn.JsonPath.objectAt("$.Payload.Completed"),
+        CheckCount: sfn.JsonPath.numberAt("$.Payload.CheckCount"),
+        PendingBytes: sfn.JsonPath.numberAt("$.Payload.PendingBytes"),
+        WaitSeconds: sfn.JsonPath.numberAt("$.Payload.WaitSeconds"),
+        WaitedSeconds: sfn.JsonPath.numberAt("$.Payload.WaitedSeconds"),
       },
       resultPath: "$.IngestionJob",
     });
 
     // Check for the completion of direct ingestion or entire synchronization.
+    // The result only keeps the documents still in progress, so that the next check only looks them up.
     const checkIngestionJob = new tasks.LambdaInvoke(this, `CheckIngestionJob${idSuffix}`, {
       lambdaFunction: this._synchronizeDataSourceHandler,
       payload: sfn.TaskInput.fromObject({
         Action: "Check",
         IngestionJob: sfn.JsonPath.objectAt("$.IngestionJob"),
+        TimeoutSeconds: timeout.toSeconds(),
       }),
-      resultPath: sfn.JsonPath.DISCARD,
+      resultSelector: {
+        KnowledgeBaseId: sfn.JsonPath.stringAt("$.Payload.KnowledgeBaseId"),
+        DataSourceId: sfn.JsonPath.stringAt("$.Payload.DataSourceId"),
+        DocumentsDiff: sfn.JsonPath.objectAt("$.Payload.DocumentsDiff"),
+        IngestionJobId: sfn.JsonPath.stringAt("$.Payload.IngestionJobId"),
+        Completed: sfn.JsonPath.objectAt("$.Payload.Completed"),
+        CheckCount: sfn.JsonPath.numberAt("$.Payload.CheckCount"),
+        PendingBytes: sfn.JsonPath.numberAt("$.Payload.PendingBytes"),
+        WaitSeconds: sfn.JsonPath.numberAt("$.Payload.WaitSeconds"),
+        WaitedSeconds: sfn.JsonPath.numberAt("$.Payload.WaitedSeconds"),
+      },
+      resultPath: "$.IngestionJob",
+    });
+    // The interval is estimated from the size of the pending documents, and grows with each check.
+    const waitIngestionJob = new sfn.Wait(this, `WaitIngestionJob${idSuffix}`, {
+      time: sfn.WaitTime.secondsPath("$.IngestionJob.WaitSeconds"),
     });
+    const checkIngestionJobCompleted = new sfn.Choice(this, `CheckIngestionJobCompleted${idSuffix}`);
 
     const ingestionComplete = new sfn.Pass(this, `IngestionComplete${idSuffix}`);
-    return startIngestionJob
+    const ingestionFinished = releaseLockForDataSource.next(ingestionComplete);
+    return enqueueFilesDiffs
+      .next(acquireLockForDataSource)
       .next(
-        checkIngestionJob.addRetry({
-          interval: Duration.seconds(15),
-          maxAttempts: timeout.toSeconds() / 15,
-          backoffRate: 1,
-          errors: [
-            'RetryException',
-          ],
-        }).addCatch(ingestionComplete, {
+        startIngestionJob.addCatch(releaseLockForDataSourceOnFailed.next(ingestionFailed), {
           resultPath: sfn.JsonPath.stringAt('$.Error'),
         })
-      ).next(ingestionComplete)
+      )
+      .next(
+        // Skip checking if there is nothing to be indexed.
+        checkIngestionJobCompleted
+          .when(sfn.Condition.booleanEquals("$.IngestionJob.Completed", true), ingestionFinished)
+          .otherwise(
+            waitIngestionJob
+              .next(
+                checkIngestionJob.addCatch(ingestionFinished, {
+                  resultPath: sfn.JsonPath.stringAt('$.Error'),
+                })
+              )
+              .next(checkIngestionJobCompleted)
+          )
+      )
   }
 
   private createAcquireLockTask(idSuffix: string, {
@@ -1,7 +1,8 @@
 import { Construct } from "constructs";
 import * as s3 from "aws-cdk-lib/aws-s3";
 import * as athena from "aws-cdk-lib/aws-athena";
-import { CfnOutput, RemovalPolicy, Stack } from "aws-cdk-lib";
+import { CfnOutput, Duration, RemovalPolicy, Stack } from "aws-cdk-lib";
+import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
 import * as glue from "@aws-cdk/aws-glue-alpha";
 import * as events from "aws-cdk-lib/aws-events";
 import * as targets from "aws-cdk-lib/aws-events-targets";
@@ -23,6 +24,7 @@ export class UsageAnalysis extends Construct {
   public readonly database: glue.IDatabase;
   public readonly ddbExportTable: glue.ITable;
   public readonly ddbBucket: s3.IBucket;
+  public readonly rollupTable: dynamodb.ITable;
   public readonly resultOutputBucket: s3.IBucket;
   public readonly workgroupName: string;
   public readonly workgroupArn: string;
@@ -238,13 +240,30 @@ export class UsageAnalysis extends Construct {
         `s3://${ddbBucket.bucketName}/` + "${datehour}/AWSDynamoDB/data/",
     });
 
+    // Hourly cost rollups per bot and per user, produced by the export handler.
+    // PK: `BOT#YYYY/MM/DD` or `USER#YYYY/MM/DD`, SK: `HH#<id>`
+    const rollupTable = new dynamodb.Table(this, "UsageRollupTable", {
+      partitionKey: { name: "PK", type: dynamodb.AttributeType.STRING },
+      sortKey: { name: "SK", type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      removalPolicy: RemovalPolicy.DESTROY,
+      encryption: dynamodb.TableEncryption.AWS_MANAGED,
+      timeToLiveAttribute: "ExpireTime",
+    });
+
     const exportHandler = new python.PythonFunction(this, "ExportHandler", {
       entry: path.join(__dirname, "../../../backend/s3_exporter/"),
       runtime: Runtime.PYTHON_3_13,
       environment: {
         BUCKET_NAME: ddbBucket.bucketName,
         TABLE_ARN: props.sourceDatabase.conversationTable.tableArn,
+        USAGE_ANALYSIS_DATABASE: database.databaseName,
+        USAGE_ANALYSIS_TABLE: ddbExportTable.tableName,
+        USAGE_ANALYSIS_WORKGROUP: wg.name,
+        USAGE_ROLLUP_TABLE_NAME: rollupTable.tableName,
       },
+      // Rolling up runs Athena queries
+      timeout: Duration.minutes(5),
       logRetention: logs.RetentionDays.THREE_MONTHS,
     });
     exportHandler.role?.addToPrincipalPolicy(
@@ -253,7 +272,38 @@ export class UsageAnalysis extends Construct {
         resources: [props.sourceDatabase.conversationTable.tableArn],
       })
     );
+    exportHandler.role?.addToPrincipalPolicy(
+      new iam.PolicyStatement({
+        actions: [
+          "athena:StartQueryExecution",
+          "athena:GetQueryExecution",
+          "athena:GetQueryResults",
+        ],
+        resources: [
+          `arn:aws:athena:${Stack.of(this).region}:${
+            Stack.of(this).account
+          }:workgroup/${wg.name}`,
+        ],
+      })
+    );
+    exportHandler.role?.addToPrincipalPolicy(
+      new iam.PolicyStatement({
+        actions: [
+          "glue:GetDatabase",
+          "glue:GetTable",
+          "glue:GetPartition",
+          "glue:GetPartitions",
+        ],
+        resources: [
+          database.databaseArn,
+          database.catalogArn,
+          ddbExportTable.tableArn,
+        ],
+      })
+    );
     ddbBucket.grantReadWrite(exportHandler);
+    queryResultBucket.grantReadWrite(exportHandler);
+    rollupTable.grantWriteData(exportHandler);
 
     new events.Rule(this, "ScheduleRule", {
       schedule: events.Schedule.cron({ minute: "5" }),
@@ -269,6 +319,7 @@ export class UsageAnalysis extends Construct {
 
     this.database = database;
     this.ddbBucket = ddbBucket;
+    this.rollupTable = rollupTable;
     this.ddbExportTable = ddbExportTable;
     this.workgroupName = wg.name;
     this.resultOutputBucket = queryResultBucket;
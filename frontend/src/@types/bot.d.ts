@@ -215,3 +215,23 @@ export type GetPublicBotResponse = BotDetails;
 export type GetPresignedUrlResponse = {
   url: string;
 };
+
+export type StartMultipartUploadRequest = {
+  filename: string;
+  contentType: string;
+  partCount: number;
+};
+
+export type StartMultipartUploadResponse = {
+  uploadId: string;
+  partUrls: string[];
+};
+
+export type CompleteMultipartUploadRequest = {
+  filename: string;
+  uploadId: string;
+  parts: {
+    partNumber: number;
+    etag: string;
+  }[];
+};
@@ -63,6 +63,7 @@ export const PostStreamingStatus = {
   STREAMING_END: 'STREAMING_END',
   AGENT_THINKING: 'AGENT_THINKING',
   AGENT_TOOL_RESULT: 'AGENT_TOOL_RESULT',
+  AGENT_TOOL_PROGRESS: 'AGENT_TOOL_PROGRESS',
   AGENT_RELATED_DOCUMENT: 'AGENT_RELATED_DOCUMENT',
   REASONING: 'REASONING',
   ERROR: 'ERROR',
@@ -81,6 +82,16 @@ export const GUARDRAILS_CONTEXTUAL_GROUNDING_THRESHOLD = {
   STEP: 0.1,
 };
 
+export const MULTIPART_UPLOAD = {
+  // Files larger than this are uploaded in parts, which are uploaded in parallel and retried individually.
+  THRESHOLD: 100 * 1024 * 1024,
+  PART_SIZE: 16 * 1024 * 1024,
+  // Limit of S3
+  MAX_PARTS: 10000,
+  CONCURRENCY: 4,
+  MAX_ATTEMPTS: 3,
+};
+
 export const AVAILABLE_MODEL_KEYS = [
   'claude-v4-opus',
   'claude-v4.1-opus',
@@ -5,6 +5,12 @@ export const DEFAULT_FIRECRAWL_CONFIG: FirecrawlConfig = {
   maxResults: 5,
 };
 
+// Seconds which tools and retrieval may take in a response
+export const EDGE_TURN_TIME_BUDGET = {
+  MIN: 10,
+  MAX: 840,
+};
+
 export const EDGE_FIRECRAWL_CONFIG = {
   maxResults: {
     MIN: 1,
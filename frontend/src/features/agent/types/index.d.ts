@@ -5,6 +5,7 @@ import {
 
 export type AgentInput = {
   tools: AgentTool[];
+  turnTimeBudget?: number | null;
 };
 
 export type FirecrawlConfig = {
@@ -45,6 +46,7 @@ export type AgentTool = InternetAgentTool | PlainAgentTool | BedrockAgentTool;
 
 export type Agent = {
   tools: AgentTool[];
+  turnTimeBudget?: number | null;
 };
 
 export type AgentToolsProps = {
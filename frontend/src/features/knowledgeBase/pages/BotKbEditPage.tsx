@@ -38,6 +38,7 @@ import {
   isBedrockAgentTool,
 } from '../../../features/agent/utils/typeGuards';
 import { AvailableTools } from '../../../features/agent/components/AvailableTools';
+import { EDGE_TURN_TIME_BUDGET } from '../../../features/agent/constants';
 import {
   DEFAULT_FIXED_CHUNK_PARAMS,
   DEFAULT_HIERARCHICAL_CHUNK_PARAMS,
@@ -112,6 +113,7 @@ const BotKbEditPage: React.FC = () => {
   );
   const [promptCachingEnabled, setPromptCachingEnabled] = useState<boolean>(false);
   const [tools, setTools] = useState<AgentTool[]>([]);
+  const [turnTimeBudget, setTurnTimeBudget] = useState<string>('');
   const [conversationQuickStarters, setConversationQuickStarters] = useState<
     ConversationQuickStarter[]
   >([
@@ -505,6 +507,7 @@ const BotKbEditPage: React.FC = () => {
       getMyBot(botId)
         .then((bot) => {
           setTools(bot.agent.tools);
+          setTurnTimeBudget(bot.agent.turnTimeBudget?.toString() ?? '');
           setTitle(bot.title);
           setDescription(bot.description);
           setInstruction(bot.instruction);
@@ -1010,6 +1013,27 @@ const BotKbEditPage: React.FC = () => {
       return false;
     }
 
+    if (turnTimeBudget) {
+      const seconds = Number(turnTimeBudget);
+      if (!Number.isInteger(seconds) || seconds < EDGE_TURN_TIME_BUDGET.MIN) {
+        setErrorMessages(
+          'turnTimeBudget',
+          t('validation.minRange.message', {
+            size: EDGE_TURN_TIME_BUDGET.MIN,
+          })
+        );
+        return false;
+      } else if (seconds > EDGE_TURN_TIME_BUDGET.MAX) {
+        setErrorMessages(
+          'turnTimeBudget',
+          t('validation.maxRange.message', {
+            size: EDGE_TURN_TIME_BUDGET.MAX,
+          })
+        );
+        return false;
+      }
+    }
+
     // Chunking Strategy params validation
     if (chunkingStrategy === 'fixed_size') {
       if (fixedSizeParams.maxTokens < EDGE_FIXED_CHUNK_PARAMS.maxTokens.MIN) {
@@ -1250,6 +1274,7 @@ const BotKbEditPage: React.FC = () => {
     searchParams.maxResults,
     conversationQuickStarters,
     isToolValid,
+    turnTimeBudget,
     isValidGenerationConfigParam,
     budgetTokens,
     isValidBudgetTokens,
@@ -1274,6 +1299,7 @@ const BotKbEditPage: React.FC = () => {
     registerBot({
       agent: {
         tools,
+        turnTimeBudget: turnTimeBudget ? Number(turnTimeBudget) : null,
       },
       id: botId,
       title,
@@ -1350,6 +1376,7 @@ const BotKbEditPage: React.FC = () => {
     isValid,
     registerBot,
     tools,
+    turnTimeBudget,
     botId,
     title,
     description,
@@ -1399,6 +1426,7 @@ const BotKbEditPage: React.FC = () => {
       updateBot(botId, {
         agent: {
           tools,
+          turnTimeBudget: turnTimeBudget ? Number(turnTimeBudget) : null,
         },
         title,
         description,
@@ -1479,6 +1507,7 @@ const BotKbEditPage: React.FC = () => {
     updateBot,
     botId,
     tools,
+    turnTimeBudget,
     title,
     description,
     instruction,
@@ -1585,6 +1614,18 @@ const BotKbEditPage: React.FC = () => {
                 setTools={setTools}
               />
 
+              <InputText
+                className="mt-3"
+                label={t('agent.turnTimeBudget.label')}
+                type="number"
+                disabled={isLoading}
+                value={turnTimeBudget}
+                placeholder={`${EDGE_TURN_TIME_BUDGET.MIN} - ${EDGE_TURN_TIME_BUDGET.MAX}`}
+                hint={t('agent.turnTimeBudget.hint')}
+                errorMessage={errorMessages['turnTimeBudget']}
+                onChange={setTurnTimeBudget}
+              />
+
               <div className="mt-3">
                 <div className="flex items-center gap-1">
                   <div className="text-lg font-bold">
@@ -1,10 +1,86 @@
 import { RegisterBotRequest, UpdateBotRequest } from '../@types/bot';
 import useBotApi from './useBotApi';
 import { produce } from 'immer';
+import { MULTIPART_UPLOAD } from '../constants';
 
 const useBot = (shouldAutoRefreshMyBots?: boolean) => {
   const api = useBotApi();
 
+  const uploadFileInParts = async (
+    botId: string,
+    file: File,
+    onProgress?: (progress: number) => void
+  ) => {
+    const partSize = Math.max(
+      MULTIPART_UPLOAD.PART_SIZE,
+      Math.ceil(file.size / MULTIPART_UPLOAD.MAX_PARTS)
+    );
+    const partCount = Math.ceil(file.size / partSize);
+    const {
+      data: { uploadId, partUrls },
+    } = await api.startMultipartUpload(botId, {
+      filename: file.name,
+      contentType: file.type,
+      partCount,
+    });
+
+    const loaded = new Array<number>(partCount).fill(0);
+    const etags = new Array<string>(partCount);
+    const uploadPart = async (index: number) => {
+      const part = file.slice(index * partSize, (index + 1) * partSize);
+      for (let attempt = 1; ; attempt++) {
+        try {
+          const response = await api.uploadPart(
+            partUrls[index],
+            part,
+            (partLoaded) => {
+              loaded[index] = partLoaded;
+              onProgress?.(
+                Math.floor(
+                  (loaded.reduce((sum, l) => sum + l, 0) / file.size) * 100
+                )
+              );
+            }
+          );
+          etags[index] = response.headers['etag'];
+          return;
+        } catch (e) {
+          // Retry only the failed part
+          loaded[index] = 0;
+          if (attempt >= MULTIPART_UPLOAD.MAX_ATTEMPTS) {
+            throw e;
+          }
+        }
+      }
+    };
+
+    try {
+      let nextIndex = 0;
+      await Promise.all(
+        Array.from(
+          { length: Math.min(MULTIPART_UPLOAD.CONCURRENCY, partCount) },
+          async () => {
+            while (nextIndex < partCount) {
+              await uploadPart(nextIndex++);
+            }
+          }
+        )
+      );
+      return await api.completeMultipartUpload(botId, {
+        filename: file.name,
+        uploadId,
+        parts: etags.map((etag, index) => ({
+          partNumber: index + 1,
+          etag,
+        })),
+      });
+    } catch (e) {
+      // Discard the uploaded parts. Parts of abandoned uploads are also discarded by the lifecycle rule.
+      api.abortMultipartUpload(botId, file.name, uploadId).catch(() => {});
+      throw e;
+    }
+  };
+
   const {
     data: myBots,
     mutate: mutateMyBots,
@@ -225,6 +301,9 @@ const useBot = (shouldAutoRefreshMyBots?: boolean) => {
       file: File,
       onProgress?: (progress: number) => void
     ) => {
+      if (file.size > MULTIPART_UPLOAD.THRESHOLD) {
+        return uploadFileInParts(botId, file, onProgress);
+      }
       return api.getPresignedUrl(botId, file).then(({ data }) => {
         data.url;
         return api.uploadFile(data.url, file, onProgress);
@@ -14,6 +14,9 @@ import {
   GetPinnedBotResponse,
   UpdateBotSharedScopeRequest,
   UpdateBotSharedScopeResponse,
+  StartMultipartUploadRequest,
+  StartMultipartUploadResponse,
+  CompleteMultipartUploadRequest,
 } from '../@types/bot';
 import useHttp from './useHttp';
 
@@ -107,6 +110,46 @@ const useBotApi = () => {
         },
       });
     },
+    startMultipartUpload: (
+      botId: string,
+      params: StartMultipartUploadRequest
+    ) => {
+      return http.post<
+        StartMultipartUploadResponse,
+        StartMultipartUploadRequest
+      >(`bot/${botId}/multipart-upload`, params);
+    },
+    uploadPart: (
+      presignedUrl: string,
+      part: Blob,
+      onProgress?: (loaded: number) => void
+    ) => {
+      // presignedURL contains credential.
+      return axios.put(presignedUrl, part, {
+        onUploadProgress: (e) => {
+          onProgress ? onProgress(e.loaded) : null;
+        },
+      });
+    },
+    completeMultipartUpload: (
+      botId: string,
+      params: CompleteMultipartUploadRequest
+    ) => {
+      return http.post<void, CompleteMultipartUploadRequest>(
+        `bot/${botId}/multipart-upload/complete`,
+        params
+      );
+    },
+    abortMultipartUpload: (
+      botId: string,
+      filename: string,
+      uploadId: string
+    ) => {
+      return http.delete(`bot/${botId}/multipart-upload`, {
+        filename,
+        uploadId,
+      });
+    },
     deleteUploadedFile: (botId: string, filename: string) => {
       return http.delete(`bot/${botId}/uploaded-file`, {
         filename,
@@ -114,6 +114,13 @@ const usePostMessageStreaming = create<{
                     status: data.result.status,
                   });
                   break;
+                case PostStreamingStatus.AGENT_TOOL_PROGRESS:
+                  handleStreamingEvent({
+                    type: 'tool-progress',
+                    toolUseId: data.result.toolUseId,
+                    content: data.result.content,
+                  });
+                  break;
                 case PostStreamingStatus.AGENT_RELATED_DOCUMENT:
                   handleStreamingEvent({
                     type: 'related-document',
@@ -108,6 +108,13 @@ const usePublishedWebSocket = create<{
                     status: data.result.status,
                   });
                   break;
+                case PostStreamingStatus.AGENT_TOOL_PROGRESS:
+                  handleStreamingEvent({
+                    type: 'tool-progress',
+                    toolUseId: data.result.toolUseId,
+                    content: data.result.content,
+                  });
+                  break;
                 case PostStreamingStatus.REASONING:
                   handleStreamingEvent({
                     type: 'reasoning',
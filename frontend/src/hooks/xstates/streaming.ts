@@ -2,7 +2,10 @@ import { createMachine, assign } from 'xstate';
 import { produce } from 'immer';
 
 import { AgentToolsProps, AgentToolState } from '../../features/agent/types';
-import { RelatedDocument } from '../../@types/conversation';
+import {
+  AgentToolResultContent,
+  RelatedDocument,
+} from '../../@types/conversation';
 
 export const StreamingState = {
   SLEEPING: 'sleeping',
@@ -42,6 +45,11 @@ export type StreamingEvent =
       toolUseId: string;
       status: AgentToolState;
     }
+  | {
+      type: 'tool-progress';
+      toolUseId: string;
+      content: AgentToolResultContent;
+    }
   | {
       type: 'related-document';
       toolUseId: string;
@@ -138,6 +146,25 @@ export const streamingStateMachine = createMachine<StreamingContext, StreamingEv
             },
           }),
         },
+        'tool-progress': {
+          actions: assign({
+            tools: (context, event) => {
+              return produce(context.tools, (draft: AgentToolsProps[]) => {
+                if (event.type === 'tool-progress') {
+                  const tool = draft.find(tool => event.toolUseId in tool.tools);
+                  if (tool != null) {
+                    const toolUse = tool.tools[event.toolUseId];
+                    if (toolUse.resultContents == null) {
+                      toolUse.resultContents = [event.content];
+                    } else {
+                      toolUse.resultContents.push(event.content);
+                    }
+                  }
+                }
+              });
+            },
+          }),
+        },
         'related-document': {
           actions: assign((context, event) => {
             return produce(context, (draft: StreamingContext) => {
@@ -161,6 +161,10 @@ const translation = {
       progress: {
         label: 'Thinking...',
       },
+      turnTimeBudget: {
+        label: 'Time Limit for Tools (seconds)',
+        hint: 'Tools and knowledge retrieval still running when the time limit of a response is reached are stopped, and the answer is based on the results so far. If empty, the default time limit is used.',
+      },
       progressCard: {
         toolInput: 'Input: ',
         toolOutput: 'Output: ',
@@ -162,6 +162,10 @@ const translation: typeof en = {
       progress: {
         label: '思考中...',
       },
+      turnTimeBudget: {
+        label: 'ツールの制限時間（秒）',
+        hint: '回答の制限時間に達した時点で実行中のツールやナレッジ検索は中断され、それまでの結果をもとに回答します。空欄の場合はデフォルトの制限時間が使われます。',
+      },
       progressCard: {
         toolInput: '入力: ',
         toolOutput: '出力: ',